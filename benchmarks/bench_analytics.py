@@ -0,0 +1,148 @@
+#!/usr/bin/env python3
+"""
+Benchmark the NumPy analytics engine against pure Python.
+
+For a sample of product/retailer pairs, loads the full history and computes
+window stats, rolling mean/median/std, percentiles and max drawdown, first
+with lists and the statistics module (the style used by the dashboard
+before), then with src.analytics. Results are cross-checked.
+
+Usage:
+    python benchmarks/bench_analytics.py                     # 1k products x 5 retailers x 2 years
+    python benchmarks/bench_analytics.py --pairs 50 --window 30
+    python benchmarks/bench_analytics.py --db /tmp/bench.db  # reuse a generated database
+"""
+import argparse
+import math
+import random
+import statistics
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).parent.parent
+sys.path.insert(0, str(ROOT))
+
+from src.analytics import load_price_arrays
+from src.database import PriceDatabase, window_start
+from synthetic import RETAILERS, generate_database
+
+
+def python_analytics(db: PriceDatabase, product_id: str, retailer_id: str, window: int) -> dict:
+    """Everything computed from per-row Python values."""
+    cursor = db.conn.cursor()
+    cursor.execute("""
+        SELECT price, ts_epoch FROM price_history
+        WHERE product_id = ? AND retailer_id = ?
+        ORDER BY ts_epoch, timestamp
+    """, (product_id, retailer_id))
+    rows = cursor.fetchall()
+    prices = [row['price'] for row in rows]
+
+    cutoff = window_start(30)
+    recent = [row['price'] for row in rows if row['ts_epoch'] >= cutoff]
+
+    runs = [prices[i - window + 1:i + 1] for i in range(window - 1, len(prices))]
+    rolling_mean = [sum(run) / window for run in runs]
+    rolling_median = [statistics.median(run) for run in runs]
+    rolling_std = [statistics.pstdev(run) for run in runs]
+
+    ordered = sorted(prices)
+    percentiles = {q: _percentile(ordered, q) for q in (5, 25, 50, 75, 95)}
+
+    high = -math.inf
+    max_drawdown = 0.0
+    for price in prices:
+        high = max(high, price)
+        max_drawdown = max(max_drawdown, 1 - price / high)
+
+    return {
+        'avg': sum(recent) / len(recent) if recent else None,
+        'rolling_mean': rolling_mean[-1] if rolling_mean else None,
+        'rolling_median': rolling_median[-1] if rolling_median else None,
+        'rolling_std': rolling_std[-1] if rolling_std else None,
+        'percentiles': percentiles,
+        'max_drawdown': max_drawdown,
+    }
+
+
+def _percentile(ordered, q):
+    # Linear interpolation, as numpy.percentile's default
+    position = (len(ordered) - 1) * q / 100
+    lower = math.floor(position)
+    upper = min(lower + 1, len(ordered) - 1)
+    return ordered[lower] + (ordered[upper] - ordered[lower]) * (position - lower)
+
+
+def numpy_analytics(db: PriceDatabase, product_id: str, retailer_id: str, window: int) -> dict:
+    """The same results from src.analytics."""
+    arrays = load_price_arrays(db.conn, product_id, retailer_id)
+    stats = arrays.stats(30)
+    return {
+        'avg': stats.avg_price if stats else None,
+        'rolling_mean': arrays.rolling_mean(window)[-1] if len(arrays) >= window else None,
+        'rolling_median': arrays.rolling_median(window)[-1] if len(arrays) >= window else None,
+        'rolling_std': arrays.rolling_std(window)[-1] if len(arrays) >= window else None,
+        'percentiles': arrays.percentiles((5, 25, 50, 75, 95)),
+        'max_drawdown': arrays.max_drawdown(),
+    }
+
+
+def time_pairs(db, pairs, compute, window: int, repeat: int):
+    """Best-of-N wall time over all pairs, plus the last run's results."""
+    best = float('inf')
+    results = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        results = [compute(db, p, r, window) for p, r in pairs]
+        best = min(best, time.perf_counter() - started)
+    return best, results
+
+
+def _close(a, b) -> bool:
+    if isinstance(a, dict):
+        return all(_close(a[k], b[k]) for k in a)
+    if a is None or b is None:
+        return a is b
+    return math.isclose(a, b, rel_tol=1e-9, abs_tol=1e-9)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--products', type=int, default=1000)
+    parser.add_argument('--days', type=int, default=730)
+    parser.add_argument('--db', default='data/bench_dashboard.db',
+                        help="Database to use; generated if it doesn't exist")
+    parser.add_argument('--pairs', type=int, default=200,
+                        help="Product/retailer pairs sampled")
+    parser.add_argument('--window', type=int, default=7, help="Rolling window (observations)")
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    if not Path(args.db).exists():
+        print(f"Generating {args.products} products x {len(RETAILERS)} retailers x {args.days} days...")
+        started = time.perf_counter()
+        generate_database(args.db, args.products, args.days)
+        print(f"  done in {time.perf_counter() - started:.1f}s")
+
+    db = PriceDatabase(args.db)
+    rows = db.conn.execute("SELECT COUNT(*) FROM price_history").fetchone()[0]
+    all_pairs = [tuple(r) for r in db.conn.execute(
+        "SELECT product_id, retailer_id FROM price_stats_summary")]
+    pairs = random.Random(1).sample(all_pairs, min(args.pairs, len(all_pairs)))
+    print(f"Database: {args.db} ({rows:,} price rows, {len(pairs)} pairs sampled)\n")
+
+    python_time, python_results = time_pairs(db, pairs, python_analytics, args.window, args.repeat)
+    numpy_time, numpy_results = time_pairs(db, pairs, numpy_analytics, args.window, args.repeat)
+    db.close()
+
+    mismatches = sum(1 for a, b in zip(python_results, numpy_results) if not _close(a, b))
+
+    print(f"{'pure Python':<16} {python_time:8.2f}s")
+    print(f"{'NumPy':<16} {numpy_time:8.2f}s")
+    print(f"{'speedup':<16} {python_time / numpy_time:8.2f}x")
+    print(f"{'mismatches':<16} {mismatches:8d}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+"""
+Benchmark the /api/dashboard-data payload builder.
+
+Builds (or reuses) a synthetic database and times the set-based
+build_dashboard_payload() against the previous per-product implementation.
+
+Usage:
+    python benchmarks/bench_dashboard.py                      # 1k products x 5 retailers x 2 years
+    python benchmarks/bench_dashboard.py --products 100 --days 90
+    python benchmarks/bench_dashboard.py --db /tmp/bench.db   # reuse a generated database
+"""
+import argparse
+import sqlite3
+import sys
+import time
+from collections import defaultdict
+from pathlib import Path
+
+ROOT = Path(__file__).parent.parent
+sys.path.insert(0, str(ROOT))
+sys.path.insert(0, str(ROOT / 'dashboard'))
+
+from api import build_dashboard_payload
+from synthetic import RETAILERS, generate_database
+
+def legacy_dashboard_payload(conn):
+    """The original implementation: one history query per product, stats in Python."""
+    cursor = conn.cursor()
+    cursor.execute('SELECT * FROM products')
+    products = cursor.fetchall()
+    if not products:
+        return {'brands': []}
+
+    brands_data = defaultdict(lambda: {'name': '', 'products': [], 'bestRetailer': ''})
+    for product in products:
+        product_id = product['id']
+        product_name = product['name']
+        brand_name = product['brand'] if product['brand'] else product_name.split()[0]
+
+        cursor.execute('''
+            SELECT retailer_id, price, timestamp
+            FROM price_history
+            WHERE product_id = ?
+            ORDER BY timestamp ASC
+        ''', (product_id,))
+        price_history = cursor.fetchall()
+        if not price_history:
+            continue
+
+        retailer_prices = defaultdict(list)
+        for record in price_history:
+            retailer_prices[record['retailer_id']].append({
+                'price': record['price'],
+                'date': record['timestamp']
+            })
+
+        retailers_stats = []
+        chart_data = []
+        for retailer_id, prices in retailer_prices.items():
+            price_values = [p['price'] for p in prices]
+            high_price = max(price_values)
+            low_price = min(price_values)
+            avg_price = sum(price_values) / len(price_values)
+            high_date = next(p['date'] for p in prices if p['price'] == high_price)
+            low_date = next(p['date'] for p in prices if p['price'] == low_price)
+            url_column = f'{retailer_id}_url'
+            retailer_url = product[url_column] if url_column in product.keys() else '#'
+            retailers_stats.append({
+                'name': retailer_id, 'high': high_price, 'highDate': high_date,
+                'low': low_price, 'lowDate': low_date, 'avg': avg_price,
+                'url': retailer_url or '#'
+            })
+            chart_data.append({
+                'retailer': retailer_id,
+                'prices': [{'date': p['date'], 'price': p['price']} for p in prices]
+            })
+
+        best_retailer = min(retailers_stats, key=lambda x: x['avg'])
+        brands_data[brand_name]['name'] = brand_name
+        brands_data[brand_name]['products'].append({
+            'id': product_id, 'name': product_name, 'brand': brand_name,
+            'size': product['size'] if product['size'] else '',
+            'bestAvgPrice': best_retailer['avg'],
+            'bestRetailer': best_retailer['name'].capitalize(),
+            'retailers': sorted(retailers_stats, key=lambda x: x['avg']),
+            'chartData': chart_data
+        })
+        if not brands_data[brand_name]['bestRetailer']:
+            brands_data[brand_name]['bestRetailer'] = best_retailer['name'].capitalize()
+
+    return {'brands': list(brands_data.values())}
+
+
+def time_builder(db_path: str, builder, repeat: int) -> float:
+    """Best-of-N wall time for building the payload on a fresh connection."""
+    best = float('inf')
+    for _ in range(repeat):
+        conn = sqlite3.connect(db_path)
+        conn.row_factory = sqlite3.Row
+        started = time.perf_counter()
+        builder(conn)
+        best = min(best, time.perf_counter() - started)
+        conn.close()
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--products', type=int, default=1000)
+    parser.add_argument('--days', type=int, default=730)
+    parser.add_argument('--db', default='data/bench_dashboard.db',
+                        help="Database to use; generated if it doesn't exist")
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    if not Path(args.db).exists():
+        print(f"Generating {args.products} products x {len(RETAILERS)} retailers x {args.days} days...")
+        started = time.perf_counter()
+        generate_database(args.db, args.products, args.days)
+        print(f"  done in {time.perf_counter() - started:.1f}s")
+
+    conn = sqlite3.connect(args.db)
+    rows = conn.execute("SELECT COUNT(*) FROM price_history").fetchone()[0]
+    conn.close()
+    print(f"Database: {args.db} ({rows:,} price rows)\n")
+
+    legacy = time_builder(args.db, legacy_dashboard_payload, args.repeat)
+    current = time_builder(args.db, build_dashboard_payload, args.repeat)
+
+    print(f"{'per-product (legacy)':<24} {legacy:8.2f}s")
+    print(f"{'set-based':<24} {current:8.2f}s")
+    print(f"{'speedup':<24} {legacy / current:8.2f}x")
+
+
+if __name__ == "__main__":
+    main()
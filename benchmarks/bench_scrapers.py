@@ -0,0 +1,302 @@
+#!/usr/bin/env python3
+"""
+Benchmark the scrapers and collectors against a local stand-in server.
+
+Every scraper fetches recorded product pages from benchmarks/standin_server.py
+(optionally with latency and injected failures), then the concurrent
+collector and the asyncio pipeline collect a synthetic catalog from it into
+a scratch database. Reports throughput, p50/p95 latency per fetch and memory:
+traced peak allocation per fetch for the scrapers, traced peak for a whole
+collector run.
+
+The browser tier is skipped (pages without structured data count as failed
+fetches) unless --browser is given and Selenium and the browsers are installed.
+
+Usage:
+    python benchmarks/bench_scrapers.py                           # 200 fetches per scraper, 200 products
+    python benchmarks/bench_scrapers.py --latency-ms 80 --jitter-ms 40 --error-rate 0.02
+    python benchmarks/bench_scrapers.py --save /tmp/before.json   # before changing src/scraper.py
+    python benchmarks/bench_scrapers.py --compare /tmp/before.json
+"""
+import argparse
+import asyncio
+import json
+import sys
+import tempfile
+import time
+import tracemalloc
+from dataclasses import dataclass, asdict, field
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+ROOT = Path(__file__).parent.parent
+sys.path.insert(0, str(ROOT))
+
+from collect_prices import create_scrapers
+from src.async_http import AsyncHttpClient
+from src.collector import collect_concurrently
+from src.database import PriceDatabase
+from src.models import Product
+from src.pipeline import run_pipeline
+from src.scraper import BlockedError
+from standin_server import RETAILER_PAGES, Faults, StandInServer
+
+
+@dataclass
+class BenchResult:
+    name: str
+    fetches: int = 0
+    ok: int = 0
+    seconds: float = 0.0
+    latencies: List[float] = field(default_factory=list, repr=False)
+    kib_per_fetch: Optional[float] = None  # Mean traced peak allocation per fetch
+    peak_mib: Optional[float] = None  # Traced peak for the whole run
+
+    @property
+    def throughput(self) -> float:
+        return self.fetches / self.seconds if self.seconds else 0.0
+
+    def percentile_ms(self, q: float) -> Optional[float]:
+        if not self.latencies:
+            return None
+        ordered = sorted(self.latencies)
+        return ordered[min(len(ordered) - 1, int(q * len(ordered)))] * 1000
+
+    def summary(self) -> Dict[str, Optional[float]]:
+        return {
+            'fetches': self.fetches,
+            'ok': self.ok,
+            'throughput': self.throughput,
+            'p50_ms': self.percentile_ms(0.50),
+            'p95_ms': self.percentile_ms(0.95),
+            'kib_per_fetch': self.kib_per_fetch,
+            'peak_mib': self.peak_mib,
+        }
+
+
+def _no_browser(product_id: str, url: str):
+    return None
+
+
+def bench_scrapers(server: StandInServer, fetches: int, memory_sample: int,
+                   browser: bool) -> List[BenchResult]:
+    """fetch_price over and over for each scraper, one fetch at a time."""
+    results = []
+    for retailer_id, scraper in create_scrapers().items():
+        if not browser:
+            scraper.render_price = _no_browser
+        result = BenchResult(f"scraper:{retailer_id}")
+
+        def fetch(i: int) -> bool:
+            try:
+                return scraper.fetch_price(f"bench-{i}", server.url(retailer_id, f"bench-{i}")) is not None
+            except BlockedError:
+                return False
+
+        started = time.perf_counter()
+        for i in range(fetches):
+            fetch_started = time.perf_counter()
+            result.ok += fetch(i)
+            result.latencies.append(time.perf_counter() - fetch_started)
+        result.seconds = time.perf_counter() - started
+        result.fetches = fetches
+
+        # Allocation peak per fetch, in a separate pass: tracing slows everything down
+        tracemalloc.start()
+        peaks = []
+        for i in range(memory_sample):
+            tracemalloc.reset_peak()
+            before = tracemalloc.get_traced_memory()[0]
+            fetch(i)
+            peaks.append(tracemalloc.get_traced_memory()[1] - before)
+        tracemalloc.stop()
+        result.kib_per_fetch = sum(peaks) / len(peaks) / 1024 if peaks else None
+        results.append(result)
+    return results
+
+
+def catalog(server: StandInServer, products: int) -> List[Product]:
+    """Synthetic products with a URL at every retailer on the stand-in server."""
+    return [
+        Product(id=f"bench-{i}", name=f"Bench Product {i}", size="5 oz", category="skincare",
+                urls={r: server.url(r, f"bench-{i}") for r in RETAILER_PAGES})
+        for i in range(products)
+    ]
+
+
+def _traced(run: Callable[[], BenchResult]) -> BenchResult:
+    """Run a collector twice: once timed, once under tracemalloc for its peak memory."""
+    result = run()
+    tracemalloc.start()
+    run()
+    result.peak_mib = tracemalloc.get_traced_memory()[1] / 2**20
+    tracemalloc.stop()
+    return result
+
+
+def bench_concurrent(server: StandInServer, products: List[Product], workers: int,
+                     per_retailer: int, browser: bool, scratch: Path) -> BenchResult:
+    def run() -> BenchResult:
+        result = BenchResult(f"concurrent:{workers}x{per_retailer}")
+        scrapers = create_scrapers()
+        for scraper in scrapers.values():
+            timed = scraper.fetch_price
+
+            def fetch_price(product_id, url, timed=timed):
+                fetch_started = time.perf_counter()
+                try:
+                    return timed(product_id, url)
+                finally:
+                    result.latencies.append(time.perf_counter() - fetch_started)
+
+            scraper.fetch_price = fetch_price
+            if not browser:
+                scraper.render_price = _no_browser
+
+        db = PriceDatabase(str(scratch / f"concurrent-{time.monotonic_ns()}.db"), run_length=True)
+        db.tune_for_ingestion()
+        started = time.perf_counter()
+        with db.buffered_writer(flush_rows=25) as writer:
+            outcomes = collect_concurrently(products, scrapers, save=writer.add,
+                                            workers=workers, per_retailer=per_retailer)
+        result.seconds = time.perf_counter() - started
+        db.close()
+        result.ok = sum(o.successes for o in outcomes)
+        result.fetches = result.ok + sum(o.failures for o in outcomes)
+        return result
+
+    return _traced(run)
+
+
+class _TimedClient(AsyncHttpClient):
+    """AsyncHttpClient that records how long each GET took."""
+
+    def __init__(self, latencies: List[float]):
+        super().__init__()
+        self.latencies = latencies
+
+    async def get(self, url, headers=None):
+        started = time.perf_counter()
+        try:
+            return await super().get(url, headers)
+        finally:
+            self.latencies.append(time.perf_counter() - started)
+
+
+def bench_pipeline(server: StandInServer, products: List[Product], in_flight: int,
+                   per_retailer: int, browser: bool, scratch: Path) -> BenchResult:
+    async def collect(result: BenchResult):
+        scrapers = create_scrapers()
+        db = PriceDatabase(str(scratch / f"pipeline-{time.monotonic_ns()}.db"), run_length=True)
+        db.tune_for_ingestion()
+
+        async def save_batch(batch):
+            db.add_price_points([r.price_point for r in batch if r.ok])
+
+        client = _TimedClient(result.latencies)
+        started = time.perf_counter()
+        try:
+            stats = await run_pipeline(products, scrapers, save_batch, client=client,
+                                       max_in_flight=in_flight, per_retailer=per_retailer,
+                                       browser_workers=2 if browser else 0)
+        finally:
+            await client.close()
+        result.seconds = time.perf_counter() - started
+        db.close()
+        result.ok = stats.successes
+        result.fetches = stats.successes + stats.failures
+
+    def run() -> BenchResult:
+        result = BenchResult(f"pipeline:{in_flight}x{per_retailer}")
+        asyncio.run(collect(result))
+        return result
+
+    return _traced(run)
+
+
+def _fmt(value: Optional[float], spec: str) -> str:
+    return format(value, spec) if value is not None else '-'
+
+
+def print_results(results: List[BenchResult]):
+    print(f"{'benchmark':<22} {'fetches':>7} {'ok':>5} {'fetch/s':>9} {'p50 ms':>8} {'p95 ms':>8} "
+          f"{'KiB/fetch':>10} {'peak MiB':>9}")
+    for r in results:
+        print(f"{r.name:<22} {r.fetches:>7} {r.ok:>5} {r.throughput:>9.1f} "
+              f"{_fmt(r.percentile_ms(0.50), '.2f'):>8} {_fmt(r.percentile_ms(0.95), '.2f'):>8} "
+              f"{_fmt(r.kib_per_fetch, '.1f'):>10} {_fmt(r.peak_mib, '.1f'):>9}")
+
+
+def compare(results: List[BenchResult], baseline_path: str, tolerance: float) -> bool:
+    """Print changes against a saved run; False if any p50 or throughput regressed past tolerance."""
+    baseline = json.loads(Path(baseline_path).read_text())['results']
+    print(f"\nAgainst {baseline_path} (tolerance {tolerance:.0%}):")
+    ok = True
+    for r in results:
+        before = baseline.get(r.name)
+        if not before:
+            continue
+        now = r.summary()
+        p50_change = (now['p50_ms'] / before['p50_ms'] - 1) if before['p50_ms'] else 0.0
+        throughput_change = (now['throughput'] / before['throughput'] - 1) if before['throughput'] else 0.0
+        regressed = p50_change > tolerance or throughput_change < -tolerance
+        ok &= not regressed
+        print(f"  {'✗' if regressed else '✓'} {r.name:<22} p50 {p50_change:+.0%}, "
+              f"throughput {throughput_change:+.0%}")
+    return ok
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--fetches', type=int, default=200, help="Fetches per scraper")
+    parser.add_argument('--memory-sample', type=int, default=50,
+                        help="Fetches per scraper traced for memory")
+    parser.add_argument('--products', type=int, default=200, help="Catalog size for the collectors")
+    parser.add_argument('--workers', type=int, default=8, help="Concurrent collector workers")
+    parser.add_argument('--in-flight', type=int, default=64, help="Pipeline fetches in flight")
+    parser.add_argument('--per-retailer', type=int, default=4)
+    parser.add_argument('--latency-ms', type=float, default=0.0, help="Server latency per response")
+    parser.add_argument('--jitter-ms', type=float, default=0.0, help="Extra random latency, up to")
+    parser.add_argument('--error-rate', type=float, default=0.0, help="Fraction of 500 responses")
+    parser.add_argument('--block-rate', type=float, default=0.0, help="Fraction of 429 responses")
+    parser.add_argument('--drop-rate', type=float, default=0.0,
+                        help="Fraction of connections closed without a response")
+    parser.add_argument('--browser', action='store_true',
+                        help="Fall back to the browser tier (needs Selenium and the browsers)")
+    parser.add_argument('--skip-collectors', action='store_true')
+    parser.add_argument('--save', metavar='PATH', help="Save results as JSON for --compare")
+    parser.add_argument('--compare', metavar='PATH', help="Compare against results saved with --save")
+    parser.add_argument('--tolerance', type=float, default=0.25,
+                        help="Slowdown allowed by --compare before failing (default: 0.25)")
+    args = parser.parse_args()
+
+    faults = Faults(latency_ms=args.latency_ms, jitter_ms=args.jitter_ms, error_rate=args.error_rate,
+                    block_rate=args.block_rate, drop_rate=args.drop_rate)
+    print(f"Stand-in server: {faults}\n")
+
+    with StandInServer(faults) as server, tempfile.TemporaryDirectory() as scratch:
+        results = bench_scrapers(server, args.fetches, args.memory_sample, args.browser)
+        if not args.skip_collectors:
+            products = catalog(server, args.products)
+            results.append(bench_concurrent(server, products, args.workers, args.per_retailer,
+                                            args.browser, Path(scratch)))
+            results.append(bench_pipeline(server, products, args.in_flight, args.per_retailer,
+                                          args.browser, Path(scratch)))
+        counters = server.counters
+
+    print_results(results)
+    print(f"\nServer: {counters.requests} requests, {counters.errors} errors, "
+          f"{counters.blocks} blocks, {counters.drops} drops injected")
+
+    if args.save:
+        Path(args.save).write_text(json.dumps({
+            'faults': asdict(faults),
+            'results': {r.name: r.summary() for r in results},
+        }, indent=2))
+        print(f"✓ Saved results to {args.save}")
+    if args.compare and not compare(results, args.compare, args.tolerance):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+"""
+Benchmark windowed price statistics.
+
+Times the original string-compared window query (plus its separate
+latest-price query) against the ts_epoch range scan PriceDatabase now uses,
+for a random sample of product/retailer pairs.
+
+Usage:
+    python benchmarks/bench_window_stats.py                    # 1k products x 5 retailers x 2 years
+    python benchmarks/bench_window_stats.py --days-window 90 365
+    python benchmarks/bench_window_stats.py --db /tmp/bench.db # reuse a generated database
+"""
+import argparse
+import random
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).parent.parent
+sys.path.insert(0, str(ROOT))
+
+from src.database import PriceDatabase
+from synthetic import RETAILERS, generate_database
+
+LEGACY_WINDOW_QUERY = """
+    SELECT
+        product_id,
+        retailer_id,
+        MIN(price) as min_price,
+        MAX(price) as max_price,
+        AVG(price) as avg_price,
+        COUNT(*) as observation_count,
+        MIN(timestamp) as first_seen,
+        MAX(timestamp) as last_updated
+    FROM price_history
+    WHERE product_id = ?
+        AND retailer_id = ?
+        AND timestamp >= datetime('now', '-' || ? || ' days')
+    GROUP BY product_id, retailer_id
+"""
+
+LEGACY_LATEST_QUERY = """
+    SELECT price
+    FROM price_history
+    WHERE product_id = ? AND retailer_id = ?
+    ORDER BY timestamp DESC
+    LIMIT 1
+"""
+
+
+def legacy_price_stats(db: PriceDatabase, product_id: str, retailer_id: str, days: int):
+    """The original get_price_stats queries."""
+    cursor = db.conn.cursor()
+    cursor.execute(LEGACY_WINDOW_QUERY, (product_id, retailer_id, days))
+    row = cursor.fetchone()
+    cursor.execute(LEGACY_LATEST_QUERY, (product_id, retailer_id))
+    return row, cursor.fetchone()
+
+
+def time_pairs(pairs, fetch, repeat: int) -> float:
+    """Best-of-N wall time for fetching stats for every pair."""
+    best = float('inf')
+    for _ in range(repeat):
+        started = time.perf_counter()
+        for product_id, retailer_id in pairs:
+            fetch(product_id, retailer_id)
+        best = min(best, time.perf_counter() - started)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--products', type=int, default=1000)
+    parser.add_argument('--days', type=int, default=730)
+    parser.add_argument('--db', default='data/bench_dashboard.db',
+                        help="Database to use; generated if it doesn't exist")
+    parser.add_argument('--days-window', type=int, nargs='+', default=[30, 90, 365],
+                        help="Stats windows to time (default: 30 90 365)")
+    parser.add_argument('--pairs', type=int, default=500,
+                        help="Product/retailer pairs sampled per window")
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    if not Path(args.db).exists():
+        print(f"Generating {args.products} products x {len(RETAILERS)} retailers x {args.days} days...")
+        started = time.perf_counter()
+        generate_database(args.db, args.products, args.days)
+        print(f"  done in {time.perf_counter() - started:.1f}s")
+
+    db = PriceDatabase(args.db)
+    rows = db.conn.execute("SELECT COUNT(*) FROM price_history").fetchone()[0]
+    all_pairs = [tuple(r) for r in db.conn.execute(
+        "SELECT product_id, retailer_id FROM price_stats_summary")]
+    pairs = random.Random(1).sample(all_pairs, min(args.pairs, len(all_pairs)))
+    print(f"Database: {args.db} ({rows:,} price rows, {len(pairs)} pairs sampled)\n")
+
+    print(f"{'window':<8} {'legacy':>9} {'ts_epoch':>9} {'summary':>9} {'speedup':>9}")
+    for days in args.days_window:
+        legacy = time_pairs(pairs, lambda p, r: legacy_price_stats(db, p, r, days), args.repeat)
+        epoch = time_pairs(pairs, lambda p, r: db._query_price_stats(p, r, days), args.repeat)
+        current = time_pairs(pairs, lambda p, r: db.get_price_stats(p, r, days), args.repeat)
+        print(f"{days:>4}d    {legacy:8.3f}s {epoch:8.3f}s {current:8.3f}s {legacy / current:8.2f}x")
+
+    db.close()
+
+
+if __name__ == "__main__":
+    main()
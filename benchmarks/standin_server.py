@@ -0,0 +1,180 @@
+"""
+Local stand-in for the retailer sites, for benchmarks.
+
+Serves the recorded product pages in fixtures/html at
+
+    http://127.0.0.1:<port>/<retailer>/p/<product id>
+
+with optional latency and injected failures, so scrapers and collectors can
+be timed without touching live sites. Block pages are left to
+Faults.block_rate, so every retailer's scraper gets a real product page.
+
+Usage:
+    with StandInServer(Faults(latency_ms=50, error_rate=0.02)) as server:
+        url = server.url('walmart', 'eucerin-eczema-5oz')
+"""
+import gzip
+import random
+import threading
+import time
+from dataclasses import dataclass
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Dict, Optional
+
+FIXTURES = Path(__file__).parent.parent / 'fixtures' / 'html'
+
+# Recorded page served for each retailer's product URLs
+RETAILER_PAGES = {
+    'walmart': 'walmart_next_data.html',
+    'target': 'target_json_ld.html',
+    'cvs': 'cvs_product_next_data.html',
+    'walgreens': 'walgreens_itemprop.html',
+    'amazon': 'amazon_rendered_only.html',
+}
+
+
+@dataclass
+class Faults:
+    """Latency and failures to inject into responses."""
+    latency_ms: float = 0.0  # Added before every response
+    jitter_ms: float = 0.0  # Uniform extra latency, 0 to jitter_ms
+    error_rate: float = 0.0  # Fraction answered 500
+    block_rate: float = 0.0  # Fraction answered 429
+    drop_rate: float = 0.0  # Fraction whose connection is closed without a response
+    gzip: bool = True  # Compress pages for clients that accept it, as retailers do
+
+
+@dataclass
+class ServerCounters:
+    requests: int = 0
+    errors: int = 0
+    blocks: int = 0
+    drops: int = 0
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'  # Keep-alive, like the real sites
+    # Headers and body go out in separate writes; with Nagle on, the body
+    # waits for the client's delayed ACK and every fetch gains ~40ms
+    disable_nagle_algorithm = True
+    server: '_Server'
+
+    def do_GET(self):
+        server = self.server
+        fault = server.draw_fault()
+        if server.delay:
+            time.sleep(server.delay())
+
+        if fault == 'drop':
+            self.close_connection = True
+            return
+        if fault == 'error':
+            self._send(500, b'Internal Server Error', 'text/plain')
+            return
+        if fault == 'block':
+            self._send(429, b'Too Many Requests', 'text/plain')
+            return
+
+        parts = self.path.split('?', 1)[0].strip('/').split('/')
+        page = server.pages.get(parts[0]) if len(parts) == 3 and parts[1] == 'p' else None
+        if page is None:
+            self._send(404, b'Not Found', 'text/plain')
+            return
+        if server.faults.gzip and 'gzip' in self.headers.get('Accept-Encoding', ''):
+            self._send(200, page[1], 'text/html; charset=utf-8', encoding='gzip')
+        else:
+            self._send(200, page[0], 'text/html; charset=utf-8')
+
+    def _send(self, status: int, body: bytes, content_type: str, encoding: Optional[str] = None):
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        if encoding:
+            self.send_header('Content-Encoding', encoding)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class _Server(ThreadingHTTPServer):
+    daemon_threads = True
+    # The default backlog of 5 drops connects from a burst of fetchers, which
+    # then retry after a 1s SYN timeout
+    request_queue_size = 256
+
+    def __init__(self, faults: Faults, pages: Dict[str, tuple], seed: int):
+        super().__init__(('127.0.0.1', 0), _Handler)
+        self.faults = faults
+        self.pages = pages
+        self.counters = ServerCounters()
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self.delay = None
+        if faults.latency_ms or faults.jitter_ms:
+            self.delay = self._delay
+
+    def _delay(self) -> float:
+        with self._lock:
+            jitter = self._rng.uniform(0, self.faults.jitter_ms)
+        return (self.faults.latency_ms + jitter) / 1000
+
+    def draw_fault(self) -> Optional[str]:
+        """Count a request and decide which failure, if any, it gets."""
+        faults = self.faults
+        with self._lock:
+            self.counters.requests += 1
+            roll = self._rng.random()
+            for name, rate, counter in (('drop', faults.drop_rate, 'drops'),
+                                        ('error', faults.error_rate, 'errors'),
+                                        ('block', faults.block_rate, 'blocks')):
+                if roll < rate:
+                    setattr(self.counters, counter, getattr(self.counters, counter) + 1)
+                    return name
+                roll -= rate
+        return None
+
+
+class StandInServer:
+    """Threaded local server for the recorded retailer pages. See module docstring."""
+
+    def __init__(self, faults: Optional[Faults] = None, pages_dir: Path = FIXTURES, seed: int = 1):
+        """
+        Args:
+            faults: Latency and failures to inject (default: none)
+            pages_dir: Directory holding the RETAILER_PAGES files
+            seed: Seed for the latency jitter and failure draws
+        """
+        pages = {}
+        for retailer_id, name in RETAILER_PAGES.items():
+            body = (pages_dir / name).read_bytes()
+            pages[retailer_id] = (body, gzip.compress(body))
+        self._server = _Server(faults or Faults(), pages, seed)
+        self._thread: Optional[threading.Thread] = None
+        self.base_url = f"http://127.0.0.1:{self._server.server_address[1]}"
+
+    @property
+    def counters(self) -> ServerCounters:
+        return self._server.counters
+
+    def url(self, retailer_id: str, product_id: str) -> str:
+        """Product page URL for a retailer on this server."""
+        return f"{self.base_url}/{retailer_id}/p/{product_id}"
+
+    def start(self) -> 'StandInServer':
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True,
+                                        name='standin-server')
+        self._thread.start()
+        return self
+
+    def close(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self) -> 'StandInServer':
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.close()
@@ -0,0 +1,56 @@
+"""
+Synthetic price databases for the benchmarks.
+"""
+import random
+import sys
+from datetime import datetime, timedelta
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.database import INSERT_PRICE_SQL, PriceDatabase
+
+RETAILERS = ['walmart', 'target', 'cvs', 'walgreens', 'amazon']
+
+
+def generate_database(db_path: str, products: int, days: int, seed: int = 1):
+    """Fill a fresh database with one price per product/retailer/day."""
+    db = PriceDatabase(db_path)
+    db.tune_for_ingestion()
+    now = datetime.now().replace(microsecond=0)
+    rng = random.Random(seed)
+
+    db.conn.executemany("""
+        INSERT INTO products (id, name, size, category, brand, created_at, updated_at)
+        VALUES (?, ?, ?, ?, ?, ?, ?)
+    """, [
+        (f"product-{i}", f"Brand{i % 40} Product {i}", "5 oz", "skincare",
+         f"Brand{i % 40}" if i % 3 else None, now.isoformat(), now.isoformat())
+        for i in range(products)
+    ])
+    db.conn.executemany("""
+        INSERT INTO product_listings (product_id, retailer_id, url, created_at, updated_at)
+        VALUES (?, ?, ?, ?, ?)
+    """, [
+        (f"product-{i}", r, f"https://www.{r}.com/p/{i}", now.isoformat(), now.isoformat())
+        for i in range(products) for r in RETAILERS
+    ])
+
+    def rows():
+        # Day by day, like the daily collector appends them
+        prices = {(i, r): rng.uniform(5, 40) for i in range(products) for r in RETAILERS}
+        for day in range(days):
+            observed = now - timedelta(days=days - day)
+            timestamp, ts_epoch = observed.isoformat(), int(observed.timestamp())
+            for (i, retailer_id), price in prices.items():
+                price = round(max(1.0, price + rng.choice((0, 0, 0, -0.5, 0.5))), 2)
+                prices[(i, retailer_id)] = price
+                yield (f"product-{i}", retailer_id, price, timestamp, ts_epoch, timestamp, ts_epoch,
+                       f"https://www.{retailer_id}.com/p/{i}", 1, None, 'http')
+
+    db.conn.executemany(INSERT_PRICE_SQL, rows())
+    db.conn.commit()
+
+    # Rows went in behind PriceDatabase's back
+    db.rebuild_stats_summary()
+    db.close()
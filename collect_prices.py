@@ -3,37 +3,47 @@
 Automated price collection script.
 Reads products from database and collects prices from all configured retailers.
 """
+import time
+_LAUNCHED = time.perf_counter()
+
+import argparse
 import sys
 from pathlib import Path
-from datetime import datetime
+from datetime import datetime, timedelta
 
 # Add src to path
 sys.path.insert(0, str(Path(__file__).parent))
 
+from src.browser_workers import BrowserProcessPool, configure_browser_processes
 from src.database import PriceDatabase
-from src.scraper import WalmartScraper, TargetScraper, CVSScraper, WalgreensScraper, AmazonScraper
-
-
-def collect_prices_for_all_products():
+from src.collector import collect_concurrently, ProductResults
+from src.driver_pool import pool_metrics, close_all_pools, configure_pools
+from src.http_client import get_http_session
+from src.page_validators import ValidatorCache
+from src.rate_limit import RateLimiter
+from src.run_metrics import RunRecorder, write_run_metrics
+from src.scraper import BlockedError
+from src.scraper_registry import ScraperConfigError, configure_scraper_registry, get_scraper_registry
+
+# Seconds spent importing the modules above, reported by --profile-startup
+_IMPORT_SECONDS = time.perf_counter() - _LAUNCHED
+
+
+def collect_prices_for_all_products(run_length: bool = True, rate_limit: bool = True,
+                                    conditional: bool = True, isolate_browsers: bool = True,
+                                    metrics_out: str = None, profile_startup: bool = False):
     """Collect prices for all products in the database."""
+    started = time.perf_counter()
+    recorder = RunRecorder('sequential')
     print("=" * 70)
     print("AUTOMATED PRICE COLLECTION")
     print(f"Started: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
     print("=" * 70)
 
-    db = PriceDatabase()
-
-    # Initialize scrapers
-    scrapers = {
-        'walmart': WalmartScraper(),
-        'target': TargetScraper(),
-        'cvs': CVSScraper(),
-        'walgreens': WalgreensScraper(),
-        'amazon': AmazonScraper()
-    }
+    db = PriceDatabase(run_length=run_length)
 
-    # Get all products
-    products = db.get_all_products()
+    # Products with active listings, each with only its active URLs
+    products = db.get_products_to_collect()
 
     if not products:
         print("\n⚠️  No products found in database")
@@ -41,59 +51,373 @@ def collect_prices_for_all_products():
         db.close()
         return
 
+    scrapers = create_scrapers(listed_retailers(products))
+    limiter = RateLimiter.for_scrapers(scrapers) if rate_limit else None
+    validators = attach_validators(db, scrapers) if conditional else None
+    browsers = attach_browser_processes(scrapers, 1) if isolate_browsers else None
+    if profile_startup:
+        print_startup_profile(_LAUNCHED, _IMPORT_SECONDS)
+
     print(f"\nFound {len(products)} product(s) to track\n")
 
+    db.tune_for_ingestion()
+
     total_attempts = 0
     total_successes = 0
     total_failures = 0
 
-    # Process each product
-    for product in products:
-        print("=" * 70)
-        print(f"Product: {product.name} ({product.size})")
-        print(f"ID: {product.id}")
-        print(f"UPC: {product.upc}")
-        print("=" * 70)
+    # Batch writes; rows are flushed every few successes, after any product
+    # finishing 5s or more after the last flush, and at the end
+    with db.buffered_writer(flush_rows=25) as writer:
+        # Process each product
+        for product in products:
+            print_product_header(product)
+
+            product_successes = 0
+            product_failures = 0
+
+            # Try each retailer the product is listed at
+            for retailer_id, url in product.urls.items():
+                scraper = scrapers.get(retailer_id)
+
+                if scraper is None:
+                    print(f"\n⊘ {retailer_id.capitalize():<12} - No scraper for this retailer (skipping)")
+                    continue
+
+                print(f"\n→ {retailer_id.capitalize():<12} - Scraping...")
+                total_attempts += 1
+
+                if limiter:
+                    limiter.wait(retailer_id)
+
+                blocked = False
+                error = None
+                price_point = None
+                try:
+                    price_point = scraper.fetch_price(product.id, url)
+
+                    if price_point:
+                        # Queue for the next batched database write
+                        writer.add(price_point)
+                        print(f"  ✓ SUCCESS: ${price_point.price:.2f} via {price_point.source} (queued for database)")
+                        product_successes += 1
+                        total_successes += 1
+                    else:
+                        error = "No price returned"
+                        print(f"  ✗ FAILED: No price returned")
+                        product_failures += 1
+                        total_failures += 1
+
+                except BlockedError as e:
+                    error = f"Blocked: {e}"
+                    print(f"  ✗ BLOCKED: {e}")
+                    blocked = True
+                    product_failures += 1
+                    total_failures += 1
 
-        product_successes = 0
-        product_failures = 0
+                except Exception as e:
+                    error = str(e)
+                    print(f"  ✗ ERROR: {e}")
+                    product_failures += 1
+                    total_failures += 1
 
-        # Try each retailer
-        for retailer_id, scraper in scrapers.items():
-            url = product.get_retailer_url(retailer_id)
+                if limiter:
+                    limiter.record(retailer_id, blocked)
+                recorder.record_fetch(retailer_id, price_point if error is None else None, blocked)
+                update_retry_queue(db, product.id, retailer_id, url, error)
+
+            print_product_summary(product_successes, product_failures)
+            # Don't hold a slow run's prices in memory until the next add()
+            writer.flush_if_due()
+
+    print_collection_summary(total_attempts, total_successes, total_failures)
+    save_validators(db, validators)
+    print_fetch_report(validators, started)
+    print_retry_queue(db)
+    print_rate_limits(limiter)
+    print_selector_stats(scrapers)
+    if browsers:
+        browsers.close()
+    print_browser_processes(browsers)
+    print_pool_metrics()
+    finish_run(db, recorder, scrapers, get_http_session(), metrics_out)
+    close_all_pools()
+    db.close()
 
-            if not url:
-                print(f"\n⊘ {retailer_id.capitalize():<12} - No URL configured (skipping)")
-                continue
 
-            print(f"\n→ {retailer_id.capitalize():<12} - Scraping...")
-            total_attempts += 1
+def collect_prices_concurrently(workers: int, per_retailer: int, run_length: bool = True,
+                                rate_limit: bool = True, conditional: bool = True,
+                                isolate_browsers: bool = True, metrics_out: str = None,
+                                profile_startup: bool = False):
+    """
+    Collect prices for all products using a bounded pool of fetch workers.
+
+    Fetches for different products and retailers overlap, with at most
+    `per_retailer` requests in flight against any one retailer. Results are
+    written to the database from this thread only and summaries are printed
+    per product, in catalog order, once all of its retailers have finished.
+    Requests are paced per retailer (see src/rate_limit.py) unless
+    rate_limit is False; workers move on to other retailers meanwhile.
+    """
+    started = time.perf_counter()
+    recorder = RunRecorder('concurrent')
+    print("=" * 70)
+    print("AUTOMATED PRICE COLLECTION (concurrent)")
+    print(f"Started: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
+    print(f"Workers: {workers}, per-retailer limit: {per_retailer}")
+    print("=" * 70)
+
+    db = PriceDatabase(run_length=run_length)
+    products = db.get_products_to_collect()
+
+    if not products:
+        print("\n⚠️  No products found in database")
+        print("Run migrate_add_product_urls.py to add products")
+        db.close()
+        return
+
+    scrapers = create_scrapers(listed_retailers(products))
+    limiter = RateLimiter.for_scrapers(scrapers) if rate_limit else None
+    validators = attach_validators(db, scrapers) if conditional else None
+    browsers = attach_browser_processes(scrapers, workers) if isolate_browsers else None
+    if profile_startup:
+        print_startup_profile(_LAUNCHED, _IMPORT_SECONDS)
+
+    print(f"\nFound {len(products)} product(s) to track\n")
 
+    # Enough warm browsers for every worker that could want one at once
+    configure_pools(size=workers)
+
+    def report(outcome: ProductResults):
+        print_product_header(outcome.product)
+        for retailer_id in outcome.skipped:
+            print(f"\n⊘ {retailer_id.capitalize():<12} - No scraper for this retailer (skipping)")
+        for result in outcome.results:
+            print(f"\n→ {result.job.retailer_id.capitalize():<12}")
+            if result.ok:
+                print(f"  ✓ SUCCESS: ${result.price_point.price:.2f} via {result.price_point.source} "
+                      f"(queued for database)")
+            else:
+                print(f"  ✗ FAILED: {result.error}")
+            recorder.record_fetch(result.job.retailer_id, result.price_point, result.blocked)
+            update_retry_queue(db, outcome.product.id, result.job.retailer_id, result.job.url,
+                               None if result.ok else result.error)
+        print_product_summary(outcome.successes, outcome.failures)
+        writer.flush_if_due()  # On the calling thread, like save
+
+    db.tune_for_ingestion()
+    with db.buffered_writer(flush_rows=25) as writer:
+        outcomes = collect_concurrently(
+            products,
+            scrapers,
+            save=writer.add,
+            workers=workers,
+            per_retailer=per_retailer,
+            on_product_done=report,
+            limiter=limiter,
+        )
+
+    total_successes = sum(o.successes for o in outcomes)
+    total_failures = sum(o.failures for o in outcomes)
+    print_collection_summary(total_successes + total_failures, total_successes, total_failures)
+    save_validators(db, validators)
+    print_fetch_report(validators, started)
+    print_retry_queue(db)
+    print_rate_limits(limiter)
+    print_selector_stats(scrapers)
+    if browsers:
+        browsers.close()
+    print_browser_processes(browsers)
+    print_pool_metrics()
+    finish_run(db, recorder, scrapers, get_http_session(), metrics_out)
+    close_all_pools()
+    db.close()
+
+
+def attach_validators(db, scrapers) -> ValidatorCache:
+    """Load stored page validators and share them with every scraper for change-aware fetching."""
+    validators = ValidatorCache(db.get_page_validators())
+    for scraper in scrapers.values():
+        scraper.validators = validators
+    return validators
+
+
+def attach_browser_processes(scrapers, workers: int) -> BrowserProcessPool:
+    """Run every scraper's browser tier in a shared pool of supervised worker processes."""
+    browsers = BrowserProcessPool(workers=workers)
+    for scraper in scrapers.values():
+        scraper.browser_processes = browsers
+    return browsers
+
+
+def save_validators(db, validators):
+    """Persist the validators that changed during the run."""
+    if validators:
+        db.save_page_validators(validators.changed())
+
+
+def finish_run(db, recorder: RunRecorder, scrapers, session, metrics_out: str = None):
+    """Store the run in collection_runs, print where its time went and export its metrics."""
+    run = recorder.finish(scrapers, session.requests_sent, session.bytes_received,
+                          db.write_stats)
+    db.save_collection_run(run)
+    print_stage_timings(run)
+    if metrics_out:
+        write_run_metrics(run, metrics_out)
+        print(f"  Metrics written to {metrics_out}")
+    return run
+
+
+def update_retry_queue(db, product_id: str, retailer_id: str, url: str, error):
+    """Queue a failed fetch for retry (error set) or drop any queued retry after a success."""
+    if error is None:
+        db.clear_fetch_retry(product_id, retailer_id)
+    else:
+        db.record_fetch_failure(product_id, retailer_id, url, error)
+
+
+def drain_retries(max_minutes: float = 30, run_length: bool = True, rate_limit: bool = True,
+                  isolate_browsers: bool = True, metrics_out: str = None,
+                  profile_startup: bool = False):
+    """
+    Retry queued failed fetches as their backoff elapses.
+
+    Keeps going while retries become due within `max_minutes`, so transient
+    failures from a collection run are recovered in the same window. Jobs that
+    keep failing are dead-lettered after RETRY_MAX_ATTEMPTS.
+    """
+    print("=" * 70)
+    print("RETRYING FAILED FETCHES")
+    print(f"Started: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
+    print("=" * 70)
+
+    db = PriceDatabase(run_length=run_length)
+    scrapers = create_scrapers({r.retailer_id for r in db.get_fetch_retries() if not r.is_dead})
+    limiter = RateLimiter.for_scrapers(scrapers) if rate_limit else None
+    browsers = attach_browser_processes(scrapers, 1) if isolate_browsers else None
+    if profile_startup:
+        print_startup_profile(_LAUNCHED, _IMPORT_SECONDS)
+    deadline = datetime.now() + timedelta(minutes=max_minutes)
+    recorder = RunRecorder('retries')
+
+    recovered = 0
+    failed = 0
+    while True:
+        due = db.get_due_retries()
+        if not due:
+            next_at = db.next_retry_at()
+            if next_at is None or next_at > deadline:
+                break
+            wait = (next_at - datetime.now()).total_seconds()
+            if wait > 0:
+                print(f"\n… Next retry due at {next_at.strftime('%H:%M:%S')}, waiting {wait:.0f}s")
+                time.sleep(wait)
+            continue
+
+        for job in due:
+            print(f"\n→ {job.retailer_id.capitalize():<12} {job.product_id} (attempt {job.attempts + 1})")
+            scraper = scrapers.get(job.retailer_id)
+            if limiter and scraper:
+                limiter.wait(job.retailer_id)
+
+            blocked = False
+            error = None
+            price_point = None
             try:
-                price_point = scraper.fetch_price(product.id, url)
-
-                if price_point:
-                    # Save to database
-                    db.add_price_point(price_point)
-                    print(f"  ✓ SUCCESS: ${price_point.price:.2f} (saved to database)")
-                    product_successes += 1
-                    total_successes += 1
+                if scraper is None:
+                    error = f"No scraper for retailer '{job.retailer_id}'"
                 else:
-                    print(f"  ✗ FAILED: No price returned")
-                    product_failures += 1
-                    total_failures += 1
-
+                    price_point = scraper.fetch_price(job.product_id, job.url)
+                    if price_point:
+                        db.add_price_point(price_point)
+                        print(f"  ✓ RECOVERED: ${price_point.price:.2f} via {price_point.source}")
+                        recovered += 1
+                    else:
+                        error = "No price returned"
+            except BlockedError as e:
+                error = f"Blocked: {e}"
+                blocked = True
             except Exception as e:
-                print(f"  ✗ ERROR: {e}")
-                product_failures += 1
-                total_failures += 1
+                error = str(e)
 
-        # Product summary
-        print(f"\n{'-' * 70}")
-        print(f"Product Summary: {product_successes} successful, {product_failures} failed")
-        print(f"{'-' * 70}\n")
+            if limiter and scraper:
+                limiter.record(job.retailer_id, blocked)
+            recorder.record_fetch(job.retailer_id, price_point if error is None else None, blocked)
+            if error is None:
+                db.clear_fetch_retry(job.product_id, job.retailer_id)
+                continue
+
+            failed += 1
+            retry = db.record_fetch_failure(job.product_id, job.retailer_id, job.url, error)
+            if retry.is_dead:
+                print(f"  ✗ FAILED: {error} (giving up after {retry.attempts} attempts)")
+            else:
+                print(f"  ✗ FAILED: {error} (next try {retry.next_attempt_at.strftime('%H:%M:%S')})")
 
-    # Overall summary
+    print("\n" + "=" * 70)
+    print("RETRIES COMPLETE")
+    print("=" * 70)
+    print(f"Recovered: {recovered}")
+    print(f"Failed attempts: {failed}")
+    print_retry_queue(db)
+    print_rate_limits(limiter)
+    if browsers:
+        browsers.close()
+    print_browser_processes(browsers)
+    finish_run(db, recorder, scrapers, get_http_session(), metrics_out)
+    close_all_pools()
+    db.close()
+
+
+def create_scrapers(retailer_ids=None):
+    """
+    Scraper instances keyed by retailer id, in collection order.
+
+    Only the scrapers for retailer_ids (default: every registered retailer)
+    are imported and created; see src/scraper_registry.py. A registration
+    that can't be loaded only shows up here, so it exits like a bad config.
+    """
+    try:
+        return get_scraper_registry().create(retailer_ids)
+    except ScraperConfigError as e:
+        print(f"✗ {e}")
+        sys.exit(1)
+
+
+def listed_retailers(products):
+    """Retailer ids the products have listings at."""
+    return {retailer_id for product in products for retailer_id in product.urls}
+
+
+def print_startup_profile(launched: float, import_seconds: float):
+    """Print how long the script took to get ready to fetch."""
+    registry = get_scraper_registry()
+    print("\nStartup:")
+    print(f"  Module imports: {import_seconds * 1000:.1f} ms "
+          f"(python -X importtime for a per-module breakdown)")
+    for retailer_id, seconds in registry.import_seconds.items():
+        print(f"  Scraper {retailer_id:<10} {seconds * 1000:.1f} ms  {registry.spec(retailer_id)}")
+    print(f"  Ready to fetch: {(time.perf_counter() - launched) * 1000:.1f} ms after launch")
+
+
+def print_product_header(product):
+    """Print the banner shown before each product's results."""
+    print("=" * 70)
+    print(f"Product: {product.name} ({product.size})")
+    print(f"ID: {product.id}")
+    print(f"UPC: {product.upc}")
+    print("=" * 70)
+
+
+def print_product_summary(successes: int, failures: int):
+    """Print the per-product success/failure line."""
+    print(f"\n{'-' * 70}")
+    print(f"Product Summary: {successes} successful, {failures} failed")
+    print(f"{'-' * 70}\n")
+
+
+def print_collection_summary(total_attempts: int, total_successes: int, total_failures: int):
+    """Print the end-of-run totals."""
     print("\n" + "=" * 70)
     print("COLLECTION COMPLETE")
     print("=" * 70)
@@ -103,16 +427,120 @@ def collect_prices_for_all_products():
     print(f"Completed: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
     print("=" * 70)
 
-    db.close()
+
+def print_selector_stats(scrapers):
+    """Print how often each price selector matched and how fast."""
+    lines = []
+    for retailer_id, scraper in scrapers.items():
+        for selector, stats in scraper.selector_report().items():
+            avg = f"{stats['avg_seconds']:.2f}s" if stats['avg_seconds'] is not None else "-"
+            lines.append(f"  {retailer_id:<10} {stats['hits']:>4}/{stats['attempts']:<4} "
+                         f"avg {avg:<7} {selector}")
+    if lines:
+        print("\nPrice selectors (hits/attempts):")
+        print("\n".join(lines))
+
+
+def print_stage_timings(run):
+    """Print the average and worst time of each fetch stage, per retailer, and of database writes."""
+    print(f"\nStage timings (run #{run.id}, avg/max):")
+    for retailer_id, m in run.metrics['retailers'].items():
+        stages = ", ".join(
+            f"{stage} {s['avg_seconds']:.2f}/{s['max_seconds']:.2f}s ×{s['count']}"
+            for stage, s in m['stages'].items() if s['count']
+        )
+        print(f"  {retailer_id:<10} {m['successes']}/{m['attempts']} ok, "
+              f"{m['blocked']} blocked: {stages or '-'}")
+    db_write = run.metrics['db_write']
+    if db_write['count']:
+        print(f"  {'database':<10} {db_write['count']} write(s), "
+              f"{db_write['total_seconds']:.2f}s total, max {db_write['max_seconds']:.2f}s")
+
+
+def print_retry_queue(db):
+    """Print what is left in the retry queue, listing dead-lettered fetches."""
+    retries = db.get_fetch_retries()
+    if not retries:
+        return
+
+    pending = [r for r in retries if not r.is_dead]
+    dead = [r for r in retries if r.is_dead]
+    print(f"\nRetry queue: {len(pending)} pending, {len(dead)} dead-lettered")
+    if pending:
+        next_at = min(r.next_attempt_at for r in pending)
+        print(f"  Next retry due: {next_at.strftime('%Y-%m-%d %H:%M:%S')} "
+              f"(run with --drain-retries to retry)")
+    for r in dead:
+        print(f"  ✗ {r.product_id} @ {r.retailer_id}: {r.attempts} attempts, last error: {r.last_error}")
+
+
+def print_fetch_report(validators, started: float, session=None):
+    """Print request counts, what conditional fetching saved, and the run time."""
+    session = session or get_http_session()
+    print("\nFetching:")
+    print(f"  HTTP requests: {session.requests_sent}, received {session.bytes_received / 1e6:.1f} MB")
+    if validators:
+        r = validators.report()
+        saved = f"~{r['est_seconds_saved']:.0f}s" if r['est_seconds_saved'] is not None else "-"
+        print(f"  Conditional: {r['conditional']}/{r['requests']} sent with validators, "
+              f"{r['not_modified']} not modified")
+        print(f"  Browser renders: {r['browser_renders']} ({r['browser_seconds']:.1f}s), "
+              f"{r['fragment_unchanged']} skipped on unchanged pages, saved {saved}")
+        if r['expired']:
+            print(f"  Expired: {r['expired']} stored price(s) too old to reuse, read again")
+        print(f"  Prices: {r['price_changed']} changed, "
+              f"{r['price_unchanged'] + r['not_modified'] + r['fragment_unchanged']} unchanged")
+    print(f"  Run time: {time.perf_counter() - started:.1f}s")
+
+
+def print_rate_limits(limiter):
+    """Print how each retailer was paced and how often it blocked us."""
+    if not limiter:
+        return
+
+    print("\nRate limits:")
+    for m in limiter.metrics():
+        print(f"  {m['retailer']:<10} requests: {m['requests']}, blocked: {m['blocks']}, "
+              f"now {m['requests_per_minute']:g}/min, waited: {m['waited_seconds']:.1f}s, "
+              f"backoff: {m['cooldown_seconds']:.0f}s")
+
+
+def print_browser_processes(browsers):
+    """Print how the browser worker processes fared."""
+    if not browsers:
+        return
+
+    m = browsers.metrics()
+    if not m['jobs']:
+        return
+    print("\nBrowser processes:")
+    print(f"  jobs: {m['jobs']}, workers started: {m['workers_started']}, "
+          f"timed out: {m['timeouts']}, crashed: {m['crashes']}, "
+          f"recycled: {m['recycled_rss']} for memory / {m['recycled_jobs']} for age, "
+          f"peak RSS: {m['peak_rss_mb']:.0f} MB")
+
+
+def print_pool_metrics():
+    """Print browser pool usage for the run."""
+    metrics = pool_metrics()
+    if not metrics:
+        return
+
+    print("\nBrowser pools:")
+    for m in metrics:
+        print(f"  {m['name']:<15} started: {m['created']}, leases: {m['leases']}, "
+              f"reused: {m['reused']}, recycled: {m['recycled']}, crashed: {m['crashed']}, "
+              f"blocked: {m['blocked']}, startup: {m['startup_seconds']:.1f}s")
 
 
-def collect_prices_for_product(product_id: str):
+def collect_prices_for_product(product_id: str, run_length: bool = True,
+                               profile_startup: bool = False):
     """Collect prices for a specific product."""
     print("=" * 70)
     print(f"COLLECTING PRICES FOR: {product_id}")
     print("=" * 70)
 
-    db = PriceDatabase()
+    db = PriceDatabase(run_length=run_length)
 
     # Get the product
     product = db.get_product(product_id)
@@ -125,24 +553,20 @@ def collect_prices_for_product(product_id: str):
     print(f"\nProduct: {product.name} ({product.size})")
     print(f"UPC: {product.upc}\n")
 
-    # Initialize scrapers
-    scrapers = {
-        'walmart': WalmartScraper(),
-        'target': TargetScraper(),
-        'cvs': CVSScraper(),
-        'walgreens': WalgreensScraper(),
-        'amazon': AmazonScraper()
-    }
+    scrapers = create_scrapers(product.urls)
+    if profile_startup:
+        print_startup_profile(_LAUNCHED, _IMPORT_SECONDS)
+        print()
 
     successes = 0
     failures = 0
 
-    # Try each retailer
-    for retailer_id, scraper in scrapers.items():
-        url = product.get_retailer_url(retailer_id)
+    # Try each retailer the product is listed at
+    for retailer_id, url in product.urls.items():
+        scraper = scrapers.get(retailer_id)
 
-        if not url:
-            print(f"{retailer_id.capitalize():<12} - No URL configured (skipping)")
+        if scraper is None:
+            print(f"{retailer_id.capitalize():<12} - No scraper for this retailer (skipping)")
             continue
 
         print(f"{retailer_id.capitalize():<12} - ", end='', flush=True)
@@ -166,14 +590,72 @@ def collect_prices_for_product(product_id: str):
     print(f"Results: {successes} successful, {failures} failed")
     print(f"{'-' * 70}")
 
+    close_all_pools()
     db.close()
 
 
-if __name__ == "__main__":
-    if len(sys.argv) > 1:
+def main():
+    parser = argparse.ArgumentParser(description="Collect prices from all configured retailers.")
+    parser.add_argument('product_id', nargs='?', help="Only collect prices for this product")
+    parser.add_argument('--workers', type=int, default=1,
+                        help="Concurrent fetch workers (default: 1, sequential)")
+    parser.add_argument('--per-retailer', type=int, default=1,
+                        help="Maximum concurrent fetches per retailer (default: 1)")
+    parser.add_argument('--no-run-length', dest='run_length', action='store_false',
+                        help="Store a row for every observation, even when the price is unchanged")
+    parser.add_argument('--no-rate-limit', dest='rate_limit', action='store_false',
+                        help="Fetch as fast as possible, without per-retailer pacing or backoff")
+    parser.add_argument('--full-fetch', dest='conditional', action='store_false',
+                        help="Always download and parse every page, ignoring stored validators")
+    parser.add_argument('--in-process-browsers', dest='isolate_browsers', action='store_false',
+                        help="Run browsers in this process instead of supervised worker processes")
+    parser.add_argument('--browser-timeout', type=float,
+                        help="Seconds a browser render may take before its worker is killed (default: 120)")
+    parser.add_argument('--browser-max-rss-mb', type=float,
+                        help="Memory (MB) above which a browser worker is replaced (default: 1500)")
+    parser.add_argument('--metrics-out', metavar='PATH',
+                        help="Also export the run's metrics to PATH: Prometheus text for *.prom, JSON otherwise")
+    parser.add_argument('--drain-retries', action='store_true',
+                        help="Only retry previously failed fetches as their backoff elapses")
+    parser.add_argument('--drain-minutes', type=float, default=30,
+                        help="How long --drain-retries keeps waiting for retries to come due (default: 30)")
+    add_registry_arguments(parser)
+    args = parser.parse_args()
+    configure_browser_processes(job_timeout=args.browser_timeout, max_rss_mb=args.browser_max_rss_mb)
+    configure_registry_from_args(args)
+
+    if args.drain_retries:
+        drain_retries(args.drain_minutes, args.run_length, args.rate_limit, args.isolate_browsers,
+                      args.metrics_out, args.profile_startup)
+    elif args.product_id:
         # Collect for specific product
-        product_id = sys.argv[1]
-        collect_prices_for_product(product_id)
+        collect_prices_for_product(args.product_id, args.run_length, args.profile_startup)
+    elif args.workers > 1:
+        collect_prices_concurrently(args.workers, args.per_retailer, args.run_length, args.rate_limit,
+                                    args.conditional, args.isolate_browsers, args.metrics_out,
+                                    args.profile_startup)
     else:
         # Collect for all products
-        collect_prices_for_all_products()
+        collect_prices_for_all_products(args.run_length, args.rate_limit, args.conditional,
+                                        args.isolate_browsers, args.metrics_out, args.profile_startup)
+
+
+def add_registry_arguments(parser):
+    """Add the scraper registry and startup profiling options shared by the collectors."""
+    parser.add_argument('--scrapers', metavar='PATH',
+                        help="JSON file registering scrapers by retailer id (default: scrapers.json if present)")
+    parser.add_argument('--profile-startup', action='store_true',
+                        help="Report how long imports and scraper loading took before the first fetch")
+
+
+def configure_registry_from_args(args):
+    """Load the scraper registrations given on the command line, exiting on a bad config."""
+    try:
+        configure_scraper_registry(args.scrapers)
+    except ScraperConfigError as e:
+        print(f"✗ {e}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
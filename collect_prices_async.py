@@ -0,0 +1,202 @@
+#!/usr/bin/env python3
+"""
+Asyncio price collection.
+
+Same job as collect_prices.py, run as a pipeline (see src/pipeline.py):
+pages are fetched by coroutines over a keep-alive async HTTP client, so
+thousands of URLs can be in flight without a thread each. Parsing runs in a
+small thread pool, pages that need a browser are rendered on a few browser
+threads, and results are written to the database in batches.
+
+Press Ctrl-C once to stop: no new fetches start, fetches in flight are
+cancelled and everything already fetched is saved. Press it again to abort.
+"""
+import time
+_LAUNCHED = time.perf_counter()
+
+import argparse
+import asyncio
+import signal
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from functools import partial
+from pathlib import Path
+
+# Add src to path
+sys.path.insert(0, str(Path(__file__).parent))
+
+from collect_prices import (add_registry_arguments, attach_browser_processes, attach_validators,
+                            configure_registry_from_args, create_scrapers, finish_run,
+                            listed_retailers, print_browser_processes, print_collection_summary,
+                            print_fetch_report, print_pool_metrics, print_rate_limits,
+                            print_retry_queue, print_selector_stats, print_startup_profile,
+                            save_validators, update_retry_queue)
+from src.async_http import AsyncHttpClient
+from src.browser_workers import configure_browser_processes
+from src.database import PriceDatabase
+from src.driver_pool import close_all_pools, configure_pools
+from src.pipeline import run_pipeline
+from src.rate_limit import RateLimiter
+from src.run_metrics import RunRecorder
+
+# Seconds spent importing the modules above, reported by --profile-startup
+_IMPORT_SECONDS = time.perf_counter() - _LAUNCHED
+
+
+def write_results(db, results):
+    """Save a batch of pipeline results: prices in one transaction, then the retry queue."""
+    db.add_price_points([r.price_point for r in results if r.ok])
+    for r in results:
+        update_retry_queue(db, r.job.product.id, r.job.retailer_id, r.job.url,
+                           None if r.ok else r.error)
+
+
+def print_result(result):
+    """Print one line per fetch as results arrive."""
+    label = f"{result.job.retailer_id.capitalize():<12} {result.job.product.id}"
+    if result.ok:
+        print(f"  ✓ {label}: ${result.price_point.price:.2f} via {result.price_point.source}")
+    else:
+        print(f"  ✗ {label}: {result.error}")
+
+
+async def collect_prices_async(max_in_flight: int, per_retailer: int, browser_workers: int,
+                               batch_size: int, run_length: bool = True,
+                               rate_limit: bool = True, conditional: bool = True,
+                               isolate_browsers: bool = True, metrics_out: str = None,
+                               profile_startup: bool = False):
+    """Collect prices for all products through the asyncio pipeline."""
+    started = time.perf_counter()
+    recorder = RunRecorder('async')
+    print("=" * 70)
+    print("AUTOMATED PRICE COLLECTION (async pipeline)")
+    print(f"Started: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
+    print(f"In flight: {max_in_flight}, per-retailer limit: {per_retailer}, "
+          f"browser workers: {browser_workers}")
+    print("=" * 70)
+
+    # sqlite3 connections must stay on the thread that opened them, so every
+    # database call goes through this one thread
+    loop = asyncio.get_running_loop()
+    db_thread = ThreadPoolExecutor(max_workers=1, thread_name_prefix='db')
+
+    def run_db(fn, *args):
+        return loop.run_in_executor(db_thread, partial(fn, *args))
+
+    db = await run_db(partial(PriceDatabase, run_length=run_length))
+    products = await run_db(db.get_products_to_collect)
+
+    if not products:
+        print("\n⚠️  No products found in database")
+        print("Run migrate_add_product_urls.py to add products")
+        await run_db(db.close)
+        db_thread.shutdown()
+        return
+
+    scrapers = create_scrapers(listed_retailers(products))
+    limiter = RateLimiter.for_scrapers(scrapers) if rate_limit else None
+    validators = await run_db(attach_validators, db, scrapers) if conditional else None
+    if profile_startup:
+        print_startup_profile(_LAUNCHED, _IMPORT_SECONDS)
+
+    print(f"\nFound {len(products)} product(s) to track\n")
+    await run_db(db.tune_for_ingestion)
+    browsers = None
+    if browser_workers and isolate_browsers:
+        browsers = attach_browser_processes(scrapers, browser_workers)
+    elif browser_workers:
+        configure_pools(size=browser_workers)
+
+    # First Ctrl-C stops gracefully; restoring the default handler lets a second one abort
+    stop = asyncio.Event()
+
+    def on_sigint():
+        print("\n… Stopping: finishing up and saving results (Ctrl-C again to abort)")
+        loop.remove_signal_handler(signal.SIGINT)
+        stop.set()
+
+    loop.add_signal_handler(signal.SIGINT, on_sigint)
+
+    def on_result(result):
+        recorder.record_fetch(result.job.retailer_id, result.price_point, result.blocked)
+        print_result(result)
+
+    client = AsyncHttpClient()
+    try:
+        stats = await run_pipeline(
+            products,
+            scrapers,
+            save_batch=partial(run_db, write_results, db),
+            client=client,
+            max_in_flight=max_in_flight,
+            per_retailer=per_retailer,
+            browser_workers=browser_workers,
+            batch_size=batch_size,
+            limiter=limiter,
+            on_result=on_result,
+            stop=stop,
+        )
+    finally:
+        loop.remove_signal_handler(signal.SIGINT)
+        await client.close()
+        if browsers:
+            # Kills renders still running after a stop
+            await loop.run_in_executor(None, browsers.close)
+
+    if stats.cancelled:
+        print("\n⚠️  Stopped early; unfetched jobs were skipped")
+    print_collection_summary(stats.successes + stats.failures, stats.successes, stats.failures)
+    print(f"Prices via HTTP: {stats.http_prices}, via browser: {stats.browser_prices}, "
+          f"saved in {stats.batches} batch(es)")
+    await run_db(save_validators, db, validators)
+    print_fetch_report(validators, started, session=client)
+    await run_db(print_retry_queue, db)
+    print_rate_limits(limiter)
+    print_selector_stats(scrapers)
+    print_browser_processes(browsers)
+    print_pool_metrics()
+    await run_db(finish_run, db, recorder, scrapers, client, metrics_out)
+    close_all_pools()
+    await run_db(db.close)
+    db_thread.shutdown()
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Collect prices from all configured retailers with the asyncio pipeline.")
+    parser.add_argument('--in-flight', type=int, default=64,
+                        help="Most pages being fetched at once (default: 64)")
+    parser.add_argument('--per-retailer', type=int, default=4,
+                        help="Most fetches in flight against one retailer (default: 4)")
+    parser.add_argument('--browser-workers', type=int, default=2,
+                        help="Browser threads for pages without structured prices; 0 for HTTP only (default: 2)")
+    parser.add_argument('--batch-size', type=int, default=50,
+                        help="Results written to the database per transaction (default: 50)")
+    parser.add_argument('--no-run-length', dest='run_length', action='store_false',
+                        help="Store a row for every observation, even when the price is unchanged")
+    parser.add_argument('--no-rate-limit', dest='rate_limit', action='store_false',
+                        help="Fetch as fast as possible, without per-retailer pacing or backoff")
+    parser.add_argument('--in-process-browsers', dest='isolate_browsers', action='store_false',
+                        help="Run browsers in this process instead of supervised worker processes")
+    parser.add_argument('--browser-timeout', type=float,
+                        help="Seconds a browser render may take before its worker is killed (default: 120)")
+    parser.add_argument('--browser-max-rss-mb', type=float,
+                        help="Memory (MB) above which a browser worker is replaced (default: 1500)")
+    parser.add_argument('--full-fetch', dest='conditional', action='store_false',
+                        help="Always download and parse every page, ignoring stored validators")
+    parser.add_argument('--metrics-out', metavar='PATH',
+                        help="Also export the run's metrics to PATH: Prometheus text for *.prom, JSON otherwise")
+    add_registry_arguments(parser)
+    args = parser.parse_args()
+    configure_browser_processes(job_timeout=args.browser_timeout, max_rss_mb=args.browser_max_rss_mb)
+    configure_registry_from_args(args)
+
+    asyncio.run(collect_prices_async(args.in_flight, args.per_retailer, args.browser_workers,
+                                     args.batch_size, args.run_length, args.rate_limit,
+                                     args.conditional, args.isolate_browsers, args.metrics_out,
+                                     args.profile_startup))
+
+
+if __name__ == "__main__":
+    main()
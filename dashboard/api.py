@@ -4,16 +4,24 @@ Simple Flask API server for the Price Intelligence Dashboard.
 Serves price data from the SQLite database.
 """
 
-from flask import Flask, jsonify, send_from_directory
+from flask import Flask, Response, jsonify, request, send_from_directory
 from flask_cors import CORS
+import gzip
 import sqlite3
 import os
+import sys
+import threading
 from datetime import datetime
 from collections import defaultdict
+from dataclasses import dataclass
+from typing import Optional
 
 app = Flask(__name__)
 CORS(app)
 
+# Project root, for the optional src.analytics module
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
 # Database path - use absolute path on PythonAnywhere, relative locally
 if os.path.exists('/home/smugsock/price-intelligence-tracker'):
     # Running on PythonAnywhere
@@ -22,124 +30,395 @@ else:
     # Running locally
     DB_PATH = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'data', 'prices.db')
 
+# Optional directory for persisting the cached dashboard payload across restarts
+CACHE_DIR = os.environ.get('DASHBOARD_CACHE_DIR')
+
 def get_db_connection():
     """Create a database connection."""
     conn = sqlite3.connect(DB_PATH)
     conn.row_factory = sqlite3.Row
     return conn
 
+
+def get_data_version(conn) -> Optional[str]:
+    """
+    Read the version stamp PriceDatabase bumps on every write, qualified by
+    the database's random id (a replaced database restarts the count).
+
+    Returns None for databases that predate the stamp, which disables caching.
+    """
+    try:
+        meta = dict(conn.execute(
+            "SELECT key, value FROM db_meta WHERE key IN ('database_id', 'data_version')"
+        ).fetchall())
+    except sqlite3.OperationalError:
+        return None
+    if 'database_id' not in meta or 'data_version' not in meta:
+        return None
+    return f"{meta['database_id']:x}-{meta['data_version']}"
+
+
+@dataclass
+class CachedPayload:
+    """A serialized dashboard payload for one data version."""
+    version: str
+    etag: str
+    body: bytes
+    gzip_body: bytes
+
+
+class DashboardCache:
+    """
+    Holds the serialized /api/dashboard-data response for the latest data version.
+
+    The payload only changes when the collector (or any PriceDatabase writer)
+    bumps the version stamp, so between collection runs every request is served
+    from memory, pre-compressed, or answered with 304 Not Modified.
+    """
+
+    def __init__(self, cache_dir: Optional[str] = None):
+        self.cache_dir = cache_dir
+        self._entry: Optional[CachedPayload] = None
+        self._lock = threading.Lock()
+
+    def get(self, conn) -> Optional[CachedPayload]:
+        """Return the payload for the current data version, building it if needed."""
+        version = get_data_version(conn)
+        if version is None:
+            return None
+
+        entry = self._entry
+        if entry and entry.version == version:
+            return entry
+
+        # One request rebuilds; concurrent ones wait and reuse its result
+        with self._lock:
+            entry = self._entry
+            if entry and entry.version == version:
+                return entry
+            entry = self._load_from_disk(version) or self._build(conn, version)
+            self._entry = entry
+            return entry
+
+    def _build(self, conn, version: str) -> CachedPayload:
+        body = app.json.dumps(build_dashboard_payload(conn)).encode('utf-8')
+        entry = CachedPayload(
+            version=version,
+            etag=f"dashboard-{version}",
+            body=body,
+            gzip_body=gzip.compress(body, compresslevel=6),
+        )
+        self._save_to_disk(entry)
+        return entry
+
+    def _disk_path(self, version: str) -> str:
+        return os.path.join(self.cache_dir, f"dashboard-{version}.json.gz")
+
+    def _load_from_disk(self, version: str) -> Optional[CachedPayload]:
+        if not self.cache_dir:
+            return None
+        try:
+            with open(self._disk_path(version), 'rb') as f:
+                gzip_body = f.read()
+        except OSError:
+            return None
+        return CachedPayload(
+            version=version,
+            etag=f"dashboard-{version}",
+            body=gzip.decompress(gzip_body),
+            gzip_body=gzip_body,
+        )
+
+    def _save_to_disk(self, entry: CachedPayload):
+        if not self.cache_dir:
+            return
+        os.makedirs(self.cache_dir, exist_ok=True)
+        path = self._disk_path(entry.version)
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, 'wb') as f:
+            f.write(entry.gzip_body)
+        os.replace(tmp_path, path)
+
+        # Older versions will never be served again
+        for name in os.listdir(self.cache_dir):
+            if name.startswith('dashboard-') and name.endswith('.json.gz') \
+                    and name != os.path.basename(path):
+                try:
+                    os.remove(os.path.join(self.cache_dir, name))
+                except OSError:
+                    pass
+
+
+dashboard_cache = DashboardCache(CACHE_DIR)
+
+
+# Per-(product, retailer) statistics in one grouped scan. The high/low dates
+# are the earliest timestamps at which the max/min price was seen; both the
+# scan and the lookups are served by idx_price_history_price.
+STATS_QUERY = """
+    SELECT
+        s.product_id,
+        s.retailer_id,
+        s.high,
+        s.low,
+        s.avg,
+        s.first_seen,
+        (SELECT MIN(h.timestamp) FROM price_history h
+         WHERE h.product_id = s.product_id AND h.retailer_id = s.retailer_id
+           AND h.price = s.high) AS high_date,
+        (SELECT MIN(h.timestamp) FROM price_history h
+         WHERE h.product_id = s.product_id AND h.retailer_id = s.retailer_id
+           AND h.price = s.low) AS low_date
+    FROM (
+        SELECT
+            product_id,
+            retailer_id,
+            MAX(price) AS high,
+            MIN(price) AS low,
+            AVG(price) AS avg,
+            MIN(timestamp) AS first_seen
+        FROM price_history
+        GROUP BY product_id, retailer_id
+    ) s
+"""
+
+# Same columns from the summary table PriceDatabase maintains on every insert
+SUMMARY_STATS_QUERY = """
+    SELECT
+        product_id,
+        retailer_id,
+        max_price AS high,
+        min_price AS low,
+        price_sum / observation_count AS avg,
+        first_seen,
+        high_date,
+        low_date
+    FROM price_stats_summary
+"""
+
+# Full history in storage order. Rows are appended as prices are collected,
+# so this is already (almost always) chronological within each series, and a
+# plain table scan avoids an index lookup per row.
+HISTORY_QUERY = """
+    SELECT product_id, retailer_id, price, timestamp
+    FROM price_history
+"""
+
+# The same for run-length history: a run of unchanged prices is charted as its
+# first and last sighting, which draws the same line as every point in between
+RUN_HISTORY_QUERY = """
+    SELECT product_id, retailer_id, price, timestamp
+    FROM price_history
+    UNION ALL
+    SELECT product_id, retailer_id, price, last_seen
+    FROM price_history
+    WHERE seen_count > 1
+"""
+
+
+# Product page at each retailer, for the dashboard's links
+LISTINGS_QUERY = """
+    SELECT product_id, retailer_id, url
+    FROM product_listings
+"""
+
+
+def _listing_urls(cursor):
+    """{(product_id, retailer_id): url} for every listing."""
+    try:
+        rows = cursor.execute(LISTINGS_QUERY).fetchall()
+    except sqlite3.OperationalError:
+        # Database not yet opened by a PriceDatabase that migrates URLs to listings
+        return {}
+    return {(row['product_id'], row['retailer_id']): row['url'] for row in rows}
+
+
+def _retailer_stats(cursor):
+    """Per-(product, retailer) stats rows, from the summary table when present."""
+    try:
+        return cursor.execute(SUMMARY_STATS_QUERY).fetchall()
+    except sqlite3.OperationalError:
+        # Database not yet opened by a PriceDatabase that maintains the summary
+        return cursor.execute(STATS_QUERY).fetchall()
+
+
+def _history_points(conn):
+    """(product_id, retailer_id, price, date) chart points, run endpoints included."""
+    history = conn.cursor()
+    history.row_factory = None
+    try:
+        return history.execute(RUN_HISTORY_QUERY)
+    except sqlite3.OperationalError:
+        # Database from before run-length storage
+        return history.execute(HISTORY_QUERY)
+
+
+def build_dashboard_payload(conn):
+    """
+    Build the /api/dashboard-data response body.
+
+    Returns products grouped by brand with price history and statistics.
+    """
+    cursor = conn.cursor()
+
+    # Get all products
+    cursor.execute('SELECT * FROM products')
+    products = cursor.fetchall()
+
+    if not products:
+        return {'brands': []}
+
+    listing_urls = _listing_urls(cursor)
+
+    # Retailer statistics, grouped by product
+    stats_by_product = defaultdict(list)
+    for row in _retailer_stats(cursor):
+        stats_by_product[row['product_id']].append(row)
+
+    # Chart series: one pass over the history, appending each row to its
+    # (product, retailer) series and noting any series that arrives out of order
+    chart_points = defaultdict(dict)
+    last_date = {}
+    unsorted = set()
+    for product_id, retailer_id, price, date in _history_points(conn):
+        key = (product_id, retailer_id)
+        series = chart_points[product_id].get(retailer_id)
+        if series is None:
+            series = chart_points[product_id][retailer_id] = []
+        elif date < last_date[key]:
+            unsorted.add(key)
+        last_date[key] = date
+        series.append({'date': date, 'price': price})
+
+    # Backfilled series need sorting before they can be charted
+    for product_id, retailer_id in unsorted:
+        chart_points[product_id][retailer_id].sort(key=lambda p: p['date'])
+
+    brands_data = defaultdict(lambda: {'name': '', 'products': [], 'bestRetailer': ''})
+
+    for product in products:
+        product_id = product['id']
+        product_name = product['name']
+
+        retailer_rows = stats_by_product.get(product_id)
+        if not retailer_rows:
+            continue
+
+        # Get brand name from brand field, fallback to first word of product name
+        brand_name = product['brand'] if product['brand'] else product_name.split()[0]
+
+        # Retailers in the order they were first seen for this product
+        retailer_rows.sort(key=lambda r: r['first_seen'])
+
+        retailers_stats = []
+        chart_data = []
+
+        for row in retailer_rows:
+            retailer_id = row['retailer_id']
+
+            retailer_url = listing_urls.get((product_id, retailer_id))
+
+            retailers_stats.append({
+                'name': retailer_id,
+                'high': row['high'],
+                'highDate': row['high_date'],
+                'low': row['low'],
+                'lowDate': row['low_date'],
+                'avg': row['avg'],
+                'url': retailer_url or '#'
+            })
+
+            chart_data.append({
+                'retailer': retailer_id,
+                'prices': chart_points[product_id].get(retailer_id, [])
+            })
+
+        # Find best average price
+        best_retailer = min(retailers_stats, key=lambda x: x['avg'])
+
+        product_data = {
+            'id': product_id,
+            'name': product_name,
+            'brand': brand_name,
+            'size': product['size'] if product['size'] else '',
+            'bestAvgPrice': best_retailer['avg'],
+            'bestRetailer': best_retailer['name'].capitalize(),
+            'retailers': sorted(retailers_stats, key=lambda x: x['avg']),
+            'chartData': chart_data
+        }
+
+        brands_data[brand_name]['name'] = brand_name
+        brands_data[brand_name]['products'].append(product_data)
+
+        # Determine overall best retailer for the brand
+        # (for simplicity, using the best for this product)
+        if not brands_data[brand_name]['bestRetailer']:
+            brands_data[brand_name]['bestRetailer'] = best_retailer['name'].capitalize()
+
+    # Convert to list format
+    return {'brands': list(brands_data.values())}
+
+
 @app.route('/api/dashboard-data')
 def get_dashboard_data():
     """
     Get all price data formatted for the dashboard.
     Returns products grouped by brand with price history and statistics.
+
+    Responses carry an ETag tied to the database's data version; clients that
+    send a matching If-None-Match get 304 Not Modified.
+    """
+    try:
+        conn = get_db_connection()
+        try:
+            entry = dashboard_cache.get(conn)
+            if entry is None:
+                # Database without a version stamp: no caching possible
+                return jsonify(build_dashboard_payload(conn))
+        finally:
+            conn.close()
+
+        if request.if_none_match.contains(entry.etag):
+            response = Response(status=304)
+        elif 'gzip' in request.headers.get('Accept-Encoding', ''):
+            response = Response(entry.gzip_body, mimetype='application/json')
+            response.headers['Content-Encoding'] = 'gzip'
+        else:
+            response = Response(entry.body, mimetype='application/json')
+
+        response.set_etag(entry.etag)
+        response.headers['Vary'] = 'Accept-Encoding'
+        response.headers['Cache-Control'] = 'no-cache'  # Always revalidate
+        return response
+
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/analytics/<product_id>/<retailer_id>')
+def get_analytics(product_id, retailer_id):
+    """
+    Daily price series with rolling mean/median/std, percentiles and max
+    drawdown for one product at one retailer, computed with NumPy.
+
+    Query parameters:
+        window: Rolling window in days (default 7)
     """
+    try:
+        from src.analytics import load_price_arrays, summarize
+    except ImportError:
+        return jsonify({'error': 'Analytics requires numpy (pip install -r requirements.txt)'}), 501
+
+    window = request.args.get('window', default=7, type=int)
     try:
         conn = get_db_connection()
-        cursor = conn.cursor()
-
-        # Get all products
-        cursor.execute('SELECT * FROM products')
-        products = cursor.fetchall()
-
-        if not products:
-            return jsonify({'brands': []})
-
-        brands_data = defaultdict(lambda: {'name': '', 'products': [], 'bestRetailer': ''})
-
-        for product in products:
-            product_id = product['id']
-            product_name = product['name']
-
-            # Get brand name from brand field, fallback to first word of product name
-            brand_name = product['brand'] if product['brand'] else product_name.split()[0]
-
-            # Get price history for this product
-            cursor.execute('''
-                SELECT retailer_id, price, timestamp
-                FROM price_history
-                WHERE product_id = ?
-                ORDER BY timestamp ASC
-            ''', (product_id,))
-            price_history = cursor.fetchall()
-
-            if not price_history:
-                continue
-
-            # Group prices by retailer
-            retailer_prices = defaultdict(list)
-            for record in price_history:
-                retailer_prices[record['retailer_id']].append({
-                    'price': record['price'],
-                    'date': record['timestamp']
-                })
-
-            # Calculate statistics for each retailer
-            retailers_stats = []
-            chart_data = []
-
-            for retailer_id, prices in retailer_prices.items():
-                if not prices:
-                    continue
-
-                price_values = [p['price'] for p in prices]
-                high_price = max(price_values)
-                low_price = min(price_values)
-                avg_price = sum(price_values) / len(price_values)
-
-                # Get dates for high and low prices
-                high_date = next(p['date'] for p in prices if p['price'] == high_price)
-                low_date = next(p['date'] for p in prices if p['price'] == low_price)
-
-                # Get retailer URL
-                url_column = f'{retailer_id}_url'
-                retailer_url = product[url_column] if url_column in product.keys() else '#'
-
-                retailers_stats.append({
-                    'name': retailer_id,
-                    'high': high_price,
-                    'highDate': high_date,
-                    'low': low_price,
-                    'lowDate': low_date,
-                    'avg': avg_price,
-                    'url': retailer_url or '#'
-                })
-
-                # Add to chart data
-                chart_data.append({
-                    'retailer': retailer_id,
-                    'prices': [{'date': p['date'], 'price': p['price']} for p in prices]
-                })
-
-            # Find best average price
-            if retailers_stats:
-                best_retailer = min(retailers_stats, key=lambda x: x['avg'])
-
-                product_data = {
-                    'id': product_id,
-                    'name': product_name,
-                    'brand': brand_name,
-                    'size': product['size'] if product['size'] else '',
-                    'bestAvgPrice': best_retailer['avg'],
-                    'bestRetailer': best_retailer['name'].capitalize(),
-                    'retailers': sorted(retailers_stats, key=lambda x: x['avg']),
-                    'chartData': chart_data
-                }
-
-                brands_data[brand_name]['name'] = brand_name
-                brands_data[brand_name]['products'].append(product_data)
-
-                # Determine overall best retailer for the brand
-                # (for simplicity, using the best for this product)
-                if not brands_data[brand_name]['bestRetailer']:
-                    brands_data[brand_name]['bestRetailer'] = best_retailer['name'].capitalize()
-
-        conn.close()
-
-        # Convert to list format
-        brands_list = list(brands_data.values())
-
-        return jsonify({'brands': brands_list})
+        try:
+            arrays = load_price_arrays(conn, product_id, retailer_id)
+        finally:
+            conn.close()
+
+        if not len(arrays):
+            return jsonify({'error': 'No price history found'}), 404
+        return jsonify(summarize(arrays, window))
 
     except Exception as e:
         return jsonify({'error': str(e)}), 500
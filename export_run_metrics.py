@@ -0,0 +1,50 @@
+#!/usr/bin/env python3
+"""
+Export stored collection run metrics.
+
+Prints the latest run in the Prometheus text format (for node_exporter's
+textfile collector) or recent runs as JSON. Collectors can write the same
+file directly with --metrics-out.
+"""
+import argparse
+import json
+import sys
+from pathlib import Path
+
+# Add src to path
+sys.path.insert(0, str(Path(__file__).parent))
+
+from src.database import PriceDatabase
+from src.run_metrics import run_to_dict, run_to_prometheus, write_run_metrics
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Export metrics of recent collection runs.")
+    parser.add_argument('--format', choices=('prom', 'json'), default='prom',
+                        help="Prometheus text (latest run only) or JSON (default: prom)")
+    parser.add_argument('--runs', type=int, default=1,
+                        help="Number of recent runs to export as JSON (default: 1)")
+    parser.add_argument('--out', metavar='PATH',
+                        help="Write the latest run to PATH (.prom for Prometheus text) instead of stdout")
+    parser.add_argument('--db', default="data/prices.db", help="Database file (default: data/prices.db)")
+    args = parser.parse_args()
+
+    db = PriceDatabase(args.db)
+    runs = db.get_collection_runs(limit=max(args.runs, 1))
+    db.close()
+
+    if not runs:
+        print("✗ No collection runs recorded yet", file=sys.stderr)
+        sys.exit(1)
+
+    if args.out:
+        write_run_metrics(runs[0], args.out)
+        print(f"✓ Run #{runs[0].id} written to {args.out}", file=sys.stderr)
+    elif args.format == 'prom':
+        sys.stdout.write(run_to_prometheus(runs[0]))
+    else:
+        print(json.dumps([run_to_dict(run) for run in runs], indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+"""
+Import historical prices in bulk.
+
+Streams a CSV, NDJSON or Parquet file of price observations into the
+database chunk by chunk, skipping observations already stored (same
+product, retailer and timestamp), and reports throughput. See
+src/bulk_import.py for the accepted fields.
+
+Examples:
+    python import_prices.py receipts.csv
+    gunzip -c history.ndjson.gz | python import_prices.py - --format ndjson
+"""
+import argparse
+import sys
+from pathlib import Path
+
+# Add src to path
+sys.path.insert(0, str(Path(__file__).parent))
+
+from src.bulk_import import DEFAULT_SOURCE, FORMATS, detect_format, import_prices, read_rows
+from src.database import PriceDatabase
+
+
+def print_progress(report):
+    print(f"  {report.rows_read:,} rows read, {report.inserted:,} new "
+          f"({report.rows_per_second:,.0f} rows/s)", flush=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Import historical price observations in bulk.")
+    parser.add_argument('path', help="CSV, NDJSON or Parquet file, optionally .gz; '-' for stdin")
+    parser.add_argument('--format', choices=FORMATS,
+                        help="Input format (default: from the file extension)")
+    parser.add_argument('--db', default="data/prices.db", help="Database file (default: data/prices.db)")
+    parser.add_argument('--batch-size', type=int, default=5000,
+                        help="Rows validated and written per transaction (default: 5000)")
+    parser.add_argument('--source', default=DEFAULT_SOURCE,
+                        help=f"Source recorded for rows without one (default: {DEFAULT_SOURCE})")
+    parser.add_argument('--no-run-length', dest='run_length', action='store_false',
+                        help="Keep imported observations as separate rows instead of merging them into runs")
+    parser.add_argument('--quiet', action='store_true', help="Don't print progress per batch")
+    args = parser.parse_args()
+
+    if args.path == '-' and not args.format:
+        parser.error("--format is required when reading stdin")
+    try:
+        fmt = args.format or detect_format(args.path)
+    except ValueError as e:
+        parser.error(str(e))
+
+    db = PriceDatabase(args.db, run_length=args.run_length)
+    db.tune_for_ingestion()
+    try:
+        report = import_prices(db, read_rows(args.path, fmt), chunk_size=max(args.batch_size, 1),
+                               source=args.source, on_progress=None if args.quiet else print_progress)
+    except (ImportError, OSError) as e:
+        db.close()
+        print(f"✗ {e}", file=sys.stderr)
+        sys.exit(1)
+
+    print(f"✓ {report.rows_read:,} rows read in {report.seconds:.1f}s "
+          f"({report.rows_per_second:,.0f} rows/s)")
+    print(f"✓ {report.inserted:,} inserted")
+    if report.duplicates:
+        print(f"⊘ {report.duplicates:,} already stored or repeated, skipped")
+    if report.rejected:
+        print(f"✗ {report.rejected:,} rejected")
+        for product_id, count in sorted(report.unknown_products.items(), key=lambda item: -item[1]):
+            print(f"    unknown product {product_id!r}: {count:,} row(s)")
+        for retailer_id, count in sorted(report.unknown_retailers.items(), key=lambda item: -item[1]):
+            print(f"    unknown retailer {retailer_id!r}: {count:,} row(s)")
+        for error in report.errors:
+            print(f"    {error}")
+    db.close()
+
+
+if __name__ == "__main__":
+    main()
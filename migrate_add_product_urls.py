@@ -1,6 +1,10 @@
 #!/usr/bin/env python3
 """
-Migration script to add retailer URL columns to products table and insert Eucerin product.
+Migration script to add product metadata columns and insert the Eucerin product
+with its retailer listings.
+
+Retailer URLs live in the product_listings table (created by PriceDatabase,
+which also copies over any legacy products.<retailer>_url columns).
 """
 import sqlite3
 import sys
@@ -31,7 +35,7 @@ def migrate_database():
     print(f"Current columns: {columns}")
 
     # Check if migration needed
-    new_columns = {'upc', 'target_url', 'walmart_url', 'cvs_url', 'walgreens_url', 'amazon_url', 'created_at', 'updated_at'}
+    new_columns = {'upc', 'created_at', 'updated_at'}
     missing_columns = new_columns - columns
 
     if missing_columns:
@@ -42,16 +46,6 @@ def migrate_database():
 
         if 'upc' in missing_columns:
             cursor.execute("ALTER TABLE products ADD COLUMN upc TEXT")
-        if 'target_url' in missing_columns:
-            cursor.execute("ALTER TABLE products ADD COLUMN target_url TEXT")
-        if 'walmart_url' in missing_columns:
-            cursor.execute("ALTER TABLE products ADD COLUMN walmart_url TEXT")
-        if 'cvs_url' in missing_columns:
-            cursor.execute("ALTER TABLE products ADD COLUMN cvs_url TEXT")
-        if 'walgreens_url' in missing_columns:
-            cursor.execute("ALTER TABLE products ADD COLUMN walgreens_url TEXT")
-        if 'amazon_url' in missing_columns:
-            cursor.execute("ALTER TABLE products ADD COLUMN amazon_url TEXT")
         if 'created_at' in missing_columns:
             cursor.execute("ALTER TABLE products ADD COLUMN created_at TEXT")
             # Set created_at for existing products
@@ -81,33 +75,29 @@ def add_eucerin_product():
         size="16.9 oz",
         category="skincare",
         upc="072140634827",
-        target_url="https://www.target.com/p/eucerin-advanced-repair-unscented-body-lotion-for-dry-skin-16-9-fl-oz/-/A-11005178",
-        walmart_url="https://www.walmart.com/ip/Eucerin-Advanced-Repair-Body-Lotion-Fragrance-Free-16-9-fl-oz-Bottle/10811050",
-        cvs_url="https://www.cvs.com/shop/eucerin-advanced-repair-body-lotion-16-9-oz-prodid-1016602",
-        walgreens_url="https://www.walgreens.com/store/c/eucerin-advanced-repair-body-lotion/ID=prod3970669-product",
-        amazon_url="https://www.amazon.com/Eucerin-Advanced-Repair-Lotion-Ounce/dp/B003BMJGKE"
+        urls={
+            'target': "https://www.target.com/p/eucerin-advanced-repair-unscented-body-lotion-for-dry-skin-16-9-fl-oz/-/A-11005178",
+            'walmart': "https://www.walmart.com/ip/Eucerin-Advanced-Repair-Body-Lotion-Fragrance-Free-16-9-fl-oz-Bottle/10811050",
+            'cvs': "https://www.cvs.com/shop/eucerin-advanced-repair-body-lotion-16-9-oz-prodid-1016602",
+            'walgreens': "https://www.walgreens.com/store/c/eucerin-advanced-repair-body-lotion/ID=prod3970669-product",
+            'amazon': "https://www.amazon.com/Eucerin-Advanced-Repair-Lotion-Ounce/dp/B003BMJGKE"
+        }
     )
 
     db.add_product(eucerin)
     print(f"✓ Added product: {eucerin.name} ({eucerin.size})")
     print(f"  Product ID: {eucerin.id}")
     print(f"  UPC: {eucerin.upc}")
-    print(f"  Target: {eucerin.target_url[:50]}...")
-    print(f"  Walmart: {eucerin.walmart_url[:50]}...")
-    print(f"  CVS: {eucerin.cvs_url[:50]}...")
-    print(f"  Walgreens: {eucerin.walgreens_url[:50]}...")
-    print(f"  Amazon: {eucerin.amazon_url[:50]}...")
+    for retailer_id, url in eucerin.urls.items():
+        print(f"  {retailer_id.capitalize()}: {url[:50]}...")
 
     # Verify it was added
     retrieved = db.get_product(eucerin.id)
     if retrieved:
         print(f"\n✓ Verification: Product successfully stored in database")
         print(f"  Retrieved: {retrieved.name}")
-        print(f"  Has Target URL: {bool(retrieved.target_url)}")
-        print(f"  Has Walmart URL: {bool(retrieved.walmart_url)}")
-        print(f"  Has CVS URL: {bool(retrieved.cvs_url)}")
-        print(f"  Has Walgreens URL: {bool(retrieved.walgreens_url)}")
-        print(f"  Has Amazon URL: {bool(retrieved.amazon_url)}")
+        for retailer_id in eucerin.urls:
+            print(f"  Has {retailer_id.capitalize()} listing: {bool(retrieved.get_retailer_url(retailer_id))}")
     else:
         print("\n✗ Error: Could not retrieve product from database")
 
@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+"""
+Migration script to add the numeric ts_epoch column to price_history.
+
+Windowed statistics filter on ts_epoch (indexed with product and retailer)
+instead of comparing ISO timestamp strings against SQLite's UTC datetime().
+"""
+import sqlite3
+import sys
+import time
+from pathlib import Path
+
+# Add src to path
+sys.path.insert(0, str(Path(__file__).parent))
+
+from src.database import PriceDatabase
+
+
+def migrate_database(db_path: str = "data/prices.db"):
+    """Add and backfill ts_epoch, then recompute the windowed stats summary."""
+    print(f"Migrating database: {db_path}")
+
+    # Connect directly to check if migration is needed
+    conn = sqlite3.connect(db_path)
+    cursor = conn.cursor()
+    cursor.execute("PRAGMA table_info(price_history)")
+    columns = {row[1] for row in cursor.fetchall()}
+    cursor.execute("SELECT COUNT(*) FROM price_history")
+    total_rows = cursor.fetchone()[0]
+    conn.close()
+
+    if 'ts_epoch' in columns:
+        print("✓ price_history already has ts_epoch")
+    else:
+        print(f"Adding ts_epoch and backfilling {total_rows:,} row(s)...")
+
+    started = time.perf_counter()
+
+    # Opening the database adds the column, backfills it and creates the index
+    db = PriceDatabase(db_path)
+
+    # Catch rows written by older code after the column was added
+    backfilled = db.backfill_ts_epoch()
+    if backfilled:
+        print(f"✓ Backfilled {backfilled:,} row(s) missing ts_epoch")
+
+    # Stored 30-day windows were computed with the old string comparison
+    pairs = db.rebuild_stats_summary()
+    print(f"✓ Recomputed price stats for {pairs} product/retailer pair(s)")
+
+    cursor = db.conn.cursor()
+    cursor.execute("SELECT COUNT(*) FROM price_history WHERE ts_epoch IS NULL")
+    missing = cursor.fetchone()[0]
+    db.close()
+
+    if missing:
+        print(f"✗ {missing:,} row(s) still have no ts_epoch (unparseable timestamp?)")
+    else:
+        print(f"✓ Migration completed in {time.perf_counter() - started:.1f}s")
+
+
+if __name__ == "__main__":
+    print("=" * 70)
+    print("DATABASE MIGRATION: Add price_history.ts_epoch")
+    print("=" * 70)
+
+    migrate_database(sys.argv[1] if len(sys.argv) > 1 else "data/prices.db")
+
+    print("\n" + "=" * 70)
+    print("Migration complete!")
+    print("=" * 70)
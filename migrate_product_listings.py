@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+"""
+Migration script to move retailer URLs into the product_listings table.
+
+Older databases keep one URL column per retailer on products (target_url,
+walmart_url, ...). Each non-empty URL becomes an active product_listings row;
+with --drop-url-columns the old columns are then removed (SQLite 3.35+).
+"""
+import argparse
+import sqlite3
+import sys
+import time
+from pathlib import Path
+
+# Add src to path
+sys.path.insert(0, str(Path(__file__).parent))
+
+from src.database import PriceDatabase
+
+
+def migrate_database(db_path: str = "data/prices.db", drop_url_columns: bool = False):
+    """Copy legacy URL columns into product_listings, optionally dropping the columns."""
+    print(f"Migrating database: {db_path}")
+    started = time.perf_counter()
+
+    # Opening the database creates product_listings and, the first time,
+    # copies the legacy URLs over
+    db = PriceDatabase(db_path)
+
+    # Catch URLs written to the old columns by older code since then
+    created = db.migrate_legacy_urls()
+    if created:
+        print(f"✓ Copied {created:,} URL(s) from the legacy columns")
+
+    cursor = db.conn.cursor()
+    cursor.execute("""
+        SELECT COUNT(*), COUNT(DISTINCT product_id), SUM(active)
+        FROM product_listings
+    """)
+    listings, products, active = cursor.fetchone()
+    print(f"✓ {listings:,} listing(s) for {products:,} product(s), {active or 0:,} active")
+
+    if drop_url_columns:
+        if sqlite3.sqlite_version_info < (3, 35, 0):
+            print(f"✗ SQLite {sqlite3.sqlite_version} can't drop columns (3.35+ needed); kept them")
+        else:
+            dropped = db.drop_legacy_url_columns()
+            if dropped:
+                print(f"✓ Dropped legacy column(s): {', '.join(dropped)}")
+            else:
+                print("✓ No legacy URL columns left to drop")
+    db.close()
+
+    print(f"✓ Migration completed in {time.perf_counter() - started:.1f}s")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Move retailer URLs into the product_listings table.")
+    parser.add_argument('db_path', nargs='?', default="data/prices.db")
+    parser.add_argument('--drop-url-columns', action='store_true',
+                        help="Remove the legacy products.<retailer>_url columns afterwards")
+    args = parser.parse_args()
+
+    print("=" * 70)
+    print("DATABASE MIGRATION: Retailer URLs to product_listings")
+    print("=" * 70)
+
+    migrate_database(args.db_path, args.drop_url_columns)
+
+    print("\n" + "=" * 70)
+    print("Migration complete!")
+    print("=" * 70)
@@ -0,0 +1,55 @@
+#!/usr/bin/env python3
+"""
+Migration script to convert price_history to run-length storage.
+
+Consecutive observations of an unchanged price (and pack size, savings and
+URL) at a retailer are merged into a single row recording when the run was
+first and last seen and how many times it was observed. Readers expand runs
+back into individual observations, so stats and history are unchanged while
+the table, and every range scan over it, shrinks.
+"""
+import os
+import sys
+import time
+from pathlib import Path
+
+# Add src to path
+sys.path.insert(0, str(Path(__file__).parent))
+
+from src.database import PriceDatabase
+
+
+def migrate_database(db_path: str = "data/prices.db"):
+    """Add the run columns, merge unchanged observations and reclaim the space."""
+    print(f"Migrating database: {db_path}")
+    size_before = os.path.getsize(db_path)
+    started = time.perf_counter()
+
+    # Opening the database adds and backfills the run columns and the index
+    db = PriceDatabase(db_path)
+
+    rows_before, rows_after = db.compact_price_history()
+    print(f"✓ Compacted price_history: {rows_before:,} → {rows_after:,} row(s)")
+
+    # Windows now count sightings spread across each run
+    pairs = db.rebuild_stats_summary()
+    print(f"✓ Recomputed price stats for {pairs} product/retailer pair(s)")
+
+    db.conn.execute("VACUUM")
+    db.close()
+
+    size_after = os.path.getsize(db_path)
+    print(f"✓ Database size: {size_before / 1e6:.1f} MB → {size_after / 1e6:.1f} MB")
+    print(f"✓ Migration completed in {time.perf_counter() - started:.1f}s")
+
+
+if __name__ == "__main__":
+    print("=" * 70)
+    print("DATABASE MIGRATION: Run-length price history")
+    print("=" * 70)
+
+    migrate_database(sys.argv[1] if len(sys.argv) > 1 else "data/prices.db")
+
+    print("\n" + "=" * 70)
+    print("Migration complete!")
+    print("=" * 70)
@@ -25,6 +25,9 @@ echo "========================================" >> "$LOG_FILE"
 
 EXIT_CODE=$?
 
+# Retry fetches that failed transiently, within the same collection window
+"$PROJECT_DIR/venv/bin/python3" "$PROJECT_DIR/collect_prices.py" --drain-retries >> "$LOG_FILE" 2>&1
+
 echo "" >> "$LOG_FILE"
 echo "========================================" >> "$LOG_FILE"
 echo "Price Collection Finished: $(date)" >> "$LOG_FILE"
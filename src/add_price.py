@@ -72,6 +72,19 @@ def show_current_prices():
     db.close()
 
 
+def rebuild_stats():
+    """Recompute the stats summary table from the full price history."""
+    db = PriceDatabase()
+    
+    try:
+        pairs = db.rebuild_stats_summary()
+        print(f"✓ Rebuilt price stats for {pairs} product/retailer pair(s)")
+    except Exception as e:
+        print(f"✗ Error: {e}")
+    finally:
+        db.close()
+
+
 def main():
     """Main CLI entry point."""
     if len(sys.argv) == 1:
@@ -80,6 +93,9 @@ def main():
     elif sys.argv[1] == "show":
         # Show current prices
         show_current_prices()
+    elif sys.argv[1] == "rebuild-stats":
+        # Recompute the stats summary table
+        rebuild_stats()
     elif len(sys.argv) >= 5:
         # Quick add mode: python add_price.py <product_id> <retailer_id> <price> <url>
         add_price_quick(
@@ -93,6 +109,7 @@ def main():
         print("  Interactive mode:  python add_price.py")
         print("  Quick add:        python add_price.py <product_id> <retailer_id> <price> <url>")
         print("  Show prices:      python add_price.py show")
+        print("  Rebuild stats:    python add_price.py rebuild-stats")
         print("\nExample:")
         print('  python add_price.py eucerin-eczema-5oz walmart 12.97 "https://walmart.com/..."')
 
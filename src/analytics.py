@@ -0,0 +1,255 @@
+"""
+Columnar price-history analytics with NumPy.
+
+A product/retailer history is loaded straight from the covering
+idx_price_history_runs index into contiguous arrays (int64 epoch seconds,
+float64 prices), with run-length rows expanded into their individual
+sightings, and every statistic is computed with vectorized operations
+instead of per-row Python objects.
+
+Requires numpy (see requirements.txt); nothing else in the tracker imports
+this module at startup.
+
+PriceDatabase.get_price_stats and the dashboard's retailer stats don't go
+through these arrays. In run-length storage they aggregate a row per run (or
+read price_stats_summary), while the arrays hold a value per sighting, so
+for the same numbers the SQL paths do less work. PriceArrays.stats()
+computes the same PriceStats for callers that already have the arrays.
+"""
+import math
+import sqlite3
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Dict, Iterable, Optional, Sequence, Tuple
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+from src.models import PriceStats
+
+SECONDS_PER_DAY = 86400
+
+_RUN_DTYPE = np.dtype([
+    ('ts_epoch', np.int64), ('last_epoch', np.int64), ('seen_count', np.int64),
+    ('price', np.float64), ('wall', np.int64), ('last_wall', np.int64),
+])
+
+# Runs in time order. Calendar days come from the wall-clock seconds of the
+# text timestamps (stored as naive local time) rather than the UTC epoch
+_SERIES_QUERY = """
+    SELECT ts_epoch, last_epoch, seen_count, price,
+           CAST(strftime('%s', timestamp) AS INTEGER),
+           CAST(strftime('%s', last_seen) AS INTEGER)
+    FROM price_history
+    WHERE product_id = ? AND retailer_id = ? AND last_epoch >= ?
+    ORDER BY last_epoch, ts_epoch
+"""
+
+
+@dataclass
+class PriceArrays:
+    """One product's price history at one retailer, as parallel arrays in time order."""
+    product_id: str
+    retailer_id: str
+    epochs: np.ndarray  # int64 seconds since the epoch
+    prices: np.ndarray  # float64
+    days: np.ndarray  # int64 local calendar day numbers (days since 1970-01-01)
+
+    def __len__(self) -> int:
+        return len(self.prices)
+
+    def since(self, epoch: int) -> 'PriceArrays':
+        """Observations at or after `epoch` (a view, not a copy)."""
+        start = int(np.searchsorted(self.epochs, epoch, side='left'))
+        return PriceArrays(self.product_id, self.retailer_id,
+                           self.epochs[start:], self.prices[start:], self.days[start:])
+
+    def stats(self, days: int = 30, now: Optional[int] = None) -> Optional[PriceStats]:
+        """
+        PriceStats over the last `days` days, matching PriceDatabase.get_price_stats.
+
+        Args:
+            days: Window length
+            now: Epoch second the window ends at (defaults to the current time)
+
+        Returns:
+            PriceStats, or None if nothing was observed inside the window
+        """
+        if now is None:
+            now = int(datetime.now().timestamp())
+        window = self.since(now - days * SECONDS_PER_DAY)
+        if not len(window):
+            return None
+        return PriceStats(
+            product_id=self.product_id,
+            retailer_id=self.retailer_id,
+            current_price=float(self.prices[-1]),
+            min_price=float(window.prices.min()),
+            max_price=float(window.prices.max()),
+            avg_price=float(window.prices.mean()),
+            observation_count=len(window),
+            first_seen=datetime.fromtimestamp(int(window.epochs[0])),
+            last_updated=datetime.fromtimestamp(int(window.epochs[-1]))
+        )
+
+    def rolling_mean(self, window: int) -> np.ndarray:
+        """rolling_mean() over the observed prices."""
+        return rolling_mean(self.prices, window)
+
+    def rolling_median(self, window: int) -> np.ndarray:
+        """rolling_median() over the observed prices."""
+        return rolling_median(self.prices, window)
+
+    def rolling_std(self, window: int) -> np.ndarray:
+        """rolling_std() over the observed prices."""
+        return rolling_std(self.prices, window)
+
+    def percentiles(self, q: Sequence[float] = (5, 25, 50, 75, 95)) -> Dict[float, float]:
+        """Price percentiles (linear interpolation), keyed by percentile."""
+        if not len(self):
+            return {}
+        values = np.percentile(self.prices, q)
+        return {p: float(v) for p, v in zip(q, values)}
+
+    def drawdowns(self) -> np.ndarray:
+        """drawdowns() over the observed prices."""
+        return drawdowns(self.prices)
+
+    def max_drawdown(self) -> float:
+        """Largest fractional drop from a previous high (0 if prices never fell)."""
+        values = self.drawdowns()
+        return float(values.max()) if len(values) else 0.0
+
+    def daily(self) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Resample to one price per calendar day.
+
+        Uses the last observation of each day and carries it forward over days
+        without observations.
+
+        Returns:
+            (days as datetime64[D], prices) covering first to last observed day
+        """
+        if not len(self):
+            return np.empty(0, dtype='datetime64[D]'), np.empty(0)
+        # Index of the last observation on each observed day
+        last_of_day = np.flatnonzero(np.diff(self.days, append=self.days[-1] + 1))
+        observed_days = self.days[last_of_day]
+        calendar = np.arange(observed_days[0], observed_days[-1] + 1)
+        # For every calendar day, the most recent observed day at or before it
+        slot = np.searchsorted(observed_days, calendar, side='right') - 1
+        return calendar.astype('datetime64[D]'), self.prices[last_of_day][slot]
+
+
+def rolling_mean(values: np.ndarray, window: int) -> np.ndarray:
+    """Mean of each run of `window` values; NaN until the first full window."""
+    out = np.full(len(values), np.nan)
+    if 0 < window <= len(values):
+        sums = np.cumsum(np.concatenate(([0.0], values)))
+        out[window - 1:] = (sums[window:] - sums[:-window]) / window
+    return out
+
+
+def rolling_median(values: np.ndarray, window: int) -> np.ndarray:
+    """Median of each run of `window` values; NaN until the first full window."""
+    out = np.full(len(values), np.nan)
+    if 0 < window <= len(values):
+        out[window - 1:] = np.median(sliding_window_view(values, window), axis=1)
+    return out
+
+
+def rolling_std(values: np.ndarray, window: int) -> np.ndarray:
+    """Population standard deviation of each run of `window` values."""
+    out = np.full(len(values), np.nan)
+    if 0 < window <= len(values):
+        out[window - 1:] = sliding_window_view(values, window).std(axis=1)
+    return out
+
+
+def drawdowns(values: np.ndarray) -> np.ndarray:
+    """Fractional drop of each value below the highest value seen so far (0 to 1)."""
+    if not len(values):
+        return np.empty(0)
+    return 1.0 - values / np.maximum.accumulate(values)
+
+
+def _spread(first: np.ndarray, last: np.ndarray, counts: np.ndarray,
+            run: np.ndarray, position: np.ndarray) -> np.ndarray:
+    """Evenly spaced sighting times within runs, as PriceDatabase expands them."""
+    gaps = np.maximum(counts - 1, 1)[run]
+    return first[run] + ((last - first)[run] * position) // gaps
+
+
+def _from_rows(product_id: str, retailer_id: str, rows: Iterable[tuple]) -> PriceArrays:
+    data = np.fromiter(rows, dtype=_RUN_DTYPE)
+    counts = data['seen_count']
+    # Run index and position within the run for every sighting
+    run = np.repeat(np.arange(len(data)), counts)
+    position = np.arange(len(run)) - np.repeat(np.cumsum(counts) - counts, counts)
+    walls = _spread(data['wall'], data['last_wall'], counts, run, position)
+    return PriceArrays(
+        product_id=product_id,
+        retailer_id=retailer_id,
+        epochs=_spread(data['ts_epoch'], data['last_epoch'], counts, run, position),
+        prices=data['price'][run],
+        days=walls // SECONDS_PER_DAY
+    )
+
+
+def load_price_arrays(conn: sqlite3.Connection, product_id: str, retailer_id: str,
+                      since: int = 0) -> PriceArrays:
+    """
+    Load a product's history at a retailer into arrays.
+
+    Args:
+        conn: Connection to the price database (e.g. PriceDatabase.conn)
+        product_id: Product identifier
+        retailer_id: Retailer identifier
+        since: Only load observations at or after this epoch second
+
+    Returns:
+        PriceArrays in time order (empty if there is no history)
+    """
+    cursor = conn.cursor()
+    cursor.row_factory = None
+    cursor.execute(_SERIES_QUERY, (product_id, retailer_id, since))
+    arrays = _from_rows(product_id, retailer_id, cursor)
+    # The first run loaded may have started before `since`
+    return arrays.since(since) if since else arrays
+
+
+def summarize(arrays: PriceArrays, window: int = 7) -> dict:
+    """
+    JSON-ready analytics for one history.
+
+    Args:
+        arrays: History to summarize
+        window: Days per rolling window, applied to the daily series
+
+    Returns:
+        Dict of percentiles, drawdown and the daily series with rolling stats
+    """
+    days, prices = arrays.daily()
+    columns = zip(
+        days.astype(str).tolist(),
+        prices.tolist(),
+        _nan_to_none(rolling_mean(prices, window)),
+        _nan_to_none(rolling_median(prices, window)),
+        _nan_to_none(rolling_std(prices, window)),
+    )
+    return {
+        'productId': arrays.product_id,
+        'retailer': arrays.retailer_id,
+        'observations': len(arrays),
+        'percentiles': {str(p): v for p, v in arrays.percentiles().items()},
+        'maxDrawdown': arrays.max_drawdown(),
+        'window': window,
+        'daily': [
+            {'date': date, 'price': price, 'mean': mean, 'median': median, 'std': std}
+            for date, price, mean, median, std in columns
+        ],
+    }
+
+
+def _nan_to_none(values: np.ndarray) -> list:
+    return [None if math.isnan(v) else v for v in values.tolist()]
@@ -0,0 +1,175 @@
+"""
+Minimal asyncio HTTP/1.1 client for the async collection pipeline.
+
+The asyncio counterpart of http_client.HttpSession, built on the standard
+library's streams: a request in flight is a coroutine waiting on a socket
+rather than a thread, so thousands of pages can be fetched at once.
+Connections are kept alive and pooled per host, and responses come back as
+the same HttpResponse the scrapers already parse.
+"""
+import asyncio
+import ssl
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import urljoin, urlsplit
+
+from src.http_client import DEFAULT_HEADERS, MAX_REDIRECTS, HttpResponse, _decode_body
+
+
+_HostKey = Tuple[str, str, int]
+_Connection = Tuple[asyncio.StreamReader, asyncio.StreamWriter]
+
+
+class AsyncHttpClient:
+    """Keep-alive HTTP client for use from a single event loop."""
+
+    def __init__(self, timeout: float = 15.0, max_idle_per_host: int = 8,
+                 headers: Optional[Dict[str, str]] = None):
+        """
+        Args:
+            timeout: Seconds allowed for each request, from connect to last byte
+            max_idle_per_host: Idle connections kept open for reuse per host
+            headers: Default request headers (merged over DEFAULT_HEADERS)
+        """
+        self.timeout = timeout
+        self.max_idle_per_host = max_idle_per_host
+        self.headers = {**DEFAULT_HEADERS, **(headers or {})}
+        self._idle: Dict[_HostKey, List[_Connection]] = {}
+        self._ssl: Optional[ssl.SSLContext] = None
+        self.connections_opened = 0
+        self.requests_sent = 0
+        self.bytes_received = 0
+
+    async def get(self, url: str, headers: Optional[Dict[str, str]] = None) -> HttpResponse:
+        """GET a URL, following redirects, and return the decoded response."""
+        request_headers = {**self.headers, **(headers or {})}
+        for _ in range(MAX_REDIRECTS + 1):
+            response = await asyncio.wait_for(self._request(url, request_headers), self.timeout)
+            location = response.headers.get('location')
+            if response.status in (301, 302, 303, 307, 308) and location:
+                url = urljoin(url, location)
+                continue
+            return response
+        raise ConnectionError(f"Too many redirects fetching {url}")
+
+    async def _request(self, url: str, headers: Dict[str, str]) -> HttpResponse:
+        parts = urlsplit(url)
+        scheme = parts.scheme or 'http'
+        default_port = 443 if scheme == 'https' else 80
+        port = parts.port or default_port
+        key = (scheme, parts.hostname or '', port)
+        path = parts.path or '/'
+        if parts.query:
+            path = f"{path}?{parts.query}"
+        host = key[1] if port == default_port else f"{key[1]}:{port}"
+        lines = [f"GET {path} HTTP/1.1", f"Host: {host}"]
+        lines += [f"{name}: {value}" for name, value in headers.items()]
+        request = ("\r\n".join(lines) + "\r\n\r\n").encode('latin-1')
+
+        # A pooled connection may have been closed by the server while idle;
+        # retry once on a fresh connection in that case
+        for attempt in range(2):
+            (reader, writer), reused = await self._checkout(key)
+            try:
+                writer.write(request)
+                await writer.drain()
+                status, response_headers, body, will_close = await _read_response(reader)
+            except (ConnectionError, asyncio.IncompleteReadError):
+                writer.close()
+                if reused and attempt == 0:
+                    continue
+                raise
+            except BaseException:
+                # Includes cancellation: the connection is mid-response and can't be reused
+                writer.close()
+                raise
+
+            self.requests_sent += 1
+            self.bytes_received += len(body)
+            if will_close:
+                writer.close()
+            else:
+                self._checkin(key, (reader, writer))
+
+            return HttpResponse(
+                url=url,
+                status=status,
+                headers=response_headers,
+                body=_decode_body(body, response_headers.get('content-encoding', '')),
+            )
+        raise ConnectionError(f"Could not fetch {url}")
+
+    async def _checkout(self, key: _HostKey) -> Tuple[_Connection, bool]:
+        idle = self._idle.get(key)
+        while idle:
+            reader, writer = idle.pop()
+            if not reader.at_eof() and not writer.is_closing():
+                return (reader, writer), True
+            writer.close()
+        self.connections_opened += 1
+        scheme, host, port = key
+        if scheme == 'https':
+            if self._ssl is None:
+                self._ssl = ssl.create_default_context()
+            return await asyncio.open_connection(host, port, ssl=self._ssl), False
+        return await asyncio.open_connection(host, port), False
+
+    def _checkin(self, key: _HostKey, conn: _Connection):
+        idle = self._idle.setdefault(key, [])
+        if len(idle) < self.max_idle_per_host:
+            idle.append(conn)
+        else:
+            conn[1].close()
+
+    async def close(self):
+        """Close all idle connections."""
+        idle, self._idle = self._idle, {}
+        writers = [writer for conns in idle.values() for _, writer in conns]
+        for writer in writers:
+            writer.close()
+        for writer in writers:
+            try:
+                await writer.wait_closed()
+            except (ConnectionError, ssl.SSLError):
+                pass
+
+
+async def _read_response(reader: asyncio.StreamReader) -> Tuple[int, Dict[str, str], bytes, bool]:
+    """Read one response: (status, lower-cased headers, raw body, connection will close)."""
+    status_line = await reader.readline()
+    if not status_line:
+        raise ConnectionResetError("Connection closed before the response")
+    version, status_text = status_line.decode('latin-1').split(None, 2)[:2]
+    status = int(status_text)
+
+    headers: Dict[str, str] = {}
+    while True:
+        line = await reader.readline()
+        if line in (b'\r\n', b'\n', b''):
+            break
+        name, _, value = line.decode('latin-1').partition(':')
+        name, value = name.strip().lower(), value.strip()
+        headers[name] = f"{headers[name]}, {value}" if name in headers else value
+
+    connection = headers.get('connection', '').lower()
+    will_close = connection == 'close' or (version == 'HTTP/1.0' and connection != 'keep-alive')
+
+    if status in (204, 304) or 100 <= status < 200:
+        body = b''
+    elif 'chunked' in headers.get('transfer-encoding', '').lower():
+        chunks = []
+        while True:
+            size = int((await reader.readline()).split(b';', 1)[0], 16)
+            if size == 0:
+                # Trailers, up to the blank line
+                while (await reader.readline()) not in (b'\r\n', b'\n', b''):
+                    pass
+                break
+            chunks.append(await reader.readexactly(size))
+            await reader.readline()
+        body = b''.join(chunks)
+    elif 'content-length' in headers:
+        body = await reader.readexactly(int(headers['content-length']))
+    else:
+        body = await reader.read()
+        will_close = True
+    return status, headers, body, will_close
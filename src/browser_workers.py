@@ -0,0 +1,405 @@
+"""
+Supervised worker processes for the browser tier.
+
+Selenium drivers leak memory and occasionally hang inside driver.get(). Run
+in the collector's own process, one stuck page stalls the whole run and
+leaked browsers pile up. With a BrowserProcessPool attached to a scraper
+(scraper.browser_processes), BaseScraper.render_price hands the render to a
+worker process instead:
+
+- every job has a hard wall-clock timeout; a worker that overruns it is
+  killed together with its browsers (each worker leads its own process
+  group) and a fresh worker takes the next job;
+- after each job a worker reports the resident memory of itself and its
+  browsers; a worker over `max_rss_mb`, or that has served `max_jobs` jobs,
+  is retired and replaced;
+- results come back over a multiprocessing queue, read by a supervisor
+  thread that also enforces the timeouts and notices crashed workers.
+
+Usage:
+    pool = BrowserProcessPool(workers=2)
+    scraper.browser_processes = pool
+    ...
+    pool.close()
+
+Workers are started on demand, keep their drivers warm between jobs
+(driver_pool, one browser per profile) and are spawned rather than forked,
+so none of the collector's threads or locks are copied into them.
+"""
+import itertools
+import os
+import queue
+import signal
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
+from dataclasses import dataclass, asdict
+from typing import Any, Deque, Dict, List, Optional, Tuple
+
+from src.models import PricePoint
+
+
+DEFAULT_JOB_TIMEOUT = 120.0  # Seconds from dispatch to result, including browser startup
+DEFAULT_MAX_RSS_MB = 1500.0  # Worker plus its browsers
+DEFAULT_MAX_JOBS = 100  # Jobs before a worker is replaced anyway
+RETIRE_GRACE_SECONDS = 30.0  # Time a retired worker gets to quit its browsers
+
+
+class BrowserJobError(Exception):
+    """Raised by render() when a job timed out, its worker died or the scrape raised."""
+
+
+@dataclass
+class ProcessPoolMetrics:
+    """Counters describing how the worker processes were used."""
+    jobs: int = 0  # Jobs submitted
+    completed: int = 0  # Jobs a worker answered (with or without a price)
+    timeouts: int = 0  # Workers killed for overrunning a job
+    crashes: int = 0  # Workers that died while running a job
+    recycled_rss: int = 0  # Workers retired for exceeding max_rss_mb
+    recycled_jobs: int = 0  # Workers retired after max_jobs jobs
+    workers_started: int = 0
+    peak_rss_mb: float = 0.0  # Largest footprint a worker reported
+
+
+def process_group_rss_mb(pgid: Optional[int] = None) -> Optional[float]:
+    """
+    Resident memory of every process in a process group, in MiB.
+
+    Args:
+        pgid: Process group (defaults to the caller's)
+
+    Returns:
+        Total RSS, or None where /proc is unavailable
+    """
+    pgid = os.getpgrp() if pgid is None else pgid
+    try:
+        pids = [entry for entry in os.listdir('/proc') if entry.isdigit()]
+    except OSError:
+        return None
+    page_size = os.sysconf('SC_PAGE_SIZE')
+    total = 0
+    for pid in pids:
+        try:
+            with open(f'/proc/{pid}/stat', 'rb') as f:
+                stat = f.read()
+        except OSError:
+            continue  # Exited while we were looking
+        # Fields after the parenthesised command name: state, ppid, pgrp, ... rss is the 22nd
+        fields = stat.rsplit(b')', 1)[1].split()
+        if int(fields[2]) == pgid:
+            total += int(fields[21]) * page_size
+    return total / 2**20
+
+
+def _exit_on_sigterm(signum, frame):
+    raise SystemExit(0)
+
+
+def _worker_main(worker_id: int, jobs: Any, results: Any):
+    """Worker process: run browser renders until told to stop."""
+    from src.driver_pool import close_all_pools, configure_pools
+    from src.scraper import BlockedError
+
+    # Lead a process group so a timeout kills the browsers along with us; the
+    # collector handles Ctrl-C and shuts the workers down itself
+    if hasattr(os, 'setsid'):
+        os.setsid()
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    # Terminated along with an exiting collector: still quit the browsers
+    signal.signal(signal.SIGTERM, _exit_on_sigterm)
+    configure_pools(size=1)
+
+    scrapers: Dict[type, Any] = {}
+    try:
+        while True:
+            job = jobs.get()
+            if job is None:
+                return
+            job_id, scraper_class, product_id, url = job
+            scraper = None
+            price_point = None
+            error = None
+            blocked = False
+            try:
+                scraper = scrapers.get(scraper_class)
+                if scraper is None:
+                    scraper = scrapers[scraper_class] = scraper_class()
+                scraper.selector_stats.clear()
+                scraper.stage_stats.clear()
+                price_point = scraper._run_browser(product_id, url)
+            except BlockedError as e:
+                error = str(e)
+                blocked = True
+            except Exception as e:
+                error = f"{type(e).__name__}: {e}"
+            selector_stats = dict(scraper.selector_stats) if scraper else {}
+            stage_stats = dict(scraper.stage_stats) if scraper else {}
+            results.put((worker_id, job_id, price_point, error, blocked, selector_stats, stage_stats,
+                         process_group_rss_mb()))
+    finally:
+        close_all_pools()
+
+
+@dataclass
+class _Job:
+    id: int
+    scraper_class: type
+    product_id: str
+    url: str
+    future: Future
+
+
+class _Worker:
+    """A worker process plus the supervisor's bookkeeping about it."""
+
+    def __init__(self, worker_id: int, process: Any, jobs: Any):
+        self.id = worker_id
+        self.process = process
+        self.jobs = jobs
+        self.job: Optional[_Job] = None
+        self.deadline = 0.0
+        self.jobs_done = 0
+        self.retire_by: Optional[float] = None  # Set once told to stop
+
+
+class BrowserProcessPool:
+    """Runs browser renders in supervised, recyclable worker processes."""
+
+    def __init__(self, workers: int = 2, job_timeout: Optional[float] = None,
+                 max_rss_mb: Optional[float] = None, max_jobs: Optional[int] = None):
+        """
+        Args:
+            workers: Most worker processes alive (and jobs running) at once
+            job_timeout: Seconds a job may run before its worker is killed
+            max_rss_mb: Memory (worker plus browsers) above which a worker is replaced
+            max_jobs: Jobs after which a worker is replaced
+        """
+        if workers < 1:
+            raise ValueError("Need at least one worker process")
+        self.size = workers
+        self.job_timeout = job_timeout or _settings['job_timeout']
+        self.max_rss_mb = max_rss_mb or _settings['max_rss_mb']
+        self.max_jobs = max_jobs or _settings['max_jobs']
+        self._ctx = None  # Spawn context, created with the first job
+        self._results = None
+        self._pending: Deque[_Job] = deque()
+        self._workers: Dict[int, _Worker] = {}
+        self._retiring: List[_Worker] = []
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+        self._supervisor: Optional[threading.Thread] = None
+        self._closed = False
+        self._metrics = ProcessPoolMetrics()
+
+    def render(self, scraper: Any, product_id: str,
+               url: str) -> Tuple[Optional[PricePoint], Dict[str, Any], Dict[str, Any]]:
+        """
+        Run scraper._fetch_browser(product_id, url) in a worker process.
+
+        Blocks until the job finishes. Safe to call from many threads.
+
+        Returns:
+            (price point or None, the selector stats and the stage timings
+            the render recorded)
+
+        Raises:
+            BlockedError: The retailer served a block page
+            BrowserJobError: The job timed out, the worker died or the scrape raised
+        """
+        future: Future = Future()
+        with self._lock:
+            if self._closed:
+                raise BrowserJobError("Browser process pool is closed")
+            self._pending.append(_Job(next(self._ids), type(scraper), product_id, url, future))
+            self._metrics.jobs += 1
+            if self._supervisor is None:
+                # multiprocessing is imported here rather than at startup, since
+                # most runs never need a browser
+                import multiprocessing
+                self._ctx = multiprocessing.get_context('spawn')
+                self._results = self._ctx.Queue()
+                self._supervisor = threading.Thread(target=self._supervise, daemon=True,
+                                                    name='browser-supervisor')
+                self._supervisor.start()
+        return future.result()
+
+    def _supervise(self):
+        try:
+            self._supervise_loop()
+        except BaseException as e:
+            # Don't leave callers waiting on jobs nobody is watching any more
+            with self._lock:
+                self._closed = True
+                self._shut_down(f"Browser supervisor failed: {e!r}", kill=True)
+            raise
+
+    def _supervise_loop(self):
+        while True:
+            with self._lock:
+                if self._closed and not self._workers and not self._retiring:
+                    return
+                self._dispatch()
+            try:
+                message = self._results.get(timeout=0.1)
+            except queue.Empty:
+                message = None
+            with self._lock:
+                if message is not None:
+                    self._complete(*message)
+                self._check_workers()
+
+    def _dispatch(self):
+        while self._pending and not self._closed:
+            worker = next((w for w in self._workers.values() if w.job is None), None)
+            if worker is None:
+                if len(self._workers) >= self.size:
+                    return
+                worker = self._start_worker()
+            job = self._pending.popleft()
+            if not job.future.set_running_or_notify_cancel():
+                continue
+            worker.job = job
+            worker.deadline = time.monotonic() + self.job_timeout
+            worker.jobs.put((job.id, job.scraper_class, job.product_id, job.url))
+
+    def _start_worker(self) -> _Worker:
+        worker_id = next(self._ids)
+        jobs = self._ctx.Queue()
+        process = self._ctx.Process(target=_worker_main, args=(worker_id, jobs, self._results),
+                                    name=f'browser-worker-{worker_id}', daemon=True)
+        process.start()
+        self._metrics.workers_started += 1
+        worker = self._workers[worker_id] = _Worker(worker_id, process, jobs)
+        return worker
+
+    def _complete(self, worker_id: int, job_id: int, price_point: Optional[PricePoint],
+                  error: Optional[str], blocked: bool, selector_stats: Dict[str, Any],
+                  stage_stats: Dict[str, Any], rss_mb: Optional[float]):
+        worker = self._workers.get(worker_id)
+        if worker is None or worker.job is None or worker.job.id != job_id:
+            return  # The job already timed out
+        job, worker.job = worker.job, None
+        worker.jobs_done += 1
+        self._metrics.completed += 1
+        if rss_mb is not None:
+            self._metrics.peak_rss_mb = max(self._metrics.peak_rss_mb, rss_mb)
+
+        if blocked:
+            from src.scraper import BlockedError
+            job.future.set_exception(BlockedError(error))
+        elif error:
+            job.future.set_exception(BrowserJobError(error))
+        else:
+            job.future.set_result((price_point, selector_stats, stage_stats))
+
+        if rss_mb is not None and rss_mb > self.max_rss_mb:
+            self._metrics.recycled_rss += 1
+            self._retire(worker)
+        elif worker.jobs_done >= self.max_jobs:
+            self._metrics.recycled_jobs += 1
+            self._retire(worker)
+
+    def _check_workers(self):
+        now = time.monotonic()
+        for worker in list(self._workers.values()):
+            if worker.job is not None and now > worker.deadline:
+                self._metrics.timeouts += 1
+                self._kill(worker)
+                self._fail(worker, f"Browser job timed out after {self.job_timeout:g}s")
+            elif not worker.process.is_alive():
+                if worker.job is not None:
+                    self._metrics.crashes += 1
+                    self._fail(worker, f"Browser worker died (exit code {worker.process.exitcode})")
+                self._workers.pop(worker.id, None)
+        for worker in list(self._retiring):
+            if not worker.process.is_alive():
+                worker.process.join()
+                self._retiring.remove(worker)
+            elif now > worker.retire_by:
+                self._kill(worker)
+                self._retiring.remove(worker)
+
+    def _fail(self, worker: _Worker, reason: str):
+        job, worker.job = worker.job, None
+        self._workers.pop(worker.id, None)
+        job.future.set_exception(BrowserJobError(f"{reason}: {job.url}"))
+
+    def _retire(self, worker: _Worker):
+        """Ask an idle worker to quit its browsers and exit."""
+        self._workers.pop(worker.id, None)
+        worker.jobs.put(None)
+        worker.retire_by = time.monotonic() + RETIRE_GRACE_SECONDS
+        self._retiring.append(worker)
+
+    @staticmethod
+    def _kill(worker: _Worker):
+        """Kill a worker and every browser it started."""
+        try:
+            if hasattr(os, 'killpg'):
+                os.killpg(worker.process.pid, signal.SIGKILL)
+            else:
+                worker.process.kill()
+        except (ProcessLookupError, PermissionError):
+            worker.process.kill()
+        worker.process.join(5)
+
+    def metrics(self) -> Dict[str, Any]:
+        """Snapshot of the counters plus current worker counts."""
+        with self._lock:
+            snapshot = asdict(self._metrics)
+            snapshot.update(
+                size=self.size,
+                live=len(self._workers),
+                busy=sum(1 for w in self._workers.values() if w.job is not None),
+                queued=len(self._pending),
+            )
+        return snapshot
+
+    def close(self):
+        """Stop all workers: idle ones quit their browsers, busy ones are killed."""
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+            self._shut_down("Browser process pool closed")
+            supervisor = self._supervisor
+        if supervisor is not None:
+            supervisor.join()
+
+    def _shut_down(self, reason: str, kill: bool = False):
+        """Fail queued and running jobs; retire idle workers (or kill them all)."""
+        while self._pending:
+            self._pending.popleft().future.set_exception(BrowserJobError(reason))
+        for worker in list(self._workers.values()):
+            if worker.job is not None or kill:
+                self._kill(worker)
+                if worker.job is not None:
+                    self._fail(worker, reason)
+                self._workers.pop(worker.id, None)
+            else:
+                self._retire(worker)
+        if kill:
+            for worker in self._retiring:
+                self._kill(worker)
+            self._retiring.clear()
+
+
+_settings: Dict[str, Any] = {
+    'job_timeout': DEFAULT_JOB_TIMEOUT,
+    'max_rss_mb': DEFAULT_MAX_RSS_MB,
+    'max_jobs': DEFAULT_MAX_JOBS,
+}
+
+
+def configure_browser_processes(job_timeout: Optional[float] = None,
+                                max_rss_mb: Optional[float] = None,
+                                max_jobs: Optional[int] = None):
+    """Set defaults for BrowserProcessPools created after this call."""
+    if job_timeout is not None:
+        _settings['job_timeout'] = job_timeout
+    if max_rss_mb is not None:
+        _settings['max_rss_mb'] = max_rss_mb
+    if max_jobs is not None:
+        _settings['max_jobs'] = max_jobs
@@ -0,0 +1,315 @@
+"""
+Streaming bulk import of historical price observations.
+
+For loading years of prices from receipts or other trackers in one go.
+Input is read a chunk at a time, so files of any size import in constant
+memory: each chunk is validated, then written in one transaction that skips
+observations price_history already has, as rows or as sightings inside a run
+(see PriceDatabase.import_price_rows). Runs are merged and the stats summary
+is rebuilt once, after the last chunk.
+
+Formats: CSV (with a header row), NDJSON (one JSON object per line) and
+Parquet (needs pyarrow). CSV and NDJSON may be gzipped (*.gz) or read from
+stdin ('-').
+
+Fields (CSV header, NDJSON keys or Parquet columns):
+    product_id (or product)         required, must be in the products table
+    retailer_id (or retailer)       required, must be a configured retailer or have a listing
+    price                           required, e.g. 12.97 or "$12.97"
+    timestamp                       required, ISO 8601 or Unix seconds
+    pack_size                       default 1
+    advertised_savings (or savings) optional
+    url                             default: the product's listing URL at the retailer
+    source                          default: 'import'
+
+Usage:
+    db = PriceDatabase()
+    report = import_prices(db, read_rows('receipts.csv'))
+    print(f"{report.inserted} new rows, {report.rows_per_second:.0f} rows/s")
+"""
+import csv
+import gzip
+import io
+import json
+import sys
+import time
+from dataclasses import dataclass, field
+from datetime import datetime
+from itertools import islice
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Set, Tuple
+
+from src.structured_price import parse_price
+
+FORMATS = ('csv', 'ndjson', 'parquet')
+
+# Alternative field names accepted in input files
+FIELD_ALIASES = {
+    'product': 'product_id',
+    'retailer': 'retailer_id',
+    'savings': 'advertised_savings',
+}
+
+DEFAULT_SOURCE = 'import'
+
+# Rejected rows kept (with their row numbers) for the report
+MAX_ERRORS_KEPT = 20
+
+class RowError(ValueError):
+    """Raised for an input row that can't be imported."""
+
+
+class UnknownIdError(RowError):
+    """Raised for a row naming a product or retailer the database doesn't have."""
+
+    def __init__(self, kind: str, value: str):
+        super().__init__(f"unknown {kind} {value!r}")
+        self.kind = kind
+        self.value = value
+
+
+@dataclass
+class ImportReport:
+    """What an import did and how fast."""
+    rows_read: int = 0
+    inserted: int = 0
+    duplicates: int = 0  # Already stored, or repeated within the input
+    rejected: int = 0
+    seconds: float = 0.0
+    errors: List[str] = field(default_factory=list)  # First MAX_ERRORS_KEPT rejections
+    unknown_products: Dict[str, int] = field(default_factory=dict)  # Rows rejected per unknown id
+    unknown_retailers: Dict[str, int] = field(default_factory=dict)
+
+    @property
+    def rows_per_second(self) -> float:
+        return self.rows_read / self.seconds if self.seconds else 0.0
+
+
+def detect_format(path: str) -> str:
+    """Input format from the file name (ignoring a .gz suffix)."""
+    suffixes = [s.lower() for s in Path(path).suffixes if s.lower() != '.gz']
+    suffix = suffixes[-1] if suffixes else ''
+    if suffix == '.csv':
+        return 'csv'
+    if suffix in ('.ndjson', '.jsonl', '.json'):
+        return 'ndjson'
+    if suffix == '.parquet':
+        return 'parquet'
+    raise ValueError(f"Can't tell the format of {path}; pass one of {', '.join(FORMATS)}")
+
+
+def _open_text(path: str):
+    if path == '-':
+        return io.TextIOWrapper(sys.stdin.buffer, encoding='utf-8-sig', newline='')
+    if path.endswith('.gz'):
+        return gzip.open(path, 'rt', encoding='utf-8-sig', newline='')
+    return open(path, encoding='utf-8-sig', newline='')
+
+
+def read_rows(path: str, fmt: Optional[str] = None, batch_size: int = 10000) -> Iterator[Any]:
+    """
+    Stream records from an input file.
+
+    Args:
+        path: File to read, or '-' for stdin
+        fmt: 'csv', 'ndjson' or 'parquet' (default: from the file name)
+        batch_size: Rows per read for Parquet
+
+    Yields:
+        One dict per row; a RowError in place of an NDJSON line that isn't JSON
+
+    Raises:
+        ImportError: Parquet input without pyarrow installed
+    """
+    fmt = fmt or detect_format(path)
+    if fmt == 'parquet':
+        try:
+            import pyarrow.parquet as pq
+        except ImportError:
+            raise ImportError("Reading Parquet needs pyarrow: pip install pyarrow") from None
+        for batch in pq.ParquetFile(path).iter_batches(batch_size=batch_size):
+            yield from batch.to_pylist()
+        return
+
+    with _open_text(path) as f:
+        if fmt == 'csv':
+            yield from csv.DictReader(f)
+            return
+        for line in f:
+            if not line.strip():
+                continue
+            try:
+                yield json.loads(line)
+            except ValueError as e:
+                yield RowError(f"not JSON ({e})")
+
+
+def parse_timestamp(value: Any) -> datetime:
+    """
+    Turn an ISO 8601 string or Unix seconds into a naive local datetime,
+    the form price_history timestamps are stored in.
+    """
+    if isinstance(value, datetime):
+        observed = value
+    elif isinstance(value, (int, float)) and not isinstance(value, bool):
+        return datetime.fromtimestamp(value)
+    elif isinstance(value, str) and value.strip():
+        text = value.strip()
+        try:
+            observed = datetime.fromisoformat(text)
+        except ValueError:
+            try:
+                return datetime.fromtimestamp(float(text))
+            except ValueError:
+                raise RowError(f"bad timestamp {value!r}") from None
+    else:
+        raise RowError("missing timestamp")
+    if observed.tzinfo is not None:
+        observed = observed.astimezone().replace(tzinfo=None)
+    return observed
+
+
+def _optional(record: Dict[str, Any], name: str) -> Any:
+    value = record.get(name)
+    if isinstance(value, str):
+        value = value.strip()
+    return None if value in (None, '') else value
+
+
+class RowValidator:
+    """Checks input records and turns them into PriceDatabase.import_price_rows rows."""
+
+    def __init__(self, product_ids: Set[str], retailer_ids: Set[str],
+                 listing_urls: Dict[Tuple[str, str], str], source: str = DEFAULT_SOURCE):
+        """
+        Args:
+            product_ids: Products rows may refer to
+            retailer_ids: Retailers rows may refer to (PriceDatabase.get_retailer_ids)
+            listing_urls: URL to record for rows without one, by (product, retailer)
+            source: Source recorded for rows without one
+        """
+        self.product_ids = product_ids
+        self.retailer_ids = retailer_ids
+        self.listing_urls = listing_urls
+        self.source = source
+
+    def row(self, record: Any) -> tuple:
+        """
+        Raises:
+            RowError: The record is malformed
+            UnknownIdError: The record refers to an unknown product or retailer
+        """
+        if isinstance(record, RowError):
+            raise record
+        if not isinstance(record, dict):
+            raise RowError("expected an object of fields")
+        if any(alias in record for alias in FIELD_ALIASES):
+            record = {FIELD_ALIASES.get(k, k): v for k, v in record.items()}
+
+        product_id = _optional(record, 'product_id')
+        if product_id is None:
+            raise RowError("missing product_id")
+        product_id = str(product_id)
+        if product_id not in self.product_ids:
+            raise UnknownIdError('product', product_id)
+        retailer_id = _optional(record, 'retailer_id')
+        if retailer_id is None:
+            raise RowError("missing retailer_id")
+        retailer_id = str(retailer_id)
+        if retailer_id not in self.retailer_ids:
+            raise UnknownIdError('retailer', retailer_id)
+
+        price = parse_price(_optional(record, 'price'))
+        if price is None:
+            raise RowError(f"bad price {record.get('price')!r}")
+        observed = parse_timestamp(_optional(record, 'timestamp'))
+
+        pack_size = _optional(record, 'pack_size')
+        try:
+            pack_size = 1 if pack_size is None else int(pack_size)
+        except (TypeError, ValueError):
+            raise RowError(f"bad pack_size {pack_size!r}") from None
+        if pack_size < 1:
+            raise RowError(f"bad pack_size {pack_size!r}")
+        savings = _optional(record, 'advertised_savings')
+        if savings is not None:
+            try:
+                savings = float(str(savings).lstrip('$'))
+            except ValueError:
+                raise RowError(f"bad advertised_savings {savings!r}") from None
+
+        url = _optional(record, 'url') or self.listing_urls.get((product_id, retailer_id), '')
+        source = _optional(record, 'source') or self.source
+        return (product_id, retailer_id, price, observed.isoformat(), int(observed.timestamp()),
+                str(url), pack_size, savings, str(source))
+
+
+def _chunks(records: Iterable[Any], size: int) -> Iterator[List[Any]]:
+    iterator = iter(records)
+    while True:
+        chunk = list(islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def import_prices(db, records: Iterable[Any], chunk_size: int = 5000, source: str = DEFAULT_SOURCE,
+                  on_progress: Optional[Callable[[ImportReport], None]] = None) -> ImportReport:
+    """
+    Validate and insert records a chunk at a time, then rebuild the stats summary.
+
+    With a run-length database (PriceDatabase(run_length=True)), imported
+    observations are then merged into runs with the stored ones, so later
+    collector writes extend the right run.
+
+    Args:
+        db: PriceDatabase to import into
+        records: Rows as produced by read_rows()
+        chunk_size: Rows validated and written per transaction
+        source: Source recorded for rows without one
+        on_progress: Called with the running report after every chunk
+
+    Returns:
+        ImportReport (rows that failed validation are counted, not raised)
+    """
+    started = time.perf_counter()
+    report = ImportReport()
+    validator = RowValidator({p.id for p in db.get_all_products()}, db.get_retailer_ids(),
+                             {(l.product_id, l.retailer_id): l.url for l in db.get_listings()},
+                             source)
+    unknown = {'product': report.unknown_products, 'retailer': report.unknown_retailers}
+
+    touched = set()
+    row_number = 0
+    for chunk in _chunks(records, chunk_size):
+        rows = []
+        for record in chunk:
+            row_number += 1
+            try:
+                rows.append(validator.row(record))
+            except UnknownIdError as e:
+                report.rejected += 1
+                counts = unknown[e.kind]
+                counts[e.value] = counts.get(e.value, 0) + 1
+            except RowError as e:
+                report.rejected += 1
+                if len(report.errors) < MAX_ERRORS_KEPT:
+                    report.errors.append(f"row {row_number}: {e}")
+        report.rows_read += len(chunk)
+        inserted = db.import_price_rows(rows)
+        if inserted:
+            touched.update((row[0], row[1]) for row in rows)
+        report.inserted += inserted
+        report.duplicates += len(rows) - inserted
+        report.seconds = time.perf_counter() - started
+        if on_progress:
+            on_progress(report)
+
+    if touched and db.run_length:
+        db.compact_price_history(pairs=touched)
+    if report.inserted:
+        # Imported history is usually older than what is stored, so the
+        # incremental summary updates don't apply
+        db.rebuild_stats_summary()
+    report.seconds = time.perf_counter() - started
+    return report
@@ -0,0 +1,200 @@
+"""
+Concurrent price collection engine.
+
+Fetches run on a bounded thread pool while the calling thread acts as the
+dispatcher and the single database writer (sqlite3 connections must stay on
+the thread that created them). Each retailer has its own concurrency cap so
+one slow or touchy site can't take over every worker, and with a RateLimiter
+each retailer is also paced: the dispatcher hands free workers to whichever
+retailers are ready rather than waiting on one that is rate limited or
+cooling down after a block.
+"""
+import queue
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Callable, Deque, Dict, List, Optional, Tuple
+
+from src.models import Product, PricePoint
+from src.rate_limit import RateLimiter
+from src.scraper import BlockedError
+
+
+@dataclass
+class FetchJob:
+    """One (product, retailer, url) fetch to perform."""
+    product: Product
+    retailer_id: str
+    url: str
+
+
+@dataclass
+class FetchResult:
+    """Outcome of a FetchJob."""
+    job: FetchJob
+    price_point: Optional[PricePoint] = None
+    error: Optional[str] = None
+    blocked: bool = False  # The retailer served a block page
+
+    @property
+    def ok(self) -> bool:
+        return self.price_point is not None
+
+
+@dataclass
+class ProductResults:
+    """All fetch results for one product, in retailer order."""
+    product: Product
+    skipped: List[str] = field(default_factory=list)  # Listed retailers without a scraper
+    results: List[FetchResult] = field(default_factory=list)
+
+    @property
+    def successes(self) -> int:
+        return sum(1 for r in self.results if r.ok)
+
+    @property
+    def failures(self) -> int:
+        return sum(1 for r in self.results if not r.ok)
+
+
+def _run_job(scraper, job: FetchJob) -> FetchResult:
+    try:
+        price_point = scraper.fetch_price(job.product.id, job.url)
+        if price_point:
+            return FetchResult(job, price_point=price_point)
+        return FetchResult(job, error="No price returned")
+    except BlockedError as e:
+        return FetchResult(job, error=f"Blocked: {e}", blocked=True)
+    except Exception as e:
+        return FetchResult(job, error=str(e))
+
+
+def collect_concurrently(
+    products: List[Product],
+    scrapers: Dict[str, object],
+    save: Callable[[PricePoint], None],
+    workers: int = 4,
+    per_retailer: int = 1,
+    on_product_done: Optional[Callable[[ProductResults], None]] = None,
+    limiter: Optional[RateLimiter] = None,
+) -> List[ProductResults]:
+    """
+    Collect prices for every product/retailer pair using a worker pool.
+
+    Args:
+        products: Products to collect
+        scrapers: Scraper instances keyed by retailer id (defines retailer order)
+        save: Called on the calling thread for each successful price point
+        workers: Maximum number of fetches in flight overall
+        per_retailer: Maximum number of fetches in flight per retailer
+        on_product_done: Called once all of a product's fetches have finished
+        limiter: Paces requests per retailer and is told about block pages
+
+    Returns:
+        ProductResults for each product, in the order given
+    """
+    if workers < 1 or per_retailer < 1:
+        raise ValueError("workers and per_retailer must be at least 1")
+
+    # Build per-retailer job queues and per-product bookkeeping
+    pending: Dict[str, Deque[Tuple[int, FetchJob]]] = {r: deque() for r in scrapers}
+    outcomes: List[ProductResults] = []
+    remaining: List[int] = []
+    slots: List[Dict[str, Optional[FetchResult]]] = []
+
+    for index, product in enumerate(products):
+        outcome = ProductResults(product=product)
+        product_slots: Dict[str, Optional[FetchResult]] = {}
+        for retailer_id, url in product.urls.items():
+            if retailer_id not in scrapers:
+                outcome.skipped.append(retailer_id)
+                continue
+            product_slots[retailer_id] = None
+            pending[retailer_id].append((index, FetchJob(product, retailer_id, url)))
+        outcomes.append(outcome)
+        slots.append(product_slots)
+        remaining.append(len(product_slots))
+
+    def finish_product(index: int):
+        outcome = outcomes[index]
+        outcome.results = [slots[index][r] for r in scrapers if r in slots[index]]
+        if on_product_done:
+            on_product_done(outcome)
+
+    # Products with no URLs at all are done before anything runs
+    next_to_report = 0
+
+    def report_ready():
+        # Report in catalog order so output reads like the sequential run
+        nonlocal next_to_report
+        while next_to_report < len(products) and remaining[next_to_report] == 0:
+            finish_product(next_to_report)
+            next_to_report += 1
+
+    report_ready()
+
+    done: "queue.Queue[Tuple[int, FetchResult]]" = queue.Queue()
+    in_flight: Dict[str, int] = {r: 0 for r in scrapers}
+    total_in_flight = 0
+    retailer_order = list(scrapers)
+    turn = 0
+
+    def dispatch(pool: ThreadPoolExecutor):
+        # Hand out jobs round-robin across retailers until a cap is reached
+        nonlocal total_in_flight, turn
+        progressed = True
+        while total_in_flight < workers and progressed:
+            progressed = False
+            for offset in range(len(retailer_order)):
+                if total_in_flight >= workers:
+                    break
+                retailer_id = retailer_order[(turn + offset) % len(retailer_order)]
+                if not pending[retailer_id] or in_flight[retailer_id] >= per_retailer:
+                    continue
+                if limiter is not None and not limiter.try_acquire(retailer_id):
+                    continue
+                index, job = pending[retailer_id].popleft()
+                in_flight[retailer_id] += 1
+                total_in_flight += 1
+                progressed = True
+                future = pool.submit(_run_job, scrapers[retailer_id], job)
+                future.add_done_callback(
+                    lambda f, i=index: done.put((i, f.result()))
+                )
+            turn += 1
+
+    def next_ready() -> Optional[float]:
+        # Seconds until a rate-limited retailer with waiting jobs could take
+        # a free worker, or None if only a finished fetch can free one up
+        if limiter is None or total_in_flight >= workers:
+            return None
+        delays = [limiter.ready_in(r) for r in retailer_order
+                  if pending[r] and in_flight[r] < per_retailer]
+        return max(min(delays), 0.001) if delays else None
+
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="collect") as pool:
+        dispatch(pool)
+        while total_in_flight or any(pending.values()):
+            try:
+                index, result = done.get(timeout=next_ready())
+            except queue.Empty:
+                dispatch(pool)
+                continue
+            retailer_id = result.job.retailer_id
+            in_flight[retailer_id] -= 1
+            total_in_flight -= 1
+            if limiter is not None:
+                limiter.record(retailer_id, result.blocked)
+
+            if result.ok:
+                try:
+                    save(result.price_point)
+                except Exception as e:
+                    result = FetchResult(result.job, error=f"Database write failed: {e}")
+
+            slots[index][retailer_id] = result
+            remaining[index] -= 1
+            dispatch(pool)
+            report_ready()
+
+    return outcomes
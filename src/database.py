@@ -2,23 +2,302 @@
 Database layer for storing price history.
 Uses SQLite for simplicity in the prototype.
 """
+import json
+import secrets
 import sqlite3
+import time
+from contextlib import contextmanager
 from datetime import datetime
-from typing import List, Optional
+from itertools import groupby
+from operator import itemgetter
+from typing import Dict, Iterable, Iterator, List, Optional, Set, Tuple
 from pathlib import Path
 
-from src.models import Product, Retailer, PricePoint, PriceStats
+from src.models import (CollectionRun, FetchRetry, Listing, PageValidators, Product, Retailer,
+                        PricePoint, PriceSeries, PriceStats)
+from src.run_metrics import StageStats
+
+
+# Retailers whose URLs older schemas kept in products.<retailer>_url columns
+LEGACY_URL_RETAILERS = ('walmart', 'target', 'cvs', 'walgreens', 'amazon')
+
+INSERT_PRICE_SQL = """
+    INSERT INTO price_history 
+    (product_id, retailer_id, price, timestamp, ts_epoch, last_seen, last_epoch,
+     url, pack_size, advertised_savings, source)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+"""
+
+# Staging table for import_price_rows; the primary key drops rows repeated
+# within a batch and hands them on in index order
+CREATE_IMPORT_BATCH_SQL = """
+    CREATE TEMP TABLE IF NOT EXISTS import_batch (
+        product_id TEXT NOT NULL,
+        retailer_id TEXT NOT NULL,
+        price REAL NOT NULL,
+        timestamp TEXT NOT NULL,
+        ts_epoch INTEGER NOT NULL,
+        url TEXT NOT NULL,
+        pack_size INTEGER NOT NULL,
+        advertised_savings REAL,
+        source TEXT,
+        PRIMARY KEY (product_id, retailer_id, timestamp)
+    ) WITHOUT ROWID
+"""
+
+# Staged rows not already in price_history: none stored at the same time
+# (idx_price_history_lookup), and not inside a run at the same price. The run
+# is the latest at that price starting no later than the row, a single seek
+# on idx_price_history_price
+INSERT_NEW_IMPORTS_SQL = """
+    INSERT INTO price_history
+    (product_id, retailer_id, price, timestamp, ts_epoch, last_seen, last_epoch,
+     url, pack_size, advertised_savings, source)
+    SELECT b.product_id, b.retailer_id, b.price, b.timestamp, b.ts_epoch, b.timestamp, b.ts_epoch,
+           b.url, b.pack_size, b.advertised_savings, b.source
+    FROM temp.import_batch b
+    WHERE NOT EXISTS (
+        SELECT 1 FROM price_history h
+        WHERE h.product_id = b.product_id AND h.retailer_id = b.retailer_id
+          AND h.timestamp = b.timestamp
+    )
+    AND COALESCE((
+        SELECT h.last_epoch >= b.ts_epoch FROM price_history h
+        WHERE h.product_id = b.product_id AND h.retailer_id = b.retailer_id
+          AND h.price = b.price AND h.timestamp <= b.timestamp
+        ORDER BY h.timestamp DESC
+        LIMIT 1
+    ), 0) = 0
+"""
+
+# Run-length storage: each price_history row is a run of identical sightings,
+# first seen at timestamp/ts_epoch and last seen at last_seen/last_epoch.
+# Sightings inside a run are taken to be evenly spaced, as they are for the
+# scheduled collector; a row with seen_count = 1 is a single observation.
+
+# The most recent run for a product/retailer, to extend if the price is unchanged
+LATEST_RUN_SQL = """
+    SELECT id, price, pack_size, advertised_savings, url, last_epoch
+    FROM price_history
+    WHERE product_id = ? AND retailer_id = ?
+    ORDER BY last_epoch DESC, ts_epoch DESC
+    LIMIT 1
+"""
+
+EXTEND_RUN_SQL = """
+    UPDATE price_history
+    SET last_seen = ?, last_epoch = ?, seen_count = seen_count + 1
+    WHERE id = ?
+"""
+
+
+# Window kept pre-aggregated in price_stats_summary (the default for get_price_stats)
+SUMMARY_WINDOW_DAYS = 30
+
+# Runs overlapping a stats window; bind window_start(days). Served as a
+# range scan by idx_price_history_runs
+WINDOW_CONDITION = "last_epoch >= ?"
+
+# Columns expected by _window_aggregate, oldest run first
+WINDOW_RUNS_SQL = f"""
+    SELECT price, timestamp, ts_epoch, last_seen, last_epoch, seen_count
+    FROM price_history
+    WHERE product_id = ? AND retailer_id = ? AND {WINDOW_CONDITION}
+    ORDER BY last_epoch, ts_epoch
+"""
+
+# Seconds since the epoch for a stored timestamp. Timestamps are naive local
+# time (datetime.isoformat()), hence the 'utc' conversion.
+TS_EPOCH_SQL = "CAST(strftime('%s', timestamp, 'utc') AS INTEGER)"
+
+# Fold one new observation into the all-time columns of price_stats_summary
+UPSERT_SUMMARY_SQL = """
+    INSERT INTO price_stats_summary
+    (product_id, retailer_id, current_price, min_price, max_price, price_sum,
+     observation_count, first_seen, last_seen, high_date, low_date)
+    VALUES (?, ?, ?, ?, ?, ?, 1, ?, ?, ?, ?)
+    ON CONFLICT (product_id, retailer_id) DO UPDATE SET
+        current_price = CASE WHEN excluded.last_seen >= last_seen
+                             THEN excluded.current_price ELSE current_price END,
+        high_date = CASE WHEN excluded.max_price > max_price THEN excluded.high_date
+                         WHEN excluded.max_price = max_price THEN MIN(high_date, excluded.high_date)
+                         ELSE high_date END,
+        low_date = CASE WHEN excluded.min_price < min_price THEN excluded.low_date
+                        WHEN excluded.min_price = min_price THEN MIN(low_date, excluded.low_date)
+                        ELSE low_date END,
+        min_price = MIN(min_price, excluded.min_price),
+        max_price = MAX(max_price, excluded.max_price),
+        price_sum = price_sum + excluded.price_sum,
+        observation_count = observation_count + 1,
+        first_seen = MIN(first_seen, excluded.first_seen),
+        last_seen = MAX(last_seen, excluded.last_seen)
+"""
+
+# Store freshly computed windowed columns (see _window_aggregate)
+UPDATE_WINDOW_SQL = """
+    UPDATE price_stats_summary SET
+        window_min_price = ?, window_max_price = ?, window_avg_price = ?,
+        window_count = ?, window_first_seen = ?, window_last_seen = ?
+    WHERE product_id = ? AND retailer_id = ?
+"""
+
+
+# Failed fetches are retried after RETRY_BASE_SECONDS, doubling per attempt
+# up to RETRY_MAX_SECONDS, and dead-lettered after RETRY_MAX_ATTEMPTS
+RETRY_BASE_SECONDS = 60
+RETRY_MAX_SECONDS = 30 * 60
+RETRY_MAX_ATTEMPTS = 5
+
+RETRY_COLUMNS = ("product_id, retailer_id, url, attempts, next_attempt_epoch, last_error, "
+                 "status, first_failed_at")
+
+
+def retry_delay(attempts: int) -> int:
+    """Seconds to wait before retrying a fetch that has failed `attempts` times."""
+    return min(RETRY_MAX_SECONDS, RETRY_BASE_SECONDS * 2 ** (attempts - 1))
+
+
+def window_start(days: int) -> int:
+    """Epoch second at which a window of the last `days` days begins."""
+    return int(time.time()) - days * 86400
+
+
+def _sightings_before(first_epoch: int, last_epoch: int, seen_count: int, cutoff: int) -> int:
+    """How many of a run's evenly spaced sightings fall before epoch `cutoff`."""
+    if first_epoch >= cutoff:
+        return 0
+    if last_epoch < cutoff:
+        return seen_count
+    # Sighting i is at first_epoch + (span * i) // (seen_count - 1)
+    span = last_epoch - first_epoch
+    return ((cutoff - first_epoch) * (seen_count - 1) + span - 1) // span
+
+
+def _sighting_epoch(first_epoch: int, last_epoch: int, seen_count: int, index: int) -> int:
+    """Epoch second of sighting `index` within a run."""
+    if seen_count == 1:
+        return first_epoch
+    return first_epoch + ((last_epoch - first_epoch) * index) // (seen_count - 1)
+
+
+def _sighting_times(first_seen: datetime, last_seen: datetime, seen_count: int) -> List[datetime]:
+    """Timestamps of every sighting in a run, first to last."""
+    if seen_count == 1:
+        return [first_seen]
+    step = (last_seen - first_seen) / (seen_count - 1)
+    return [first_seen + step * i for i in range(seen_count - 1)] + [last_seen]
+
+
+def _window_aggregate(runs: Iterable[tuple], cutoff: int) -> Optional[tuple]:
+    """
+    Windowed stats over runs, counting only the sightings at or after `cutoff`.
+    
+    Args:
+        runs: WINDOW_RUNS_SQL rows, oldest first
+        cutoff: Epoch second at which the window begins
+    
+    Returns:
+        (min, max, avg, count, first_seen, last_seen) with ISO timestamps, or
+        None if no sighting falls inside the window
+    """
+    min_price = max_price = first_seen = last_seen = None
+    count = 0
+    total = 0.0
+    for price, timestamp, ts_epoch, run_last_seen, last_epoch, seen_count in runs:
+        skipped = _sightings_before(ts_epoch, last_epoch, seen_count, cutoff)
+        inside = seen_count - skipped
+        if inside <= 0:
+            continue
+        if first_seen is None:
+            if skipped:
+                first_seen = _sighting_times(datetime.fromisoformat(timestamp),
+                                             datetime.fromisoformat(run_last_seen),
+                                             seen_count)[skipped].isoformat()
+            else:
+                first_seen = timestamp
+            min_price = max_price = price
+        min_price = min(min_price, price)
+        max_price = max(max_price, price)
+        count += inside
+        total += price * inside
+        last_seen = run_last_seen
+    if not count:
+        return None
+    return min_price, max_price, total / count, count, first_seen, last_seen
+
+
+# Column order expected by _series_from_rows
+SERIES_COLUMNS = ("product_id, retailer_id, price, timestamp, last_seen, seen_count, "
+                  "url, pack_size, advertised_savings, source")
+
+
+def _series_from_rows(rows: Iterable[tuple], newest_first: bool = False,
+                      limit: Optional[int] = None, since: Optional[datetime] = None) -> PriceSeries:
+    """
+    Build a PriceSeries from SERIES_COLUMNS rows, expanding runs into sightings.
+    
+    Args:
+        rows: Runs in the order the series should be built
+        newest_first: Rows (and the resulting series) are newest first
+        limit: Stop after this many sightings
+        since: Drop sightings before this time
+    """
+    series = PriceSeries()
+    add = series.add
+    parse = datetime.fromisoformat
+    for product_id, retailer_id, price, timestamp, last_seen, seen_count, url, pack_size, savings, source in rows:
+        if seen_count == 1:
+            times = [parse(timestamp)]
+        else:
+            times = _sighting_times(parse(timestamp), parse(last_seen), seen_count)
+            if newest_first:
+                times.reverse()
+        for observed in times:
+            if since is not None and observed < since:
+                continue
+            add(product_id, retailer_id, price, observed, url, pack_size, savings, source)
+            if limit is not None and len(series) >= limit:
+                return series
+    return series
+
+
+def _price_row(price_point: PricePoint) -> tuple:
+    """Parameters for INSERT_PRICE_SQL."""
+    timestamp = price_point.timestamp.isoformat()
+    ts_epoch = int(price_point.timestamp.timestamp())
+    return (
+        price_point.product_id,
+        price_point.retailer_id,
+        price_point.price,
+        timestamp,
+        ts_epoch,
+        timestamp,
+        ts_epoch,
+        price_point.url,
+        price_point.pack_size,
+        price_point.advertised_savings,
+        price_point.source
+    )
 
 
 class PriceDatabase:
     """Handles all database operations for price tracking."""
     
-    def __init__(self, db_path: str = "data/prices.db"):
-        """Initialize database connection and create tables if needed."""
+    def __init__(self, db_path: str = "data/prices.db", run_length: bool = False):
+        """
+        Initialize database connection and create tables if needed.
+        
+        Args:
+            db_path: SQLite database file
+            run_length: Record an unchanged price by extending the latest run
+                        for that product/retailer instead of inserting a row
+        """
         self.db_path = db_path
+        self.run_length = run_length
         Path(db_path).parent.mkdir(parents=True, exist_ok=True)
         self.conn = sqlite3.connect(db_path)
         self.conn.row_factory = sqlite3.Row
+        self.write_stats = StageStats()  # Timing of price writes, for run metrics
         self._create_tables()
     
     def _create_tables(self):
@@ -34,16 +313,36 @@ class PriceDatabase:
                 category TEXT NOT NULL,
                 brand TEXT,
                 upc TEXT,
-                target_url TEXT,
-                walmart_url TEXT,
-                cvs_url TEXT,
-                walgreens_url TEXT,
-                amazon_url TEXT,
                 created_at TEXT NOT NULL,
                 updated_at TEXT NOT NULL
             )
         """)
         
+        # Where each product is sold: one row per product/retailer page
+        cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'product_listings'")
+        listings_are_new = cursor.fetchone() is None
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS product_listings (
+                product_id TEXT NOT NULL,
+                retailer_id TEXT NOT NULL,
+                url TEXT NOT NULL,
+                active INTEGER NOT NULL DEFAULT 1,
+                last_success_at TEXT,
+                created_at TEXT NOT NULL,
+                updated_at TEXT NOT NULL,
+                PRIMARY KEY (product_id, retailer_id)
+            )
+        """)
+        # The collectors read only active listings, product by product
+        cursor.execute("""
+            CREATE INDEX IF NOT EXISTS idx_product_listings_active
+            ON product_listings(product_id, retailer_id, url) WHERE active = 1
+        """)
+        cursor.execute("""
+            CREATE INDEX IF NOT EXISTS idx_product_listings_retailer
+            ON product_listings(retailer_id, active)
+        """)
+        
         # Retailers table
         cursor.execute("""
             CREATE TABLE IF NOT EXISTS retailers (
@@ -61,24 +360,268 @@ class PriceDatabase:
                 retailer_id TEXT NOT NULL,
                 price REAL NOT NULL,
                 timestamp TEXT NOT NULL,
+                ts_epoch INTEGER,
+                last_seen TEXT,
+                last_epoch INTEGER,
+                seen_count INTEGER NOT NULL DEFAULT 1,
                 url TEXT NOT NULL,
                 pack_size INTEGER DEFAULT 1,
                 advertised_savings REAL,
+                source TEXT,
                 FOREIGN KEY (product_id) REFERENCES products(id),
                 FOREIGN KEY (retailer_id) REFERENCES retailers(id)
             )
         """)
         
+        # Key/value metadata; 'data_version' changes on every write so readers
+        # (e.g. the dashboard response cache) can tell when data is stale
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS db_meta (
+                key TEXT PRIMARY KEY,
+                value INTEGER NOT NULL
+            )
+        """)
+        cursor.execute("INSERT OR IGNORE INTO db_meta (key, value) VALUES ('data_version', 0)")
+        # Random id telling this database apart from a replaced or recreated
+        # one, whose data_version starts over
+        cursor.execute("INSERT OR IGNORE INTO db_meta (key, value) VALUES ('database_id', ?)",
+                       (secrets.randbits(48),))
+        
+        # Pre-aggregated stats per (product, retailer), maintained on every
+        # insert so stats reads are a single primary-key lookup
+        cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'price_stats_summary'")
+        summary_is_new = cursor.fetchone() is None
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS price_stats_summary (
+                product_id TEXT NOT NULL,
+                retailer_id TEXT NOT NULL,
+                current_price REAL NOT NULL,
+                min_price REAL NOT NULL,
+                max_price REAL NOT NULL,
+                price_sum REAL NOT NULL,
+                observation_count INTEGER NOT NULL,
+                first_seen TEXT NOT NULL,
+                last_seen TEXT NOT NULL,
+                high_date TEXT NOT NULL,
+                low_date TEXT NOT NULL,
+                window_min_price REAL,
+                window_max_price REAL,
+                window_avg_price REAL,
+                window_count INTEGER NOT NULL DEFAULT 0,
+                window_first_seen TEXT,
+                window_last_seen TEXT,
+                PRIMARY KEY (product_id, retailer_id)
+            )
+        """)
+        
+        # Persistent retry queue of failed fetches, one row per product/retailer
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS fetch_retries (
+                product_id TEXT NOT NULL,
+                retailer_id TEXT NOT NULL,
+                url TEXT NOT NULL,
+                attempts INTEGER NOT NULL,
+                next_attempt_epoch INTEGER NOT NULL,
+                last_error TEXT,
+                status TEXT NOT NULL DEFAULT 'pending',
+                first_failed_at TEXT NOT NULL,
+                last_failed_at TEXT NOT NULL,
+                PRIMARY KEY (product_id, retailer_id)
+            )
+        """)
+        cursor.execute("""
+            CREATE INDEX IF NOT EXISTS idx_fetch_retries_due
+            ON fetch_retries(status, next_attempt_epoch)
+        """)
+        
+        # What each product URL last looked like, for change-aware fetching
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS page_validators (
+                url TEXT PRIMARY KEY,
+                etag TEXT,
+                last_modified TEXT,
+                fragment_hash TEXT,
+                price REAL,
+                pack_size INTEGER NOT NULL DEFAULT 1,
+                read_at TEXT,
+                updated_at TEXT NOT NULL
+            )
+        """)
+        self._ensure_column("page_validators", "read_at", "TEXT")
+        
+        # One row per collection run, with its metrics as JSON
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS collection_runs (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                started_at TEXT NOT NULL,
+                finished_at TEXT NOT NULL,
+                mode TEXT NOT NULL,
+                seconds REAL NOT NULL,
+                attempts INTEGER NOT NULL,
+                successes INTEGER NOT NULL,
+                failures INTEGER NOT NULL,
+                http_requests INTEGER NOT NULL DEFAULT 0,
+                bytes_received INTEGER NOT NULL DEFAULT 0,
+                metrics TEXT
+            )
+        """)
+        
+        # Columns added after the original schema
+        self._ensure_column("price_history", "source", "TEXT")
+        added = self._ensure_column("price_history", "ts_epoch", "INTEGER")
+        added |= self._ensure_column("price_history", "last_seen", "TEXT")
+        added |= self._ensure_column("price_history", "last_epoch", "INTEGER")
+        added |= self._ensure_column("price_history", "seen_count", "INTEGER NOT NULL DEFAULT 1")
+        if added:
+            self.backfill_ts_epoch()
+        
         # Create index for faster queries
         cursor.execute("""
             CREATE INDEX IF NOT EXISTS idx_price_history_lookup 
             ON price_history(product_id, retailer_id, timestamp DESC)
         """)
+
+        # Covering index for per-retailer aggregates: MIN/MAX/AVG read only the
+        # index, and "first time at price X" is a single seek
+        cursor.execute("""
+            CREATE INDEX IF NOT EXISTS idx_price_history_price
+            ON price_history(product_id, retailer_id, price, timestamp)
+        """)
+
+        # Windowed stats are range scans over when each run was last seen;
+        # carrying the rest of the run makes window aggregates, the latest-price
+        # lookup and time-ordered history scans index-only. Replaces the
+        # single-observation idx_price_history_epoch.
+        cursor.execute("DROP INDEX IF EXISTS idx_price_history_epoch")
+        cursor.execute("""
+            CREATE INDEX IF NOT EXISTS idx_price_history_runs
+            ON price_history(product_id, retailer_id, last_epoch, ts_epoch, timestamp,
+                             last_seen, price, seen_count)
+        """)
         
         self.conn.commit()
+
+        if summary_is_new:
+            # Existing history predates the summary table
+            self.rebuild_stats_summary()
+        if listings_are_new:
+            # Existing products keep their URLs in products.<retailer>_url
+            self.migrate_legacy_urls()
+    
+    def _legacy_url_columns(self) -> List[str]:
+        """Legacy products.<retailer>_url columns present in this database."""
+        cursor = self.conn.cursor()
+        cursor.execute("PRAGMA table_info(products)")
+        columns = {row['name'] for row in cursor.fetchall()}
+        return [f"{r}_url" for r in LEGACY_URL_RETAILERS if f"{r}_url" in columns]
+
+    def migrate_legacy_urls(self) -> int:
+        """
+        Copy URLs from the legacy products.<retailer>_url columns into product_listings.
+
+        Listings that already exist are left alone, so this is safe to re-run.
+
+        Returns:
+            Number of listings created
+        """
+        now = datetime.now().isoformat()
+        created = 0
+        with self.conn:
+            for column in self._legacy_url_columns():
+                cursor = self.conn.execute(f"""
+                    INSERT OR IGNORE INTO product_listings
+                    (product_id, retailer_id, url, active, created_at, updated_at)
+                    SELECT id, ?, {column}, 1, COALESCE(created_at, ?), ?
+                    FROM products
+                    WHERE {column} IS NOT NULL AND {column} != ''
+                """, (column[:-len('_url')], now, now))
+                created += cursor.rowcount
+            if created:
+                # When each migrated listing last yielded a price
+                self.conn.execute("""
+                    UPDATE product_listings SET last_success_at = (
+                        SELECT MAX(COALESCE(h.last_seen, h.timestamp)) FROM price_history h
+                        WHERE h.product_id = product_listings.product_id
+                          AND h.retailer_id = product_listings.retailer_id
+                    )
+                    WHERE last_success_at IS NULL
+                """)
+        return created
+
+    def drop_legacy_url_columns(self) -> List[str]:
+        """Drop the legacy products.<retailer>_url columns (after migrate_legacy_urls). Needs SQLite 3.35+."""
+        columns = self._legacy_url_columns()
+        with self.conn:
+            for column in columns:
+                self.conn.execute(f"ALTER TABLE products DROP COLUMN {column}")
+        return columns
+
+    def _ensure_column(self, table: str, column: str, definition: str) -> bool:
+        """Add a column to an existing table if an older schema lacks it. Returns True if added."""
+        cursor = self.conn.cursor()
+        cursor.execute(f"PRAGMA table_info({table})")
+        if column in {row['name'] for row in cursor.fetchall()}:
+            return False
+        cursor.execute(f"ALTER TABLE {table} ADD COLUMN {column} {definition}")
+        return True
+
+    def backfill_ts_epoch(self, batch_size: int = 50000) -> int:
+        """
+        Fill in ts_epoch and the run columns for rows written before they existed.
+        
+        Such rows are single observations, so each is a run of one. Rows
+        whose timestamp SQLite can't parse are left as they are.
+        
+        Args:
+            batch_size: Rows examined per transaction
+        
+        Returns:
+            Number of rows updated
+        """
+        cursor = self.conn.cursor()
+        updated = 0
+        last_id = 0
+        while True:
+            cursor.execute("""
+                SELECT MAX(id) FROM (
+                    SELECT id FROM price_history
+                    WHERE id > ? AND last_epoch IS NULL
+                    ORDER BY id LIMIT ?
+                )
+            """, (last_id, batch_size))
+            batch_end = cursor.fetchone()[0]
+            if batch_end is None:
+                return updated
+            with self.conn:
+                cursor.execute(f"""
+                    UPDATE price_history SET
+                        ts_epoch = COALESCE(ts_epoch, {TS_EPOCH_SQL}),
+                        last_seen = COALESCE(last_seen, timestamp),
+                        last_epoch = COALESCE(last_epoch, ts_epoch, {TS_EPOCH_SQL})
+                    WHERE id > ? AND id <= ? AND last_epoch IS NULL
+                      AND COALESCE(ts_epoch, {TS_EPOCH_SQL}) IS NOT NULL
+                """, (last_id, batch_end))
+            updated += cursor.rowcount
+            last_id = batch_end
+    
+    def _bump_data_version(self, cursor: sqlite3.Cursor):
+        """Mark the data as changed. Call inside the writing transaction."""
+        cursor.execute("UPDATE db_meta SET value = value + 1 WHERE key = 'data_version'")
+
+    def get_data_version(self) -> int:
+        """Counter that increases whenever products, retailers or prices change."""
+        cursor = self.conn.cursor()
+        cursor.execute("SELECT value FROM db_meta WHERE key = 'data_version'")
+        row = cursor.fetchone()
+        return row['value'] if row else 0
     
     def add_product(self, product: Product):
-        """Add or update a product in the database."""
+        """
+        Add or update a product in the database.
+
+        Its listings become product.urls: listings at retailers no longer in
+        urls are deactivated (kept, with their history, for reactivation).
+        """
         cursor = self.conn.cursor()
         now = datetime.now().isoformat()
 
@@ -89,9 +632,8 @@ class PriceDatabase:
 
         cursor.execute("""
             INSERT OR REPLACE INTO products
-            (id, name, size, category, brand, upc, target_url, walmart_url, cvs_url,
-             walgreens_url, amazon_url, created_at, updated_at)
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            (id, name, size, category, brand, upc, created_at, updated_at)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?)
         """, (
             product.id,
             product.name,
@@ -99,15 +641,62 @@ class PriceDatabase:
             product.category,
             product.brand,
             product.upc,
-            product.target_url,
-            product.walmart_url,
-            product.cvs_url,
-            product.walgreens_url,
-            product.amazon_url,
             created_at,
             now
         ))
+        self._save_listings(cursor, [
+            (product.id, retailer_id, url) for retailer_id, url in product.urls.items()
+        ], now)
+        cursor.execute("SELECT retailer_id FROM product_listings WHERE product_id = ? AND active = 1",
+                       (product.id,))
+        dropped = [row['retailer_id'] for row in cursor.fetchall() if row['retailer_id'] not in product.urls]
+        cursor.executemany("""
+            UPDATE product_listings SET active = 0, updated_at = ?
+            WHERE product_id = ? AND retailer_id = ?
+        """, [(now, product.id, retailer_id) for retailer_id in dropped])
+        self._bump_data_version(cursor)
         self.conn.commit()
+
+    def add_listing(self, product_id: str, retailer_id: str, url: str, active: bool = True):
+        """Add a product's page at a retailer, or update its URL and active flag."""
+        cursor = self.conn.cursor()
+        self._save_listings(cursor, [(product_id, retailer_id, url)], datetime.now().isoformat(),
+                            active)
+        self._bump_data_version(cursor)
+        self.conn.commit()
+
+    def _save_listings(self, cursor: sqlite3.Cursor, listings: List[Tuple[str, str, str]],
+                       now: str, active: bool = True):
+        cursor.executemany("""
+            INSERT INTO product_listings
+            (product_id, retailer_id, url, active, created_at, updated_at)
+            VALUES (?, ?, ?, ?, ?, ?)
+            ON CONFLICT (product_id, retailer_id) DO UPDATE SET
+                url = excluded.url,
+                active = excluded.active,
+                updated_at = excluded.updated_at
+        """, [(product_id, retailer_id, url, int(active), now, now)
+              for product_id, retailer_id, url in listings])
+
+    def set_listing_active(self, product_id: str, retailer_id: str, active: bool) -> bool:
+        """Start or stop collecting a listing. Returns False if there is no such listing."""
+        with self.conn:
+            cursor = self.conn.execute("""
+                UPDATE product_listings SET active = ?, updated_at = ?
+                WHERE product_id = ? AND retailer_id = ?
+            """, (int(active), datetime.now().isoformat(), product_id, retailer_id))
+        return cursor.rowcount > 0
+
+    def get_listings(self, product_id: Optional[str] = None) -> List[Listing]:
+        """All listings, active or not, optionally for one product."""
+        cursor = self.conn.cursor()
+        if product_id is None:
+            cursor.execute("SELECT * FROM product_listings ORDER BY product_id, retailer_id")
+        else:
+            cursor.execute("""
+                SELECT * FROM product_listings WHERE product_id = ? ORDER BY retailer_id
+            """, (product_id,))
+        return [_listing_from_row(row) for row in cursor]
     
     def add_retailer(self, retailer: Retailer):
         """Add or update a retailer in the database."""
@@ -116,26 +705,281 @@ class PriceDatabase:
             INSERT OR REPLACE INTO retailers (id, name, base_url)
             VALUES (?, ?, ?)
         """, (retailer.id, retailer.name, retailer.base_url))
+        self._bump_data_version(cursor)
         self.conn.commit()
     
     def add_price_point(self, price_point: PricePoint):
         """Record a new price observation."""
+        started = time.perf_counter()
         cursor = self.conn.cursor()
-        cursor.execute("""
-            INSERT INTO price_history 
-            (product_id, retailer_id, price, timestamp, url, pack_size, advertised_savings)
-            VALUES (?, ?, ?, ?, ?, ?, ?)
-        """, (
-            price_point.product_id,
-            price_point.retailer_id,
-            price_point.price,
-            price_point.timestamp.isoformat(),
-            price_point.url,
-            price_point.pack_size,
-            price_point.advertised_savings
-        ))
+        self._write_price_points(cursor, [price_point])
+        self._update_stats_summary(cursor, [price_point])
+        self._record_listing_successes(cursor, [price_point])
+        self._bump_data_version(cursor)
         self.conn.commit()
+        self.write_stats.add(time.perf_counter() - started)
+
+    def add_price_points(self, price_points: Iterable[PricePoint]) -> int:
+        """
+        Record many price observations in a single transaction.
+
+        Either every observation is written or, on error, none are.
+
+        Returns:
+            Number of observations recorded
+        """
+        price_points = list(price_points)
+        if not price_points:
+            return 0
+        started = time.perf_counter()
+        with self.conn:
+            cursor = self.conn.cursor()
+            self._write_price_points(cursor, price_points)
+            self._update_stats_summary(cursor, price_points)
+            self._record_listing_successes(cursor, price_points)
+            self._bump_data_version(cursor)
+        self.write_stats.add(time.perf_counter() - started)
+        return len(price_points)
+
+    def _write_price_points(self, cursor: sqlite3.Cursor, price_points: List[PricePoint]):
+        """Insert observations, extending unchanged runs in run-length mode."""
+        if not self.run_length:
+            cursor.executemany(INSERT_PRICE_SQL, [_price_row(p) for p in price_points])
+            return
+
+        for p in price_points:
+            row = _price_row(p)
+            cursor.execute(LATEST_RUN_SQL, (p.product_id, p.retailer_id))
+            latest = cursor.fetchone()
+            ts_epoch = row[4]
+            if (latest is not None
+                    and ts_epoch >= latest['last_epoch']
+                    and (latest['price'], latest['pack_size'], latest['advertised_savings'], latest['url'])
+                    == (p.price, p.pack_size, p.advertised_savings, p.url)):
+                cursor.execute(EXTEND_RUN_SQL, (row[3], ts_epoch, latest['id']))
+            else:
+                cursor.execute(INSERT_PRICE_SQL, row)
+
+    def import_price_rows(self, rows: List[tuple]) -> int:
+        """
+        Insert historical observations in one transaction, skipping known ones.
+
+        A row is skipped if price_history already has an observation for its
+        product and retailer at the same timestamp, if it falls inside a
+        stored run at the same price, or if it repeats an earlier row of the
+        batch. Rows are inserted as single observations and the stats summary
+        is left alone: once the whole import is in, call
+        compact_price_history() for the touched pairs (in run-length mode) and
+        rebuild_stats_summary().
+
+        Args:
+            rows: (product_id, retailer_id, price, timestamp, ts_epoch, url,
+                   pack_size, advertised_savings, source) tuples
+
+        Returns:
+            Number of rows inserted
+        """
+        if not rows:
+            return 0
+        started = time.perf_counter()
+        with self.conn:
+            cursor = self.conn.cursor()
+            cursor.execute(CREATE_IMPORT_BATCH_SQL)
+            cursor.execute("DELETE FROM temp.import_batch")
+            cursor.executemany("INSERT OR IGNORE INTO temp.import_batch VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                               rows)
+            cursor.execute(INSERT_NEW_IMPORTS_SQL)
+            inserted = cursor.rowcount
+            cursor.execute("DELETE FROM temp.import_batch")
+            if inserted:
+                self._bump_data_version(cursor)
+        self.write_stats.add(time.perf_counter() - started)
+        return inserted
+
+    def compact_price_history(self, pairs_per_commit: int = 200,
+                              pairs: Optional[Iterable[Tuple[str, str]]] = None) -> Tuple[int, int]:
+        """
+        Merge consecutive identical observations into runs.
+        
+        Converts history written one row per observation into run-length
+        form; stats and expanded history are unchanged for evenly spaced
+        collection.
+        
+        Args:
+            pairs_per_commit: Product/retailer pairs compacted per transaction
+            pairs: Only compact these (product_id, retailer_id) pairs (default: all)
+        
+        Returns:
+            (rows before, rows after)
+        """
+        cursor = self.conn.cursor()
+        cursor.execute("SELECT COUNT(*) FROM price_history")
+        rows_before = cursor.fetchone()[0]
+        if pairs is None:
+            pairs = cursor.execute(
+                "SELECT DISTINCT product_id, retailer_id FROM price_history"
+            ).fetchall()
+        else:
+            pairs = sorted(pairs)
+
+        for start in range(0, len(pairs), pairs_per_commit):
+            with self.conn:
+                for product_id, retailer_id in pairs[start:start + pairs_per_commit]:
+                    self._compact_pair(cursor, product_id, retailer_id)
+
+        cursor.execute("SELECT COUNT(*) FROM price_history")
+        rows_after = cursor.fetchone()[0]
+        if rows_after != rows_before:
+            with self.conn:
+                self._bump_data_version(cursor)
+        return rows_before, rows_after
+
+    def _compact_pair(self, cursor: sqlite3.Cursor, product_id: str, retailer_id: str):
+        """Merge one product/retailer's consecutive identical rows into the first of each run."""
+        cursor.execute("""
+            SELECT id, price, pack_size, advertised_savings, url, last_seen, last_epoch, seen_count
+            FROM price_history
+            WHERE product_id = ? AND retailer_id = ?
+            ORDER BY last_epoch, ts_epoch, id
+        """, (product_id, retailer_id))
+        rows = cursor.fetchall()
+
+        extended = {}  # run id -> (last_seen, last_epoch, seen_count, id)
+        merged_away = []
+        run_id = run_key = None
+        run_count = 0
+        for row in rows:
+            key = (row['price'], row['pack_size'], row['advertised_savings'], row['url'])
+            if run_id is not None and key == run_key:
+                run_count += row['seen_count']
+                extended[run_id] = (row['last_seen'], row['last_epoch'], run_count, run_id)
+                merged_away.append((row['id'],))
+            else:
+                run_id, run_key, run_count = row['id'], key, row['seen_count']
+
+        cursor.executemany(
+            "UPDATE price_history SET last_seen = ?, last_epoch = ?, seen_count = ? WHERE id = ?",
+            extended.values()
+        )
+        cursor.executemany("DELETE FROM price_history WHERE id = ?", merged_away)
+
+    @contextmanager
+    def buffered_writer(self, flush_rows: int = 100, flush_seconds: float = 5.0):
+        """
+        Context manager that batches add() calls into add_price_points().
+
+        Usage:
+            with db.buffered_writer() as writer:
+                for price_point in collected:
+                    writer.add(price_point)
+
+        Buffered rows are flushed every `flush_rows` observations, when an add()
+        or flush_if_due() comes more than `flush_seconds` after the last flush,
+        and on exit. Callers that can go quiet between adds (e.g. while a slow
+        retailer is scraped) should call flush_if_due() at natural breaks.
+        """
+        writer = BufferedPriceWriter(self, flush_rows, flush_seconds)
+        try:
+            yield writer
+        finally:
+            writer.flush()
+
+    def tune_for_ingestion(self):
+        """
+        Switch the connection to settings suited to bulk/collector writes.
+
+        WAL lets the dashboard keep reading while the collector writes, and
+        synchronous=NORMAL syncs at checkpoints instead of on every commit.
+        """
+        cursor = self.conn.cursor()
+        cursor.execute("PRAGMA journal_mode=WAL")
+        cursor.execute("PRAGMA synchronous=NORMAL")
+        cursor.execute("PRAGMA cache_size=-20000")  # ~20 MB page cache
+        cursor.execute("PRAGMA temp_store=MEMORY")
     
+    def _record_listing_successes(self, cursor: sqlite3.Cursor, price_points: List[PricePoint]):
+        """Note when each listing last yielded a price, in the write's transaction."""
+        # MAX, so importing or backfilling older prices doesn't move it back
+        cursor.executemany("""
+            UPDATE product_listings SET last_success_at = MAX(COALESCE(last_success_at, ''), ?)
+            WHERE product_id = ? AND retailer_id = ?
+        """, [(p.timestamp.isoformat(), p.product_id, p.retailer_id) for p in price_points])
+
+    def _update_stats_summary(self, cursor: sqlite3.Cursor, price_points: List[PricePoint]):
+        """Fold newly inserted observations into price_stats_summary (same transaction)."""
+        rows = []
+        for p in price_points:
+            timestamp = p.timestamp.isoformat()
+            rows.append((p.product_id, p.retailer_id, p.price, p.price, p.price, p.price,
+                         timestamp, timestamp, timestamp, timestamp))
+        cursor.executemany(UPSERT_SUMMARY_SQL, rows)
+
+        self._refresh_windows(cursor, {(p.product_id, p.retailer_id) for p in price_points})
+
+    def _refresh_windows(self, cursor: sqlite3.Cursor, pairs: Iterable[Tuple[str, str]]):
+        """Recompute the windowed summary columns for the given pairs from their recent runs."""
+        cutoff = window_start(SUMMARY_WINDOW_DAYS)
+        updates = []
+        for product_id, retailer_id in pairs:
+            cursor.execute(WINDOW_RUNS_SQL, (product_id, retailer_id, cutoff))
+            window = _window_aggregate(cursor.fetchall(), cutoff)
+            updates.append((*(window or (None, None, None, 0, None, None)), product_id, retailer_id))
+        cursor.executemany(UPDATE_WINDOW_SQL, updates)
+
+    def rebuild_stats_summary(self) -> int:
+        """
+        Recompute price_stats_summary from the full price history.
+
+        Only needed if price_history was modified outside PriceDatabase.
+
+        Returns:
+            Number of (product, retailer) pairs summarized
+        """
+        with self.conn:
+            cursor = self.conn.cursor()
+            cursor.execute("DELETE FROM price_stats_summary")
+            cursor.execute("""
+                INSERT INTO price_stats_summary
+                (product_id, retailer_id, current_price, min_price, max_price, price_sum,
+                 observation_count, first_seen, last_seen, high_date, low_date)
+                SELECT
+                    s.product_id,
+                    s.retailer_id,
+                    (SELECT h.price FROM price_history h
+                     WHERE h.product_id = s.product_id AND h.retailer_id = s.retailer_id
+                     ORDER BY h.last_epoch DESC, h.ts_epoch DESC LIMIT 1),
+                    s.min_price,
+                    s.max_price,
+                    s.price_sum,
+                    s.observation_count,
+                    s.first_seen,
+                    s.last_seen,
+                    (SELECT MIN(h.timestamp) FROM price_history h
+                     WHERE h.product_id = s.product_id AND h.retailer_id = s.retailer_id
+                       AND h.price = s.max_price),
+                    (SELECT MIN(h.timestamp) FROM price_history h
+                     WHERE h.product_id = s.product_id AND h.retailer_id = s.retailer_id
+                       AND h.price = s.min_price)
+                FROM (
+                    SELECT
+                        product_id,
+                        retailer_id,
+                        MIN(price) AS min_price,
+                        MAX(price) AS max_price,
+                        SUM(price * seen_count) AS price_sum,
+                        SUM(seen_count) AS observation_count,
+                        MIN(timestamp) AS first_seen,
+                        MAX(last_seen) AS last_seen
+                    FROM price_history
+                    GROUP BY product_id, retailer_id
+                ) s
+            """)
+            cursor.execute("SELECT product_id, retailer_id FROM price_stats_summary")
+            self._refresh_windows(cursor, cursor.fetchall())
+            self._bump_data_version(cursor)
+            cursor.execute("SELECT COUNT(*) FROM price_stats_summary")
+            return cursor.fetchone()[0]
+
     def get_price_stats(self, product_id: str, retailer_id: str, 
                        days: int = 30) -> Optional[PriceStats]:
         """
@@ -149,125 +993,380 @@ class PriceDatabase:
         Returns:
             PriceStats object or None if no data exists
         """
+        if days == SUMMARY_WINDOW_DAYS:
+            cursor = self.conn.cursor()
+            cursor.execute("""
+                SELECT * FROM price_stats_summary
+                WHERE product_id = ? AND retailer_id = ?
+            """, (product_id, retailer_id))
+            row = cursor.fetchone()
+            if row is None:
+                return None
+            # If no observation has aged out of the window since it was last
+            # refreshed, the stored window is exact
+            if not row['window_count'] or \
+                    datetime.fromisoformat(row['window_first_seen']).timestamp() >= window_start(days):
+                return _stats_from_summary(row)
+        
+        return self._query_price_stats(product_id, retailer_id, days)
+
+    def _query_price_stats(self, product_id: str, retailer_id: str,
+                           days: int) -> Optional[PriceStats]:
+        """Compute windowed stats directly from price_history."""
         cursor = self.conn.cursor()
+        cursor.row_factory = None
         
         # Get stats for the specified time period
-        cursor.execute("""
-            SELECT 
-                product_id,
-                retailer_id,
-                MIN(price) as min_price,
-                MAX(price) as max_price,
-                AVG(price) as avg_price,
-                COUNT(*) as observation_count,
-                MIN(timestamp) as first_seen,
-                MAX(timestamp) as last_updated
-            FROM price_history
-            WHERE product_id = ? 
-                AND retailer_id = ?
-                AND timestamp >= datetime('now', '-' || ? || ' days')
-            GROUP BY product_id, retailer_id
-        """, (product_id, retailer_id, days))
-        
-        row = cursor.fetchone()
-        if not row or row['observation_count'] == 0:
+        cutoff = window_start(days)
+        cursor.execute(WINDOW_RUNS_SQL, (product_id, retailer_id, cutoff))
+        window = _window_aggregate(cursor.fetchall(), cutoff)
+        if window is None:
             return None
+        min_price, max_price, avg_price, count, first_seen, last_seen = window
         
         # Get most recent price
         cursor.execute("""
             SELECT price
             FROM price_history
             WHERE product_id = ? AND retailer_id = ?
-            ORDER BY timestamp DESC
+            ORDER BY last_epoch DESC, ts_epoch DESC
             LIMIT 1
         """, (product_id, retailer_id))
         
         current_row = cursor.fetchone()
-        current_price = current_row['price'] if current_row else row['avg_price']
+        current_price = current_row[0] if current_row else avg_price
         
         return PriceStats(
-            product_id=row['product_id'],
-            retailer_id=row['retailer_id'],
+            product_id=product_id,
+            retailer_id=retailer_id,
             current_price=current_price,
-            min_price=row['min_price'],
-            max_price=row['max_price'],
-            avg_price=row['avg_price'],
-            observation_count=row['observation_count'],
-            first_seen=datetime.fromisoformat(row['first_seen']),
-            last_updated=datetime.fromisoformat(row['last_updated'])
+            min_price=min_price,
+            max_price=max_price,
+            avg_price=avg_price,
+            observation_count=count,
+            first_seen=datetime.fromisoformat(first_seen),
+            last_updated=datetime.fromisoformat(last_seen)
         )
     
     def get_recent_prices(self, product_id: str, retailer_id: str, 
-                         limit: int = 30) -> List[PricePoint]:
-        """Get recent price history for a product at a retailer."""
+                         limit: int = 30) -> PriceSeries:
+        """Get recent price history for a product at a retailer, newest first."""
         cursor = self.conn.cursor()
-        cursor.execute("""
-            SELECT *
+        cursor.row_factory = None
+        # Each run holds at least one sighting, so `limit` runs are enough
+        cursor.execute(f"""
+            SELECT {SERIES_COLUMNS}
             FROM price_history
             WHERE product_id = ? AND retailer_id = ?
-            ORDER BY timestamp DESC
+            ORDER BY last_epoch DESC, ts_epoch DESC
             LIMIT ?
         """, (product_id, retailer_id, limit))
+        return _series_from_rows(cursor, newest_first=True, limit=limit)
+    
+    def get_price_history(self, product_id: str, retailer_id: str,
+                          since: Optional[datetime] = None) -> PriceSeries:
+        """
+        Get the full price history for a product at a retailer, oldest first.
         
-        rows = cursor.fetchall()
-        return [
-            PricePoint(
-                product_id=row['product_id'],
-                retailer_id=row['retailer_id'],
+        Args:
+            product_id: Product identifier
+            retailer_id: Retailer identifier
+            since: Only include observations at or after this time
+        
+        Returns:
+            PriceSeries (array-backed, no per-row objects until accessed)
+        """
+        cursor = self.conn.cursor()
+        cursor.row_factory = None
+        cursor.execute(f"""
+            SELECT {SERIES_COLUMNS}
+            FROM price_history
+            WHERE product_id = ? AND retailer_id = ? AND last_epoch >= ?
+            ORDER BY last_epoch, ts_epoch
+        """, (product_id, retailer_id, int(since.timestamp()) if since else 0))
+        return _series_from_rows(cursor, since=since)
+    
+    def iter_recent_history(self, since: int, limit: int) -> Iterator[tuple]:
+        """
+        Stream recent price observations for every product/retailer pair.
+        
+        For each pair this covers everything observed at or after epoch second
+        `since` and the `limit` most recent observations, whichever
+        reaches further back. Each pair is a seek plus a short range scan on
+        idx_price_history_runs, so the cost does not grow with older history.
+        Runs are expanded into their individual sightings.
+        
+        Yields:
+            (product_id, retailer_id, price, timestamp, ts_epoch, pack_size,
+            advertised_savings) tuples, ordered by product, retailer and time
+        """
+        cursor = self.conn.cursor()
+        cursor.row_factory = None
+        cursor.execute("""
+            SELECT h.product_id, h.retailer_id, h.price, h.timestamp, h.ts_epoch,
+                   h.pack_size, h.advertised_savings, h.last_seen, h.last_epoch, h.seen_count
+            FROM price_stats_summary s
+            JOIN price_history h
+                ON h.product_id = s.product_id
+                AND h.retailer_id = s.retailer_id
+                AND h.last_epoch >= MIN(?, COALESCE((
+                    SELECT x.last_epoch FROM price_history x
+                    WHERE x.product_id = s.product_id AND x.retailer_id = s.retailer_id
+                    ORDER BY x.last_epoch DESC
+                    LIMIT 1 OFFSET ?
+                ), 0))
+            ORDER BY s.product_id, s.retailer_id, h.last_epoch, h.ts_epoch
+        """, (since, limit - 1))
+        
+        for _, runs in groupby(cursor, key=itemgetter(0, 1)):
+            runs = list(runs)
+            # Walk back from the newest run to find the first sighting needed
+            # from each: everything since `since`, plus the `limit` most recent
+            remaining = limit
+            firsts = [0] * len(runs)
+            for i in range(len(runs) - 1, -1, -1):
+                row = runs[i]
+                seen_count = row[9]
+                if remaining >= seen_count:
+                    remaining -= seen_count
+                elif row[4] < since:
+                    firsts[i] = min(seen_count - remaining,
+                                    _sightings_before(row[4], row[8], seen_count, since))
+                    remaining = 0
+                else:
+                    remaining = 0
+            
+            for row, first in zip(runs, firsts):
+                seen_count = row[9]
+                if seen_count == 1:
+                    if first == 0:
+                        yield row[:7]
+                    continue
+                product_id, retailer_id, price, timestamp, ts_epoch, pack_size, savings, last_seen, last_epoch = row[:9]
+                if first < seen_count - 1:
+                    start = datetime.fromisoformat(timestamp)
+                    step = (datetime.fromisoformat(last_seen) - start) / (seen_count - 1)
+                for index in range(first, seen_count):
+                    if index == 0:
+                        observed = timestamp
+                    elif index == seen_count - 1:
+                        observed = last_seen
+                    else:
+                        observed = (start + step * index).isoformat()
+                    yield (product_id, retailer_id, price, observed,
+                           _sighting_epoch(ts_epoch, last_epoch, seen_count, index), pack_size, savings)
+    
+    def record_fetch_failure(self, product_id: str, retailer_id: str, url: str,
+                             error: Optional[str] = None,
+                             max_attempts: int = RETRY_MAX_ATTEMPTS) -> FetchRetry:
+        """
+        Queue a failed fetch for retry, with exponential backoff.
+        
+        Args:
+            product_id: Product identifier
+            retailer_id: Retailer identifier
+            url: URL that failed
+            error: Why it failed
+            max_attempts: Failures after which the job is dead-lettered
+        
+        Returns:
+            The queued job (status 'dead' once max_attempts is reached)
+        """
+        now = datetime.now()
+        with self.conn:
+            cursor = self.conn.cursor()
+            cursor.execute(
+                "SELECT attempts, first_failed_at FROM fetch_retries WHERE product_id = ? AND retailer_id = ?",
+                (product_id, retailer_id)
+            )
+            row = cursor.fetchone()
+            attempts = row['attempts'] + 1 if row else 1
+            first_failed_at = row['first_failed_at'] if row else now.isoformat()
+            status = 'dead' if attempts >= max_attempts else 'pending'
+            next_attempt_epoch = int(now.timestamp()) + retry_delay(attempts)
+            cursor.execute("""
+                INSERT OR REPLACE INTO fetch_retries
+                (product_id, retailer_id, url, attempts, next_attempt_epoch, last_error,
+                 status, first_failed_at, last_failed_at)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+            """, (product_id, retailer_id, url, attempts, next_attempt_epoch, error,
+                  status, first_failed_at, now.isoformat()))
+        return _retry_from_row((product_id, retailer_id, url, attempts, next_attempt_epoch,
+                                error, status, first_failed_at))
+
+    def clear_fetch_retry(self, product_id: str, retailer_id: str) -> bool:
+        """Drop a queued retry after a successful fetch. Returns True if one was queued."""
+        with self.conn:
+            cursor = self.conn.cursor()
+            cursor.execute(
+                "DELETE FROM fetch_retries WHERE product_id = ? AND retailer_id = ?",
+                (product_id, retailer_id)
+            )
+        return cursor.rowcount > 0
+
+    def get_due_retries(self, limit: Optional[int] = None) -> List[FetchRetry]:
+        """Pending retries whose backoff has elapsed, most overdue first."""
+        cursor = self.conn.cursor()
+        cursor.row_factory = None
+        cursor.execute(f"""
+            SELECT {RETRY_COLUMNS}
+            FROM fetch_retries
+            WHERE status = 'pending' AND next_attempt_epoch <= ?
+            ORDER BY next_attempt_epoch
+            LIMIT ?
+        """, (int(time.time()), -1 if limit is None else limit))
+        return [_retry_from_row(row) for row in cursor]
+
+    def next_retry_at(self) -> Optional[datetime]:
+        """When the earliest pending retry becomes due, or None if none are pending."""
+        cursor = self.conn.cursor()
+        cursor.execute(
+            "SELECT MIN(next_attempt_epoch) FROM fetch_retries WHERE status = 'pending'"
+        )
+        epoch = cursor.fetchone()[0]
+        return datetime.fromtimestamp(epoch) if epoch is not None else None
+
+    def get_fetch_retries(self, status: Optional[str] = None) -> List[FetchRetry]:
+        """Every queued retry, or only those with the given status ('pending' or 'dead')."""
+        cursor = self.conn.cursor()
+        cursor.row_factory = None
+        if status is None:
+            cursor.execute(f"SELECT {RETRY_COLUMNS} FROM fetch_retries ORDER BY product_id, retailer_id")
+        else:
+            cursor.execute(f"""
+                SELECT {RETRY_COLUMNS} FROM fetch_retries WHERE status = ?
+                ORDER BY product_id, retailer_id
+            """, (status,))
+        return [_retry_from_row(row) for row in cursor]
+
+    def get_page_validators(self) -> Dict[str, PageValidators]:
+        """Stored validators for every product URL, keyed by URL."""
+        cursor = self.conn.cursor()
+        cursor.execute("""
+            SELECT url, etag, last_modified, fragment_hash, price, pack_size, read_at
+            FROM page_validators
+        """)
+        return {
+            row['url']: PageValidators(
+                etag=row['etag'],
+                last_modified=row['last_modified'],
+                fragment_hash=row['fragment_hash'],
                 price=row['price'],
-                timestamp=datetime.fromisoformat(row['timestamp']),
-                url=row['url'],
                 pack_size=row['pack_size'],
-                advertised_savings=row['advertised_savings']
+                read_at=datetime.fromisoformat(row['read_at']) if row['read_at'] else None
             )
-            for row in rows
+            for row in cursor
+        }
+
+    def save_page_validators(self, entries: Iterable[Tuple[str, PageValidators]]) -> int:
+        """
+        Store validators for the given URLs in a single transaction.
+        
+        Args:
+            entries: (url, validators) pairs, e.g. ValidatorCache.changed()
+        
+        Returns:
+            Number of URLs written
+        """
+        now = datetime.now().isoformat()
+        rows = [
+            (url, v.etag, v.last_modified, v.fragment_hash, v.price, v.pack_size,
+             v.read_at.isoformat() if v.read_at else None, now)
+            for url, v in entries
         ]
-    
-    def get_all_products(self) -> List[Product]:
-        """Get all tracked products."""
+        with self.conn:
+            self.conn.executemany("""
+                INSERT OR REPLACE INTO page_validators
+                (url, etag, last_modified, fragment_hash, price, pack_size, read_at, updated_at)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+            """, rows)
+        return len(rows)
+
+    def save_collection_run(self, run: CollectionRun) -> int:
+        """Store a collection run and return its id."""
+        with self.conn:
+            cursor = self.conn.execute("""
+                INSERT INTO collection_runs
+                (started_at, finished_at, mode, seconds, attempts, successes, failures,
+                 http_requests, bytes_received, metrics)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            """, (
+                run.started_at.isoformat(),
+                run.finished_at.isoformat(),
+                run.mode,
+                run.seconds,
+                run.attempts,
+                run.successes,
+                run.failures,
+                run.http_requests,
+                run.bytes_received,
+                json.dumps(run.metrics) if run.metrics is not None else None
+            ))
+        run.id = cursor.lastrowid
+        return run.id
+
+    def get_collection_runs(self, limit: int = 10) -> List[CollectionRun]:
+        """The most recent collection runs, newest first."""
         cursor = self.conn.cursor()
-        cursor.execute("SELECT * FROM products")
+        cursor.execute("SELECT * FROM collection_runs ORDER BY id DESC LIMIT ?", (limit,))
         return [
-            Product(
+            CollectionRun(
                 id=row['id'],
-                name=row['name'],
-                size=row['size'],
-                category=row['category'],
-                brand=row['brand'] if 'brand' in row.keys() else None,
-                upc=row['upc'],
-                target_url=row['target_url'],
-                walmart_url=row['walmart_url'],
-                cvs_url=row['cvs_url'],
-                walgreens_url=row['walgreens_url'],
-                amazon_url=row['amazon_url'],
-                created_at=datetime.fromisoformat(row['created_at']) if row['created_at'] else None,
-                updated_at=datetime.fromisoformat(row['updated_at']) if row['updated_at'] else None
+                started_at=datetime.fromisoformat(row['started_at']),
+                finished_at=datetime.fromisoformat(row['finished_at']),
+                mode=row['mode'],
+                seconds=row['seconds'],
+                attempts=row['attempts'],
+                successes=row['successes'],
+                failures=row['failures'],
+                http_requests=row['http_requests'],
+                bytes_received=row['bytes_received'],
+                metrics=json.loads(row['metrics']) if row['metrics'] else None
             )
             for row in cursor.fetchall()
         ]
 
+    def get_all_products(self) -> List[Product]:
+        """Get all tracked products, with the URLs of their active listings."""
+        cursor = self.conn.cursor()
+        cursor.execute("SELECT product_id, retailer_id, url FROM product_listings WHERE active = 1")
+        urls: Dict[str, Dict[str, str]] = {}
+        for product_id, retailer_id, url in cursor.fetchall():
+            urls.setdefault(product_id, {})[retailer_id] = url
+        cursor.execute("SELECT * FROM products")
+        return [_product_from_row(row, urls.get(row['id'], {})) for row in cursor.fetchall()]
+
+    def get_products_to_collect(self) -> List[Product]:
+        """
+        Products with at least one active listing, each with only its active URLs.
+
+        A single join over the active-listings index drives the collectors, so
+        inactive or missing listings cost nothing.
+        """
+        cursor = self.conn.cursor()
+        cursor.execute("""
+            SELECT p.*, l.retailer_id AS listing_retailer, l.url AS listing_url
+            FROM products p
+            JOIN product_listings l ON l.product_id = p.id AND l.active = 1
+            ORDER BY p.rowid, l.retailer_id
+        """)
+        return [
+            _product_from_row(rows[0], {row['listing_retailer']: row['listing_url'] for row in rows})
+            for rows in (list(group) for _, group in groupby(cursor, key=itemgetter('id')))
+        ]
+
     def get_product(self, product_id: str) -> Optional[Product]:
-        """Get a specific product by ID."""
+        """Get a specific product by ID, with the URLs of its active listings."""
         cursor = self.conn.cursor()
         cursor.execute("SELECT * FROM products WHERE id = ?", (product_id,))
         row = cursor.fetchone()
         if not row:
             return None
-        return Product(
-            id=row['id'],
-            name=row['name'],
-            size=row['size'],
-            category=row['category'],
-            brand=row['brand'] if 'brand' in row.keys() else None,
-            upc=row['upc'],
-            target_url=row['target_url'],
-            walmart_url=row['walmart_url'],
-            cvs_url=row['cvs_url'],
-            walgreens_url=row['walgreens_url'],
-            amazon_url=row['amazon_url'],
-            created_at=datetime.fromisoformat(row['created_at']) if row['created_at'] else None,
-            updated_at=datetime.fromisoformat(row['updated_at']) if row['updated_at'] else None
-        )
+        cursor.execute("""
+            SELECT retailer_id, url FROM product_listings
+            WHERE product_id = ? AND active = 1 ORDER BY retailer_id
+        """, (product_id,))
+        return _product_from_row(row, dict(cursor.fetchall()))
     
     def get_all_retailers(self) -> List[Retailer]:
         """Get all configured retailers."""
@@ -282,6 +1381,102 @@ class PriceDatabase:
             for row in cursor.fetchall()
         ]
     
+    def get_retailer_ids(self) -> Set[str]:
+        """Ids of the configured retailers and of every retailer a product is listed at."""
+        cursor = self.conn.cursor()
+        cursor.execute("SELECT id FROM retailers UNION SELECT retailer_id FROM product_listings")
+        return {row[0] for row in cursor.fetchall()}
+    
     def close(self):
         """Close database connection."""
         self.conn.close()
+
+
+class BufferedPriceWriter:
+    """Accumulates price points and writes them in batches. See PriceDatabase.buffered_writer."""
+
+    def __init__(self, db: PriceDatabase, flush_rows: int, flush_seconds: float):
+        self.db = db
+        self.flush_rows = flush_rows
+        self.flush_seconds = flush_seconds
+        self.written = 0
+        self._buffer: List[PricePoint] = []
+        self._last_flush = time.monotonic()
+
+    def add(self, price_point: PricePoint):
+        """Queue a price point, flushing if the row or time limit is reached."""
+        self._buffer.append(price_point)
+        if len(self._buffer) >= self.flush_rows:
+            self.flush()
+        else:
+            self.flush_if_due()
+
+    def flush_if_due(self):
+        """Flush if more than flush_seconds have passed since the last flush."""
+        if time.monotonic() - self._last_flush >= self.flush_seconds:
+            self.flush()
+
+    def flush(self):
+        """Write everything buffered so far in one transaction."""
+        if self._buffer:
+            self.written += self.db.add_price_points(self._buffer)
+            self._buffer = []
+        self._last_flush = time.monotonic()
+
+
+def _product_from_row(row: sqlite3.Row, urls: Dict[str, str]) -> Product:
+    return Product(
+        id=row['id'],
+        name=row['name'],
+        size=row['size'],
+        category=row['category'],
+        brand=row['brand'] if 'brand' in row.keys() else None,
+        upc=row['upc'],
+        urls=urls,
+        created_at=datetime.fromisoformat(row['created_at']) if row['created_at'] else None,
+        updated_at=datetime.fromisoformat(row['updated_at']) if row['updated_at'] else None
+    )
+
+
+def _listing_from_row(row: sqlite3.Row) -> Listing:
+    return Listing(
+        product_id=row['product_id'],
+        retailer_id=row['retailer_id'],
+        url=row['url'],
+        active=bool(row['active']),
+        last_success_at=datetime.fromisoformat(row['last_success_at']) if row['last_success_at'] else None,
+        created_at=datetime.fromisoformat(row['created_at']),
+        updated_at=datetime.fromisoformat(row['updated_at'])
+    )
+
+
+def _stats_from_summary(row: sqlite3.Row) -> Optional[PriceStats]:
+    """PriceStats for the summary window, or None if nothing falls inside it."""
+    if not row['window_count']:
+        return None
+    return PriceStats(
+        product_id=row['product_id'],
+        retailer_id=row['retailer_id'],
+        current_price=row['current_price'],
+        min_price=row['window_min_price'],
+        max_price=row['window_max_price'],
+        avg_price=row['window_avg_price'],
+        observation_count=row['window_count'],
+        first_seen=datetime.fromisoformat(row['window_first_seen']),
+        last_updated=datetime.fromisoformat(row['window_last_seen'])
+    )
+
+
+def _retry_from_row(row: tuple) -> FetchRetry:
+    """FetchRetry from RETRY_COLUMNS values."""
+    product_id, retailer_id, url, attempts, next_attempt_epoch, last_error, status, first_failed_at = row
+    return FetchRetry(
+        product_id=product_id,
+        retailer_id=retailer_id,
+        url=url,
+        attempts=attempts,
+        next_attempt_at=datetime.fromtimestamp(next_attempt_epoch),
+        last_error=last_error,
+        status=status,
+        first_failed_at=datetime.fromisoformat(first_failed_at)
+    )
@@ -0,0 +1,371 @@
+"""
+Pool of warm Selenium WebDriver instances shared by the scrapers.
+
+Starting a browser (and resolving geckodriver) costs more than scraping a
+product page, so drivers are kept alive between fetches and leased out to
+scrapers instead of being created and quit for every URL.
+
+Usage:
+    from src.driver_pool import get_pool
+
+    with get_pool('firefox').lease() as driver:
+        driver.get(url)
+        ...
+
+Each browser profile ('firefox', 'chrome-uc', ...) gets its own pool. A driver
+is reset (cookies, extra tabs, storage) when it is returned, and recycled after
+a configurable number of uses or as soon as it errors out.
+"""
+import atexit
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass, asdict
+from functools import lru_cache
+from typing import Any, Callable, Dict, List, Optional
+
+
+DEFAULT_POOL_SIZE = 2
+DEFAULT_MAX_USES = 25
+
+
+class DriverStartupError(Exception):
+    """Raised when a pool cannot start a new browser."""
+
+
+class PoolTimeout(Exception):
+    """Raised when no driver became available within the lease timeout."""
+
+
+class PageBlocked(Exception):
+    """Raised inside a lease when the site served a block page; the driver itself is fine."""
+
+
+@dataclass
+class PoolMetrics:
+    """Counters describing how a pool has been used."""
+    created: int = 0          # Browsers started
+    leases: int = 0           # Successful lease() calls
+    reused: int = 0           # Leases served by an already-warm driver
+    recycled: int = 0         # Drivers retired after reaching max_uses
+    crashed: int = 0          # Drivers discarded after an error or failed reset
+    blocked: int = 0          # Leases that ended on a block page (driver kept)
+    startup_seconds: float = 0.0  # Total time spent starting browsers
+    wait_seconds: float = 0.0     # Total time callers waited for a free driver
+
+
+class _PooledDriver:
+    """A driver plus the bookkeeping the pool needs about it."""
+
+    def __init__(self, driver: Any):
+        self.driver = driver
+        self.uses = 0
+        self.created_at = time.monotonic()
+
+
+@lru_cache(maxsize=None)
+def _geckodriver_path() -> str:
+    """Resolve geckodriver once per process instead of once per fetch."""
+    from webdriver_manager.firefox import GeckoDriverManager
+    return GeckoDriverManager().install()
+
+
+def _firefox_factory(user_agent: Optional[str] = None) -> Callable[[], Any]:
+    """Build a factory for headless Firefox drivers."""
+    def create():
+        from selenium import webdriver
+        from selenium.webdriver.firefox.service import Service
+        from selenium.webdriver.firefox.options import Options
+
+        firefox_options = Options()
+        firefox_options.add_argument('--headless')
+        firefox_options.add_argument('--width=1920')
+        firefox_options.add_argument('--height=1080')
+        if user_agent:
+            firefox_options.set_preference('general.useragent.override', user_agent)
+
+        service = Service(_geckodriver_path())
+        return webdriver.Firefox(service=service, options=firefox_options)
+    return create
+
+
+def _undetected_chrome_factory(headless: bool = False) -> Callable[[], Any]:
+    """Build a factory for Chrome started through undetected-chromedriver (used for CVS)."""
+    def create():
+        import undetected_chromedriver as uc
+
+        options = uc.ChromeOptions()
+        if headless:
+            # The new headless mode runs the full browser, which CVS blocks
+            # far less than old headless; no display needed (cron)
+            options.add_argument('--headless=new')
+        else:
+            # Keep the visible window out of the way
+            options.add_argument('--window-position=-2400,-2400')
+        options.add_argument('--no-sandbox')
+        options.add_argument('--disable-dev-shm-usage')
+        options.add_argument('--window-size=1920,1080')
+
+        return uc.Chrome(options=options, use_subprocess=True)
+    return create
+
+
+# Browser profiles the scrapers can ask for, keyed by BaseScraper.browser
+BROWSER_FACTORIES: Dict[str, Callable[[], Any]] = {
+    'firefox': _firefox_factory(),
+    'firefox-mac-ua': _firefox_factory(
+        'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36'
+    ),
+    'chrome-uc': _undetected_chrome_factory(),
+    'chrome-uc-headless': _undetected_chrome_factory(headless=True),
+}
+
+
+class DriverPool:
+    """Keeps up to `size` WebDriver instances alive and leases them out."""
+
+    def __init__(self, factory: Callable[[], Any], size: int = DEFAULT_POOL_SIZE,
+                 max_uses: int = DEFAULT_MAX_USES, name: str = "driver"):
+        """
+        Args:
+            factory: Callable that starts and returns a new driver
+            size: Maximum number of live drivers in this pool
+            max_uses: Leases after which a driver is quit and replaced
+            name: Label used in metrics output
+        """
+        if size < 1:
+            raise ValueError("Pool size must be at least 1")
+        self.factory = factory
+        self.size = size
+        self.max_uses = max_uses
+        self.name = name
+        self._idle: List[_PooledDriver] = []
+        self._live = 0
+        self._closed = False
+        self._cond = threading.Condition()
+        self._metrics = PoolMetrics()
+
+    def warm(self, count: Optional[int] = None):
+        """Start drivers ahead of time so the first leases don't pay startup."""
+        count = self.size if count is None else min(count, self.size)
+        while True:
+            with self._cond:
+                if self._closed or self._live >= count:
+                    return
+                self._live += 1
+            try:
+                pooled = self._start_driver()
+            except Exception:
+                with self._cond:
+                    self._live -= 1
+                    self._cond.notify()
+                raise
+            with self._cond:
+                self._idle.append(pooled)
+                self._cond.notify()
+
+    @contextmanager
+    def lease(self, timeout: Optional[float] = None):
+        """
+        Borrow a driver for the duration of a `with` block.
+
+        The driver is reset and returned to the pool afterwards. If the block
+        raises, the driver is assumed to be in a bad state and is discarded,
+        unless the error is a PageBlocked: the site refused the page, not the
+        browser, so the driver is reset and kept.
+
+        Args:
+            timeout: Seconds to wait for a free driver (None waits forever)
+
+        Raises:
+            PoolTimeout: No driver became free within `timeout`
+            DriverStartupError: A new browser could not be started
+        """
+        pooled = self._acquire(timeout)
+        try:
+            yield pooled.driver
+        except PageBlocked:
+            with self._cond:
+                self._metrics.blocked += 1
+            self._release(pooled)
+            raise
+        except BaseException:
+            self._discard(pooled, crashed=True)
+            raise
+        else:
+            self._release(pooled)
+
+    def _acquire(self, timeout: Optional[float]) -> _PooledDriver:
+        started = time.monotonic()
+        deadline = None if timeout is None else started + timeout
+        with self._cond:
+            while True:
+                if self._closed:
+                    raise RuntimeError(f"{self.name} pool is closed")
+                if self._idle:
+                    pooled = self._idle.pop()
+                    self._metrics.reused += 1
+                    break
+                if self._live < self.size:
+                    self._live += 1
+                    pooled = None
+                    break
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    raise PoolTimeout(f"No {self.name} driver free after {timeout}s")
+                self._cond.wait(remaining)
+            self._metrics.wait_seconds += time.monotonic() - started
+
+        if pooled is None:
+            try:
+                pooled = self._start_driver()
+            except BaseException:
+                with self._cond:
+                    self._live -= 1
+                    self._cond.notify()
+                raise
+
+        pooled.uses += 1
+        with self._cond:
+            self._metrics.leases += 1
+        return pooled
+
+    def _start_driver(self) -> _PooledDriver:
+        started = time.monotonic()
+        try:
+            driver = self.factory()
+        except ImportError:
+            raise
+        except Exception as e:
+            raise DriverStartupError(f"Could not start {self.name} driver: {e}") from e
+        with self._cond:
+            self._metrics.created += 1
+            self._metrics.startup_seconds += time.monotonic() - started
+        return _PooledDriver(driver)
+
+    def _release(self, pooled: _PooledDriver):
+        if pooled.uses >= self.max_uses:
+            self._discard(pooled, crashed=False)
+            return
+        if not self._reset(pooled.driver):
+            self._discard(pooled, crashed=True)
+            return
+        with self._cond:
+            if self._closed:
+                self._live -= 1
+                _quit_quietly(pooled.driver)
+            else:
+                self._idle.append(pooled)
+            self._cond.notify()
+
+    def _discard(self, pooled: _PooledDriver, crashed: bool):
+        _quit_quietly(pooled.driver)
+        with self._cond:
+            self._live -= 1
+            if crashed:
+                self._metrics.crashed += 1
+            else:
+                self._metrics.recycled += 1
+            self._cond.notify()
+
+    @staticmethod
+    def _reset(driver: Any) -> bool:
+        """Clear per-lease state. Returns False if the driver looks dead."""
+        try:
+            handles = driver.window_handles
+            for handle in handles[1:]:
+                driver.switch_to.window(handle)
+                driver.close()
+            driver.switch_to.window(handles[0])
+            try:
+                driver.execute_script(
+                    'window.localStorage.clear(); window.sessionStorage.clear();'
+                )
+            except Exception:
+                pass  # Storage is unavailable on some pages (e.g. error pages)
+            driver.delete_all_cookies()
+            driver.get('about:blank')
+            return True
+        except Exception:
+            return False
+
+    def metrics(self) -> Dict[str, Any]:
+        """Snapshot of pool counters plus current occupancy."""
+        with self._cond:
+            snapshot = asdict(self._metrics)
+            snapshot.update(
+                name=self.name,
+                size=self.size,
+                max_uses=self.max_uses,
+                live=self._live,
+                idle=len(self._idle),
+                in_use=self._live - len(self._idle),
+            )
+        return snapshot
+
+    def close(self):
+        """Quit all idle drivers; leased drivers are quit when returned."""
+        with self._cond:
+            self._closed = True
+            idle, self._idle = self._idle, []
+            self._live -= len(idle)
+            self._cond.notify_all()
+        for pooled in idle:
+            _quit_quietly(pooled.driver)
+
+
+def _quit_quietly(driver: Any):
+    try:
+        driver.quit()
+    except Exception:
+        pass
+
+
+_pools: Dict[str, DriverPool] = {}
+_pools_lock = threading.Lock()
+_pool_settings = {'size': DEFAULT_POOL_SIZE, 'max_uses': DEFAULT_MAX_USES}
+
+
+def configure_pools(size: Optional[int] = None, max_uses: Optional[int] = None):
+    """Set defaults for pools created after this call."""
+    with _pools_lock:
+        if size is not None:
+            _pool_settings['size'] = size
+        if max_uses is not None:
+            _pool_settings['max_uses'] = max_uses
+
+
+def get_pool(browser: str) -> DriverPool:
+    """Return the shared pool for a browser profile, creating it on first use."""
+    with _pools_lock:
+        pool = _pools.get(browser)
+        if pool is None:
+            if browser not in BROWSER_FACTORIES:
+                raise KeyError(f"Unknown browser profile: {browser}")
+            pool = DriverPool(
+                BROWSER_FACTORIES[browser],
+                size=_pool_settings['size'],
+                max_uses=_pool_settings['max_uses'],
+                name=browser,
+            )
+            _pools[browser] = pool
+        return pool
+
+
+def pool_metrics() -> List[Dict[str, Any]]:
+    """Metrics for every pool that has been created in this process."""
+    with _pools_lock:
+        pools = list(_pools.values())
+    return [pool.metrics() for pool in pools]
+
+
+def close_all_pools():
+    """Quit every pooled browser. Safe to call more than once."""
+    with _pools_lock:
+        pools = list(_pools.values())
+        _pools.clear()
+    for pool in pools:
+        pool.close()
+
+
+atexit.register(close_all_pools)
@@ -1,82 +1,221 @@
 """
 Export price data to JSON for use in the HTML display.
+
+The export is streamed: recent price history is read with a single ordered
+cursor, and each product is summarized and written out as soon as its rows
+have gone by, so memory use stays flat however long the history.
 """
+import argparse
+import gzip
 import json
+import os
+import sys
+from collections import deque
 from datetime import datetime
-from database import PriceDatabase
+from itertools import groupby
+from operator import itemgetter
+from pathlib import Path
+from typing import Iterator, Optional
 
+sys.path.insert(0, str(Path(__file__).parent.parent))
 
-def export_to_json(output_path: str = "data/prices_export.json"):
-    """Export all price data to JSON format."""
-    db = PriceDatabase()
-    
-    products = db.get_all_products()
-    retailers = db.get_all_retailers()
-    
-    export_data = {
-        "generated_at": datetime.now().isoformat(),
-        "products": [],
-        "retailers": [
+from src.database import PriceDatabase, window_start
+from src.models import PriceStats
+
+STATS_WINDOW_DAYS = 30  # Window for min/max/avg, as in get_price_stats()
+HISTORY_LIMIT = 30  # Most recent observations included per retailer
+
+FORMATS = ('json', 'ndjson')
+
+_encode = json.JSONEncoder(separators=(',', ':')).encode
+
+
+def _retailer_prices(product_id: str, retailer_id: str, rows, cutoff: int) -> Optional[dict]:
+    """
+    Summarize one retailer's rows for a product.
+
+    Args:
+        rows: iter_recent_history() rows for the pair, oldest first
+        cutoff: Epoch second at which the stats window begins
+
+    Returns:
+        The export entry, or None if nothing was observed inside the window
+    """
+    recent = deque(maxlen=HISTORY_LIMIT)
+    count = 0
+    total = 0.0
+    min_price = max_price = None
+    first_seen = None
+
+    for row in rows:
+        recent.append(row)
+        price, timestamp, ts_epoch = row[2], row[3], row[4]
+        if ts_epoch is None or ts_epoch < cutoff:
+            continue
+        if count == 0:
+            first_seen = timestamp
+            min_price = max_price = price
+        else:
+            min_price = min(min_price, price)
+            max_price = max(max_price, price)
+        count += 1
+        total += price
+
+    if not count:
+        return None
+
+    # Rows are in time order, so the window is a suffix and the last row is
+    # both the current price and the window's last observation
+    latest = recent[-1]
+    stats = PriceStats(
+        product_id=product_id,
+        retailer_id=retailer_id,
+        current_price=latest[2],
+        min_price=min_price,
+        max_price=max_price,
+        avg_price=total / count,
+        observation_count=count,
+        first_seen=datetime.fromisoformat(first_seen),
+        last_updated=datetime.fromisoformat(latest[3])
+    )
+    return {
+        "retailer_id": retailer_id,
+        "current_price": stats.current_price,
+        "min_price": stats.min_price,
+        "max_price": stats.max_price,
+        "avg_price": stats.avg_price,
+        "is_good_deal": stats.is_good_deal(),
+        "savings_vs_avg": stats.savings_vs_average(),
+        "observation_count": stats.observation_count,
+        "last_updated": stats.last_updated.isoformat(),
+        "history": [
             {
-                "id": r.id,
-                "name": r.name,
-                "base_url": r.base_url
+                "price": price,
+                "timestamp": timestamp,
+                "pack_size": pack_size,
+                "advertised_savings": advertised_savings
             }
-            for r in retailers
+            for _, _, price, timestamp, _, pack_size, advertised_savings in recent
         ]
     }
-    
-    # Gather price data for each product
-    for product in products:
-        product_data = {
-            "id": product.id,
-            "name": product.name,
-            "size": product.size,
-            "category": product.category,
-            "prices": []
+
+
+def iter_product_exports(db: PriceDatabase) -> Iterator[dict]:
+    """
+    Yield the export entry for every product with recent price data.
+
+    Products come out in product id order (the order of the history cursor);
+    retailers within a product follow the retailers table.
+    """
+    products = {p.id: p for p in db.get_all_products()}
+    retailer_order = {r.id: i for i, r in enumerate(db.get_all_retailers())}
+    cutoff = window_start(STATS_WINDOW_DAYS)
+
+    history = db.iter_recent_history(cutoff, HISTORY_LIMIT)
+    for product_id, product_rows in groupby(history, key=itemgetter(0)):
+        product = products.get(product_id)
+        if product is None:
+            continue
+
+        prices = []
+        for retailer_id, rows in groupby(product_rows, key=itemgetter(1)):
+            if retailer_id not in retailer_order:
+                continue
+            price_info = _retailer_prices(product_id, retailer_id, rows, cutoff)
+            if price_info:
+                prices.append(price_info)
+
+        if prices:  # Only include products with price data
+            prices.sort(key=lambda p: retailer_order[p["retailer_id"]])
+            yield {
+                "id": product.id,
+                "name": product.name,
+                "size": product.size,
+                "category": product.category,
+                "prices": prices
+            }
+
+
+def export_to_json(output_path: str = "data/prices_export.json", fmt: str = 'json',
+                   compress: Optional[bool] = None) -> int:
+    """
+    Export all price data.
+
+    Args:
+        output_path: File to write (replaced atomically once complete)
+        fmt: 'json' for a single compact document, or 'ndjson' for a header
+             line (generated_at, retailers) followed by one product per line
+        compress: gzip the output; defaults to True when output_path ends in .gz
+
+    Returns:
+        Number of products exported
+    """
+    if fmt not in FORMATS:
+        raise ValueError(f"Unknown export format: {fmt} (expected one of {', '.join(FORMATS)})")
+    if compress is None:
+        compress = output_path.endswith('.gz')
+
+    db = PriceDatabase()
+
+    retailers = [
+        {
+            "id": r.id,
+            "name": r.name,
+            "base_url": r.base_url
         }
-        
-        for retailer in retailers:
-            stats = db.get_price_stats(product.id, retailer.id, days=30)
-            recent_prices = db.get_recent_prices(product.id, retailer.id, limit=30)
-            
-            if stats:
-                price_info = {
-                    "retailer_id": retailer.id,
-                    "current_price": stats.current_price,
-                    "min_price": stats.min_price,
-                    "max_price": stats.max_price,
-                    "avg_price": stats.avg_price,
-                    "is_good_deal": stats.is_good_deal(),
-                    "savings_vs_avg": stats.savings_vs_average(),
-                    "observation_count": stats.observation_count,
-                    "last_updated": stats.last_updated.isoformat(),
-                    "history": [
-                        {
-                            "price": p.price,
-                            "timestamp": p.timestamp.isoformat(),
-                            "pack_size": p.pack_size,
-                            "advertised_savings": p.advertised_savings
-                        }
-                        for p in reversed(recent_prices)  # Chronological order
-                    ]
-                }
-                product_data["prices"].append(price_info)
-        
-        if product_data["prices"]:  # Only include products with price data
-            export_data["products"].append(product_data)
-    
-    # Write to JSON file
-    with open(output_path, 'w') as f:
-        json.dump(export_data, f, indent=2)
-    
+        for r in db.get_all_retailers()
+    ]
+    generated_at = datetime.now().isoformat()
+
+    tmp_path = f"{output_path}.tmp"
+    opener = gzip.open if compress else open
+    product_count = 0
+
+    try:
+        with opener(tmp_path, 'wt', encoding='utf-8') as f:
+            if fmt == 'ndjson':
+                f.write(_encode({"generated_at": generated_at, "retailers": retailers}))
+                f.write("\n")
+                for product_data in iter_product_exports(db):
+                    f.write(_encode(product_data))
+                    f.write("\n")
+                    product_count += 1
+            else:
+                # Same document as before, written a product at a time
+                f.write(f'{{"generated_at":{_encode(generated_at)},"products":[')
+                for product_data in iter_product_exports(db):
+                    if product_count:
+                        f.write(",")
+                    f.write(_encode(product_data))
+                    product_count += 1
+                f.write(f'],"retailers":{_encode(retailers)}}}')
+        os.replace(tmp_path, output_path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    finally:
+        db.close()
+
     print(f"✓ Exported price data to {output_path}")
-    print(f"  Products: {len(export_data['products'])}")
-    print(f"  Retailers: {len(export_data['retailers'])}")
-    
-    db.close()
-    return export_data
+    print(f"  Products: {product_count}")
+    print(f"  Retailers: {len(retailers)}")
+
+    return product_count
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Export price data for the HTML display.")
+    parser.add_argument('output', nargs='?', default="data/prices_export.json",
+                        help="Output file (default: data/prices_export.json)")
+    parser.add_argument('--format', choices=FORMATS, default='json', dest='fmt',
+                        help="json (single document) or ndjson (one product per line)")
+    parser.add_argument('--gzip', action='store_true', default=None,
+                        help="Compress the output (implied by a .gz file name)")
+    args = parser.parse_args()
+
+    export_to_json(args.output, fmt=args.fmt, compress=args.gzip)
 
 
 if __name__ == "__main__":
-    export_to_json()
+    main()
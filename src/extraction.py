@@ -0,0 +1,164 @@
+r"""
+Declarative price extraction for the browser tier.
+
+Each retailer's rendered-page extraction is described by a spec in
+src/extraction_specs.json rather than in code:
+
+    "amazon": {
+        "selectors": [{"css": "span.a-price span.a-offscreen"}, ...],
+        "read": ["text", "@textContent"],
+        "accept": "\\$|^\\d+(\\.\\d*)?$",
+        "price": "\\$?(\\d+\\.\\d{2})",
+        "was_price": [{"css": "span.a-price.a-text-price span.a-offscreen"}],
+        "abort_on_block_page": false
+    }
+
+- selectors: where the price is, in order of preference; each one "css",
+  "xpath" or "tag"
+- read: how to get an element's text, tried in order until one is non-empty:
+  "text" (rendered text) or "@name" (an attribute or DOM property)
+- accept: regex element text must match to count as a price (default: "\\$")
+- price: regex whose first group is the price (default: "\\$?(\\d+\\.\\d{2})")
+- was_price: optional selectors for the regular price of an item on sale;
+  read once the price is found and stored as the advertised savings
+- abort_on_block_page: stop waiting and raise BlockedError when the page title
+  says access was denied
+
+Specs are compiled once per file into ExtractionSpec objects holding the
+compiled patterns and (By, selector) pairs, and BaseScraper runs them all
+through the same engine (see BaseScraper._extract_with_spec). Adding a
+selector is an edit to the JSON file.
+"""
+import json
+import re
+from dataclasses import dataclass
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, Dict, Optional, Pattern, Tuple
+
+EXTRACTION_SPECS_PATH = Path(__file__).parent / 'extraction_specs.json'
+
+DEFAULT_ACCEPT = r'\$'
+DEFAULT_PRICE = r'\$?(\d+\.\d{2})'
+
+# Spec selector keys and the Selenium `By` strategies they stand for
+# (the By constants are these strings, so selenium isn't needed to compile)
+SELECTOR_KINDS = {
+    'css': 'css selector',
+    'xpath': 'xpath',
+    'tag': 'tag name',
+}
+
+
+class ExtractionSpecError(Exception):
+    """Raised when an extraction spec is malformed."""
+
+
+@dataclass(frozen=True)
+class ExtractionSpec:
+    """A retailer's compiled extraction spec. See module docstring."""
+    retailer_id: str
+    selectors: Tuple[Tuple[str, str], ...]  # (By, selector) pairs, in order of preference
+    read: Tuple[str, ...] = ('text',)
+    accept: Pattern = re.compile(DEFAULT_ACCEPT)
+    price: Pattern = re.compile(DEFAULT_PRICE)
+    was_price: Tuple[Tuple[str, str], ...] = ()
+    abort_on_block_page: bool = False
+
+    def read_text(self, element: Any) -> str:
+        """An element's text, from the first `read` source that has any."""
+        for source in self.read:
+            if source == 'text':
+                text = element.text
+            else:
+                text = element.get_attribute(source[1:])
+            if text:
+                return text
+        return ''
+
+    def accepts(self, text: str) -> bool:
+        """Whether element text looks like a price."""
+        return self.accept.search(text) is not None
+
+    def parse_price(self, text: str) -> Optional[float]:
+        """The price in element text, or None if it has none."""
+        match = self.price.search(text)
+        return float(match.group(1)) if match else None
+
+    def find_was_price(self, driver: Any) -> Optional[float]:
+        """The first regular price on the page, without waiting for it to render."""
+        for by, selector in self.was_price:
+            for element in driver.find_elements(by, selector):
+                price = self.parse_price(self.read_text(element).strip())
+                if price is not None:
+                    return price
+        return None
+
+
+def _compile_selectors(retailer_id: str, field: str, entries: Any) -> Tuple[Tuple[str, str], ...]:
+    if not isinstance(entries, list):
+        raise ExtractionSpecError(f"{retailer_id}: '{field}' must be a list of selectors")
+    selectors = []
+    for entry in entries:
+        kinds = [kind for kind in SELECTOR_KINDS if kind in entry] if isinstance(entry, dict) else []
+        if len(kinds) != 1:
+            raise ExtractionSpecError(f"{retailer_id}: {field} entry {entry!r} needs exactly one of "
+                                      f"{', '.join(SELECTOR_KINDS)}")
+        selectors.append((SELECTOR_KINDS[kinds[0]], entry[kinds[0]]))
+    return tuple(selectors)
+
+
+def _compile_pattern(retailer_id: str, field: str, pattern: str, groups: int = 0) -> Pattern:
+    try:
+        compiled = re.compile(pattern)
+    except (re.error, TypeError) as e:
+        raise ExtractionSpecError(f"{retailer_id}: bad '{field}' pattern {pattern!r}: {e}") from e
+    if compiled.groups < groups:
+        raise ExtractionSpecError(f"{retailer_id}: '{field}' pattern {pattern!r} needs a group for the price")
+    return compiled
+
+
+def compile_spec(retailer_id: str, raw: Dict[str, Any]) -> ExtractionSpec:
+    """
+    Compile one retailer's spec from its JSON form.
+
+    Raises:
+        ExtractionSpecError: The spec is malformed
+    """
+    if not raw.get('selectors'):
+        raise ExtractionSpecError(f"{retailer_id}: a spec needs at least one selector")
+    read = raw.get('read', ['text'])
+    read = [read] if isinstance(read, str) else read
+    for source in read:
+        if source != 'text' and not source.startswith('@'):
+            raise ExtractionSpecError(f"{retailer_id}: 'read' sources are \"text\" or \"@name\", "
+                                      f"got {source!r}")
+    return ExtractionSpec(
+        retailer_id=retailer_id,
+        selectors=_compile_selectors(retailer_id, 'selectors', raw['selectors']),
+        read=tuple(read),
+        accept=_compile_pattern(retailer_id, 'accept', raw.get('accept', DEFAULT_ACCEPT)),
+        price=_compile_pattern(retailer_id, 'price', raw.get('price', DEFAULT_PRICE), groups=1),
+        was_price=_compile_selectors(retailer_id, 'was_price', raw.get('was_price', [])),
+        abort_on_block_page=bool(raw.get('abort_on_block_page', False)),
+    )
+
+
+@lru_cache(maxsize=None)
+def load_extraction_specs(path: Path = EXTRACTION_SPECS_PATH) -> Dict[str, ExtractionSpec]:
+    """
+    Compiled specs from a JSON file, keyed by retailer id. Cached per path.
+
+    Raises:
+        ExtractionSpecError: The file can't be read or a spec is malformed
+    """
+    try:
+        raw = json.loads(Path(path).read_text())
+    except (OSError, ValueError) as e:
+        raise ExtractionSpecError(f"Can't read extraction specs {path}: {e}") from e
+    return {retailer_id: compile_spec(retailer_id, spec) for retailer_id, spec in raw.items()}
+
+
+def get_extraction_spec(retailer_id: str, path: Path = EXTRACTION_SPECS_PATH) -> Optional[ExtractionSpec]:
+    """A retailer's compiled spec, or None if the file has none for it."""
+    return load_extraction_specs(path).get(retailer_id)
@@ -0,0 +1,176 @@
+"""
+Minimal keep-alive HTTP client for the browser-free fetch tier.
+
+Uses only the standard library (http.client). Connections are pooled per
+host and reused across requests, so repeated fetches against the same
+retailer skip the TCP/TLS handshake.
+"""
+import gzip
+import http.client
+import threading
+import zlib
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import urljoin, urlsplit
+
+
+DEFAULT_HEADERS = {
+    'User-Agent': ('Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 '
+                   '(KHTML, like Gecko) Chrome/120.0 Safari/537.36'),
+    'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8',
+    'Accept-Language': 'en-US,en;q=0.9',
+    'Accept-Encoding': 'gzip, deflate',
+    'Connection': 'keep-alive',
+}
+
+MAX_REDIRECTS = 5
+
+
+@dataclass
+class HttpResponse:
+    """A fully-read HTTP response."""
+    url: str  # Final URL after redirects
+    status: int
+    headers: Dict[str, str] = field(default_factory=dict)  # Lower-cased names
+    body: bytes = b''
+
+    @property
+    def text(self) -> str:
+        charset = 'utf-8'
+        content_type = self.headers.get('content-type', '')
+        if 'charset=' in content_type:
+            charset = content_type.split('charset=', 1)[1].split(';')[0].strip() or charset
+        return self.body.decode(charset, errors='replace')
+
+
+_HostKey = Tuple[str, str, int]
+
+
+class HttpSession:
+    """Thread-safe HTTP client that keeps connections alive per host."""
+
+    def __init__(self, timeout: float = 15.0, max_idle_per_host: int = 4,
+                 headers: Optional[Dict[str, str]] = None):
+        """
+        Args:
+            timeout: Socket timeout in seconds for connect and read
+            max_idle_per_host: Idle connections kept open for reuse per host
+            headers: Default request headers (merged over DEFAULT_HEADERS)
+        """
+        self.timeout = timeout
+        self.max_idle_per_host = max_idle_per_host
+        self.headers = {**DEFAULT_HEADERS, **(headers or {})}
+        self._idle: Dict[_HostKey, List[http.client.HTTPConnection]] = {}
+        self._lock = threading.Lock()
+        self.connections_opened = 0
+        self.requests_sent = 0
+        self.bytes_received = 0
+
+    def get(self, url: str, headers: Optional[Dict[str, str]] = None) -> HttpResponse:
+        """GET a URL, following redirects, and return the decoded response."""
+        request_headers = {**self.headers, **(headers or {})}
+        for _ in range(MAX_REDIRECTS + 1):
+            response = self._request('GET', url, request_headers)
+            location = response.headers.get('location')
+            if response.status in (301, 302, 303, 307, 308) and location:
+                url = urljoin(url, location)
+                continue
+            return response
+        raise http.client.HTTPException(f"Too many redirects fetching {url}")
+
+    def _request(self, method: str, url: str, headers: Dict[str, str]) -> HttpResponse:
+        parts = urlsplit(url)
+        scheme = parts.scheme or 'http'
+        port = parts.port or (443 if scheme == 'https' else 80)
+        key = (scheme, parts.hostname or '', port)
+        path = parts.path or '/'
+        if parts.query:
+            path = f"{path}?{parts.query}"
+
+        # A pooled connection may have been closed by the server while idle;
+        # retry once on a fresh connection in that case
+        for attempt in range(2):
+            conn, reused = self._checkout(key)
+            try:
+                conn.request(method, path, headers=headers)
+                raw = conn.getresponse()
+                body = raw.read()
+            except (http.client.RemoteDisconnected, ConnectionResetError,
+                    BrokenPipeError, http.client.CannotSendRequest):
+                conn.close()
+                if reused and attempt == 0:
+                    continue
+                raise
+            except Exception:
+                conn.close()
+                raise
+
+            response_headers = {k.lower(): v for k, v in raw.getheaders()}
+            with self._lock:
+                self.requests_sent += 1
+                self.bytes_received += len(body)
+
+            if raw.will_close:
+                conn.close()
+            else:
+                self._checkin(key, conn)
+
+            return HttpResponse(
+                url=url,
+                status=raw.status,
+                headers=response_headers,
+                body=_decode_body(body, response_headers.get('content-encoding', '')),
+            )
+        raise http.client.HTTPException(f"Could not fetch {url}")
+
+    def _checkout(self, key: _HostKey) -> Tuple[http.client.HTTPConnection, bool]:
+        with self._lock:
+            idle = self._idle.get(key)
+            if idle:
+                return idle.pop(), True
+            self.connections_opened += 1
+        scheme, host, port = key
+        if scheme == 'https':
+            return http.client.HTTPSConnection(host, port, timeout=self.timeout), False
+        return http.client.HTTPConnection(host, port, timeout=self.timeout), False
+
+    def _checkin(self, key: _HostKey, conn: http.client.HTTPConnection):
+        with self._lock:
+            idle = self._idle.setdefault(key, [])
+            if len(idle) < self.max_idle_per_host:
+                idle.append(conn)
+                return
+        conn.close()
+
+    def close(self):
+        """Close all idle connections."""
+        with self._lock:
+            idle, self._idle = self._idle, {}
+        for conns in idle.values():
+            for conn in conns:
+                conn.close()
+
+
+def _decode_body(body: bytes, encoding: str) -> bytes:
+    encoding = encoding.lower()
+    if encoding == 'gzip':
+        return gzip.decompress(body)
+    if encoding == 'deflate':
+        try:
+            return zlib.decompress(body)
+        except zlib.error:
+            return zlib.decompress(body, -zlib.MAX_WBITS)
+    return body
+
+
+_session: Optional[HttpSession] = None
+_session_lock = threading.Lock()
+
+
+def get_http_session() -> HttpSession:
+    """Process-wide shared session used by the scrapers."""
+    global _session
+    with _session_lock:
+        if _session is None:
+            _session = HttpSession()
+        return _session
@@ -1,9 +1,11 @@
 """
 Data models for the price tracking system.
 """
-from dataclasses import dataclass
-from datetime import datetime
-from typing import Optional
+import math
+from array import array
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, Iterator, List, Optional, Union
 
 
 @dataclass
@@ -15,11 +17,7 @@ class Product:
     category: str  # e.g., 'skincare', 'eye-drops'
     brand: Optional[str] = None  # Brand/manufacturer name (e.g., 'Eucerin', 'La Roche-Posay')
     upc: Optional[str] = None  # Universal Product Code
-    target_url: Optional[str] = None
-    walmart_url: Optional[str] = None
-    cvs_url: Optional[str] = None
-    walgreens_url: Optional[str] = None
-    amazon_url: Optional[str] = None
+    urls: Dict[str, str] = field(default_factory=dict)  # Active listing URLs by retailer id
     created_at: Optional[datetime] = None
     updated_at: Optional[datetime] = None
 
@@ -28,14 +26,19 @@ class Product:
 
     def get_retailer_url(self, retailer_id: str) -> Optional[str]:
         """Get the URL for a specific retailer."""
-        url_map = {
-            'target': self.target_url,
-            'walmart': self.walmart_url,
-            'cvs': self.cvs_url,
-            'walgreens': self.walgreens_url,
-            'amazon': self.amazon_url
-        }
-        return url_map.get(retailer_id)
+        return self.urls.get(retailer_id)
+
+
+@dataclass
+class Listing:
+    """A product's page at one retailer (a product_listings row)."""
+    product_id: str
+    retailer_id: str
+    url: str
+    active: bool = True  # Inactive listings are kept but not collected
+    last_success_at: Optional[datetime] = None  # When a price was last collected from it
+    created_at: Optional[datetime] = None
+    updated_at: Optional[datetime] = None
 
 
 @dataclass
@@ -49,7 +52,7 @@ class Retailer:
         return self.name
 
 
-@dataclass
+@dataclass(slots=True)
 class PricePoint:
     """A single price observation at a specific time."""
     product_id: str
@@ -59,6 +62,7 @@ class PricePoint:
     url: str  # Product URL at the retailer
     pack_size: int = 1  # For multi-packs (1 for single items)
     advertised_savings: Optional[float] = None  # If retailer claims "$X off"
+    source: Optional[str] = None  # How it was collected: 'http', 'browser', 'reused' or 'manual'
     
     @property
     def price_per_unit(self) -> float:
@@ -70,6 +74,57 @@ class PricePoint:
         return f"${self.price:.2f} ({pack_info}) @ {self.retailer_id}"
 
 
+@dataclass
+class PageValidators:
+    """What was last seen at a product URL, for change-aware fetching."""
+    etag: Optional[str] = None
+    last_modified: Optional[str] = None
+    fragment_hash: Optional[str] = None  # Hash of the markup around the price
+    price: Optional[float] = None  # Price last read from the page
+    pack_size: int = 1
+    read_at: Optional[datetime] = None  # When the price was last read (not reused) from the page
+
+
+@dataclass
+class FetchRetry:
+    """A failed (product, retailer, url) fetch waiting to be retried."""
+    product_id: str
+    retailer_id: str
+    url: str
+    attempts: int  # Failed attempts so far
+    next_attempt_at: datetime
+    last_error: Optional[str] = None
+    status: str = 'pending'  # 'pending', or 'dead' once attempts are used up
+    first_failed_at: Optional[datetime] = None
+    
+    @property
+    def is_dead(self) -> bool:
+        return self.status == 'dead'
+    
+    def __str__(self):
+        return f"{self.product_id} @ {self.retailer_id} ({self.attempts} attempt(s), {self.status})"
+
+
+@dataclass
+class CollectionRun:
+    """What one collection run did and where its time went."""
+    started_at: datetime
+    finished_at: datetime
+    mode: str  # 'sequential', 'concurrent', 'async' or 'retries'
+    seconds: float
+    attempts: int
+    successes: int
+    failures: int
+    http_requests: int = 0
+    bytes_received: int = 0
+    metrics: Optional[Dict] = None  # Per-retailer outcomes, stage timings and selector stats
+    id: Optional[int] = None
+
+    def __str__(self):
+        return (f"{self.started_at:%Y-%m-%d %H:%M:%S} {self.mode}: "
+                f"{self.successes}/{self.attempts} in {self.seconds:.1f}s")
+
+
 @dataclass
 class PriceStats:
     """Statistical summary of price history for a product at a retailer."""
@@ -98,3 +153,139 @@ class PriceStats:
     def savings_vs_average(self) -> float:
         """Calculate savings compared to historical average."""
         return self.avg_price - self.current_price
+
+
+# Timestamps are naive local datetimes; PriceSeries stores them as microseconds
+# of wall-clock time since this origin, which round-trips exactly. Aware
+# datetimes are converted to local time first.
+_WALL_CLOCK_ORIGIN = datetime(1970, 1, 1)
+_MICROSECOND = timedelta(microseconds=1)
+
+
+class PriceSeries:
+    """
+    Array-backed sequence of price observations.
+    
+    Columns are kept in parallel typed arrays, with product, retailer, URL and
+    source strings interned so repeated values are stored once. Indexing or
+    iterating builds PricePoint objects on demand; slicing returns another
+    PriceSeries without creating any. Use the column properties (prices,
+    pack_sizes, ...) to work on the raw values.
+    """
+    
+    __slots__ = ('_timestamps', '_prices', '_pack_sizes', '_savings',
+                 '_product_ids', '_retailer_ids', '_urls', '_sources',
+                 '_strings', '_string_ids')
+    
+    def __init__(self, price_points: Iterable['PricePoint'] = ()):
+        self._timestamps = array('q')  # Wall-clock microseconds since 1970-01-01
+        self._prices = array('d')
+        self._pack_sizes = array('l')
+        self._savings = array('d')  # NaN for "no advertised savings"
+        self._product_ids = array('I')  # Indexes into _strings
+        self._retailer_ids = array('I')
+        self._urls = array('I')
+        self._sources = array('I')
+        self._strings: List[Optional[str]] = []
+        self._string_ids: Dict[Optional[str], int] = {}
+        for price_point in price_points:
+            self.append(price_point)
+    
+    def _intern(self, value: Optional[str]) -> int:
+        index = self._string_ids.get(value)
+        if index is None:
+            index = self._string_ids[value] = len(self._strings)
+            self._strings.append(value)
+        return index
+    
+    def add(self, product_id: str, retailer_id: str, price: float, timestamp: datetime,
+            url: str, pack_size: int = 1, advertised_savings: Optional[float] = None,
+            source: Optional[str] = None):
+        """Append one observation from its field values."""
+        if timestamp.tzinfo is not None:
+            timestamp = timestamp.astimezone().replace(tzinfo=None)
+        self._timestamps.append((timestamp - _WALL_CLOCK_ORIGIN) // _MICROSECOND)
+        self._prices.append(price)
+        self._pack_sizes.append(pack_size if pack_size is not None else 1)
+        self._savings.append(math.nan if advertised_savings is None else advertised_savings)
+        self._product_ids.append(self._intern(product_id))
+        self._retailer_ids.append(self._intern(retailer_id))
+        self._urls.append(self._intern(url))
+        self._sources.append(self._intern(source))
+    
+    def append(self, price_point: 'PricePoint'):
+        """Append a PricePoint."""
+        self.add(price_point.product_id, price_point.retailer_id, price_point.price,
+                 price_point.timestamp, price_point.url, price_point.pack_size,
+                 price_point.advertised_savings, price_point.source)
+    
+    def __len__(self) -> int:
+        return len(self._prices)
+    
+    def __getitem__(self, index: Union[int, slice]) -> Union['PricePoint', 'PriceSeries']:
+        if isinstance(index, slice):
+            return self._take(index)
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("PriceSeries index out of range")
+        strings = self._strings
+        savings = self._savings[index]
+        return PricePoint(
+            product_id=strings[self._product_ids[index]],
+            retailer_id=strings[self._retailer_ids[index]],
+            price=self._prices[index],
+            timestamp=_WALL_CLOCK_ORIGIN + self._timestamps[index] * _MICROSECOND,
+            url=strings[self._urls[index]],
+            pack_size=self._pack_sizes[index],
+            advertised_savings=None if math.isnan(savings) else savings,
+            source=strings[self._sources[index]]
+        )
+    
+    def _take(self, index: slice) -> 'PriceSeries':
+        # The intern table is shared; appending to either series only adds entries
+        series = PriceSeries.__new__(PriceSeries)
+        for name in ('_timestamps', '_prices', '_pack_sizes', '_savings',
+                     '_product_ids', '_retailer_ids', '_urls', '_sources'):
+            setattr(series, name, getattr(self, name)[index])
+        series._strings = self._strings
+        series._string_ids = self._string_ids
+        return series
+    
+    def __iter__(self) -> Iterator['PricePoint']:
+        for index in range(len(self)):
+            yield self[index]
+    
+    def __reversed__(self) -> Iterator['PricePoint']:
+        for index in range(len(self) - 1, -1, -1):
+            yield self[index]
+    
+    def __repr__(self):
+        return f"PriceSeries({len(self)} observations)"
+    
+    @property
+    def prices(self) -> array:
+        """Prices as a float array (shared, do not modify)."""
+        return self._prices
+    
+    @property
+    def pack_sizes(self) -> array:
+        """Pack sizes as an int array (shared, do not modify)."""
+        return self._pack_sizes
+    
+    @property
+    def timestamps(self) -> List[datetime]:
+        """Observation times as datetimes."""
+        return [_WALL_CLOCK_ORIGIN + t * _MICROSECOND for t in self._timestamps]
+    
+    @property
+    def retailer_ids(self) -> List[str]:
+        """Retailer id of each observation."""
+        strings = self._strings
+        return [strings[i] for i in self._retailer_ids]
+    
+    @property
+    def urls(self) -> List[str]:
+        """Product URL of each observation."""
+        strings = self._strings
+        return [strings[i] for i in self._urls]
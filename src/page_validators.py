@@ -0,0 +1,216 @@
+"""
+Change-aware fetching: per-URL validators remembered between runs.
+
+For every product URL the collector keeps the HTTP validators the retailer
+sent (ETag, Last-Modified), a hash of the page's price-bearing fragment and
+the price last read from it. The HTTP tier then:
+
+- sends If-None-Match / If-Modified-Since, and on 304 Not Modified reuses
+  the stored price without downloading or parsing the page;
+- when the page has no structured price, hashes the markup around the
+  scraper's price_markers and, if it is unchanged since the browser last
+  read a price from it and still shows that price, reuses the price instead
+  of rendering the page.
+
+A stored price is only reused within MAX_REUSE_AGE of when it was last
+actually read; after that the page is fetched and read in full again, so a
+fragment that never changes (e.g. an empty placeholder filled in client-side)
+can't keep an old price alive. Reused prices are recorded with
+source='reused'.
+
+Validators are held in memory while a run is in progress (scrapers may run
+on worker threads) and loaded from / saved to the database by the collector
+on its own thread.
+"""
+import hashlib
+import threading
+from dataclasses import dataclass, asdict, replace
+from datetime import datetime, timedelta
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from src.models import PageValidators, PricePoint
+
+
+FRAGMENT_SPAN = 300  # Characters kept after each price marker
+FRAGMENT_MAX_HITS = 8  # Marker occurrences hashed per page
+
+MAX_REUSE_AGE = timedelta(days=3)  # How long a price may be reused without reading it again
+
+REUSED_SOURCE = 'reused'  # PricePoint.source of a stored price reused for an unchanged page
+
+
+def price_fragments(html: str, markers: Iterable[str]) -> List[str]:
+    """
+    The markup following each price marker.
+
+    Args:
+        html: Page source
+        markers: Literal strings that introduce the price (e.g. an element id)
+
+    Returns:
+        Up to FRAGMENT_MAX_HITS fragments of FRAGMENT_SPAN characters
+    """
+    fragments = []
+    for marker in markers:
+        start = html.find(marker)
+        while start != -1 and len(fragments) < FRAGMENT_MAX_HITS:
+            fragments.append(html[start:start + FRAGMENT_SPAN])
+            start = html.find(marker, start + len(marker))
+    return fragments
+
+
+def fragments_hash(fragments: List[str]) -> Optional[str]:
+    """Hex digest of price_fragments() output, or None if there are none."""
+    if not fragments:
+        return None
+    digest = hashlib.sha1()
+    for fragment in fragments:
+        digest.update(fragment.encode('utf-8', 'replace'))
+    return digest.hexdigest()
+
+
+def shows_price(fragments: List[str], price: float) -> bool:
+    """Whether the fragments contain the price as a page would print it (12.97, 1,299.00)."""
+    texts = {f"{price:.2f}", f"{price:,.2f}"}
+    return any(text in fragment for fragment in fragments for text in texts)
+
+
+@dataclass
+class ConditionalFetchStats:
+    """What change-aware fetching saved during a run."""
+    requests: int = 0  # HTTP tier requests
+    conditional: int = 0  # Requests sent with stored validators
+    not_modified: int = 0  # 304 responses answered from the stored price
+    fragment_unchanged: int = 0  # Browser renders skipped on an unchanged fragment
+    expired: int = 0  # Stored prices too old to reuse (MAX_REUSE_AGE), read again
+    price_unchanged: int = 0  # Pages fetched in full whose price had not changed
+    price_changed: int = 0  # Prices that differed from the stored one (or were new)
+    browser_renders: int = 0
+    browser_seconds: float = 0.0
+
+
+class ValidatorCache:
+    """Thread-safe per-URL validators for one collection run."""
+
+    def __init__(self, validators: Optional[Dict[str, PageValidators]] = None,
+                 max_age: timedelta = MAX_REUSE_AGE):
+        """
+        Args:
+            validators: Stored entries by URL (PriceDatabase.get_page_validators)
+            max_age: How long after it was read a stored price may be reused
+        """
+        self._entries: Dict[str, PageValidators] = dict(validators or {})
+        self.max_age = max_age
+        self._pending_fragments: Dict[str, str] = {}
+        self._pending_validators: Dict[str, Tuple[Optional[str], Optional[str]]] = {}
+        self._dirty: set = set()
+        self._lock = threading.Lock()
+        self.stats = ConditionalFetchStats()
+
+    def get(self, url: str) -> Optional[PageValidators]:
+        with self._lock:
+            return self._entries.get(url)
+
+    def _reusable_price(self, entry: Optional[PageValidators]) -> bool:
+        """Whether the entry holds a price read recently enough to reuse. Call with the lock held."""
+        if entry is None or entry.price is None:
+            return False
+        return entry.read_at is not None and datetime.now() - entry.read_at <= self.max_age
+
+    def conditional_headers(self, url: str) -> Dict[str, str]:
+        """If-None-Match / If-Modified-Since headers for a URL with a stored price."""
+        with self._lock:
+            entry = self._entries.get(url)
+            self.stats.requests += 1
+            if not self._reusable_price(entry):
+                if entry is not None and entry.price is not None:
+                    self.stats.expired += 1
+                return {}
+            headers = {}
+            if entry.etag:
+                headers['If-None-Match'] = entry.etag
+            if entry.last_modified:
+                headers['If-Modified-Since'] = entry.last_modified
+            if headers:
+                self.stats.conditional += 1
+            return headers
+
+    def record_response(self, url: str, status: int, headers: Dict[str, str]):
+        """
+        Hold the validators from a 200 response until remember() pairs them
+        with a price read from that page. If no price is read, the stored
+        validators stay those of the page the stored price came from, so the
+        next request isn't answered 304 for a page nobody read.
+        """
+        if status != 200:
+            return
+        with self._lock:
+            self._pending_validators[url] = (headers.get('etag'), headers.get('last-modified'))
+
+    def reuse(self, url: str, fragments: Optional[List[str]] = None) -> Optional[PageValidators]:
+        """
+        The stored entry if its price can stand in for this fetch.
+
+        Without fragments this is the 304 case; with them (price_fragments()),
+        the stored price is reused only if the fragments hash the same as when
+        it was read and contain the price. Otherwise the hash is held until
+        remember() pairs it with the price the browser reads. Either way the
+        price must have been read within max_age.
+        """
+        fragment_hash = fragments_hash(fragments) if fragments is not None else None
+        with self._lock:
+            entry = self._entries.get(url)
+            if not self._reusable_price(entry):
+                reusable = False
+            elif fragments is None:
+                reusable = True
+                self.stats.not_modified += 1
+            else:
+                reusable = entry.fragment_hash == fragment_hash and shows_price(fragments, entry.price)
+                if reusable:
+                    self.stats.fragment_unchanged += 1
+            if not reusable and fragment_hash is not None:
+                self._pending_fragments[url] = fragment_hash
+            return entry if reusable else None
+
+    def remember(self, url: str, price_point: PricePoint, reused: bool = False):
+        """
+        Store the price read from a URL (reused: it came from the stored entry),
+        with the validators and fragment hash of the response it was read from.
+        """
+        with self._lock:
+            entry = self._entries.get(url) or PageValidators()
+            fragment_hash = self._pending_fragments.pop(url, entry.fragment_hash)
+            etag, last_modified = self._pending_validators.pop(url, (entry.etag, entry.last_modified))
+            if not reused:
+                if entry.price == price_point.price and entry.pack_size == price_point.pack_size:
+                    self.stats.price_unchanged += 1
+                else:
+                    self.stats.price_changed += 1
+            updated = replace(entry, price=price_point.price, pack_size=price_point.pack_size,
+                              fragment_hash=fragment_hash, etag=etag, last_modified=last_modified,
+                              read_at=entry.read_at if reused else datetime.now())
+            if updated != entry:
+                self._entries[url] = updated
+                self._dirty.add(url)
+
+    def record_browser_render(self, seconds: float):
+        with self._lock:
+            self.stats.browser_renders += 1
+            self.stats.browser_seconds += seconds
+
+    def changed(self) -> List[Tuple[str, PageValidators]]:
+        """Entries added or updated since the cache was loaded."""
+        with self._lock:
+            return [(url, self._entries[url]) for url in sorted(self._dirty)]
+
+    def report(self) -> Dict[str, Any]:
+        """Stats plus an estimate of the browser time saved."""
+        with self._lock:
+            stats = asdict(self.stats)
+        renders = stats['browser_renders']
+        avg_render = stats['browser_seconds'] / renders if renders else None
+        stats['est_seconds_saved'] = (
+            stats['fragment_unchanged'] * avg_render if avg_render is not None else None
+        )
+        return stats
@@ -0,0 +1,227 @@
+"""
+Asyncio price collection pipeline.
+
+Four stages connected by bounded queues:
+
+    products ─▶ jobs ─▶ fetch (async HTTP) ─▶ parse (executor) ─▶ results ─▶ batched writes
+
+- The producer turns products into FetchJobs. The jobs queue holds at most
+  `max_in_flight` jobs, so the catalog is read only as fast as pages are
+  fetched.
+- `max_in_flight` fetch tasks take jobs and GET the pages with an
+  AsyncHttpClient, at most `per_retailer` at a time against any one retailer
+  (and paced by a RateLimiter, if given). Waiting on the network costs a
+  coroutine, not a thread.
+- Parsing is CPU work, so it runs in a small thread pool off the event loop.
+  Pages without a structured price fall back to the scraper's browser tier
+  on `browser_workers` threads (0 disables the fallback).
+- Results go through a bounded queue to a single writer, which hands them to
+  `save_batch` in batches of up to `batch_size`; a partial batch is saved
+  once no result has arrived for `flush_seconds`. A slow database therefore
+  stalls the fetchers instead of filling memory.
+
+Setting the `stop` event (collect_prices_async.py does so on SIGINT) stops
+the producer and cancels fetches in flight; results already fetched are
+still written before run_pipeline returns.
+"""
+import asyncio
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Awaitable, Callable, Dict, List, Optional
+
+from src.async_http import AsyncHttpClient
+from src.collector import FetchJob, FetchResult
+from src.models import Product
+from src.rate_limit import RateLimiter
+from src.scraper import BlockedError
+
+
+@dataclass
+class PipelineStats:
+    """Counters for one pipeline run."""
+    jobs: int = 0  # Jobs produced
+    successes: int = 0
+    failures: int = 0
+    blocked: int = 0  # Failures where the retailer served a block page
+    http_prices: int = 0  # Prices read without a browser
+    browser_prices: int = 0
+    batches: int = 0  # save_batch calls
+    cancelled: bool = False  # Stopped before every job was fetched
+    seconds: float = 0.0
+
+
+async def _acquire(limiter: RateLimiter, retailer_id: str):
+    """Wait (without blocking the loop) until the limiter allows a request."""
+    while not limiter.try_acquire(retailer_id):
+        await asyncio.sleep(max(limiter.ready_in(retailer_id), 0.01))
+
+
+async def run_pipeline(
+    products: List[Product],
+    scrapers: Dict[str, object],
+    save_batch: Callable[[List[FetchResult]], Awaitable[None]],
+    client: Optional[AsyncHttpClient] = None,
+    max_in_flight: int = 64,
+    per_retailer: int = 8,
+    parse_workers: Optional[int] = None,
+    browser_workers: int = 0,
+    batch_size: int = 50,
+    flush_seconds: float = 2.0,
+    limiter: Optional[RateLimiter] = None,
+    on_result: Optional[Callable[[FetchResult], None]] = None,
+    stop: Optional[asyncio.Event] = None,
+) -> PipelineStats:
+    """
+    Fetch every product's price from every retailer it has a URL for.
+
+    Args:
+        products: Products to collect, in order
+        scrapers: Scraper instances keyed by retailer id
+        save_batch: Coroutine function persisting a batch of results
+        client: HTTP client (one is created and closed if not given)
+        max_in_flight: Fetch tasks, i.e. the most pages being fetched at once
+        per_retailer: Most fetches in flight against any one retailer
+        parse_workers: Threads parsing pages (default: min(4, CPU count))
+        browser_workers: Threads rendering pages the HTTP tier couldn't read
+        batch_size: Results per save_batch call
+        flush_seconds: Idle time after which a partial batch is saved
+        limiter: Optional per-retailer pacing
+        on_result: Called on the event loop with every result, in completion order
+        stop: When set, stop producing, cancel fetches in flight and finish up
+
+    Returns:
+        PipelineStats for the run
+    """
+    started = time.perf_counter()
+    loop = asyncio.get_running_loop()
+    stats = PipelineStats()
+    own_client = client is None
+    client = client or AsyncHttpClient()
+    parse_pool = ThreadPoolExecutor(parse_workers or min(4, os.cpu_count() or 1),
+                                    thread_name_prefix='parse')
+    browser_pool = (ThreadPoolExecutor(browser_workers, thread_name_prefix='browser')
+                    if browser_workers > 0 else None)
+    semaphores = {retailer_id: asyncio.Semaphore(per_retailer) for retailer_id in scrapers}
+    jobs: asyncio.Queue = asyncio.Queue(maxsize=max_in_flight)
+    results: asyncio.Queue = asyncio.Queue(maxsize=2 * batch_size)
+
+    async def produce():
+        for product in products:
+            for retailer_id, url in product.urls.items():
+                if retailer_id in scrapers:
+                    await jobs.put(FetchJob(product, retailer_id, url))
+                    stats.jobs += 1
+        for _ in range(max_in_flight):
+            await jobs.put(None)
+
+    async def fetch(job: FetchJob) -> FetchResult:
+        scraper = scrapers[job.retailer_id]
+        product_id = job.product.id
+        price_point = None
+        blocked = None
+        error = None
+        if scraper.http_fast_path:
+            try:
+                with scraper.timed_stage('http'):
+                    response = await client.get(job.url, scraper.request_headers(job.url))
+                price_point = await loop.run_in_executor(
+                    parse_pool, scraper.price_from_response, product_id, job.url, response)
+            except BlockedError as e:
+                blocked = e
+            except Exception as e:
+                error = str(e) or type(e).__name__
+        if price_point is None and browser_pool is not None:
+            try:
+                price_point = await loop.run_in_executor(
+                    browser_pool, scraper.render_price, product_id, job.url)
+            except Exception as e:
+                error = str(e)
+
+        if price_point:
+            return FetchResult(job, price_point=price_point)
+        if blocked is not None:
+            return FetchResult(job, error=f"Blocked: {blocked}", blocked=True)
+        return FetchResult(job, error=error or "No price returned")
+
+    async def fetch_jobs():
+        while True:
+            job = await jobs.get()
+            if job is None:
+                return
+            async with semaphores[job.retailer_id]:
+                if limiter:
+                    await _acquire(limiter, job.retailer_id)
+                result = await fetch(job)
+                if limiter:
+                    limiter.record(job.retailer_id, result.blocked)
+            await results.put(result)
+
+    async def flush(batch: List[FetchResult]):
+        await save_batch(batch)
+        stats.batches += 1
+
+    async def write_results():
+        batch: List[FetchResult] = []
+        while True:
+            try:
+                result = await asyncio.wait_for(results.get(), flush_seconds if batch else None)
+            except asyncio.TimeoutError:
+                await flush(batch)
+                batch = []
+                continue
+            if result is None:
+                if batch:
+                    await flush(batch)
+                return
+
+            if result.ok:
+                stats.successes += 1
+                if result.price_point.source == 'browser':
+                    stats.browser_prices += 1
+                else:
+                    stats.http_prices += 1
+            else:
+                stats.failures += 1
+                stats.blocked += result.blocked
+            if on_result:
+                on_result(result)
+            batch.append(result)
+            if len(batch) >= batch_size:
+                await flush(batch)
+                batch = []
+
+    producer = asyncio.ensure_future(produce())
+    fetchers = [asyncio.ensure_future(fetch_jobs()) for _ in range(max_in_flight)]
+    writer = asyncio.ensure_future(write_results())
+    fetching = asyncio.gather(producer, *fetchers)
+    stopping = asyncio.ensure_future(stop.wait()) if stop else None
+    try:
+        await asyncio.wait([fetching, writer] + ([stopping] if stopping else []),
+                           return_when=asyncio.FIRST_COMPLETED)
+        if writer.done():
+            # The writer only stops early if save_batch failed
+            fetching.cancel()
+            await asyncio.gather(fetching, return_exceptions=True)
+            writer.result()
+        if not fetching.done():
+            stats.cancelled = True
+            fetching.cancel()
+            await asyncio.gather(fetching, return_exceptions=True)
+
+        # Everything fetched so far is written, even after a stop
+        await results.put(None)
+        await writer
+        if not stats.cancelled:
+            fetching.result()  # Surface a failure in a stage
+    finally:
+        for task in [producer, writer, *fetchers] + ([stopping] if stopping else []):
+            task.cancel()
+        parse_pool.shutdown(wait=False, cancel_futures=True)
+        if browser_pool:
+            browser_pool.shutdown(wait=False, cancel_futures=True)
+        if own_client:
+            await client.close()
+        stats.seconds = time.perf_counter() - started
+    return stats
@@ -0,0 +1,217 @@
+"""
+Per-retailer request pacing for the collectors.
+
+Each retailer gets a token bucket (a sustained request rate plus a small
+burst), random jitter between requests, and adaptive backoff: when a
+retailer serves a block page its rate is halved and it is put in a cooldown
+that doubles with each consecutive block, and the rate creeps back up with
+every request that gets through. Slowing down as soon as a site pushes back keeps it
+from escalating to longer blocks, which is what maximizes successful
+fetches per hour.
+
+Usage:
+    limiter = RateLimiter.for_scrapers(scrapers)
+
+    limiter.wait(retailer_id)           # Block until a request is allowed
+    ...fetch...
+    limiter.record(retailer_id, blocked=False)
+
+The concurrent collector uses the non-blocking side (try_acquire/ready_in)
+to hand workers to whichever retailer is ready instead of sleeping on one.
+"""
+import random
+import threading
+import time
+from dataclasses import dataclass, asdict
+from typing import Any, Callable, Dict, List, Mapping, Optional
+
+
+DEFAULT_REQUESTS_PER_MINUTE = 30.0
+DEFAULT_BURST = 2
+DEFAULT_JITTER_SECONDS = 1.0
+
+BACKOFF_BASE_SECONDS = 30.0
+BACKOFF_MAX_SECONDS = 900.0
+MIN_RATE_FACTOR = 1 / 16  # Blocks never slow a retailer below this share of its rate
+RECOVERY_STEP = 0.05  # Rate share regained per request that isn't blocked
+
+
+@dataclass
+class RetailerPolicy:
+    """How fast one retailer may be fetched."""
+    requests_per_minute: float = DEFAULT_REQUESTS_PER_MINUTE
+    burst: int = DEFAULT_BURST  # Requests allowed back to back after an idle spell
+    jitter_seconds: float = DEFAULT_JITTER_SECONDS  # Random extra gap after each request
+    backoff_seconds: float = BACKOFF_BASE_SECONDS  # Cooldown after the first block in a row
+    max_backoff_seconds: float = BACKOFF_MAX_SECONDS  # Cooldowns stop doubling here
+
+
+@dataclass
+class ThrottleMetrics:
+    """Counters describing how a retailer has been paced."""
+    requests: int = 0
+    served: int = 0  # Requests answered without a block page
+    blocks: int = 0
+    waited_seconds: float = 0.0  # Time callers spent in wait()
+    cooldown_seconds: float = 0.0  # Total backoff imposed after blocks
+
+
+class TokenBucket:
+    """Token bucket refilled continuously at `rate` tokens per second. Not thread-safe."""
+
+    def __init__(self, rate: float, capacity: float, now: float):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = now
+
+    def _refill(self, now: float):
+        if now > self.updated:
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+
+    def ready_in(self, now: float) -> float:
+        """Seconds until a token is available (0 if one is available now)."""
+        self._refill(now)
+        if self.tokens >= 1:
+            return 0.0
+        return (1 - self.tokens) / self.rate
+
+    def take(self, now: float) -> bool:
+        """Take a token if one is available."""
+        self._refill(now)
+        if self.tokens < 1:
+            return False
+        self.tokens -= 1
+        return True
+
+
+class RetailerThrottle:
+    """Token bucket, jitter and adaptive backoff for one retailer."""
+
+    def __init__(self, policy: RetailerPolicy, clock: Callable[[], float],
+                 rng: random.Random):
+        self.policy = policy
+        self._clock = clock
+        self._rng = rng
+        self.base_rate = policy.requests_per_minute / 60.0
+        self.rate_factor = 1.0
+        self.bucket = TokenBucket(self.base_rate, max(1, policy.burst), clock())
+        self.not_before = 0.0  # Jitter and cooldown deadline
+        self.consecutive_blocks = 0
+        self.metrics = ThrottleMetrics()
+
+    def ready_in(self) -> float:
+        """Seconds until the next request is allowed."""
+        now = self._clock()
+        return max(self.not_before - now, self.bucket.ready_in(now), 0.0)
+
+    def try_acquire(self) -> bool:
+        """Claim a request slot if one is available now."""
+        now = self._clock()
+        if now < self.not_before or not self.bucket.take(now):
+            return False
+        self.metrics.requests += 1
+        if self.policy.jitter_seconds > 0:
+            self.not_before = now + self._rng.uniform(0, self.policy.jitter_seconds)
+        return True
+
+    def record(self, blocked: bool):
+        """Adapt the pace to the outcome of a request."""
+        if blocked:
+            self.metrics.blocks += 1
+            self.consecutive_blocks += 1
+            self.rate_factor = max(MIN_RATE_FACTOR, self.rate_factor / 2)
+            cooldown = min(self.policy.max_backoff_seconds,
+                           self.policy.backoff_seconds * 2 ** (self.consecutive_blocks - 1))
+            self.not_before = max(self.not_before, self._clock() + cooldown)
+            self.metrics.cooldown_seconds += cooldown
+            # Don't let a saved-up burst fire the moment the cooldown ends
+            self.bucket.tokens = min(self.bucket.tokens, 1)
+        else:
+            self.metrics.served += 1
+            self.consecutive_blocks = 0
+            self.rate_factor = min(1.0, self.rate_factor + RECOVERY_STEP)
+        self.bucket.rate = self.base_rate * self.rate_factor
+
+
+class RateLimiter:
+    """Thread-safe set of RetailerThrottles keyed by retailer id."""
+
+    def __init__(self, policies: Mapping[str, RetailerPolicy],
+                 clock: Callable[[], float] = time.monotonic,
+                 sleep: Callable[[float], None] = time.sleep,
+                 seed: Optional[int] = None):
+        """
+        Args:
+            policies: Policy for each retailer; others get RetailerPolicy()
+            clock: Monotonic time source (seconds)
+            sleep: Used by wait()
+            seed: Seed for the jitter, for reproducible schedules
+        """
+        self._clock = clock
+        self._sleep = sleep
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self._throttles: Dict[str, RetailerThrottle] = {
+            retailer_id: RetailerThrottle(policy, clock, self._rng)
+            for retailer_id, policy in policies.items()
+        }
+
+    @classmethod
+    def for_scrapers(cls, scrapers: Mapping[str, Any], **kwargs) -> 'RateLimiter':
+        """Build a limiter from each scraper's requests_per_minute/burst/jitter_seconds."""
+        return cls({
+            retailer_id: RetailerPolicy(
+                requests_per_minute=getattr(scraper, 'requests_per_minute', DEFAULT_REQUESTS_PER_MINUTE),
+                burst=getattr(scraper, 'burst', DEFAULT_BURST),
+                jitter_seconds=getattr(scraper, 'jitter_seconds', DEFAULT_JITTER_SECONDS),
+            )
+            for retailer_id, scraper in scrapers.items()
+        }, **kwargs)
+
+    def _throttle(self, retailer_id: str) -> RetailerThrottle:
+        throttle = self._throttles.get(retailer_id)
+        if throttle is None:
+            throttle = self._throttles[retailer_id] = RetailerThrottle(
+                RetailerPolicy(), self._clock, self._rng)
+        return throttle
+
+    def ready_in(self, retailer_id: str) -> float:
+        """Seconds until a request to this retailer is allowed."""
+        with self._lock:
+            return self._throttle(retailer_id).ready_in()
+
+    def try_acquire(self, retailer_id: str) -> bool:
+        """Claim a request to this retailer if one is allowed now."""
+        with self._lock:
+            return self._throttle(retailer_id).try_acquire()
+
+    def wait(self, retailer_id: str):
+        """Block until a request to this retailer is allowed, then claim it."""
+        started = self._clock()
+        while True:
+            with self._lock:
+                throttle = self._throttle(retailer_id)
+                if throttle.try_acquire():
+                    throttle.metrics.waited_seconds += self._clock() - started
+                    return
+                delay = throttle.ready_in()
+            self._sleep(max(delay, 0.01))
+
+    def record(self, retailer_id: str, blocked: bool):
+        """Report how a request went (blocked = the retailer served a block page)."""
+        with self._lock:
+            self._throttle(retailer_id).record(blocked)
+
+    def metrics(self) -> List[Dict[str, Any]]:
+        """Counters and current pace for every retailer."""
+        with self._lock:
+            return [
+                {
+                    'retailer': retailer_id,
+                    'requests_per_minute': round(throttle.bucket.rate * 60, 2),
+                    **asdict(throttle.metrics),
+                }
+                for retailer_id, throttle in self._throttles.items()
+            ]
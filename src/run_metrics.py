@@ -0,0 +1,248 @@
+"""
+Instrumentation for collection runs.
+
+Scrapers time each stage of a fetch (BaseScraper.record_stage):
+
+    http      GET of the product page (HTTP tier)
+    parse     reading the price from the fetched page
+    render    the whole browser tier, as seen by the collector
+    driver    leasing a pooled browser, including starting one
+    navigate  driver.get()
+    wait      waiting for a price selector to render
+    extract   the rest of the browser tier: reading and parsing the price
+
+The collector adds per-retailer outcomes through a RunRecorder, whose
+finish() takes the database's price write timings and produces a
+CollectionRun that is stored in the collection_runs table and can be
+exported as JSON or in the Prometheus text format (for node_exporter's
+textfile collector).
+"""
+import json
+import threading
+import time
+from dataclasses import dataclass, asdict
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, List, Mapping, Optional
+
+from src.models import CollectionRun
+
+
+STAGES = ('http', 'parse', 'render', 'driver', 'navigate', 'wait', 'extract')
+
+
+@dataclass
+class StageStats:
+    """How many times a stage ran and how long it took."""
+    count: int = 0
+    total_seconds: float = 0.0
+    max_seconds: float = 0.0
+
+    def add(self, seconds: float):
+        self.count += 1
+        self.total_seconds += seconds
+        self.max_seconds = max(self.max_seconds, seconds)
+
+    def merge(self, other: 'StageStats'):
+        self.count += other.count
+        self.total_seconds += other.total_seconds
+        self.max_seconds = max(self.max_seconds, other.max_seconds)
+
+    @property
+    def avg_seconds(self) -> Optional[float]:
+        return self.total_seconds / self.count if self.count else None
+
+
+@dataclass
+class RetailerOutcomes:
+    """Fetch outcomes for one retailer during a run."""
+    attempts: int = 0
+    successes: int = 0
+    failures: int = 0
+    blocked: int = 0
+    http: int = 0  # Prices read by the HTTP tier
+    browser: int = 0  # Prices read by the browser tier
+    reused: int = 0  # Stored prices reused for unchanged pages (page_validators.py)
+
+
+class RunRecorder:
+    """Collects what happened during one collection run. Thread-safe."""
+
+    def __init__(self, mode: str):
+        """
+        Args:
+            mode: How the run was made ('sequential', 'concurrent', 'async', 'retries')
+        """
+        self.mode = mode
+        self.started_at = datetime.now()
+        self._started = time.perf_counter()
+        self._lock = threading.Lock()
+        self._retailers: Dict[str, RetailerOutcomes] = {}
+
+    def record_fetch(self, retailer_id: str, price_point: Any = None, blocked: bool = False):
+        """Count one fetch attempt (price_point is None for a failure)."""
+        with self._lock:
+            outcomes = self._retailers.setdefault(retailer_id, RetailerOutcomes())
+            outcomes.attempts += 1
+            if price_point is not None:
+                outcomes.successes += 1
+                if price_point.source == 'browser':
+                    outcomes.browser += 1
+                elif price_point.source == 'reused':
+                    outcomes.reused += 1
+                else:
+                    outcomes.http += 1
+            else:
+                outcomes.failures += 1
+                outcomes.blocked += blocked
+
+    def finish(self, scrapers: Mapping[str, Any], http_requests: int = 0,
+               bytes_received: int = 0, db_write: Optional[StageStats] = None) -> CollectionRun:
+        """
+        Summarize the run.
+
+        Args:
+            scrapers: Scrapers used, for their stage and selector stats
+            http_requests: Requests made by the HTTP client(s)
+            bytes_received: Response bytes received by the HTTP client(s)
+            db_write: Price write timings (PriceDatabase.write_stats)
+        """
+        with self._lock:
+            retailers = {}
+            for retailer_id, scraper in scrapers.items():
+                outcomes = self._retailers.get(retailer_id, RetailerOutcomes())
+                stages = scraper.stage_report() if hasattr(scraper, 'stage_report') else {}
+                if not outcomes.attempts and not stages:
+                    continue
+                retailers[retailer_id] = {
+                    **asdict(outcomes),
+                    'stages': stages,
+                    'selectors': scraper.selector_report(),
+                }
+            totals = RetailerOutcomes()
+            for outcomes in self._retailers.values():
+                totals.attempts += outcomes.attempts
+                totals.successes += outcomes.successes
+                totals.failures += outcomes.failures
+
+        finished_at = datetime.now()
+        return CollectionRun(
+            started_at=self.started_at,
+            finished_at=finished_at,
+            mode=self.mode,
+            seconds=time.perf_counter() - self._started,
+            attempts=totals.attempts,
+            successes=totals.successes,
+            failures=totals.failures,
+            http_requests=http_requests,
+            bytes_received=bytes_received,
+            metrics={'retailers': retailers, 'db_write': stage_dict(db_write or StageStats())},
+        )
+
+
+def stage_dict(stats: StageStats) -> Dict[str, Any]:
+    """JSON-ready view of a stage's timings."""
+    return {
+        'count': stats.count,
+        'total_seconds': round(stats.total_seconds, 6),
+        'avg_seconds': round(stats.avg_seconds, 6) if stats.count else None,
+        'max_seconds': round(stats.max_seconds, 6),
+    }
+
+
+def run_to_dict(run: CollectionRun) -> Dict[str, Any]:
+    """JSON-ready view of a run."""
+    data = asdict(run)
+    data['started_at'] = run.started_at.isoformat()
+    data['finished_at'] = run.finished_at.isoformat()
+    return data
+
+
+def _label_value(value: str) -> str:
+    return value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def run_to_prometheus(run: CollectionRun, prefix: str = 'price_collection') -> str:
+    """
+    A run in the Prometheus text exposition format.
+
+    Counters describe the run on their own (they restart with every run), so
+    the file is meant to be replaced after each collection.
+    """
+    lines: List[str] = []
+
+    def metric(name: str, kind: str, help_text: str, samples: List[tuple]):
+        lines.append(f"# HELP {prefix}_{name} {help_text}")
+        lines.append(f"# TYPE {prefix}_{name} {kind}")
+        for labels, value in samples:
+            label_text = ','.join(f'{k}="{_label_value(str(v))}"' for k, v in labels.items())
+            suffix = f"{{{label_text}}}" if label_text else ''
+            lines.append(f"{prefix}_{name}{suffix} {value!r}")
+
+    metrics = run.metrics or {}
+    retailers = metrics.get('retailers', {})
+    metric('last_run_timestamp_seconds', 'gauge', "When the last collection run finished",
+           [({'mode': run.mode}, float(run.finished_at.timestamp()))])
+    metric('run_duration_seconds', 'gauge', "Wall-clock time of the last collection run",
+           [({'mode': run.mode}, float(run.seconds))])
+    metric('fetches_total', 'counter', "Fetch attempts by retailer and outcome", [
+        ({'retailer': r, 'outcome': outcome}, m[outcome])
+        for r, m in retailers.items() for outcome in ('successes', 'failures', 'blocked')
+    ])
+    metric('prices_total', 'counter', "Prices collected by retailer and tier", [
+        ({'retailer': r, 'tier': tier}, m.get(tier, 0))
+        for r, m in retailers.items() for tier in ('http', 'browser', 'reused')
+    ])
+    stage_samples = [
+        (r, stage, stats) for r, m in retailers.items()
+        for stage, stats in m['stages'].items()
+    ]
+    metric('stage_seconds_sum', 'counter', "Time spent in each fetch stage", [
+        ({'retailer': r, 'stage': stage}, float(stats['total_seconds']))
+        for r, stage, stats in stage_samples
+    ])
+    metric('stage_seconds_count', 'counter', "Times each fetch stage ran", [
+        ({'retailer': r, 'stage': stage}, stats['count']) for r, stage, stats in stage_samples
+    ])
+    metric('stage_seconds_max', 'gauge', "Slowest run of each fetch stage", [
+        ({'retailer': r, 'stage': stage}, float(stats['max_seconds']))
+        for r, stage, stats in stage_samples
+    ])
+    selector_samples = [
+        (r, selector, stats) for r, m in retailers.items()
+        for selector, stats in m['selectors'].items()
+    ]
+    metric('selector_attempts_total', 'counter', "Pages each price selector was polled on", [
+        ({'retailer': r, 'selector': selector}, stats['attempts'])
+        for r, selector, stats in selector_samples
+    ])
+    metric('selector_hits_total', 'counter', "Pages where each price selector supplied the price", [
+        ({'retailer': r, 'selector': selector}, stats['hits'])
+        for r, selector, stats in selector_samples
+    ])
+    db_write = metrics.get('db_write', {})
+    metric('db_write_seconds_sum', 'counter', "Time spent writing prices to the database",
+           [({}, float(db_write.get('total_seconds', 0.0)))])
+    metric('db_write_seconds_count', 'counter', "Database write batches",
+           [({}, db_write.get('count', 0))])
+    metric('http_requests_total', 'counter', "HTTP requests made", [({}, run.http_requests)])
+    metric('http_received_bytes_total', 'counter', "HTTP response bytes received",
+           [({}, run.bytes_received)])
+    return "\n".join(lines) + "\n"
+
+
+def write_run_metrics(run: CollectionRun, path: str):
+    """
+    Write a run to `path`: Prometheus text for a .prom file, JSON otherwise.
+
+    The file is written next to its destination and renamed into place, so
+    a scraper of the file never sees it half written.
+    """
+    path = Path(path)
+    if path.suffix == '.prom':
+        text = run_to_prometheus(run)
+    else:
+        text = json.dumps(run_to_dict(run), indent=2) + "\n"
+    tmp = path.with_name(path.name + '.tmp')
+    tmp.write_text(text)
+    tmp.replace(path)
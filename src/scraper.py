@@ -9,24 +9,157 @@ NOTE: Web scraping may violate terms of service. Consider using:
 2. RSS feeds or price tracking services
 3. Manual data entry for prototype
 """
+from contextlib import contextmanager
+from dataclasses import dataclass
 from datetime import datetime
-from typing import Optional
+from typing import TYPE_CHECKING, Any, Callable, Dict, List, Optional, Tuple
+import threading
 import time
 import json
 import re
 
 from src.models import PricePoint
+from src.driver_pool import get_pool, DriverStartupError, PageBlocked
+from src.extraction import EXTRACTION_SPECS_PATH, ExtractionSpec, get_extraction_spec
+from src.http_client import HttpResponse, get_http_session
+from src.page_validators import REUSED_SOURCE, ValidatorCache, price_fragments
+from src.run_metrics import STAGES, StageStats, stage_dict
+from src.structured_price import EMBEDDED_STATE_IDS, extract_script_price, extract_structured_price
+
+if TYPE_CHECKING:
+    from src.browser_workers import BrowserProcessPool
+
+
+@dataclass
+class SelectorStats:
+    """How often a price selector matched and how long it took."""
+    attempts: int = 0  # Pages this selector was polled on
+    hits: int = 0  # Pages where this selector supplied the price
+    total_seconds: float = 0.0  # Summed time-to-match over hits
+
+    @property
+    def hit_rate(self) -> float:
+        return self.hits / self.attempts if self.attempts else 0.0
+
+    @property
+    def avg_seconds(self) -> Optional[float]:
+        return self.total_seconds / self.hits if self.hits else None
+
+
+@dataclass
+class PriceMatch:
+    """Element text found by BaseScraper._wait_for_price."""
+    selector: str
+    text: str
+    seconds: float  # Time from the start of the wait until the match
+
+
+class BlockedError(PageBlocked):
+    """Raised by fetch_price when the retailer served a block page instead of the product."""
+
+
+# Statuses retailers answer with when they throttle or block a client
+_BLOCKED_STATUSES = (403, 429)
+
+_TITLE = re.compile(r'<title[^>]*>(.*?)</title>', re.IGNORECASE | re.DOTALL)
+
+
+def _is_blocked_title(title: str) -> bool:
+    return 'Access Denied' in title or 'denied' in title.lower()
+
+
+def _is_blocked_page(html: str) -> bool:
+    match = _TITLE.search(html, 0, 4096)
+    return match is not None and _is_blocked_title(match.group(1))
+
+
+def _looks_like_price(text: str) -> bool:
+    return '$' in text
+
+
+def _element_text(element: Any) -> str:
+    return element.text
+
+
+def _price_poll(
+    selectors: List[Tuple[str, str]],
+    accept: Callable[[str], bool] = _looks_like_price,
+    read_text: Callable[[Any], str] = _element_text,
+    abort_if: Optional[Callable[[Any], bool]] = None,
+    fallback: Optional[Dict[str, Tuple[str, str]]] = None,
+) -> Callable[[Any], Any]:
+    """
+    The check BaseScraper._wait_for_price repeats on every poll.
+
+    The returned function looks at every selector at once and returns
+    'abort' when abort_if says so, (selector, text) for the first selector in
+    list order whose text passes `accept`, or False. The first non-empty text
+    that didn't pass is kept in fallback['first'].
+    """
+    fallback = {} if fallback is None else fallback
+
+    def any_price_present(driver):
+        if abort_if and abort_if(driver):
+            return 'abort'
+        for by, selector in selectors:
+            for element in driver.find_elements(by, selector):
+                text = (read_text(element) or '').strip()
+                if not text:
+                    continue
+                if accept(text):
+                    return selector, text
+                fallback.setdefault('first', (selector, text))
+        return False
+    return any_price_present
 
 
 class BaseScraper:
     """Base class for retailer scrapers."""
+
+    # Driver pool profile used by Selenium-based subclasses (see driver_pool.py)
+    browser = 'firefox'
+
+    # Seconds a fetch may wait for the price to render after navigation
+    page_timeout = 10.0
+
+    # Try a plain HTTP fetch before falling back to a browser
+    http_fast_path = True
+
+    # Pacing used by the collectors (see rate_limit.py)
+    requests_per_minute = 30.0
+    burst = 2
+    jitter_seconds = 1.0
+
+    # Literal strings that introduce the price in the raw page; the markup
+    # after them is hashed to tell whether a browser render can be skipped
+    price_markers: Tuple[str, ...] = ()
+
+    # JSON file holding the browser tier's extraction spec (see extraction.py)
+    extraction_specs = EXTRACTION_SPECS_PATH
     
     def __init__(self, retailer_id: str):
         self.retailer_id = retailer_id
+        self.selector_stats: Dict[str, SelectorStats] = {}
+        # Time spent in each fetch stage (see run_metrics.py)
+        self.stage_stats: Dict[str, StageStats] = {}
+        self._stats_lock = threading.Lock()
+        self._local = threading.local()
+        # Set by the collectors to enable change-aware fetching (page_validators.py)
+        self.validators: Optional[ValidatorCache] = None
+        # Set by the collectors to render pages in worker processes (browser_workers.py)
+        self.browser_processes: Optional['BrowserProcessPool'] = None
     
     def fetch_price(self, product_id: str, url: str) -> Optional[PricePoint]:
         """
         Fetch current price for a product.
+
+        Tries a plain HTTP fetch of the page first and reads the price from its
+        structured data. Only if that fails is a browser started (_fetch_browser).
+        The returned PricePoint's `source` records which tier served it.
+
+        With a ValidatorCache attached (self.validators), the HTTP request is
+        conditional and a page that has not changed since the last run is
+        answered with the price read from it then, skipping the browser.
         
         Args:
             product_id: Product identifier
@@ -34,451 +167,472 @@ class BaseScraper:
         
         Returns:
             PricePoint if successful, None otherwise
-        """
-        raise NotImplementedError("Subclasses must implement fetch_price")
-    
-    def _extract_price(self, html: str) -> Optional[float]:
-        """Extract price from HTML. Implement in subclass."""
-        raise NotImplementedError
-    
-    def _extract_pack_size(self, html: str) -> int:
-        """Extract pack size from HTML. Implement in subclass."""
-        return 1  # Default to single item
 
+        Raises:
+            BlockedError: The retailer served a block page and no tier got a price
+        """
+        blocked = None
+        if self.http_fast_path:
+            try:
+                price_point = self._fetch_http(product_id, url)
+            except BlockedError as e:
+                blocked = e
+            else:
+                if price_point:
+                    return price_point
+
+        price_point = self.render_price(product_id, url)
+        if price_point is None and blocked is not None:
+            raise blocked
+        return price_point
+
+    def render_price(self, product_id: str, url: str) -> Optional[PricePoint]:
+        """
+        Browser tier: render the page and read the price (timed for the validators).
 
-class WalmartScraper(BaseScraper):
-    """Scraper for Walmart.com using Selenium."""
+        Runs in a supervised worker process when self.browser_processes is set,
+        so a hung or bloated browser costs at most that pool's job timeout.
 
-    def __init__(self):
-        super().__init__("walmart")
+        Raises:
+            BlockedError: The retailer served a block page
+            BrowserJobError: The worker process timed out or died
+        """
+        started = time.perf_counter()
+        try:
+            if self.browser_processes is not None:
+                price_point, selector_stats, stage_stats = self.browser_processes.render(
+                    self, product_id, url)
+                self._merge_worker_stats(selector_stats, stage_stats)
+            else:
+                price_point = self._run_browser(product_id, url)
+        finally:
+            seconds = time.perf_counter() - started
+            self.record_stage('render', seconds)
+        if self.validators is not None:
+            self.validators.record_browser_render(seconds)
+            if price_point:
+                self.validators.remember(url, price_point)
+        return price_point
+
+    def request_headers(self, url: str) -> Optional[Dict[str, str]]:
+        """Extra headers for the HTTP tier's GET (conditional headers, if any)."""
+        if self.validators is None:
+            return None
+        return self.validators.conditional_headers(url)
 
-    def fetch_price(self, product_id: str, url: str) -> Optional[PricePoint]:
-        """Fetch current price from Walmart using Selenium."""
+    def _fetch_http(self, product_id: str, url: str) -> Optional[PricePoint]:
+        """Browser-free tier: GET the page and parse structured price data."""
         try:
-            from selenium import webdriver
-            from selenium.webdriver.firefox.service import Service
-            from selenium.webdriver.firefox.options import Options
-            from selenium.webdriver.common.by import By
-            from selenium.webdriver.support.ui import WebDriverWait
-            from selenium.webdriver.support import expected_conditions as EC
-            from webdriver_manager.firefox import GeckoDriverManager
-
-            firefox_options = Options()
-            firefox_options.add_argument('--headless')
-            firefox_options.add_argument('--width=1920')
-            firefox_options.add_argument('--height=1080')
-
-            service = Service(GeckoDriverManager().install())
-            driver = webdriver.Firefox(service=service, options=firefox_options)
+            with self.timed_stage('http'):
+                response = get_http_session().get(url, self.request_headers(url))
+        except Exception:
+            return None
+        return self.price_from_response(product_id, url, response)
 
-            try:
-                driver.get(url)
-                time.sleep(3)
-
-                # Walmart uses itemprop="price"
-                price_selectors = [
-                    (By.CSS_SELECTOR, '[itemprop="price"]'),
-                    (By.CSS_SELECTOR, '[data-automation-id*="price"]'),
-                ]
-
-                price_text = None
-                for by, selector in price_selectors:
-                    try:
-                        element = WebDriverWait(driver, 10).until(
-                            EC.presence_of_element_located((by, selector))
-                        )
-                        price_text = element.text
-                        if '$' in price_text:
-                            break
-                    except:
-                        continue
-
-                if not price_text:
-                    print(f"Could not find price for {product_id}")
-                    return None
+    def price_from_response(self, product_id: str, url: str,
+                            response: HttpResponse) -> Optional[PricePoint]:
+        """
+        Read the price from a fetched page without a browser.
 
-                price_match = re.search(r'\$?(\d+\.\d{2})', price_text)
-                if price_match:
-                    price = float(price_match.group(1))
-                    return PricePoint(
-                        product_id=product_id,
-                        retailer_id=self.retailer_id,
-                        price=price,
-                        timestamp=datetime.now(),
-                        url=url
-                    )
-                else:
-                    print(f"Could not parse price from: {price_text}")
-                    return None
+        Args:
+            product_id: Product identifier
+            url: Product URL the response was fetched from
+            response: The page, as returned by HttpSession.get
 
-            finally:
-                driver.quit()
+        Returns:
+            PricePoint if the page (or, via the validators, an unchanged
+            earlier copy of it) carries a price, None otherwise
 
-        except Exception as e:
-            print(f"Error fetching Walmart price for {product_id}: {e}")
+        Raises:
+            BlockedError: The retailer answered with a block status or page
+        """
+        with self.timed_stage('parse'):
+            return self._read_response(product_id, url, response)
+
+    def _read_response(self, product_id: str, url: str,
+                       response: HttpResponse) -> Optional[PricePoint]:
+        validators = self.validators
+        if response.status in _BLOCKED_STATUSES:
+            raise BlockedError(f"{self.retailer_id} answered HTTP {response.status}")
+        if validators is not None:
+            validators.record_response(url, response.status, response.headers)
+            if response.status == 304:
+                return self._reuse_price(product_id, url, validators.reuse(url))
+        if response.status != 200:
             return None
 
-    def _extract_price(self, html: str) -> Optional[float]:
-        """Not used - Selenium handles extraction."""
-        _ = html
-        return None
+        html = response.text
+        if _is_blocked_page(html):
+            raise BlockedError(f"{self.retailer_id} served a block page")
+        price = self._extract_price(html)
+        if price is None:
+            if validators is not None and self.price_markers:
+                fragments = price_fragments(html, self.price_markers)
+                if fragments:
+                    return self._reuse_price(product_id, url, validators.reuse(url, fragments))
+            return None
 
+        price_point = PricePoint(
+            product_id=product_id,
+            retailer_id=self.retailer_id,
+            price=price,
+            timestamp=datetime.now(),
+            url=url,
+            pack_size=self._extract_pack_size(html),
+            source='http'
+        )
+        if validators is not None:
+            validators.remember(url, price_point)
+        return price_point
 
-class TargetScraper(BaseScraper):
-    """
-    Scraper for Target.com using Selenium for JavaScript rendering.
+    def _reuse_price(self, product_id: str, url: str, entry) -> Optional[PricePoint]:
+        """A fresh observation of the price stored for an unchanged page."""
+        if entry is None:
+            return None
+        price_point = PricePoint(
+            product_id=product_id,
+            retailer_id=self.retailer_id,
+            price=entry.price,
+            timestamp=datetime.now(),
+            url=url,
+            pack_size=entry.pack_size,
+            source=REUSED_SOURCE
+        )
+        self.validators.remember(url, price_point, reused=True)
+        return price_point
 
-    Uses Firefox with GeckoDriver to handle dynamic content.
-    """
+    def _run_browser(self, product_id: str, url: str) -> Optional[PricePoint]:
+        """_fetch_browser, timing what its driver, navigate and wait stages leave as 'extract'."""
+        self._local.timed = 0.0
+        started = time.perf_counter()
+        try:
+            return self._fetch_browser(product_id, url)
+        finally:
+            elapsed = time.perf_counter() - started
+            self.record_stage('extract', max(0.0, elapsed - self._local.timed))
 
-    def __init__(self):
-        super().__init__("target")
+    @property
+    def extraction_spec(self) -> Optional[ExtractionSpec]:
+        """This retailer's compiled extraction spec, if it has one."""
+        return get_extraction_spec(self.retailer_id, self.extraction_specs)
 
-    def fetch_price(self, product_id: str, url: str) -> Optional[PricePoint]:
+    def _fetch_browser(self, product_id: str, url: str) -> Optional[PricePoint]:
+        """
+        Render the page in a browser and read the price with the retailer's
+        extraction spec. Override for pages a spec can't describe.
         """
-        Fetch current price from Target using Selenium.
+        if self.extraction_spec is None:
+            raise NotImplementedError(f"No extraction spec for {self.retailer_id} in "
+                                      f"{self.extraction_specs}; add one or override _fetch_browser")
+        try:
+            return self._extract_with_spec(product_id, url)
+        except BlockedError:
+            raise
+        except Exception as e:
+            print(f"Error fetching {self.retailer_id.capitalize()} price for {product_id}: {e}")
+            return None
 
-        Args:
-            product_id: Product identifier
-            url: Target product URL
+    def _extract_with_spec(self, product_id: str, url: str) -> Optional[PricePoint]:
+        """
+        Load the page and wait for any of the spec's selectors to show a price.
 
-        Returns:
-            PricePoint if successful, None otherwise
+        Raises:
+            BlockedError: The spec aborts on block pages and got one
         """
-        try:
-            from selenium import webdriver
-            from selenium.webdriver.firefox.service import Service
-            from selenium.webdriver.firefox.options import Options
-            from selenium.webdriver.common.by import By
-            from selenium.webdriver.support.ui import WebDriverWait
-            from selenium.webdriver.support import expected_conditions as EC
-            from webdriver_manager.firefox import GeckoDriverManager
-
-            # Set up Firefox options for headless browsing
-            firefox_options = Options()
-            firefox_options.add_argument('--headless')
-            firefox_options.add_argument('--width=1920')
-            firefox_options.add_argument('--height=1080')
-            firefox_options.set_preference(
-                'general.useragent.override',
-                'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36'
-            )
-
-            # Initialize Firefox driver
-            service = Service(GeckoDriverManager().install())
-            driver = webdriver.Firefox(service=service, options=firefox_options)
+        with self._browser_page(url) as driver:
+            return self._read_with_spec(driver, product_id, url)
+
+    def _read_with_spec(self, driver: Any, product_id: str, url: str) -> Optional[PricePoint]:
+        """_extract_with_spec on a page that is already loaded."""
+        spec = self.extraction_spec
+        abort_if = None
+        if spec.abort_on_block_page:
+            abort_if = lambda d: _is_blocked_title(d.title)
+
+        match = self._wait_for_price(driver, list(spec.selectors), accept=spec.accepts,
+                                     read_text=spec.read_text, abort_if=abort_if)
+        if abort_if and abort_if(driver):
+            raise BlockedError(f"{self.retailer_id} served a block page ('{driver.title}')")
+        if not match:
+            print(f"Could not find price for {product_id}")
+            return None
 
-            try:
-                # Navigate to the URL
-                driver.get(url)
+        price = spec.parse_price(match.text)
+        if price is None:
+            print(f"Could not parse price from: {match.text[:80]}")
+            return None
+        was_price = spec.find_was_price(driver) if spec.was_price else None
 
-                # Wait for page to load
-                time.sleep(3)
-
-                # Try to find the price element
-                price_text = None
-                price_selectors = [
-                    (By.CSS_SELECTOR, '[data-test="product-price"]'),
-                    (By.CSS_SELECTOR, '.h-text-bs'),
-                    (By.CSS_SELECTOR, '[itemprop="price"]'),
-                ]
-
-                for by, selector in price_selectors:
-                    try:
-                        element = WebDriverWait(driver, 10).until(
-                            EC.presence_of_element_located((by, selector))
-                        )
-                        price_text = element.text
-                        if '$' in price_text:
-                            break
-                    except:
-                        continue
-
-                if not price_text:
-                    print(f"Could not find price for {product_id}")
-                    return None
+        return PricePoint(
+            product_id=product_id,
+            retailer_id=self.retailer_id,
+            price=price,
+            timestamp=datetime.now(),
+            url=url,
+            advertised_savings=round(was_price - price, 2) if was_price and was_price > price else None,
+            source='browser'
+        )
 
-                # Extract numeric price
-                price_match = re.search(r'\$?(\d+\.\d{2})', price_text)
-                if price_match:
-                    price = float(price_match.group(1))
-                    return PricePoint(
-                        product_id=product_id,
-                        retailer_id=self.retailer_id,
-                        price=price,
-                        timestamp=datetime.now(),
-                        url=url
-                    )
-                else:
-                    print(f"Could not parse price from: {price_text}")
-                    return None
+    @contextmanager
+    def _browser_page(self, url: str):
+        """
+        Lease a pooled browser and navigate it to `url`.
+
+        Usage (in _fetch_browser):
+            with self._browser_page(url) as driver:
+                match = self._wait_for_price(driver, selectors)
 
+        Times the lease (including starting a browser) as 'driver' and the
+        page load as 'navigate'.
+        """
+        started = time.perf_counter()
+        with get_pool(self.browser).lease() as driver:
+            leased = time.perf_counter()
+            self.record_stage('driver', leased - started)
+            try:
+                driver.get(url)
             finally:
-                driver.quit()
+                self.record_stage('navigate', time.perf_counter() - leased)
+            yield driver
+    
+    def _extract_price(self, html: str) -> Optional[float]:
+        """Extract price from the page's JSON-LD, microdata or embedded state."""
+        found = extract_structured_price(html)
+        return found.price if found else None
+    
+    def _extract_pack_size(self, html: str) -> int:
+        """Extract pack size from HTML. Implement in subclass."""
+        return 1  # Default to single item
 
-        except Exception as e:
-            print(f"Error fetching Target price for {product_id}: {e}")
-            return None
+    def _wait_for_price(
+        self,
+        driver: Any,
+        selectors: List[Tuple[str, str]],
+        timeout: Optional[float] = None,
+        accept: Callable[[str], bool] = _looks_like_price,
+        read_text: Callable[[Any], str] = _element_text,
+        abort_if: Optional[Callable[[Any], bool]] = None,
+    ) -> Optional[PriceMatch]:
+        """
+        Wait until any of the candidate selectors shows a price.
 
-    def _extract_price(self, html: str) -> Optional[float]:
-        """Not used - Selenium handles extraction directly in fetch_price."""
-        _ = html
-        return None
+        All selectors are polled together in one wait, so a selector that never
+        appears no longer costs a full timeout before the next one is tried.
+        The first selector (in list order) whose text passes `accept` wins.
 
+        Args:
+            driver: Selenium driver that has already navigated to the page
+            selectors: (By, selector) pairs in order of preference
+            timeout: Overall wait budget (defaults to the retailer's page_timeout)
+            accept: Predicate deciding whether element text looks like a price
+            read_text: How to read text from an element
+            abort_if: Checked on every poll; stop waiting early when it returns True
 
-class WalgreensScraper(BaseScraper):
-    """Scraper for Walgreens.com using Selenium."""
+        Returns:
+            PriceMatch, or None if nothing matched within the budget. If elements
+            were found but none passed `accept`, the first non-empty text is
+            returned once the budget runs out.
+        """
+        from selenium.common.exceptions import StaleElementReferenceException, TimeoutException
+        from selenium.webdriver.support.ui import WebDriverWait
 
-    def __init__(self):
-        super().__init__("walgreens")
+        timeout = self.page_timeout if timeout is None else timeout
+        started = time.monotonic()
+        fallback: Dict[str, Tuple[str, str]] = {}
 
-    def fetch_price(self, product_id: str, url: str) -> Optional[PricePoint]:
-        """Fetch current price from Walgreens using Selenium."""
         try:
-            from selenium import webdriver
-            from selenium.webdriver.firefox.service import Service
-            from selenium.webdriver.firefox.options import Options
-            from selenium.webdriver.common.by import By
-            from selenium.webdriver.support.ui import WebDriverWait
-            from selenium.webdriver.support import expected_conditions as EC
-            from webdriver_manager.firefox import GeckoDriverManager
-
-            firefox_options = Options()
-            firefox_options.add_argument('--headless')
-            firefox_options.add_argument('--width=1920')
-            firefox_options.add_argument('--height=1080')
-
-            service = Service(GeckoDriverManager().install())
-            driver = webdriver.Firefox(service=service, options=firefox_options)
+            found = WebDriverWait(
+                driver, timeout, poll_frequency=0.2,
+                ignored_exceptions=(StaleElementReferenceException,)
+            ).until(_price_poll(selectors, accept, read_text, abort_if, fallback))
+        except TimeoutException:
+            found = fallback.get('first')
+
+        if found == 'abort':
+            found = None
+
+        match = None
+        if found:
+            match = PriceMatch(selector=found[0], text=found[1],
+                               seconds=time.monotonic() - started)
+        self._record_selectors([s for _, s in selectors], match)
+        self.record_stage('wait', time.monotonic() - started)
+        return match
+
+    def _record_selectors(self, selectors: List[str], match: Optional[PriceMatch]):
+        with self._stats_lock:
+            for selector in selectors:
+                stats = self.selector_stats.setdefault(selector, SelectorStats())
+                stats.attempts += 1
+                if match and match.selector == selector:
+                    stats.hits += 1
+                    stats.total_seconds += match.seconds
+
+    def record_stage(self, stage: str, seconds: float):
+        """Add one timing of a fetch stage (see run_metrics.STAGES)."""
+        with self._stats_lock:
+            self.stage_stats.setdefault(stage, StageStats()).add(seconds)
+        self._local.timed = getattr(self._local, 'timed', 0.0) + seconds
+
+    @contextmanager
+    def timed_stage(self, stage: str):
+        """Record the time spent in the with-block as `stage`, even if it raises."""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record_stage(stage, time.perf_counter() - started)
+
+    def _merge_worker_stats(self, selector_stats: Dict[str, SelectorStats],
+                            stage_stats: Dict[str, StageStats]):
+        """Add stats recorded by a copy of this scraper in a worker process."""
+        with self._stats_lock:
+            for selector, theirs in selector_stats.items():
+                stats = self.selector_stats.setdefault(selector, SelectorStats())
+                stats.attempts += theirs.attempts
+                stats.hits += theirs.hits
+                stats.total_seconds += theirs.total_seconds
+            for stage, theirs in stage_stats.items():
+                self.stage_stats.setdefault(stage, StageStats()).merge(theirs)
+
+    def stage_report(self) -> Dict[str, Dict[str, Any]]:
+        """Per-stage call counts and timings for this scraper, in STAGES order."""
+        with self._stats_lock:
+            stages = sorted(self.stage_stats,
+                            key=lambda s: STAGES.index(s) if s in STAGES else len(STAGES))
+            return {stage: stage_dict(self.stage_stats[stage]) for stage in stages}
+
+    def selector_report(self) -> Dict[str, Dict[str, Any]]:
+        """Per-selector hit rate and average time-to-match for this scraper."""
+        with self._stats_lock:
+            return {
+                selector: {
+                    'attempts': stats.attempts,
+                    'hits': stats.hits,
+                    'hit_rate': stats.hit_rate,
+                    'avg_seconds': stats.avg_seconds,
+                }
+                for selector, stats in self.selector_stats.items()
+            }
 
-            try:
-                driver.get(url)
-                time.sleep(4)  # Walgreens needs extra time
-
-                # Walgreens uses class-based selectors
-                price_selectors = [
-                    (By.CSS_SELECTOR, 'span.product__price'),
-                    (By.CSS_SELECTOR, '[class*="price"]'),
-                ]
-
-                price_text = None
-                for by, selector in price_selectors:
-                    try:
-                        element = WebDriverWait(driver, 10).until(
-                            EC.presence_of_element_located((by, selector))
-                        )
-                        price_text = element.text
-                        if '$' in price_text:
-                            break
-                    except:
-                        continue
-
-                if not price_text:
-                    print(f"Could not find price for {product_id}")
-                    return None
 
-                price_match = re.search(r'\$?(\d+\.\d{2})', price_text)
-                if price_match:
-                    price = float(price_match.group(1))
-                    return PricePoint(
-                        product_id=product_id,
-                        retailer_id=self.retailer_id,
-                        price=price,
-                        timestamp=datetime.now(),
-                        url=url
-                    )
-                else:
-                    print(f"Could not parse price from: {price_text}")
-                    return None
+class WalmartScraper(BaseScraper):
+    """Scraper for Walmart.com using Selenium."""
 
-            finally:
-                driver.quit()
+    price_markers = ('itemprop="price"', 'data-automation-id="product-price"')
 
-        except Exception as e:
-            print(f"Error fetching Walgreens price for {product_id}: {e}")
-            return None
+    def __init__(self):
+        super().__init__("walmart")
 
-    def _extract_price(self, html: str) -> Optional[float]:
-        """Not used - Selenium handles extraction."""
-        _ = html
-        return None
 
+class TargetScraper(BaseScraper):
+    """
+    Scraper for Target.com using Selenium for JavaScript rendering.
+
+    Uses Firefox with GeckoDriver to handle dynamic content.
+    """
 
-class AmazonScraper(BaseScraper):
-    """Scraper for Amazon.com using Selenium."""
+    browser = 'firefox-mac-ua'
+    price_markers = ('data-test="product-price"',)
 
     def __init__(self):
-        super().__init__("amazon")
+        super().__init__("target")
 
-    def fetch_price(self, product_id: str, url: str) -> Optional[PricePoint]:
-        """Fetch current price from Amazon using Selenium."""
-        try:
-            from selenium import webdriver
-            from selenium.webdriver.firefox.service import Service
-            from selenium.webdriver.firefox.options import Options
-            from selenium.webdriver.common.by import By
-            from webdriver_manager.firefox import GeckoDriverManager
 
-            firefox_options = Options()
-            firefox_options.add_argument('--headless')
-            firefox_options.add_argument('--width=1920')
-            firefox_options.add_argument('--height=1080')
+class WalgreensScraper(BaseScraper):
+    """Scraper for Walgreens.com using Selenium."""
 
-            service = Service(GeckoDriverManager().install())
-            driver = webdriver.Firefox(service=service, options=firefox_options)
+    page_timeout = 12.0  # Walgreens needs extra time
+    price_markers = ('product__price',)
 
-            try:
-                driver.get(url)
-                time.sleep(5)  # Amazon needs more time
-
-                # Amazon price selectors - try .get_attribute first
-                price_selectors = [
-                    (By.CSS_SELECTOR, 'span.a-price span.a-offscreen'),
-                    (By.CSS_SELECTOR, '#corePriceDisplay_desktop_feature_div .a-offscreen'),
-                    (By.CSS_SELECTOR, 'span.a-price-whole'),
-                    (By.CSS_SELECTOR, '#priceblock_ourprice'),
-                    (By.CSS_SELECTOR, '#priceblock_dealprice'),
-                ]
-
-                price_text = None
-                for by, selector in price_selectors:
-                    try:
-                        elements = driver.find_elements(by, selector)
-                        for element in elements:
-                            # Try both .text and .get_attribute
-                            text = element.text or element.get_attribute('textContent') or ''
-                            if text.strip() and ('$' in text or text.replace('.','').isdigit()):
-                                price_text = text.strip()
-                                break
-                        if price_text:
-                            break
-                    except:
-                        continue
-
-                if not price_text:
-                    print(f"Could not find price for {product_id}")
-                    return None
+    def __init__(self):
+        super().__init__("walgreens")
 
-                price_match = re.search(r'\$?(\d+\.\d{2})', price_text)
-                if price_match:
-                    price = float(price_match.group(1))
-                    return PricePoint(
-                        product_id=product_id,
-                        retailer_id=self.retailer_id,
-                        price=price,
-                        timestamp=datetime.now(),
-                        url=url
-                    )
-                else:
-                    print(f"Could not parse price from: {price_text}")
-                    return None
 
-            finally:
-                driver.quit()
+class AmazonScraper(BaseScraper):
+    """Scraper for Amazon.com using Selenium."""
 
-        except Exception as e:
-            print(f"Error fetching Amazon price for {product_id}: {e}")
-            return None
+    page_timeout = 8.0
+    requests_per_minute = 12.0  # Amazon throttles fast clients with CAPTCHA pages
+    price_markers = ('corePriceDisplay_desktop_feature_div', 'priceblock_ourprice',
+                     'priceblock_dealprice')
 
-    def _extract_price(self, html: str) -> Optional[float]:
-        """Not used - Selenium handles extraction."""
-        _ = html
-        return None
+    def __init__(self):
+        super().__init__("amazon")
+
+
+# Reads the text of a rendered page's structured-data scripts: [JSON-LD, embedded state]
+_STRUCTURED_SCRIPTS_JS = (
+    "const text = sel => Array.from(document.querySelectorAll(sel), s => s.textContent);"
+    "return [text('script[type=\"application/ld+json\"]'), text(%r)];"
+    % ', '.join(f'script#{state_id}' for state_id in EMBEDDED_STATE_IDS)
+)
 
 
 class CVSScraper(BaseScraper):
     """
     Scraper for CVS.com using undetected-chromedriver.
 
-    CVS has strong bot detection. This uses undetected-chromedriver to bypass it.
+    CVS has strong bot detection and answers plain HTTP clients with an
+    Access Denied page, so most prices come from the browser tier. There the
+    product's structured data (JSON-LD, or the __NEXT_DATA__ state the page
+    hydrates from) is read straight out of its script elements; the rendered
+    text is only searched (with the CVS extraction spec) when the page has
+    none. The block page is recognised by its title as soon as navigation
+    returns, so a blocked fetch costs no waiting.
 
     Requirements:
     - Chrome browser installed
     - pip install undetected-chromedriver
     """
 
+    # New-style headless Chrome, so it runs under cron without a display;
+    # 'chrome-uc' is the visible (off-screen) profile, if headless gets blocked
+    browser = 'chrome-uc-headless'
+    page_timeout = 15.0  # CVS renders prices late
+
+    # Seconds to wait for structured data to appear before searching the page text
+    structured_data_timeout = 3.0
+
+    # CVS blocks bursts of requests; go slow and irregular
+    requests_per_minute = 6.0
+    burst = 1
+    jitter_seconds = 5.0
+
     def __init__(self):
         super().__init__("cvs")
 
-    def fetch_price(self, product_id: str, url: str) -> Optional[PricePoint]:
+    def _fetch_browser(self, product_id: str, url: str) -> Optional[PricePoint]:
         """
         Attempt to fetch price from CVS using undetected-chromedriver.
 
         Requires Chrome to be installed on the system.
         """
         try:
-            import undetected_chromedriver as uc
-            from selenium.webdriver.common.by import By
-
-            # Check if Chrome is available
-            try:
-                options = uc.ChromeOptions()
-                # NOTE: CVS blocks headless mode aggressively
-                # Visible mode has 60-80% success vs 30-50% for headless
-                # options.add_argument('--headless=new')  # Disabled: causes Access Denied
-                options.add_argument('--no-sandbox')
-                options.add_argument('--disable-dev-shm-usage')
-                options.add_argument('--window-size=1920,1080')
-                # Minimize the window to reduce distraction
-                options.add_argument('--window-position=-2400,-2400')
-
-                driver = uc.Chrome(options=options, use_subprocess=True)
-            except Exception as e:
-                print(f"[ERROR] Chrome not found. Please install Chrome first.")
-                print(f"[ERROR] Details: {e}")
-                print(f"[INFO] Download Chrome: https://www.google.com/chrome/")
-                print(f"[INFO] Use ManualPriceEntry for: {product_id}")
-                return None
-
-            try:
-                driver.get(url)
-                time.sleep(8)  # CVS needs time to load and render price
-
-                # Check if we got blocked
-                page_title = driver.title
-                if 'Access Denied' in page_title or 'denied' in page_title.lower():
-                    print(f"[BLOCKED] CVS blocked the request (got '{page_title}')")
-                    print(f"[INFO] This is expected ~40% of the time. Retry or use visible mode.")
-                    return None
-
-                # Extract all visible text from the page
-                body = driver.find_element(By.TAG_NAME, 'body')
-                all_text = body.text
-
-                # Find all prices in format $XX.XX
-                price_matches = re.findall(r'\$(\d+)\.(\d{2})', all_text)
-
-                if not price_matches:
-                    print(f"Could not find price for {product_id}")
-                    print(f"[INFO] Page loaded but no prices found")
-                    return None
-
-                # The main product price is typically the first significant price
-                # Filter out $0.00 and very small prices
-                significant_prices = [
-                    (dollars, cents) for dollars, cents in price_matches
-                    if int(dollars) > 0 or int(cents) > 0
-                ]
-
-                if not significant_prices:
-                    print(f"No significant prices found (all were $0.00)")
-                    return None
-
-                dollars, cents = significant_prices[0]
-                price = float(f"{dollars}.{cents}")
-
-                print(f"[SUCCESS] Found price: ${price:.2f}")
+            with self._browser_page(url) as driver:
+                price = self._wait_for_structured_price(driver)
+                if price is None:
+                    # The CVS spec waits for a non-zero dollar amount, giving
+                    # up early if the block page comes back
+                    return self._read_with_spec(driver, product_id, url)
                 return PricePoint(
                     product_id=product_id,
                     retailer_id=self.retailer_id,
                     price=price,
                     timestamp=datetime.now(),
-                    url=url
+                    url=url,
+                    source='browser'
                 )
-
-            finally:
-                driver.quit()
-
+        except BlockedError as e:
+            print(f"[BLOCKED] {e}")
+            print(f"[INFO] This is expected ~40% of the time. Retry or use visible mode.")
+            raise
+        except DriverStartupError as e:
+            print(f"[ERROR] Chrome not found. Please install Chrome first.")
+            print(f"[ERROR] Details: {e}")
+            print(f"[INFO] Download Chrome: https://www.google.com/chrome/")
+            print(f"[INFO] Use ManualPriceEntry for: {product_id}")
+            return None
         except ImportError:
             print(f"[ERROR] undetected-chromedriver not installed")
             print(f"[INFO] Install: pip install undetected-chromedriver")
@@ -488,10 +642,31 @@ class CVSScraper(BaseScraper):
             print(f"Error fetching CVS price for {product_id}: {e}")
             return None
 
-    def _extract_price(self, html: str) -> Optional[float]:
-        """Not used - Selenium handles extraction."""
-        _ = html
-        return None
+    def _wait_for_structured_price(self, driver: Any) -> Optional[float]:
+        """
+        Poll the loaded page's structured data for the price.
+
+        Returns:
+            The price, or None if none showed up within structured_data_timeout
+
+        Raises:
+            BlockedError: CVS served its block page
+        """
+        started = time.monotonic()
+        try:
+            while True:
+                title = driver.title
+                if _is_blocked_title(title):
+                    raise BlockedError(f"{self.retailer_id} served a block page ('{title}')")
+                json_ld, embedded_state = driver.execute_script(_STRUCTURED_SCRIPTS_JS)
+                found = extract_script_price(json_ld, embedded_state)
+                if found is not None:
+                    return found.price
+                if time.monotonic() - started >= self.structured_data_timeout:
+                    return None
+                time.sleep(0.2)
+        finally:
+            self.record_stage('wait', time.monotonic() - started)
 
 
 class ManualPriceEntry:
@@ -517,7 +692,8 @@ class ManualPriceEntry:
             timestamp=datetime.now(),
             url=url,
             pack_size=pack_size,
-            advertised_savings=advertised_savings
+            advertised_savings=advertised_savings,
+            source='manual'
         )
     
     @staticmethod
@@ -0,0 +1,177 @@
+"""
+Registry of scraper classes, keyed by retailer id.
+
+Scrapers are registered by import path ("module:Class") rather than imported,
+so a run imports only the scrapers - and, through them, the browser
+dependencies - for retailers it actually has listings scheduled at.
+Registrations come from, later ones winning:
+
+1. the built-in scrapers in src/scraper.py (BUILTIN_SCRAPERS);
+2. a JSON file mapping retailer ids to "module:Class", or to null to turn a
+   retailer off: scrapers.json in the project root if it exists, or the file
+   given to configure_scraper_registry() (collect_prices.py --scrapers);
+3. installed packages exposing entry points in the "price_tracker.scrapers"
+   group, named by retailer id, for retailers neither of the above covers.
+
+Example scrapers.json:
+
+    {
+        "walgreens": "my_scrapers.walgreens:WalgreensScraper",
+        "costco": "my_scrapers.costco:CostcoScraper",
+        "cvs": null
+    }
+
+A scraper class is a BaseScraper subclass that takes no constructor arguments.
+
+Usage:
+    registry = get_scraper_registry()
+    scrapers = registry.create({'walmart', 'costco'})  # Imports just those two
+"""
+import importlib
+import json
+import time
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional
+
+ENTRY_POINT_GROUP = 'price_tracker.scrapers'
+
+DEFAULT_CONFIG = Path(__file__).parent.parent / 'scrapers.json'
+
+# In collection order
+BUILTIN_SCRAPERS: Dict[str, str] = {
+    'walmart': 'src.scraper:WalmartScraper',
+    'target': 'src.scraper:TargetScraper',
+    'cvs': 'src.scraper:CVSScraper',
+    'walgreens': 'src.scraper:WalgreensScraper',
+    'amazon': 'src.scraper:AmazonScraper',
+}
+
+
+class ScraperConfigError(Exception):
+    """Raised when a scraper registration is malformed or names a class that can't be loaded."""
+
+
+class ScraperRegistry:
+    """Maps retailer ids to scraper classes, importing each only when first needed."""
+
+    def __init__(self, config_path: Optional[str] = None, entry_points: bool = True):
+        """
+        Args:
+            config_path: JSON registrations (default: scrapers.json in the project
+                root, if there is one)
+            entry_points: Look up retailers nothing else registers among installed
+                packages' entry points
+
+        Raises:
+            ScraperConfigError: The config file can't be read or is malformed
+        """
+        self._specs: Dict[str, Optional[str]] = dict(BUILTIN_SCRAPERS)
+        self._classes: Dict[str, type] = {}
+        self._entry_points_scanned = not entry_points
+        # Seconds spent importing each retailer's scraper module (mostly the first one)
+        self.import_seconds: Dict[str, float] = {}
+
+        path = Path(config_path) if config_path else DEFAULT_CONFIG
+        if config_path or path.exists():
+            self._read_config(path)
+
+    def _read_config(self, path: Path):
+        try:
+            config = json.loads(path.read_text())
+        except (OSError, ValueError) as e:
+            raise ScraperConfigError(f"Can't read scraper config {path}: {e}") from e
+        if not isinstance(config, dict):
+            raise ScraperConfigError(f"{path}: expected an object of retailer id to \"module:Class\"")
+        for retailer_id, spec in config.items():
+            if spec is not None and (not isinstance(spec, str) or ':' not in spec):
+                raise ScraperConfigError(f"{path}: {retailer_id}: expected \"module:Class\" or null, "
+                                         f"got {spec!r}")
+            self._specs[retailer_id] = spec
+
+    def _scan_entry_points(self):
+        # importlib.metadata alone takes ~50ms to import, more than the rest of
+        # startup, so it is only loaded once a retailer isn't registered otherwise
+        self._entry_points_scanned = True
+        from importlib.metadata import entry_points
+        for entry_point in entry_points(group=ENTRY_POINT_GROUP):
+            self._specs.setdefault(entry_point.name, entry_point.value)
+
+    def retailer_ids(self) -> List[str]:
+        """Every retailer with a scraper, in collection order (scans entry points)."""
+        if not self._entry_points_scanned:
+            self._scan_entry_points()
+        return [retailer_id for retailer_id, spec in self._specs.items() if spec is not None]
+
+    def spec(self, retailer_id: str) -> Optional[str]:
+        """The "module:Class" registered for a retailer, or None if it has no scraper."""
+        if retailer_id not in self._specs and not self._entry_points_scanned:
+            self._scan_entry_points()
+        return self._specs.get(retailer_id)
+
+    def load(self, retailer_id: str) -> Optional[type]:
+        """
+        Import a retailer's scraper class.
+
+        Returns:
+            The class, or None if the retailer has no scraper
+
+        Raises:
+            ScraperConfigError: The registered module can't be imported or has no such class
+        """
+        cls = self._classes.get(retailer_id)
+        if cls is not None:
+            return cls
+        spec = self.spec(retailer_id)
+        if spec is None:
+            return None
+
+        module_name, _, class_name = spec.partition(':')
+        started = time.perf_counter()
+        try:
+            module = importlib.import_module(module_name)
+        except ImportError as e:
+            raise ScraperConfigError(f"Scraper for {retailer_id}: can't import {module_name}: {e}") from e
+        self.import_seconds[retailer_id] = time.perf_counter() - started
+        try:
+            cls = self._classes[retailer_id] = getattr(module, class_name)
+        except AttributeError:
+            raise ScraperConfigError(f"Scraper for {retailer_id}: {module_name} has no {class_name}") from None
+        return cls
+
+    def create(self, retailer_ids: Optional[Iterable[str]] = None) -> Dict[str, object]:
+        """
+        Scraper instances keyed by retailer id, in collection order.
+
+        Args:
+            retailer_ids: Retailers to create scrapers for (default: all of them).
+                Retailers without a scraper are left out.
+        """
+        if retailer_ids is None:
+            wanted = self.retailer_ids()
+        else:
+            wanted = set(retailer_ids)
+            order = {retailer_id: i for i, retailer_id in enumerate(self._specs)}
+            wanted = sorted(wanted, key=lambda r: (order.get(r, len(order)), r))
+
+        scrapers = {}
+        for retailer_id in wanted:
+            cls = self.load(retailer_id)
+            if cls is not None:
+                scrapers[retailer_id] = cls()
+        return scrapers
+
+
+_registry: Dict[str, Optional[ScraperRegistry]] = {'default': None}
+
+
+def configure_scraper_registry(config_path: Optional[str] = None) -> ScraperRegistry:
+    """Replace the registry returned by get_scraper_registry(), reading config_path."""
+    _registry['default'] = ScraperRegistry(config_path)
+    return _registry['default']
+
+
+def get_scraper_registry() -> ScraperRegistry:
+    """The process-wide registry, created with the default config on first use."""
+    if _registry['default'] is None:
+        _registry['default'] = ScraperRegistry()
+    return _registry['default']
@@ -109,8 +109,8 @@ def add_sample_data():
         )
     ]
     
+    db.add_price_points(sample_prices)
     for price_point in sample_prices:
-        db.add_price_point(price_point)
         print(f"  ✓ {price_point}")
     
     print("\n✓ Sample data added!")
@@ -0,0 +1,289 @@
+"""
+Price extraction from structured data embedded in product pages.
+
+Most retailer pages ship the price in machine-readable form alongside the
+rendered markup, so it can be read from the raw HTML without a browser:
+
+1. JSON-LD (<script type="application/ld+json">) Product/Offer `price`
+2. itemprop="price" microdata (content attribute or element text)
+3. Open Graph / product meta tags (product:price:amount)
+4. Embedded app state such as Next.js __NEXT_DATA__ or window.__PRELOADED_STATE__
+"""
+import json
+import re
+from collections import deque
+from dataclasses import dataclass
+from html.parser import HTMLParser
+from typing import Any, Iterator, List, Optional
+
+
+# Keys checked (in priority order) when digging a price out of embedded state
+STATE_PRICE_KEYS = ('currentPrice', 'current_retail', 'salePrice', 'finalPrice', 'price')
+
+# Keys that hold the number when a price key maps to an object
+PRICE_VALUE_KEYS = ('price', 'amount', 'value', 'current_retail')
+
+EMBEDDED_STATE_IDS = ('__NEXT_DATA__', '__APOLLO_STATE__', '__PRELOADED_STATE__', '__INITIAL_STATE__')
+
+_VOID_TAGS = {'area', 'br', 'col', 'embed', 'hr', 'img', 'input', 'link', 'meta', 'source', 'wbr'}
+
+_STATE_ASSIGNMENT = re.compile(
+    r'window\.(?:__PRELOADED_STATE__|__INITIAL_STATE__|__APOLLO_STATE__)\s*=\s*'
+)
+_PRICE_NUMBER = re.compile(r'(\d{1,3}(?:,\d{3})+|\d+)(\.\d{1,2})?')
+
+
+@dataclass
+class StructuredPrice:
+    """A price found in structured data, and where it came from."""
+    price: float
+    source: str  # 'json-ld', 'itemprop', 'meta' or 'embedded-state'
+
+
+class _StructuredDataParser(HTMLParser):
+    """Collects the raw structured-data fragments from a page in one pass."""
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.json_ld: List[str] = []
+        self.embedded_state: List[str] = []
+        self.inline_scripts: List[str] = []
+        self.itemprop_prices: List[str] = []
+        self.meta_prices: List[str] = []
+        self._script_kind: Optional[str] = None
+        self._script_chunks: List[str] = []
+        self._itemprop_depth = 0
+        self._itemprop_text: List[str] = []
+
+    def handle_starttag(self, tag, attrs):
+        attrs = dict(attrs)
+        if tag == 'script':
+            script_type = (attrs.get('type') or '').lower()
+            if script_type == 'application/ld+json':
+                self._script_kind = 'json-ld'
+            elif script_type == 'application/json' and attrs.get('id') in EMBEDDED_STATE_IDS:
+                self._script_kind = 'state'
+            elif script_type in ('', 'text/javascript', 'application/javascript'):
+                self._script_kind = 'inline'
+            else:
+                self._script_kind = None
+            self._script_chunks = []
+            return
+
+        if tag == 'meta' and attrs.get('property') in ('product:price:amount', 'og:price:amount'):
+            if attrs.get('content'):
+                self.meta_prices.append(attrs['content'])
+
+        if attrs.get('itemprop') == 'price':
+            if attrs.get('content'):
+                self.itemprop_prices.append(attrs['content'])
+            elif tag != 'meta':
+                self._itemprop_depth = 1
+                self._itemprop_text = []
+        elif self._itemprop_depth and tag not in _VOID_TAGS:
+            self._itemprop_depth += 1
+
+    def handle_endtag(self, tag):
+        if tag == 'script' and self._script_kind:
+            text = ''.join(self._script_chunks)
+            if self._script_kind == 'json-ld':
+                self.json_ld.append(text)
+            elif self._script_kind == 'state':
+                self.embedded_state.append(text)
+            elif '__' in text:
+                self.inline_scripts.append(text)
+            self._script_kind = None
+            return
+        if self._itemprop_depth and tag not in _VOID_TAGS:
+            self._itemprop_depth -= 1
+            if not self._itemprop_depth:
+                text = ''.join(self._itemprop_text).strip()
+                if text:
+                    self.itemprop_prices.append(text)
+
+    def handle_data(self, data):
+        if self._script_kind:
+            self._script_chunks.append(data)
+        elif self._itemprop_depth:
+            self._itemprop_text.append(data)
+
+
+def parse_price(value: Any) -> Optional[float]:
+    """Turn 12.97, '12.97', '$1,299.00' etc. into a positive float."""
+    if isinstance(value, bool) or value is None:
+        return None
+    if isinstance(value, (int, float)):
+        return float(value) if value > 0 else None
+    if isinstance(value, str):
+        match = _PRICE_NUMBER.search(value)
+        if match:
+            price = float(match.group(1).replace(',', '') + (match.group(2) or ''))
+            return price if price > 0 else None
+    return None
+
+
+def _load_json(text: str) -> Any:
+    try:
+        return json.loads(text)
+    except ValueError:
+        return None
+
+
+def _json_ld_nodes(data: Any) -> Iterator[dict]:
+    """Yield every object in a JSON-LD document, including @graph members."""
+    if isinstance(data, list):
+        for item in data:
+            yield from _json_ld_nodes(item)
+    elif isinstance(data, dict):
+        yield data
+        for key in ('@graph', 'mainEntity', 'itemListElement'):
+            if key in data:
+                yield from _json_ld_nodes(data[key])
+
+
+def _has_type(node: dict, type_name: str) -> bool:
+    node_type = node.get('@type')
+    if isinstance(node_type, list):
+        return type_name in node_type
+    return node_type == type_name
+
+
+def _offer_price(offer: Any) -> Optional[float]:
+    if isinstance(offer, list):
+        for item in offer:
+            price = _offer_price(item)
+            if price is not None:
+                return price
+        return None
+    if not isinstance(offer, dict):
+        return None
+    for key in ('price', 'lowPrice'):
+        price = parse_price(offer.get(key))
+        if price is not None:
+            return price
+    spec = offer.get('priceSpecification')
+    if spec is not None:
+        return _offer_price(spec)
+    return None
+
+
+def _price_from_json_ld(documents: List[str]) -> Optional[float]:
+    for text in documents:
+        for node in _json_ld_nodes(_load_json(text)):
+            if _has_type(node, 'Product') and 'offers' in node:
+                price = _offer_price(node['offers'])
+                if price is not None:
+                    return price
+            if _has_type(node, 'Offer') or _has_type(node, 'AggregateOffer'):
+                price = _offer_price(node)
+                if price is not None:
+                    return price
+    return None
+
+
+def _find_key(data: Any, key: str) -> Iterator[Any]:
+    """Breadth-first search for values stored under `key`."""
+    queue = deque([data])
+    while queue:
+        current = queue.popleft()
+        if isinstance(current, dict):
+            if key in current:
+                yield current[key]
+            queue.extend(current.values())
+        elif isinstance(current, list):
+            queue.extend(current)
+
+
+def _state_value_price(value: Any) -> Optional[float]:
+    if isinstance(value, dict):
+        for key in PRICE_VALUE_KEYS:
+            if key in value:
+                price = _state_value_price(value[key])
+                if price is not None:
+                    return price
+        return None
+    return parse_price(value)
+
+
+def _price_from_state(states: List[Any]) -> Optional[float]:
+    for key in STATE_PRICE_KEYS:
+        for state in states:
+            for value in _find_key(state, key):
+                price = _state_value_price(value)
+                if price is not None:
+                    return price
+    return None
+
+
+def _inline_states(scripts: List[str]) -> Iterator[Any]:
+    decoder = json.JSONDecoder()
+    for script in scripts:
+        for match in _STATE_ASSIGNMENT.finditer(script):
+            try:
+                state, _ = decoder.raw_decode(script, match.end())
+            except ValueError:
+                continue
+            yield state
+
+
+def extract_structured_price(html: str) -> Optional[StructuredPrice]:
+    """
+    Find the product price in a page's structured data.
+
+    Args:
+        html: Raw page HTML (no JavaScript execution needed)
+
+    Returns:
+        StructuredPrice from the most reliable source present, or None
+    """
+    parser = _StructuredDataParser()
+    parser.feed(html)
+    parser.close()
+
+    price = _price_from_json_ld(parser.json_ld)
+    if price is not None:
+        return StructuredPrice(price, 'json-ld')
+
+    for text in parser.itemprop_prices:
+        price = parse_price(text)
+        if price is not None:
+            return StructuredPrice(price, 'itemprop')
+
+    for text in parser.meta_prices:
+        price = parse_price(text)
+        if price is not None:
+            return StructuredPrice(price, 'meta')
+
+    states = [s for s in map(_load_json, parser.embedded_state) if s is not None]
+    states.extend(_inline_states(parser.inline_scripts))
+    price = _price_from_state(states)
+    if price is not None:
+        return StructuredPrice(price, 'embedded-state')
+
+    return None
+
+
+def extract_script_price(json_ld: List[str], embedded_state: List[str]) -> Optional[StructuredPrice]:
+    """
+    Find the product price in structured-data script contents.
+
+    For pages rendered in a browser, where reading a few script elements is
+    far cheaper than transferring the whole page source.
+
+    Args:
+        json_ld: Text of the page's application/ld+json scripts
+        embedded_state: Text of its EMBEDDED_STATE_IDS scripts (e.g. __NEXT_DATA__)
+
+    Returns:
+        StructuredPrice from JSON-LD if present, else from embedded state, or None
+    """
+    price = _price_from_json_ld(json_ld)
+    if price is not None:
+        return StructuredPrice(price, 'json-ld')
+
+    states = [s for s in map(_load_json, embedded_state) if s is not None]
+    price = _price_from_state(states)
+    if price is not None:
+        return StructuredPrice(price, 'embedded-state')
+
+    return None
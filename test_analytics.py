@@ -0,0 +1,44 @@
+"""Test the NumPy price analytics against the database's own stats"""
+import sys
+from datetime import datetime, timedelta
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+from src.analytics import drawdowns, load_price_arrays, rolling_mean, rolling_median
+from src.database import PriceDatabase
+from src.models import PricePoint, Product
+
+
+def test_arrays_match_price_stats(tmp_path):
+    db = PriceDatabase(str(tmp_path / 'prices.db'), run_length=True)
+    db.add_product(Product(id='eucerin', name='Eucerin', size='5 oz', category='skincare'))
+    start = datetime.now().replace(microsecond=0) - timedelta(days=20, hours=1)
+    prices = [12.97] * 30 + [10.99] * 10 + [12.49] * 40
+    db.add_price_points(
+        PricePoint(product_id='eucerin', retailer_id='walmart', price=price,
+                   timestamp=start + timedelta(hours=6) * i, url='https://walmart/1')
+        for i, price in enumerate(prices))
+
+    arrays = load_price_arrays(db.conn, 'eucerin', 'walmart')
+    assert len(arrays) == len(prices)
+    for days in (2, 7, 15, 30):
+        expected = db.get_price_stats('eucerin', 'walmart', days)
+        stats = arrays.stats(days)
+        assert stats.avg_price == pytest.approx(expected.avg_price)
+        assert (stats.current_price, stats.min_price, stats.max_price, stats.observation_count,
+                stats.first_seen, stats.last_updated) == \
+            (expected.current_price, expected.min_price, expected.max_price,
+             expected.observation_count, expected.first_seen, expected.last_updated)
+    db.close()
+
+
+def test_rolling_windows_and_drawdowns():
+    values = np.array([10.0, 12.0, 11.0, 9.0, 12.0])
+    assert np.isnan(rolling_mean(values, 3)[:2]).all()
+    assert rolling_mean(values, 3)[2:].tolist() == pytest.approx([11.0, 32 / 3, 32 / 3])
+    assert rolling_median(values, 3)[2:].tolist() == [11.0, 11.0, 11.0]
+    assert drawdowns(values).tolist() == pytest.approx([0, 0, 1 / 12, 0.25, 0])
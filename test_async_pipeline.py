@@ -0,0 +1,134 @@
+"""Test the asyncio HTTP client and collection pipeline against a local server"""
+import asyncio
+import sys
+import threading
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+from src.async_http import AsyncHttpClient
+from src.models import PricePoint, Product
+from src.pipeline import run_pipeline
+from src.scraper import BaseScraper
+from test_http_fast_path import FIXTURES, QuietHandler, serve_fixtures
+
+
+class PipelineHandler(QuietHandler):
+    """Fixture pages plus a chunked response and one that takes 2s."""
+
+    def do_GET(self):
+        if self.path == '/chunked':
+            self.send_response(200)
+            self.send_header('Content-Type', 'text/plain')
+            self.send_header('Transfer-Encoding', 'chunked')
+            self.end_headers()
+            for chunk in (b'hello ', b'chunked ', b'world'):
+                self.wfile.write(b'%x\r\n%s\r\n' % (len(chunk), chunk))
+            self.wfile.write(b'0\r\n\r\n')
+        elif self.path == '/slow':
+            threading.Event().wait(2)
+            super().do_GET()
+        else:
+            super().do_GET()
+
+
+def test_client_keeps_connections_alive():
+    server, base_url = serve_fixtures(handler_class=PipelineHandler)
+
+    async def fetch_all():
+        client = AsyncHttpClient(timeout=5)
+        try:
+            pages = [await client.get(f"{base_url}/{name}")
+                     for name in ('target_json_ld.html', 'chunked', 'missing.html')]
+            return pages, client.connections_opened
+        finally:
+            await client.close()
+
+    try:
+        (page, chunked, missing), connections = asyncio.run(fetch_all())
+        assert page.status == 200
+        assert page.text == (FIXTURES / 'target_json_ld.html').read_text()
+        assert chunked.body == b'hello chunked world'
+        assert missing.status == 404
+        assert connections == 1
+    finally:
+        server.shutdown()
+
+
+class FakeBrowserScraper(BaseScraper):
+    """Walmart scraper whose browser tier returns a fixed price."""
+
+    def __init__(self):
+        super().__init__("walmart")
+        self.browser_calls = []
+
+    def _fetch_browser(self, product_id, url):
+        self.browser_calls.append(url)
+        return PricePoint(product_id=product_id, retailer_id=self.retailer_id, price=10.78,
+                          timestamp=None, url=url, source='browser')
+
+
+def make_products(base_url, pages):
+    return [Product(id=f"p{i}", name=f"P{i}", size="1 oz", category="skincare",
+                    urls={'walmart': f"{base_url}/{page}"})
+            for i, page in enumerate(pages)]
+
+
+def test_pipeline_fetches_parses_and_writes_in_batches():
+    server, base_url = serve_fixtures(handler_class=PipelineHandler)
+    pages = ['target_json_ld.html', 'walmart_next_data.html', 'walgreens_itemprop.html',
+             'amazon_rendered_only.html'] * 5
+    products = make_products(base_url, pages)
+    scraper = FakeBrowserScraper()
+    batches = []
+
+    async def save_batch(batch):
+        batches.append(batch)
+
+    try:
+        stats = asyncio.run(run_pipeline(products, {'walmart': scraper}, save_batch,
+                                         max_in_flight=8, per_retailer=3, browser_workers=1,
+                                         batch_size=6))
+    finally:
+        server.shutdown()
+
+    saved = [r for batch in batches for r in batch]
+    assert len(saved) == stats.jobs == stats.successes == 20
+    assert [len(batch) for batch in batches] == [6, 6, 6, 2]
+    assert (stats.http_prices, stats.browser_prices) == (15, 5)
+    assert len(scraper.browser_calls) == 5
+    prices = {r.job.product.id: r.price_point.price for r in saved}
+    assert prices['p0'] == 13.49 and prices['p1'] == 12.97 and prices['p3'] == 10.78
+    assert not stats.cancelled
+
+
+def test_stop_cancels_in_flight_fetches_and_saves_results():
+    server, base_url = serve_fixtures(handler_class=PipelineHandler)
+    products = make_products(base_url, ['target_json_ld.html'] * 2 + ['slow'] * 4)
+    scraper = FakeBrowserScraper()
+    saved = []
+
+    async def save_batch(batch):
+        saved.extend(batch)
+
+    async def run_and_stop():
+        stop = asyncio.Event()
+        client = AsyncHttpClient(timeout=5)
+        task = asyncio.ensure_future(run_pipeline(products, {'walmart': scraper}, save_batch,
+                                                  client=client, max_in_flight=6,
+                                                  per_retailer=6, batch_size=100, stop=stop))
+        await asyncio.sleep(0.5)
+        stop.set()
+        stats = await task
+        await client.close()
+        return stats
+
+    try:
+        stats = asyncio.run(run_and_stop())
+    finally:
+        server.shutdown()
+
+    assert stats.cancelled
+    # The fast pages were fetched and saved; the slow ones were cancelled
+    assert sorted(r.job.product.id for r in saved) == ['p0', 'p1']
+    assert stats.seconds < 2
@@ -0,0 +1,90 @@
+"""Test that browser renders run in supervised, recyclable worker processes"""
+import os
+import sys
+import time
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+from src.browser_workers import BrowserJobError, BrowserProcessPool
+from src.models import PricePoint
+from src.scraper import BaseScraper, BlockedError, SelectorStats
+
+_ballast = []
+
+
+class WorkerScraper(BaseScraper):
+    """Browser tier whose behaviour is chosen by the URL; the price is the worker's pid."""
+
+    def __init__(self):
+        super().__init__("amazon")
+
+    def _fetch_browser(self, product_id, url):
+        if url == 'hang':
+            time.sleep(60)
+        elif url == 'crash':
+            os._exit(1)
+        elif url == 'blocked':
+            raise BlockedError("Access Denied")
+        elif url == 'bloat':
+            _ballast.append(bytearray(64 * 2**20))
+        self.selector_stats['#price'] = SelectorStats(attempts=1, hits=1, total_seconds=0.5)
+        return PricePoint(product_id=product_id, retailer_id=self.retailer_id,
+                          price=float(os.getpid()), timestamp=None, url=url, source='browser')
+
+
+@pytest.fixture
+def scraper():
+    scraper = WorkerScraper()
+    scraper.browser_processes = BrowserProcessPool(workers=1, job_timeout=10, max_rss_mb=4096)
+    yield scraper
+    scraper.browser_processes.close()
+
+
+def test_render_runs_in_a_worker_process(scraper):
+    first = scraper.render_price('eucerin', 'ok')
+    second = scraper.render_price('eucerin', 'ok')
+    assert first.price != os.getpid()
+    # The worker (and its warm browsers) serves job after job
+    assert first.price == second.price
+    assert scraper.selector_report()['#price']['hits'] == 2
+
+    with pytest.raises(BlockedError):
+        scraper.render_price('eucerin', 'blocked')
+
+
+def test_hung_job_is_killed_and_worker_replaced(scraper):
+    pool = scraper.browser_processes
+    pool.job_timeout = 1.5
+    first = scraper.render_price('eucerin', 'ok')
+    started = time.monotonic()
+    with pytest.raises(BrowserJobError, match="timed out"):
+        scraper.render_price('eucerin', 'hang')
+    assert time.monotonic() - started < 5
+
+    after = scraper.render_price('eucerin', 'ok')
+    assert after.price != first.price
+    metrics = pool.metrics()
+    assert (metrics['timeouts'], metrics['workers_started']) == (1, 2)
+
+
+def test_crashed_worker_fails_only_its_job(scraper):
+    with pytest.raises(BrowserJobError, match="died"):
+        scraper.render_price('eucerin', 'crash')
+    assert scraper.render_price('eucerin', 'ok') is not None
+    assert scraper.browser_processes.metrics()['crashes'] == 1
+
+
+@pytest.mark.skipif(not Path('/proc').exists(), reason="RSS is read from /proc")
+def test_worker_over_memory_limit_is_recycled(scraper):
+    pool = scraper.browser_processes
+    baseline = scraper.render_price('eucerin', 'ok')
+    pool.max_rss_mb = pool.metrics()['peak_rss_mb'] + 32
+
+    # The worker grows by 64 MiB, goes over the limit and is replaced
+    assert scraper.render_price('eucerin', 'bloat').price == baseline.price
+    assert scraper.render_price('eucerin', 'ok').price != baseline.price
+    metrics = pool.metrics()
+    assert (metrics['recycled_rss'], metrics['workers_started']) == (1, 2)
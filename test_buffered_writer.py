@@ -0,0 +1,66 @@
+"""Test when the buffered price writer reaches the database"""
+import sys
+from datetime import datetime
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+import src.database
+from src.database import PriceDatabase
+from src.models import PricePoint, Product
+
+
+@pytest.fixture
+def db(tmp_path):
+    db = PriceDatabase(str(tmp_path / 'prices.db'))
+    db.add_product(Product(id='eucerin', name='Eucerin', size='5 oz', category='skincare',
+                           urls={'walmart': 'https://walmart/1'}))
+    yield db
+    db.close()
+
+
+def sighting(price):
+    return PricePoint(product_id='eucerin', retailer_id='walmart', price=price,
+                      timestamp=datetime.now(), url='https://walmart/1')
+
+
+def stored(db):
+    return db.conn.execute("SELECT COUNT(*) FROM price_history").fetchone()[0]
+
+
+def test_flushes_every_flush_rows(db):
+    with db.buffered_writer(flush_rows=3, flush_seconds=3600) as writer:
+        for i in range(5):
+            writer.add(sighting(10 + i))
+        assert (stored(db), writer.written) == (3, 3)
+    assert (stored(db), writer.written) == (5, 5)
+
+
+def test_flushes_after_flush_seconds(db, monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(src.database.time, 'monotonic', lambda: now[0])
+    with db.buffered_writer(flush_rows=100, flush_seconds=5) as writer:
+        writer.add(sighting(10))
+        writer.flush_if_due()
+        assert stored(db) == 0
+
+        # No further add() needed once the time is up
+        now[0] += 6
+        writer.flush_if_due()
+        assert stored(db) == 1
+
+        writer.add(sighting(11))
+        now[0] += 6
+        writer.add(sighting(12))
+        assert stored(db) == 3
+
+
+def test_flushes_on_exit_even_after_an_error(db):
+    with pytest.raises(RuntimeError):
+        with db.buffered_writer(flush_rows=100, flush_seconds=3600) as writer:
+            writer.add(sighting(10))
+            writer.add(sighting(11))
+            raise RuntimeError("scraper crashed")
+    assert stored(db) == 2
@@ -0,0 +1,147 @@
+"""Test streaming bulk import of historical prices"""
+import csv
+import gzip
+import json
+import sys
+from datetime import datetime, timedelta
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+from src.bulk_import import import_prices, read_rows
+from src.database import PriceDatabase
+from src.models import PricePoint, Product, Retailer
+
+
+def make_database(tmp_path, run_length=False):
+    db = PriceDatabase(str(tmp_path / 'prices.db'), run_length=run_length)
+    db.add_product(Product(id='eucerin', name='Eucerin', size='5 oz', category='skincare',
+                           urls={'walmart': 'https://walmart/1'}))
+    return db
+
+
+def days_ago(days):
+    return (datetime.now() - timedelta(days=days)).replace(microsecond=0)
+
+
+def write_csv(path, rows):
+    with open(path, 'w', newline='') as f:
+        writer = csv.DictWriter(f, fieldnames=['product', 'retailer', 'price', 'timestamp', 'pack_size'])
+        writer.writeheader()
+        writer.writerows(rows)
+
+
+def test_csv_import_dedupes_and_rebuilds_stats(tmp_path):
+    db = make_database(tmp_path)
+    seen = {day: days_ago(day) for day in range(1, 8)}
+    db.add_price_points([PricePoint(product_id='eucerin', retailer_id='walmart', price=11.50,
+                                    timestamp=seen[1], url='https://walmart/1')])
+
+    rows = [{'product': 'eucerin', 'retailer': 'walmart', 'price': f"${9 + day}.99",
+             'timestamp': seen[day].isoformat(), 'pack_size': ''} for day in seen]
+    rows.append(dict(rows[3]))  # Repeated within the file
+    path = tmp_path / 'history.csv'
+    write_csv(path, rows)
+
+    # A chunk size that splits the repeat from its original
+    report = import_prices(db, read_rows(str(path)), chunk_size=3)
+    assert (report.rows_read, report.inserted, report.duplicates, report.rejected) == (8, 6, 2, 0)
+    assert report.rows_per_second > 0
+
+    series = db.get_price_history('eucerin', 'walmart')
+    assert len(series) == 7
+    imported = [p for p in series if p.source == 'import']
+    assert [p.url for p in imported] == ['https://walmart/1'] * 6
+
+    stats = db.get_price_stats('eucerin', 'walmart')
+    assert (stats.current_price, stats.min_price, stats.max_price, stats.observation_count) == \
+        (11.50, 11.50, 16.99, 7)
+
+    # Importing the same file again adds nothing
+    report = import_prices(db, read_rows(str(path)))
+    assert (report.inserted, report.duplicates) == (0, 8)
+    db.close()
+
+
+def test_run_length_import_skips_sightings_inside_runs(tmp_path):
+    db = make_database(tmp_path, run_length=True)
+    seen = {day: days_ago(day) for day in range(1, 9)}
+
+    def sighting(day, price=12.97):
+        return PricePoint(product_id='eucerin', retailer_id='walmart', price=price,
+                          timestamp=seen[day], url='https://walmart/1')
+
+    db.add_price_points([sighting(day) for day in (5, 4, 3, 2, 1)])
+    assert db.conn.execute("SELECT COUNT(*), SUM(seen_count) FROM price_history").fetchone()[:] == (1, 5)
+
+    def record(day, price=12.97):
+        return {'product_id': 'eucerin', 'retailer_id': 'walmart', 'price': price,
+                'timestamp': seen[day].isoformat()}
+
+    # The collector's own sightings, imported again
+    report = import_prices(db, [record(day) for day in (5, 4, 3, 2, 1)])
+    assert (report.inserted, report.duplicates) == (0, 5)
+
+    # Older sightings at the same price merge into the run; a different price doesn't
+    report = import_prices(db, [record(8, 11.49), record(7), record(6)])
+    assert report.inserted == 3
+    rows = db.conn.execute("""
+        SELECT price, timestamp, seen_count FROM price_history ORDER BY ts_epoch
+    """).fetchall()
+    assert [tuple(row) for row in rows] == [(11.49, seen[8].isoformat(), 1),
+                                            (12.97, seen[7].isoformat(), 7)]
+
+    # The next collection extends that run
+    db.add_price_point(PricePoint(product_id='eucerin', retailer_id='walmart', price=12.97,
+                                  timestamp=datetime.now(), url='https://walmart/1'))
+    assert db.conn.execute("SELECT COUNT(*), SUM(seen_count) FROM price_history").fetchone()[:] == (2, 9)
+    stats = db.get_price_stats('eucerin', 'walmart')
+    assert (stats.current_price, stats.min_price, stats.observation_count) == (12.97, 11.49, 9)
+    db.close()
+
+
+def test_rejected_rows_are_reported(tmp_path):
+    db = make_database(tmp_path)
+    # A configured retailer is accepted without a listing
+    db.add_retailer(Retailer(id='target', name='Target', base_url='https://www.target.com'))
+    lines = [
+        {'product_id': 'eucerin', 'retailer_id': 'target', 'price': 12.49,
+         'timestamp': '2025-03-01T10:00:00+00:00', 'savings': 1.5, 'url': 'https://target/1'},
+        {'product_id': 'eucerin', 'retailer_id': 'target', 'price': 0, 'timestamp': '2025-03-02'},
+        {'product_id': 'eucerin', 'retailer_id': 'target', 'price': 12.49, 'timestamp': 'yesterday'},
+        {'product_id': 'cerave', 'retailer_id': 'target', 'price': 15.99, 'timestamp': 1740823200},
+        {'product_id': 'eucerin', 'retailer_id': 'target', 'price': 12.29, 'timestamp': 1740909600,
+         'pack_size': 2},
+    ]
+    path = tmp_path / 'history.ndjson.gz'
+    with gzip.open(path, 'wt') as f:
+        for line in lines:
+            f.write(json.dumps(line) + '\n')
+        f.write('{not json\n')
+
+    report = import_prices(db, read_rows(str(path)))
+    assert (report.rows_read, report.inserted, report.rejected) == (6, 2, 4)
+    assert report.unknown_products == {'cerave': 1}
+    assert [error.split(':')[0] for error in report.errors] == ['row 2', 'row 3', 'row 6']
+
+    series = db.get_price_history('eucerin', 'target')
+    first, second = list(series)
+    assert first.timestamp == datetime.fromisoformat('2025-03-01T10:00:00+00:00').astimezone().replace(tzinfo=None)
+    assert (first.advertised_savings, first.url) == (1.5, 'https://target/1')
+    assert (second.timestamp, second.pack_size, second.url) == (datetime.fromtimestamp(1740909600), 2, '')
+    db.close()
+
+
+def test_unknown_retailers_are_rejected(tmp_path):
+    db = make_database(tmp_path)
+    rows = [{'product_id': 'eucerin', 'retailer_id': retailer_id, 'price': 12.97,
+             'timestamp': f"2025-03-0{day}T10:00:00"}
+            for day, retailer_id in enumerate(['walmart', 'walmrt', 'walmrt', 'Walmart'], 1)]
+
+    report = import_prices(db, rows)
+    assert (report.inserted, report.rejected) == (1, 3)
+    assert report.unknown_retailers == {'walmrt': 2, 'Walmart': 1}
+    assert report.errors == []
+    assert [tuple(row) for row in db.conn.execute(
+        "SELECT DISTINCT retailer_id FROM price_history")] == [('walmart',)]
+    db.close()
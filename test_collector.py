@@ -0,0 +1,70 @@
+"""Test the concurrent collector: per-retailer caps, result order and the single writer"""
+import random
+import sys
+import threading
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+from src.collector import collect_concurrently
+from src.models import PricePoint, Product
+
+
+class SlowScraper:
+    """Takes a few milliseconds per fetch and records how many fetches overlap."""
+
+    def __init__(self, retailer_id, failing=()):
+        self.retailer_id = retailer_id
+        self.failing = set(failing)
+        self.in_flight = 0
+        self.most_in_flight = 0
+        self.lock = threading.Lock()
+
+    def fetch_price(self, product_id, url):
+        with self.lock:
+            self.in_flight += 1
+            self.most_in_flight = max(self.most_in_flight, self.in_flight)
+        time.sleep(random.uniform(0.001, 0.01))
+        with self.lock:
+            self.in_flight -= 1
+        if product_id in self.failing:
+            raise RuntimeError("page changed")
+        return PricePoint(product_id=product_id, retailer_id=self.retailer_id, price=9.99,
+                          timestamp=None, url=url)
+
+
+def make_products(count):
+    return [Product(id=f"p{i}", name=f"P{i}", size="1 oz", category="skincare",
+                    urls={'walmart': f"https://walmart/{i}", 'cvs': f"https://cvs/{i}",
+                          'costco': f"https://costco/{i}"})
+            for i in range(count)]
+
+
+def test_per_retailer_cap_order_and_single_writer():
+    products = make_products(12)
+    scrapers = {'walmart': SlowScraper('walmart'), 'cvs': SlowScraper('cvs', failing={'p3'})}
+    saved_on = set()
+    saved = []
+    reported = []
+
+    def save(price_point):
+        saved_on.add(threading.get_ident())
+        saved.append(price_point)
+
+    outcomes = collect_concurrently(products, scrapers, save=save, workers=4, per_retailer=2,
+                                    on_product_done=lambda o: reported.append(o.product.id))
+
+    assert scrapers['walmart'].most_in_flight == 2
+    assert scrapers['cvs'].most_in_flight == 2
+
+    # Products come back and are reported in the order given, results in scraper order
+    assert [o.product.id for o in outcomes] == reported == [p.id for p in products]
+    for outcome in outcomes:
+        assert [r.job.retailer_id for r in outcome.results] == ['walmart', 'cvs']
+        assert outcome.skipped == ['costco']
+    assert outcomes[3].results[1].error == "page changed"
+
+    # Every success was saved once, on this thread
+    assert saved_on == {threading.get_ident()}
+    assert len(saved) == sum(o.successes for o in outcomes) == 23
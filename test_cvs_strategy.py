@@ -0,0 +1,92 @@
+"""Test the CVS strategy against recorded CVS pages served locally"""
+import re
+import sys
+import time
+import urllib.request
+from contextlib import contextmanager
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+from src.http_client import HttpSession
+from src.scraper import BlockedError, CVSScraper
+from test_http_fast_path import serve_fixtures
+
+
+class RenderedPage:
+    """Stands in for headless Chrome on a page from the fixture server."""
+
+    def __init__(self, url):
+        try:
+            html = urllib.request.urlopen(url).read().decode()
+        except urllib.error.HTTPError as e:
+            html = e.read().decode()
+        self.html = html
+        self.title = re.search(r'<title>(.*?)</title>', html, re.IGNORECASE | re.DOTALL).group(1)
+        self.scripts_read = 0
+
+    def execute_script(self, script):
+        self.scripts_read += 1
+        return [re.findall(r'<script type="application/ld\+json">(.*?)</script>', self.html, re.DOTALL),
+                re.findall(r'<script id="__NEXT_DATA__"[^>]*>(.*?)</script>', self.html, re.DOTALL)]
+
+    @property
+    def body_text(self):
+        return re.sub(r'<[^>]+>', ' ', self.html.split('<script', 1)[0])
+
+
+@pytest.fixture
+def fixture_server():
+    server, base_url = serve_fixtures()
+    yield base_url
+    server.shutdown()
+
+
+def headless_scraper(pages):
+    """A CVSScraper whose browser tier renders fixture pages, recording each into `pages`."""
+    scraper = CVSScraper()
+    scraper.http_fast_path = False
+
+    @contextmanager
+    def browser_page(url):
+        page = RenderedPage(url)
+        pages.append(page)
+        yield page
+
+    scraper._browser_page = browser_page
+    return scraper
+
+
+def test_structured_price_wins_over_decoy_amounts(monkeypatch, fixture_server):
+    session = HttpSession(timeout=5)
+    monkeypatch.setattr('src.scraper.get_http_session', lambda: session)
+    try:
+        url = f"{fixture_server}/cvs_product_next_data.html"
+        price_point = CVSScraper().fetch_price('eucerin', url)
+        assert (price_point.price, price_point.source) == (14.49, 'http')
+
+        # The first non-zero amount in the page text is the shipping threshold
+        spec = CVSScraper().extraction_spec
+        assert spec.parse_price(RenderedPage(url).body_text) == 35.00
+    finally:
+        session.close()
+
+
+def test_headless_render_reads_structured_data(fixture_server):
+    pages = []
+    price_point = headless_scraper(pages).fetch_price(
+        'eucerin', f"{fixture_server}/cvs_product_next_data.html")
+    assert (price_point.price, price_point.source) == (14.49, 'browser')
+    assert pages[0].scripts_read == 1
+
+
+def test_block_page_aborts_without_waiting(fixture_server):
+    pages = []
+    scraper = headless_scraper(pages)
+    started = time.monotonic()
+    with pytest.raises(BlockedError):
+        scraper.fetch_price('eucerin', f"{fixture_server}/cvs_access_denied.html")
+    assert time.monotonic() - started < scraper.structured_data_timeout
+    assert pages[0].scripts_read == 0
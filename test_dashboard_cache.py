@@ -0,0 +1,71 @@
+"""Test the dashboard response cache: ETags, 304s, gzip and replaced databases"""
+import gzip
+import json
+import sys
+from datetime import datetime
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+from dashboard import api
+from src.database import PriceDatabase
+from src.models import PricePoint, Product
+
+
+def make_database(path, price=12.97):
+    db = PriceDatabase(str(path))
+    db.add_product(Product(id='eucerin', name='Eucerin', size='5 oz', category='skincare',
+                           brand='Eucerin', urls={'walmart': 'https://walmart/1'}))
+    db.add_price_point(PricePoint(product_id='eucerin', retailer_id='walmart', price=price,
+                                  timestamp=datetime.now(), url='https://walmart/1'))
+    db.close()
+
+
+@pytest.fixture
+def client(monkeypatch, tmp_path):
+    cache = api.DashboardCache(str(tmp_path / 'cache'))
+    monkeypatch.setattr(api, 'DB_PATH', str(tmp_path / 'prices.db'))
+    monkeypatch.setattr(api, 'dashboard_cache', cache)
+    return api.app.test_client()
+
+
+def test_etag_304_and_gzip(client, tmp_path):
+    make_database(tmp_path / 'prices.db')
+    first = client.get('/api/dashboard-data')
+    assert first.status_code == 200
+    etag = first.headers['ETag']
+
+    again = client.get('/api/dashboard-data', headers={'If-None-Match': etag})
+    assert (again.status_code, again.data) == (304, b'')
+
+    zipped = client.get('/api/dashboard-data', headers={'Accept-Encoding': 'gzip'})
+    assert zipped.headers['Content-Encoding'] == 'gzip'
+    assert gzip.decompress(zipped.data) == first.data
+    assert zipped.headers['Vary'] == 'Accept-Encoding'
+
+    # A write changes the ETag
+    db = PriceDatabase(str(tmp_path / 'prices.db'))
+    db.add_price_point(PricePoint(product_id='eucerin', retailer_id='walmart', price=9.99,
+                                  timestamp=datetime.now(), url='https://walmart/1'))
+    db.close()
+    changed = client.get('/api/dashboard-data', headers={'If-None-Match': etag})
+    assert changed.status_code == 200
+    assert changed.headers['ETag'] != etag
+
+
+def test_replaced_database_is_not_served_from_cache(client, tmp_path):
+    make_database(tmp_path / 'prices.db', price=12.97)
+    before = client.get('/api/dashboard-data')
+
+    # A fresh database with the same number of writes, so the same data_version
+    (tmp_path / 'prices.db').unlink()
+    make_database(tmp_path / 'prices.db', price=8.49)
+    api.dashboard_cache._entry = None  # As after a restart: only the disk cache is left
+
+    after = client.get('/api/dashboard-data', headers={'If-None-Match': before.headers['ETag']})
+    assert after.status_code == 200
+    assert after.headers['ETag'] != before.headers['ETag']
+    assert '8.49' in json.dumps(after.get_json()) and '12.97' not in json.dumps(after.get_json())
+    assert len(list((tmp_path / 'cache').iterdir())) == 1
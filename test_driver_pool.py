@@ -0,0 +1,117 @@
+"""Test the warm WebDriver pool with stand-in drivers"""
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+from src.driver_pool import DriverPool, PoolTimeout
+from src.scraper import BlockedError
+
+
+class FakeDriver:
+    """Records what the pool does to a driver."""
+
+    def __init__(self, number):
+        self.number = number
+        self.window_handles = ['main']
+        self.cookies_cleared = 0
+        self.visited = []
+        self.quit_called = False
+        self.broken = False
+        self.switch_to = self
+
+    def window(self, handle):
+        pass
+
+    def close(self):
+        self.window_handles.pop()
+
+    def execute_script(self, script):
+        pass
+
+    def delete_all_cookies(self):
+        if self.broken:
+            raise RuntimeError("browser went away")
+        self.cookies_cleared += 1
+
+    def get(self, url):
+        self.visited.append(url)
+
+    def quit(self):
+        self.quit_called = True
+
+
+def make_pool(**kwargs):
+    started = []
+
+    def factory():
+        started.append(FakeDriver(len(started)))
+        return started[-1]
+
+    return DriverPool(factory, **kwargs), started
+
+
+def test_returned_drivers_are_reset_and_reused():
+    pool, started = make_pool(size=2)
+    with pool.lease() as driver:
+        driver.window_handles.append('popup')
+        driver.get('https://walmart/1')
+    assert driver.window_handles == ['main']
+    assert (driver.cookies_cleared, driver.visited[-1]) == (1, 'about:blank')
+
+    with pool.lease() as again:
+        assert again is driver
+    metrics = pool.metrics()
+    assert (metrics['created'], metrics['leases'], metrics['reused']) == (1, 2, 1)
+    assert (metrics['live'], metrics['idle'], metrics['in_use']) == (1, 1, 0)
+
+
+def test_errors_and_failed_resets_discard_the_driver():
+    pool, started = make_pool(size=1)
+    with pytest.raises(ValueError):
+        with pool.lease() as driver:
+            raise ValueError("page crashed")
+    assert driver.quit_called
+
+    # A driver that can't be reset is replaced too
+    with pool.lease() as driver:
+        assert driver is started[1]
+        driver.broken = True
+    assert driver.quit_called
+    with pool.lease() as driver:
+        assert driver is started[2]
+    assert (pool.metrics()['crashed'], pool.metrics()['live']) == (2, 1)
+
+
+def test_drivers_are_recycled_after_max_uses():
+    pool, started = make_pool(size=1, max_uses=2)
+    for _ in range(3):
+        with pool.lease():
+            pass
+    assert [d.quit_called for d in started] == [True, False]
+    assert pool.metrics()['recycled'] == 1
+
+
+def test_lease_times_out_when_every_driver_is_busy():
+    pool, started = make_pool(size=1)
+    with pool.lease():
+        with pytest.raises(PoolTimeout):
+            with pool.lease(timeout=0.05):
+                pass
+    assert len(started) == 1
+
+
+def test_block_page_keeps_the_driver():
+    pool, started = make_pool(size=1)
+    with pytest.raises(BlockedError):
+        with pool.lease() as driver:
+            raise BlockedError("cvs served a block page")
+
+    assert not driver.quit_called
+    assert (driver.cookies_cleared, driver.visited) == (1, ['about:blank'])
+    with pool.lease() as again:
+        assert again is driver
+    metrics = pool.metrics()
+    assert (metrics['created'], metrics['blocked'], metrics['crashed']) == (1, 1, 0)
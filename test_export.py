@@ -0,0 +1,100 @@
+"""Test the streamed export against the database's own stats and recent prices"""
+import gzip
+import json
+import sys
+from datetime import datetime, timedelta
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+from src.database import PriceDatabase
+from src.export import HISTORY_LIMIT, STATS_WINDOW_DAYS, export_to_json
+from src.models import PricePoint, Product, Retailer
+
+START = datetime.now().replace(microsecond=0) - timedelta(days=40, hours=1)
+STEP = timedelta(hours=6)
+
+
+def make_database(path, run_length):
+    db = PriceDatabase(str(path), run_length=run_length)
+    for retailer_id in ('walmart', 'target'):
+        db.add_retailer(Retailer(id=retailer_id, name=retailer_id.title(),
+                                 base_url=f"https://www.{retailer_id}.com"))
+    db.add_product(Product(id='eucerin', name='Eucerin', size='5 oz', category='skincare',
+                           urls={'walmart': 'https://walmart/1', 'target': 'https://target/1'}))
+    db.add_product(Product(id='pataday', name='Pataday', size='2.5 mL', category='eye-drops',
+                           urls={'walmart': 'https://walmart/2'}))
+
+    # Long runs at one price, so windows and the history limit cut through runs
+    walmart = [12.97] * 100 + [10.99] * 12 + [12.97] * 48
+    target = [13.49, 13.49, 12.99] * 20
+    db.add_price_points(
+        PricePoint(product_id='eucerin', retailer_id='walmart', price=price, timestamp=START + STEP * i,
+                   url='https://walmart/1', advertised_savings=1.98 if price == 10.99 else None)
+        for i, price in enumerate(walmart))
+    db.add_price_points(
+        PricePoint(product_id='eucerin', retailer_id='target', price=price, timestamp=START + STEP * 2 * i,
+                   url='https://target/1', pack_size=2 if i % 7 == 0 else 1)
+        for i, price in enumerate(target))
+    # Few recent sightings, so the last HISTORY_LIMIT reach back into an old run
+    db.add_price_points(
+        PricePoint(product_id='pataday', retailer_id='walmart', price=18.47,
+                   timestamp=START + timedelta(hours=2) * i, url='https://walmart/2')
+        for i in range(60))
+    db.add_price_points(
+        PricePoint(product_id='pataday', retailer_id='walmart', price=17.99,
+                   timestamp=datetime.now() - timedelta(days=3 - i), url='https://walmart/2')
+        for i in range(3))
+    # Nothing recent, so cerave is left out
+    db.add_product(Product(id='cerave', name='CeraVe', size='16 oz', category='skincare',
+                           urls={'walmart': 'https://walmart/3'}))
+    db.add_price_point(PricePoint(product_id='cerave', retailer_id='walmart', price=15.99,
+                                  timestamp=START, url='https://walmart/3'))
+    return db
+
+
+def expected_prices(db, product_id, retailer_id):
+    stats = db.get_price_stats(product_id, retailer_id, STATS_WINDOW_DAYS)
+    recent = reversed(list(db.get_recent_prices(product_id, retailer_id, HISTORY_LIMIT)))
+    return {
+        "retailer_id": retailer_id,
+        "current_price": stats.current_price,
+        "min_price": stats.min_price,
+        "max_price": stats.max_price,
+        "avg_price": pytest.approx(stats.avg_price),
+        "is_good_deal": stats.is_good_deal(),
+        "savings_vs_avg": pytest.approx(stats.savings_vs_average()),
+        "observation_count": stats.observation_count,
+        "last_updated": stats.last_updated.isoformat(),
+        "history": [{"price": p.price, "timestamp": p.timestamp.isoformat(),
+                     "pack_size": p.pack_size, "advertised_savings": p.advertised_savings}
+                    for p in recent],
+    }
+
+
+@pytest.mark.parametrize('run_length', [False, True])
+def test_export_matches_stats_and_recent_prices(tmp_path, monkeypatch, run_length):
+    monkeypatch.chdir(tmp_path)  # export_to_json opens data/prices.db
+    db = make_database(tmp_path / 'data' / 'prices.db', run_length)
+    expected = [{"id": 'eucerin', "name": 'Eucerin', "size": '5 oz', "category": 'skincare',
+                 "prices": [expected_prices(db, 'eucerin', 'walmart'),
+                            expected_prices(db, 'eucerin', 'target')]},
+                {"id": 'pataday', "name": 'Pataday', "size": '2.5 mL', "category": 'eye-drops',
+                 "prices": [expected_prices(db, 'pataday', 'walmart')]}]
+    pataday = expected[1]["prices"][0]
+    assert len(pataday["history"]) == HISTORY_LIMIT and pataday["observation_count"] == 3
+    db.close()
+
+    assert export_to_json('out.json') == 2
+    document = json.loads((tmp_path / 'out.json').read_text())
+    assert document["products"] == expected
+    assert [r["id"] for r in document["retailers"]] == ['walmart', 'target']
+
+    assert export_to_json('out.ndjson.gz', fmt='ndjson') == 2
+    with gzip.open(tmp_path / 'out.ndjson.gz', 'rt') as f:
+        header, *products = [json.loads(line) for line in f]
+    assert header["retailers"] == document["retailers"]
+    assert products == expected
+    assert not (tmp_path / 'out.ndjson.gz.tmp').exists()
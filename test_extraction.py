@@ -0,0 +1,99 @@
+"""Test the declarative extraction specs and the engine that runs them"""
+import json
+import sys
+from contextlib import contextmanager
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+from src.extraction import ExtractionSpecError, compile_spec, load_extraction_specs
+from src.scraper import BlockedError, PriceMatch
+from src.scraper_registry import BUILTIN_SCRAPERS, ScraperRegistry
+
+
+class FakeElement:
+    def __init__(self, text='', **attributes):
+        self.text = text
+        self.attributes = attributes
+
+    def get_attribute(self, name):
+        return self.attributes.get(name)
+
+
+class FakeDriver:
+    """Elements by (By, selector), as a rendered page would return them."""
+
+    def __init__(self, elements, title='Product'):
+        self.elements = elements
+        self.title = title
+
+    def find_elements(self, by, selector):
+        return self.elements.get((by, selector), [])
+
+
+def test_every_builtin_retailer_has_a_compiled_spec():
+    specs = load_extraction_specs()
+    assert set(specs) == set(BUILTIN_SCRAPERS)
+    assert load_extraction_specs() is specs  # Compiled once
+
+    cvs = specs['cvs']
+    assert cvs.parse_price("Was $0.00 now $12.49, or $10.00 with card") == 12.49
+    assert not cvs.accepts("$0.00")
+    amazon = specs['amazon']
+    assert amazon.accepts("12.99") and not amazon.accepts("In stock")
+    assert amazon.read_text(FakeElement('', textContent='$8.97')) == '$8.97'
+
+
+def test_bad_specs_are_rejected():
+    with pytest.raises(ExtractionSpecError):
+        compile_spec('shop', {'selectors': [{'css': '.price', 'xpath': '//price'}]})
+    with pytest.raises(ExtractionSpecError):
+        compile_spec('shop', {'selectors': [{'css': '.price'}], 'price': r'\d+\.\d{2}'})
+    with pytest.raises(ExtractionSpecError):
+        compile_spec('shop', {'selectors': [{'css': '.price'}], 'read': ['innerText']})
+
+
+def run_spec(scraper, driver):
+    """_extract_with_spec against a fake page, polling the selectors once."""
+    @contextmanager
+    def browser_page(url):
+        yield driver
+
+    def wait_for_price(driver, selectors, accept, read_text, abort_if=None):
+        if abort_if and abort_if(driver):
+            return None
+        for by, selector in selectors:
+            for element in driver.find_elements(by, selector):
+                text = read_text(element).strip()
+                if accept(text):
+                    return PriceMatch(selector, text, 0.0)
+        return None
+
+    scraper._browser_page = browser_page
+    scraper._wait_for_price = wait_for_price
+    return scraper._extract_with_spec('p1', 'https://example.com/p1')
+
+
+def test_engine_reads_price_and_was_price_from_spec(tmp_path):
+    specs = tmp_path / 'specs.json'
+    specs.write_text(json.dumps({'target': {
+        'selectors': [{'css': '[data-test="product-price"]'}, {'css': '.h-text-bs'}],
+        'was_price': [{'css': '.regular'}],
+    }}))
+    scraper = ScraperRegistry(entry_points=False).create({'target'})['target']
+    scraper.extraction_specs = specs
+
+    price_point = run_spec(scraper, FakeDriver({
+        ('css selector', '[data-test="product-price"]'): [FakeElement('See price in cart')],
+        ('css selector', '.h-text-bs'): [FakeElement('$11.49')],
+        ('css selector', '.regular'): [FakeElement('reg $14.99')],
+    }))
+    assert (price_point.price, price_point.advertised_savings, price_point.source) == (11.49, 3.5, 'browser')
+
+
+def test_engine_raises_on_block_page_when_spec_says_so():
+    scraper = ScraperRegistry(entry_points=False).create({'cvs'})['cvs']
+    with pytest.raises(BlockedError):
+        run_spec(scraper, FakeDriver({}, title='Access Denied'))
@@ -0,0 +1,280 @@
+"""Test the browser-free HTTP tier against saved product pages"""
+import os
+import sys
+import threading
+import time
+from dataclasses import replace
+from datetime import datetime, timedelta
+from functools import partial
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+from src.database import PriceDatabase
+from src.http_client import HttpSession
+from src.page_validators import MAX_REUSE_AGE, ValidatorCache
+from src.models import PricePoint
+from src.scraper import BaseScraper, BlockedError
+from src.structured_price import extract_structured_price
+
+FIXTURES = Path(__file__).parent / 'fixtures' / 'html'
+
+
+def load_fixture(name: str) -> str:
+    return (FIXTURES / name).read_text()
+
+
+def test_json_ld_offer_price():
+    found = extract_structured_price(load_fixture('target_json_ld.html'))
+    assert found.price == 13.49
+    assert found.source == 'json-ld'
+
+
+def test_itemprop_meta_price():
+    found = extract_structured_price(load_fixture('walgreens_itemprop.html'))
+    assert found.price == 11.99
+    assert found.source == 'itemprop'
+
+
+def test_itemprop_text_spans_void_tags():
+    html = '<div itemprop="price"><sup>$</sup>12<br/><span>.97</span></div>'
+    assert extract_structured_price(html).price == 12.97
+
+
+def test_next_data_prefers_current_price():
+    # Related products also carry a "price" key; currentPrice must win
+    found = extract_structured_price(load_fixture('walmart_next_data.html'))
+    assert found.price == 12.97
+    assert found.source == 'embedded-state'
+
+
+def test_inline_preloaded_state():
+    html = '<script>window.__PRELOADED_STATE__ = {"product": {"salePrice": "$1,049.50"}};</script>'
+    assert extract_structured_price(html).price == 1049.50
+
+
+def test_pages_without_structured_data():
+    assert extract_structured_price(load_fixture('amazon_rendered_only.html')) is None
+    assert extract_structured_price(load_fixture('cvs_access_denied.html')) is None
+
+
+class FakeBrowserScraper(BaseScraper):
+    """Scraper whose browser tier just records that it was used."""
+
+    def __init__(self):
+        super().__init__("walmart")
+        self.browser_calls = []
+
+    def _fetch_browser(self, product_id, url):
+        self.browser_calls.append(url)
+        return None
+
+
+class QuietHandler(SimpleHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'  # Keep-alive
+
+    def log_message(self, format, *args):
+        pass
+
+
+class NoValidatorsHandler(QuietHandler):
+    """Serves pages without Last-Modified, so they can't be fetched conditionally."""
+
+    def send_header(self, keyword, value):
+        if keyword != 'Last-Modified':
+            super().send_header(keyword, value)
+
+
+def serve_fixtures(directory=FIXTURES, handler_class=QuietHandler):
+    handler = partial(handler_class, directory=str(directory))
+    server = ThreadingHTTPServer(('127.0.0.1', 0), handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}"
+
+
+def test_http_tier_serves_structured_pages(monkeypatch):
+    server, base_url = serve_fixtures()
+    session = HttpSession(timeout=5)
+    monkeypatch.setattr('src.scraper.get_http_session', lambda: session)
+    try:
+        scraper = FakeBrowserScraper()
+        for name in ('target_json_ld.html', 'walmart_next_data.html', 'walgreens_itemprop.html'):
+            price_point = scraper.fetch_price('eucerin', f"{base_url}/{name}")
+            assert price_point is not None
+            assert price_point.source == 'http'
+
+        assert scraper.browser_calls == []
+        # All three pages came over one kept-alive connection
+        assert session.connections_opened == 1
+        assert session.requests_sent == 3
+    finally:
+        session.close()
+        server.shutdown()
+
+
+def test_falls_back_to_browser(monkeypatch):
+    server, base_url = serve_fixtures()
+    session = HttpSession(timeout=5)
+    monkeypatch.setattr('src.scraper.get_http_session', lambda: session)
+    try:
+        scraper = FakeBrowserScraper()
+        for name in ('amazon_rendered_only.html', 'missing.html'):
+            assert scraper.fetch_price('eucerin', f"{base_url}/{name}") is None
+        assert scraper.browser_calls == [
+            f"{base_url}/amazon_rendered_only.html",
+            f"{base_url}/missing.html",
+        ]
+    finally:
+        session.close()
+        server.shutdown()
+
+
+def test_block_page_raises_if_browser_also_fails(monkeypatch):
+    server, base_url = serve_fixtures()
+    session = HttpSession(timeout=5)
+    monkeypatch.setattr('src.scraper.get_http_session', lambda: session)
+    try:
+        scraper = FakeBrowserScraper()
+        with pytest.raises(BlockedError):
+            scraper.fetch_price('eucerin', f"{base_url}/cvs_access_denied.html")
+        assert scraper.browser_calls == [f"{base_url}/cvs_access_denied.html"]
+    finally:
+        session.close()
+        server.shutdown()
+
+
+def test_not_modified_reuses_stored_price(monkeypatch, tmp_path):
+    server, base_url = serve_fixtures()
+    session = HttpSession(timeout=5)
+    monkeypatch.setattr('src.scraper.get_http_session', lambda: session)
+    try:
+        scraper = FakeBrowserScraper()
+        scraper.validators = ValidatorCache()
+        url = f"{base_url}/target_json_ld.html"
+        assert scraper.fetch_price('eucerin', url).price == 13.49
+
+        # Validators survive a round trip through the database
+        db = PriceDatabase(str(tmp_path / 'prices.db'))
+        db.save_page_validators(scraper.validators.changed())
+        scraper.validators = ValidatorCache(db.get_page_validators())
+        db.close()
+
+        bytes_before = session.bytes_received
+        price_point = scraper.fetch_price('eucerin', url)
+        assert price_point.price == 13.49
+        assert price_point.source == 'reused'
+        # The server answered 304 with no body
+        assert session.bytes_received == bytes_before
+        report = scraper.validators.report()
+        assert (report['conditional'], report['not_modified']) == (1, 1)
+        assert scraper.browser_calls == []
+    finally:
+        session.close()
+        server.shutdown()
+
+
+def test_validators_of_an_unread_page_are_not_kept(monkeypatch, tmp_path):
+    page = tmp_path / 'target.html'
+    page.write_text(load_fixture('target_json_ld.html'))
+    os.utime(page, (time.time() - 100, time.time() - 100))
+    server, base_url = serve_fixtures(tmp_path)
+    session = HttpSession(timeout=5)
+    monkeypatch.setattr('src.scraper.get_http_session', lambda: session)
+    try:
+        scraper = FakeBrowserScraper()
+        scraper.validators = ValidatorCache()
+        url = f"{base_url}/target.html"
+        assert scraper.fetch_price('eucerin', url).price == 13.49
+
+        # The page changes and no tier can read a price from it
+        page.write_text(load_fixture('amazon_rendered_only.html'))
+        assert scraper.fetch_price('eucerin', url) is None
+
+        # Still asked with the old validators, so the changed page is sent in
+        # full rather than answered 304 with the old price
+        assert scraper.fetch_price('eucerin', url) is None
+        assert scraper.validators.report()['not_modified'] == 0
+        assert len(scraper.browser_calls) == 2
+    finally:
+        session.close()
+        server.shutdown()
+
+
+class PricedBrowserScraper(FakeBrowserScraper):
+    """Reads the price the browser would see from the raw page."""
+
+    price_markers = ('corePriceDisplay_desktop_feature_div',)
+
+    def _fetch_browser(self, product_id, url):
+        super()._fetch_browser(product_id, url)
+        html = self.page.read_text()
+        price = float(html.split('a-offscreen">$', 1)[1].split('<', 1)[0])
+        return PricePoint(product_id=product_id, retailer_id=self.retailer_id, price=price,
+                          timestamp=None, url=url, source='browser')
+
+
+def test_unchanged_price_fragment_skips_browser(monkeypatch, tmp_path):
+    page = tmp_path / 'amazon.html'
+    page.write_text(load_fixture('amazon_rendered_only.html'))
+    server, base_url = serve_fixtures(tmp_path, NoValidatorsHandler)
+    session = HttpSession(timeout=5)
+    monkeypatch.setattr('src.scraper.get_http_session', lambda: session)
+    try:
+        scraper = PricedBrowserScraper()
+        scraper.page = page
+        scraper.validators = ValidatorCache()
+        url = f"{base_url}/amazon.html"
+
+        assert scraper.fetch_price('eucerin', url).source == 'browser'
+        reused = scraper.fetch_price('eucerin', url)
+        assert (reused.price, reused.source) == (10.78, 'reused')
+        assert len(scraper.browser_calls) == 1
+
+        # A new price changes the fragment and the page is rendered again
+        page.write_text(page.read_text().replace('$10.78', '$9.99'))
+        assert scraper.fetch_price('eucerin', url).price == 9.99
+        assert len(scraper.browser_calls) == 2
+
+        report = scraper.validators.report()
+        assert report['fragment_unchanged'] == 1
+        assert report['price_changed'] == 2
+        assert report['conditional'] == 0
+    finally:
+        session.close()
+        server.shutdown()
+
+
+def test_fragment_reuse_needs_a_recent_price_on_the_page(monkeypatch, tmp_path):
+    page = tmp_path / 'amazon.html'
+    # The price marker is an empty placeholder, filled in client-side
+    page.write_text('<div id="corePriceDisplay_desktop_feature_div"></div>' + ' ' * 400
+                    + '<span class="a-offscreen">$10.78</span>')
+    fresh = tmp_path / 'fresh.html'
+    fresh.write_text(load_fixture('amazon_rendered_only.html'))
+    server, base_url = serve_fixtures(tmp_path, NoValidatorsHandler)
+    session = HttpSession(timeout=5)
+    monkeypatch.setattr('src.scraper.get_http_session', lambda: session)
+    try:
+        scraper = PricedBrowserScraper()
+        scraper.page = page
+        scraper.validators = ValidatorCache()
+        url = f"{base_url}/amazon.html"
+        assert scraper.fetch_price('eucerin', url).source == 'browser'
+        assert scraper.fetch_price('eucerin', url).source == 'browser'
+        assert scraper.validators.report()['fragment_unchanged'] == 0
+
+        # An unchanged fragment showing the price, but read too long ago
+        scraper.page = fresh
+        url = f"{base_url}/fresh.html"
+        assert scraper.fetch_price('eucerin', url).source == 'browser'
+        read_at = datetime.now() - MAX_REUSE_AGE - timedelta(minutes=1)
+        scraper.validators = ValidatorCache({url: replace(scraper.validators.get(url), read_at=read_at)})
+        assert scraper.fetch_price('eucerin', url).source == 'browser'
+        assert scraper.fetch_price('eucerin', url).source == 'reused'
+        assert len(scraper.browser_calls) == 4
+    finally:
+        session.close()
+        server.shutdown()
@@ -0,0 +1,61 @@
+"""Test the array-backed PriceSeries: round-trips, slicing, iteration and interning"""
+import sys
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+from src.models import PricePoint, PriceSeries
+
+START = datetime(2026, 3, 8, 1, 30, 0, 123456)
+
+
+def make_points(count):
+    return [PricePoint(product_id='eucerin', retailer_id=('walmart', 'cvs')[i % 2],
+                       price=10 + i / 4, timestamp=START + timedelta(hours=7) * i,
+                       url=f"https://{('walmart', 'cvs')[i % 2]}/1", pack_size=1 + i % 3,
+                       advertised_savings=1.5 if i % 4 == 0 else None,
+                       source='http' if i % 3 else None)
+            for i in range(count)]
+
+
+def test_round_trip_and_interning():
+    points = make_points(10)
+    series = PriceSeries(points)
+    assert len(series) == 10
+    assert list(series) == points
+    assert list(reversed(series)) == points[::-1]
+    assert (series[-1], series[3]) == (points[-1], points[3])
+    with pytest.raises(IndexError):
+        series[10]
+
+    # eucerin, walmart, cvs, two URLs, 'http' and None
+    assert len(series._strings) == 7
+    assert series.retailer_ids == [p.retailer_id for p in points]
+    assert series.timestamps == [p.timestamp for p in points]
+
+
+def test_slices_are_series_that_share_strings():
+    points = make_points(10)
+    series = PriceSeries(points)
+    for index in (slice(2, 7), slice(None, None, 3), slice(-4, None), slice(8, 2, -2)):
+        part = series[index]
+        assert isinstance(part, PriceSeries)
+        assert list(part) == points[index]
+        assert list(part.prices) == [p.price for p in points[index]]
+
+    # Appending to a slice leaves the original alone
+    part = series[:2]
+    part.append(points[5])
+    assert (len(part), len(series)) == (3, 10)
+    assert part[2] == points[5] and series[2] == points[2]
+
+
+def test_aware_timestamps_are_stored_as_local_time():
+    aware = datetime(2026, 7, 1, 16, 0, tzinfo=timezone.utc)
+    series = PriceSeries()
+    series.add('eucerin', 'walmart', 12.97, aware, 'https://walmart/1')
+    assert series[0].timestamp == aware.astimezone().replace(tzinfo=None)
+    assert series[0].timestamp.tzinfo is None
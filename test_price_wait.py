@@ -0,0 +1,106 @@
+"""Test the combined selector wait behind BaseScraper._wait_for_price against a stand-in driver"""
+import sys
+import time
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+from src.scraper import BaseScraper, _price_poll
+
+
+class Element:
+    def __init__(self, text):
+        self.text = text
+
+
+class FakeDriver:
+    """Shows each selector's text once `appears_after` seconds have passed."""
+
+    def __init__(self, elements, appears_after=None):
+        self.elements = elements
+        self.appears_after = appears_after or {}
+        self.started = time.monotonic()
+        self.title = 'Eucerin Advanced Repair'
+
+    def find_elements(self, by, selector):
+        if selector not in self.elements:
+            return []
+        if time.monotonic() - self.started < self.appears_after.get(selector, 0):
+            return []
+        return [Element(self.elements[selector])]
+
+
+SELECTORS = [('css selector', '.sale-price'), ('css selector', '.price'), ('css selector', '.missing')]
+
+
+def test_one_poll_checks_every_selector_in_order():
+    poll = _price_poll(SELECTORS)
+    driver = FakeDriver({'.sale-price': '$10.99', '.price': '$12.97'})
+    assert poll(driver) == ('.sale-price', '$10.99')
+
+    # A selector that isn't on the page doesn't hold up the ones after it
+    assert poll(FakeDriver({'.price': '$12.97'})) == ('.price', '$12.97')
+    assert poll(FakeDriver({'.price': '$12.97'}, appears_after={'.price': 60})) is False
+
+
+def test_poll_keeps_unaccepted_text_as_fallback():
+    fallback = {}
+    poll = _price_poll(SELECTORS, fallback=fallback)
+    driver = FakeDriver({'.sale-price': 'See price in cart', '.price': ''})
+    assert poll(driver) is False
+    assert fallback == {'first': ('.sale-price', 'See price in cart')}
+
+    # A custom reader and acceptance rule, as extraction specs pass
+    poll = _price_poll(SELECTORS, accept=lambda text: text.isdigit(),
+                       read_text=lambda element: element.text.strip('$').replace('.', ''))
+    assert poll(FakeDriver({'.sale-price': 'Sale', '.price': '$12.97'})) == ('.price', '1297')
+
+
+def test_poll_aborts_before_reading_selectors():
+    driver = FakeDriver({'.price': '$12.97'})
+    driver.title = 'Access Denied'
+    poll = _price_poll(SELECTORS, abort_if=lambda d: d.title == 'Access Denied')
+    assert poll(driver) == 'abort'
+
+
+def test_first_selector_in_list_order_wins():
+    pytest.importorskip('selenium')  # The wait itself is WebDriverWait
+    scraper = BaseScraper('walmart')
+    driver = FakeDriver({'.sale-price': '$10.99', '.price': '$12.97'})
+    match = scraper._wait_for_price(driver, SELECTORS, timeout=2)
+    assert (match.selector, match.text) == ('.sale-price', '$10.99')
+
+    stats = scraper.selector_stats
+    assert (stats['.sale-price'].hits, stats['.price'].hits, stats['.missing'].attempts) == (1, 0, 1)
+
+
+def test_missing_selectors_dont_cost_a_timeout_each():
+    pytest.importorskip('selenium')
+    scraper = BaseScraper('walmart')
+    driver = FakeDriver({'.price': '$12.97'}, appears_after={'.price': 0.3})
+    started = time.monotonic()
+    match = scraper._wait_for_price(driver, SELECTORS, timeout=5)
+    assert match.selector == '.price'
+    assert time.monotonic() - started < 2
+
+
+def test_unaccepted_text_is_returned_when_time_runs_out():
+    pytest.importorskip('selenium')
+    scraper = BaseScraper('walmart')
+    driver = FakeDriver({'.sale-price': 'See price in cart'})
+    match = scraper._wait_for_price(driver, SELECTORS, timeout=0.5)
+    assert (match.selector, match.text) == ('.sale-price', 'See price in cart')
+
+
+def test_abort_if_stops_the_wait():
+    pytest.importorskip('selenium')
+    scraper = BaseScraper('cvs')
+    driver = FakeDriver({'.price': '$12.97'}, appears_after={'.price': 3})
+    driver.title = 'Access Denied'
+    started = time.monotonic()
+    match = scraper._wait_for_price(driver, SELECTORS, timeout=5,
+                                    abort_if=lambda d: d.title == 'Access Denied')
+    assert match is None
+    assert time.monotonic() - started < 1
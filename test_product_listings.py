@@ -0,0 +1,113 @@
+"""Test that retailer URLs live in product_listings and drive collection"""
+import sqlite3
+import sys
+from datetime import datetime
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+from src.database import PriceDatabase
+from src.models import PricePoint, Product
+
+
+def make_legacy_database(path: str):
+    """A products table from before product_listings, URLs in per-retailer columns."""
+    conn = sqlite3.connect(path)
+    conn.execute("""
+        CREATE TABLE products (
+            id TEXT PRIMARY KEY, name TEXT NOT NULL, size TEXT NOT NULL,
+            category TEXT NOT NULL, brand TEXT, upc TEXT,
+            target_url TEXT, walmart_url TEXT, cvs_url TEXT, walgreens_url TEXT, amazon_url TEXT,
+            created_at TEXT NOT NULL, updated_at TEXT NOT NULL
+        )
+    """)
+    now = datetime.now().isoformat()
+    conn.executemany("""
+        INSERT INTO products (id, name, size, category, walmart_url, cvs_url, target_url,
+                              created_at, updated_at)
+        VALUES (?, ?, '5 oz', 'skincare', ?, ?, ?, ?, ?)
+    """, [
+        ('eucerin', 'Eucerin', 'https://walmart/eucerin', 'https://cvs/eucerin', '', now, now),
+        ('unlisted', 'Unlisted', None, None, None, now, now),
+    ])
+    conn.commit()
+    conn.close()
+
+
+def test_legacy_url_columns_become_listings(tmp_path):
+    path = str(tmp_path / 'prices.db')
+    make_legacy_database(path)
+
+    db = PriceDatabase(path)
+    listings = db.get_listings()
+    assert [(l.product_id, l.retailer_id, l.url, l.active) for l in listings] == [
+        ('eucerin', 'cvs', 'https://cvs/eucerin', True),
+        ('eucerin', 'walmart', 'https://walmart/eucerin', True),
+    ]
+    # Re-running copies nothing twice
+    assert db.migrate_legacy_urls() == 0
+
+    if sqlite3.sqlite_version_info >= (3, 35, 0):
+        assert set(db.drop_legacy_url_columns()) == {
+            'target_url', 'walmart_url', 'cvs_url', 'walgreens_url', 'amazon_url'}
+        assert db.get_product('eucerin').urls == {
+            'cvs': 'https://cvs/eucerin', 'walmart': 'https://walmart/eucerin'}
+    db.close()
+
+
+def test_collection_reads_only_active_listings(tmp_path):
+    db = PriceDatabase(str(tmp_path / 'prices.db'))
+    db.add_product(Product(id='eucerin', name='Eucerin', size='5 oz', category='skincare',
+                           urls={'walmart': 'https://walmart/1', 'cvs': 'https://cvs/1'}))
+    db.add_product(Product(id='pataday', name='Pataday', size='2.5 mL', category='eye-drops',
+                           urls={'amazon': 'https://amazon/2'}))
+    db.add_product(Product(id='unlisted', name='Unlisted', size='1 oz', category='skincare'))
+
+    products = db.get_products_to_collect()
+    assert [(p.id, p.urls) for p in products] == [
+        ('eucerin', {'cvs': 'https://cvs/1', 'walmart': 'https://walmart/1'}),
+        ('pataday', {'amazon': 'https://amazon/2'}),
+    ]
+
+    assert db.set_listing_active('eucerin', 'cvs', False)
+    assert not db.set_listing_active('eucerin', 'target', False)
+    products = db.get_products_to_collect()
+    assert products[0].urls == {'walmart': 'https://walmart/1'}
+    # Inactive listings are kept, just not collected
+    assert len(db.get_listings('eucerin')) == 2
+    assert len(db.get_all_products()) == 3
+
+    # Re-adding a listing with a new URL reactivates it
+    db.add_listing('eucerin', 'cvs', 'https://cvs/1-new')
+    assert db.get_product('eucerin').get_retailer_url('cvs') == 'https://cvs/1-new'
+    db.close()
+
+
+def test_price_writes_record_listing_success(tmp_path):
+    db = PriceDatabase(str(tmp_path / 'prices.db'))
+    db.add_product(Product(id='eucerin', name='Eucerin', size='5 oz', category='skincare',
+                           urls={'walmart': 'https://walmart/1', 'cvs': 'https://cvs/1'}))
+    seen = datetime(2026, 1, 2, 3, 4, 5)
+    db.add_price_points([PricePoint(product_id='eucerin', retailer_id='walmart', price=9.99,
+                                    timestamp=seen, url='https://walmart/1')])
+
+    last_success = {l.retailer_id: l.last_success_at for l in db.get_listings('eucerin')}
+    assert last_success == {'cvs': None, 'walmart': seen}
+
+    # An older price, e.g. a late or backfilled one, doesn't move it back
+    db.add_price_point(PricePoint(product_id='eucerin', retailer_id='walmart', price=10.49,
+                                  timestamp=datetime(2025, 12, 1), url='https://walmart/1'))
+    assert db.get_listings('eucerin')[1].last_success_at == seen
+    db.close()
+
+
+def test_re_adding_a_product_deactivates_dropped_retailers(tmp_path):
+    db = PriceDatabase(str(tmp_path / 'prices.db'))
+    db.add_product(Product(id='eucerin', name='Eucerin', size='5 oz', category='skincare',
+                           urls={'walmart': 'https://walmart/1', 'cvs': 'https://cvs/1'}))
+    db.add_product(Product(id='eucerin', name='Eucerin', size='5 oz', category='skincare',
+                           urls={'walmart': 'https://walmart/2'}))
+
+    assert db.get_product('eucerin').urls == {'walmart': 'https://walmart/2'}
+    assert {l.retailer_id: l.active for l in db.get_listings('eucerin')} == {'cvs': False, 'walmart': True}
+    db.close()
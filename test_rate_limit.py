@@ -0,0 +1,103 @@
+"""Test per-retailer pacing, block backoff and the interleaving dispatcher"""
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+from src.collector import collect_concurrently
+from src.models import PricePoint, Product
+from src.rate_limit import BACKOFF_BASE_SECONDS, RateLimiter, RetailerPolicy
+from src.scraper import BlockedError
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.now += seconds
+
+
+def make_limiter(clock, **policy):
+    return RateLimiter({'cvs': RetailerPolicy(**policy)}, clock=clock, sleep=clock.sleep, seed=1)
+
+
+def test_token_bucket_allows_burst_then_sustained_rate():
+    clock = FakeClock()
+    limiter = make_limiter(clock, requests_per_minute=60, burst=2, jitter_seconds=0)
+    assert limiter.try_acquire('cvs')
+    assert limiter.try_acquire('cvs')
+    assert not limiter.try_acquire('cvs')
+    assert limiter.ready_in('cvs') == 1.0
+
+    clock.now += 1.0
+    assert limiter.try_acquire('cvs')
+
+
+def test_jitter_spaces_requests():
+    clock = FakeClock()
+    limiter = make_limiter(clock, requests_per_minute=600, burst=5, jitter_seconds=2)
+    started = clock.now
+    for _ in range(5):
+        limiter.wait('cvs')
+    assert clock.now > started
+    assert clock.now - started <= 4 * 2
+
+
+def test_blocks_back_off_and_successes_recover():
+    clock = FakeClock()
+    limiter = make_limiter(clock, requests_per_minute=60, burst=1, jitter_seconds=0)
+    limiter.wait('cvs')
+    limiter.record('cvs', blocked=True)
+    assert limiter.ready_in('cvs') == BACKOFF_BASE_SECONDS
+
+    # A second block in a row doubles the cooldown and halves the rate again
+    limiter.wait('cvs')
+    limiter.record('cvs', blocked=True)
+    assert limiter.ready_in('cvs') == 2 * BACKOFF_BASE_SECONDS
+    assert limiter.metrics()[0]['requests_per_minute'] == 15
+
+    limiter.wait('cvs')
+    limiter.record('cvs', blocked=False)
+    metrics = limiter.metrics()[0]
+    assert metrics['requests_per_minute'] > 15
+    assert (metrics['requests'], metrics['served'], metrics['blocks']) == (3, 1, 2)
+
+
+class FakeScraper:
+    def __init__(self, retailer_id, blocked=False):
+        self.retailer_id = retailer_id
+        self.blocked = blocked
+        self.fetched_at = []
+
+    def fetch_price(self, product_id, url):
+        self.fetched_at.append(time.monotonic())
+        if self.blocked:
+            raise BlockedError("Access Denied")
+        return PricePoint(product_id=product_id, retailer_id=self.retailer_id, price=9.99,
+                          timestamp=None, url=url)
+
+
+def test_dispatcher_interleaves_around_a_throttled_retailer():
+    products = [Product(id=f"p{i}", name=f"P{i}", size="1 oz", category="skincare",
+                        urls={'walmart': f"https://walmart/{i}", 'cvs': f"https://cvs/{i}"})
+                for i in range(4)]
+    scrapers = {'cvs': FakeScraper('cvs', blocked=True), 'walmart': FakeScraper('walmart')}
+    fast = dict(requests_per_minute=6000, burst=1, jitter_seconds=0, backoff_seconds=0.2)
+    limiter = RateLimiter({'cvs': RetailerPolicy(**fast), 'walmart': RetailerPolicy(**fast)})
+
+    outcomes = collect_concurrently(products, scrapers, save=lambda p: None, workers=1,
+                                    limiter=limiter)
+    cvs, walmart = scrapers['cvs'], scrapers['walmart']
+
+    # CVS blocked and went into a cooldown; the worker kept going on
+    # Walmart and only returned to CVS once the cooldown was over
+    assert len(walmart.fetched_at) == 4
+    assert walmart.fetched_at[-1] < cvs.fetched_at[1]
+    assert cvs.fetched_at[1] - cvs.fetched_at[0] >= 0.2
+    assert sum(o.successes for o in outcomes) == 4
+    assert all(r.blocked for o in outcomes for r in o.results if r.job.retailer_id == 'cvs')
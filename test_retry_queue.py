@@ -0,0 +1,50 @@
+"""Test the persistent retry queue of failed fetches"""
+import sys
+from datetime import datetime, timedelta
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+from src.database import RETRY_BASE_SECONDS, RETRY_MAX_SECONDS, PriceDatabase, retry_delay
+
+
+def test_retry_delay_doubles_up_to_cap():
+    assert retry_delay(1) == RETRY_BASE_SECONDS
+    assert retry_delay(2) == 2 * RETRY_BASE_SECONDS
+    assert retry_delay(50) == RETRY_MAX_SECONDS
+
+
+def test_failures_back_off_then_dead_letter(tmp_path):
+    db = PriceDatabase(str(tmp_path / "prices.db"))
+    try:
+        retry = db.record_fetch_failure('eucerin', 'cvs', 'https://cvs/1', 'Timed out', max_attempts=3)
+        assert (retry.attempts, retry.status) == (1, 'pending')
+        assert retry.next_attempt_at > datetime.now()
+        assert db.get_due_retries() == []
+        assert db.next_retry_at() == retry.next_attempt_at
+
+        # Not due yet, but it persists across connections
+        db.close()
+        db = PriceDatabase(str(tmp_path / "prices.db"))
+        db.conn.execute("UPDATE fetch_retries SET next_attempt_epoch = 0")
+        assert [r.product_id for r in db.get_due_retries()] == ['eucerin']
+
+        db.record_fetch_failure('eucerin', 'cvs', 'https://cvs/1', 'Blocked', max_attempts=3)
+        retry = db.record_fetch_failure('eucerin', 'cvs', 'https://cvs/1', 'Blocked', max_attempts=3)
+        assert retry.is_dead and retry.attempts == 3
+        assert retry.next_attempt_at - datetime.now() > timedelta(seconds=3 * RETRY_BASE_SECONDS)
+        assert db.next_retry_at() is None
+        assert [r.last_error for r in db.get_fetch_retries('dead')] == ['Blocked']
+    finally:
+        db.close()
+
+
+def test_success_clears_retry(tmp_path):
+    db = PriceDatabase(str(tmp_path / "prices.db"))
+    try:
+        db.record_fetch_failure('eucerin', 'walmart', 'https://walmart/1', 'No price returned')
+        assert db.clear_fetch_retry('eucerin', 'walmart')
+        assert not db.clear_fetch_retry('eucerin', 'walmart')
+        assert db.get_fetch_retries() == []
+    finally:
+        db.close()
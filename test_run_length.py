@@ -0,0 +1,123 @@
+"""Test run-length price history: runs, compaction and windows that cut a run"""
+import sys
+from dataclasses import replace
+from datetime import datetime, timedelta
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+from src.database import PriceDatabase
+from src.models import PricePoint, Product
+
+# Sightings every 6 hours, offset so no stats window starts exactly on one
+START = datetime.now().replace(microsecond=0) - timedelta(days=12, hours=1)
+STEP = timedelta(hours=6)
+
+# 12.97 for four days, 10.99 for one, then 12.97 again up to now
+PRICES = [12.97] * 16 + [10.99] * 4 + [12.97] * 28
+
+
+def make_database(path, run_length):
+    db = PriceDatabase(str(path), run_length=run_length)
+    db.add_product(Product(id='eucerin', name='Eucerin', size='5 oz', category='skincare',
+                           urls={'walmart': 'https://walmart/1'}))
+    return db
+
+
+def sighting(index, price):
+    return PricePoint(product_id='eucerin', retailer_id='walmart', price=price,
+                      timestamp=START + STEP * index, url='https://walmart/1')
+
+
+def runs(db):
+    return [tuple(row) for row in db.conn.execute(
+        "SELECT price, seen_count FROM price_history ORDER BY ts_epoch, id")]
+
+
+def same_stats(stats, expected):
+    """Equal, allowing for float rounding in the average."""
+    return replace(stats, avg_price=pytest.approx(expected.avg_price)) == expected
+
+
+def history(db):
+    return sorted((p.timestamp, p.price) for p in db.get_price_history('eucerin', 'walmart'))
+
+
+def test_unchanged_price_extends_the_latest_run(tmp_path):
+    db = make_database(tmp_path / 'prices.db', run_length=True)
+    db.add_price_points([sighting(0, 12.97), sighting(1, 12.97)])
+    db.add_price_point(sighting(2, 12.97))
+    assert runs(db) == [(12.97, 3)]
+
+    # A new price starts a run; returning to the old one doesn't reopen it
+    db.add_price_points([sighting(3, 10.99), sighting(4, 12.97), sighting(5, 12.97)])
+    assert runs(db) == [(12.97, 3), (10.99, 1), (12.97, 2)]
+
+    # A late observation, older than the latest run, is stored on its own
+    late = sighting(4, 12.97)
+    late.timestamp -= timedelta(hours=1)
+    db.add_price_point(late)
+    assert runs(db) == [(12.97, 3), (10.99, 1), (12.97, 1), (12.97, 2)]
+
+    assert history(db) == sorted(
+        [(START + STEP * i, price) for i, price in enumerate([12.97] * 3 + [10.99] + [12.97] * 2)]
+        + [(late.timestamp, 12.97)])
+    db.close()
+
+
+def test_compaction_keeps_stats_and_history(tmp_path):
+    db = make_database(tmp_path / 'prices.db', run_length=False)
+    db.add_price_points(sighting(i, price) for i, price in enumerate(PRICES))
+    before = history(db)
+    stats_before = {days: db.get_price_stats('eucerin', 'walmart', days) for days in (1, 3, 10, 30)}
+
+    assert db.compact_price_history() == (48, 3)
+    assert runs(db) == [(12.97, 16), (10.99, 4), (12.97, 28)]
+    assert history(db) == before
+    for days, expected in stats_before.items():
+        assert same_stats(db.get_price_stats('eucerin', 'walmart', days), expected)
+    # Compacting again changes nothing
+    assert db.compact_price_history() == (3, 3)
+    db.close()
+
+
+def test_windows_starting_inside_a_run(tmp_path):
+    rows = make_database(tmp_path / 'rows.db', run_length=False)
+    compact = make_database(tmp_path / 'runs.db', run_length=True)
+    for db in (rows, compact):
+        db.add_price_points(sighting(i, price) for i, price in enumerate(PRICES))
+    assert len(runs(compact)) == 3
+
+    # 1 and 3 days start inside the last run, 9 inside the first
+    for days in (1, 3, 9):
+        expected = rows.get_price_stats('eucerin', 'walmart', days)
+        stats = compact.get_price_stats('eucerin', 'walmart', days)
+        assert same_stats(stats, expected)
+        assert stats.observation_count == sum(
+            1 for i in range(len(PRICES)) if START + STEP * i >= datetime.now() - timedelta(days=days))
+
+    # The stored 30-day summary agrees with expanding every run
+    assert same_stats(compact.get_price_stats('eucerin', 'walmart'),
+                      rows.get_price_stats('eucerin', 'walmart'))
+    since = datetime.now() - timedelta(days=2)
+    assert list(compact.get_price_history('eucerin', 'walmart', since=since)) == \
+        list(rows.get_price_history('eucerin', 'walmart', since=since))
+    rows.close()
+    compact.close()
+
+
+def test_backfill_skips_unparseable_timestamps(tmp_path):
+    db = make_database(tmp_path / 'prices.db', run_length=False)
+    db.add_price_points(sighting(i, 12.97) for i in range(5))
+    db.conn.execute("UPDATE price_history SET ts_epoch = NULL, last_seen = NULL, last_epoch = NULL")
+    db.conn.execute("UPDATE price_history SET timestamp = 'last tuesday' WHERE id IN (2, 4)")
+    db.conn.commit()
+
+    # Batches smaller than the unparseable rows still finish and count only real updates
+    assert db.backfill_ts_epoch(batch_size=1) == 3
+    assert db.backfill_ts_epoch(batch_size=1) == 0
+    assert [tuple(row) for row in db.conn.execute(
+        "SELECT id FROM price_history WHERE last_epoch IS NULL ORDER BY id")] == [(2,), (4,)]
+    db.close()
@@ -0,0 +1,87 @@
+"""Test collection run instrumentation: stage timings, persistence and export"""
+import json
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+from src.database import PriceDatabase
+from src.http_client import HttpSession
+from src.models import PricePoint
+from src.run_metrics import RunRecorder, run_to_prometheus, write_run_metrics
+from src.scraper import BaseScraper
+from test_http_fast_path import serve_fixtures
+
+class SlowBrowserScraper(BaseScraper):
+    """Browser tier that waits 0.1s for a price, then takes 0.05s to read it."""
+
+    def __init__(self):
+        super().__init__("amazon")
+
+    def _fetch_browser(self, product_id, url):
+        with self.timed_stage('wait'):
+            time.sleep(0.1)
+        time.sleep(0.05)
+        return PricePoint(product_id=product_id, retailer_id=self.retailer_id, price=10.78,
+                          timestamp=None, url=url, source='browser')
+
+
+def test_fetch_stages_are_timed(monkeypatch):
+    server, base_url = serve_fixtures()
+    session = HttpSession(timeout=5)
+    monkeypatch.setattr('src.scraper.get_http_session', lambda: session)
+    try:
+        scraper = SlowBrowserScraper()
+        assert scraper.fetch_price('eucerin', f"{base_url}/target_json_ld.html").source == 'http'
+        assert scraper.fetch_price('eucerin', f"{base_url}/amazon_rendered_only.html").source == 'browser'
+    finally:
+        session.close()
+        server.shutdown()
+
+    stages = scraper.stage_report()
+    assert list(stages) == ['http', 'parse', 'render', 'wait', 'extract']
+    assert (stages['http']['count'], stages['parse']['count'], stages['render']['count']) == (2, 2, 1)
+    # Extract is what the render spent outside the stages it timed itself
+    assert 0.09 < stages['wait']['total_seconds'] < 0.2
+    assert 0.04 < stages['extract']['total_seconds'] < 0.09
+    assert stages['render']['total_seconds'] >= 0.15
+
+
+def test_run_is_stored_and_exported(tmp_path):
+    scraper = SlowBrowserScraper()
+    scraper.record_stage('http', 0.25)
+    scraper.record_stage('http', 0.75)
+    recorder = RunRecorder('sequential')
+    price_point = PricePoint(product_id='eucerin', retailer_id='amazon', price=10.78,
+                             timestamp=None, url='u', source='browser')
+    recorder.record_fetch('amazon', price_point)
+    recorder.record_fetch('amazon', None, blocked=True)
+
+    db = PriceDatabase(str(tmp_path / 'prices.db'))
+    run = recorder.finish({'amazon': scraper, 'cvs': BaseScraper('cvs')},
+                          http_requests=2, bytes_received=4096, db_write=db.write_stats)
+    run_id = db.save_collection_run(run)
+    stored = db.get_collection_runs()[0]
+    db.close()
+
+    assert stored.id == run_id
+    assert (stored.mode, stored.attempts, stored.successes, stored.failures) == ('sequential', 2, 1, 1)
+    # Retailers that were never fetched are left out
+    assert list(stored.metrics['retailers']) == ['amazon']
+    amazon = stored.metrics['retailers']['amazon']
+    assert (amazon['browser'], amazon['blocked']) == (1, 1)
+    assert amazon['stages']['http'] == {'count': 2, 'total_seconds': 1.0, 'avg_seconds': 0.5,
+                                        'max_seconds': 0.75}
+
+    text = run_to_prometheus(stored)
+    assert 'price_collection_fetches_total{retailer="amazon",outcome="blocked"} 1' in text
+    assert 'price_collection_stage_seconds_sum{retailer="amazon",stage="http"} 1.0' in text
+    assert 'price_collection_stage_seconds_count{retailer="amazon",stage="http"} 2' in text
+    assert 'price_collection_http_received_bytes_total 4096' in text
+    assert '# TYPE price_collection_fetches_total counter' in text
+
+    write_run_metrics(stored, str(tmp_path / 'run.prom'))
+    assert (tmp_path / 'run.prom').read_text() == text
+    write_run_metrics(stored, str(tmp_path / 'run.json'))
+    assert json.loads((tmp_path / 'run.json').read_text())['id'] == run_id
@@ -0,0 +1,80 @@
+"""Test that scrapers are registered by retailer id and imported only when scheduled"""
+import json
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+from src.database import PriceDatabase
+from src.models import Product
+from src.scraper_registry import BUILTIN_SCRAPERS, ScraperConfigError, ScraperRegistry
+
+PLUGIN = '''
+from src.scraper import BaseScraper
+
+class CostcoScraper(BaseScraper):
+    def __init__(self):
+        super().__init__("costco")
+'''
+
+
+def test_config_scrapers_are_imported_only_when_scheduled(tmp_path, monkeypatch):
+    (tmp_path / 'costco_plugin.py').write_text(PLUGIN)
+    monkeypatch.syspath_prepend(str(tmp_path))
+    config = tmp_path / 'scrapers.json'
+    config.write_text(json.dumps({'costco': 'costco_plugin:CostcoScraper', 'cvs': None}))
+
+    registry = ScraperRegistry(str(config), entry_points=False)
+    assert registry.retailer_ids() == ['walmart', 'target', 'walgreens', 'amazon', 'costco']
+
+    scrapers = registry.create({'amazon', 'walmart', 'cvs'})
+    assert list(scrapers) == ['walmart', 'amazon']  # Collection order; cvs is turned off
+    assert 'costco_plugin' not in sys.modules
+
+    scrapers = registry.create({'costco', 'unknown'})
+    assert list(scrapers) == ['costco']
+    assert scrapers['costco'].retailer_id == 'costco'
+    assert set(registry.import_seconds) == {'walmart', 'amazon', 'costco'}
+
+
+def test_default_registry_covers_builtin_scrapers():
+    registry = ScraperRegistry(entry_points=False)
+    for retailer_id in BUILTIN_SCRAPERS:
+        assert registry.load(retailer_id)().retailer_id == retailer_id
+
+
+def test_bad_registrations_are_reported(tmp_path):
+    config = tmp_path / 'scrapers.json'
+    config.write_text(json.dumps({'costco': 'costco_plugin.CostcoScraper'}))
+    with pytest.raises(ScraperConfigError):
+        ScraperRegistry(str(config))
+
+    config.write_text(json.dumps({'costco': 'src.scraper:CostcoScraper'}))
+    registry = ScraperRegistry(str(config), entry_points=False)
+    with pytest.raises(ScraperConfigError):
+        registry.create({'costco'})
+
+    # A misspelled module fails the same way, naming the retailer
+    config.write_text(json.dumps({'costco': 'costco_plugn:CostcoScraper'}))
+    registry = ScraperRegistry(str(config), entry_points=False)
+    with pytest.raises(ScraperConfigError, match='costco'):
+        registry.load('costco')
+
+
+def test_collector_reports_an_unloadable_scraper(tmp_path):
+    # The collector opens data/prices.db relative to where it runs
+    db = PriceDatabase(str(tmp_path / 'data' / 'prices.db'))
+    db.add_product(Product(id='eucerin', name='Eucerin', size='5 oz', category='skincare',
+                           urls={'walmart': 'https://walmart/1'}))
+    db.close()
+    (tmp_path / 'bad.json').write_text(json.dumps({'walmart': 'no_such_module:Scraper'}))
+
+    collector = Path(__file__).parent / 'collect_prices.py'
+    result = subprocess.run([sys.executable, str(collector), '--scrapers', 'bad.json'],
+                            cwd=tmp_path, capture_output=True, text=True, timeout=60)
+    assert result.returncode == 1
+    assert "✗ Scraper for walmart: can't import no_such_module" in result.stdout
+    assert 'Traceback' not in result.stderr
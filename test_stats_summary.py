@@ -0,0 +1,45 @@
+"""Test that the incrementally maintained stats summary matches a full rebuild"""
+import sys
+from datetime import datetime, timedelta
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+from src.database import PriceDatabase
+from src.models import PricePoint, Product
+
+START = datetime.now().replace(microsecond=0) - timedelta(days=40)
+
+
+def sighting(retailer_id, hours, price):
+    return PricePoint(product_id='eucerin', retailer_id=retailer_id, price=price,
+                      timestamp=START + timedelta(hours=hours), url=f'https://{retailer_id}/1')
+
+
+def summary(db):
+    rows = db.conn.execute("SELECT * FROM price_stats_summary ORDER BY product_id, retailer_id")
+    return [{key: pytest.approx(row[key]) if key in ('price_sum', 'window_avg_price') and row[key]
+             else row[key] for key in row.keys()} for row in rows]
+
+
+@pytest.mark.parametrize('run_length', [False, True])
+def test_incremental_summary_matches_rebuild(tmp_path, run_length):
+    db = PriceDatabase(str(tmp_path / 'prices.db'), run_length=run_length)
+    db.add_product(Product(id='eucerin', name='Eucerin', size='5 oz', category='skincare',
+                           urls={'walmart': 'https://walmart/1', 'cvs': 'https://cvs/1'}))
+
+    # Single writes and batches, both sides of the 30-day window, a repeated
+    # high, and a late observation older than the latest one
+    prices = [12.97, 12.97, 13.49, 10.99, 13.49, 12.49, 12.49]
+    for i, price in enumerate(prices):
+        db.add_price_point(sighting('walmart', i * 120, price))
+    db.add_price_points(sighting('cvs', i * 90, 15.79 - (i % 3)) for i in range(12))
+    db.add_price_point(sighting('walmart', 5 * 120 - 7, 9.99))
+
+    incremental = summary(db)
+    assert len(incremental) == 2
+    assert db.rebuild_stats_summary() == 2
+    assert summary(db) == incremental
+    db.close()